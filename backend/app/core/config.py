@@ -3,9 +3,191 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# 없으면 DB 엔진을 만들 때(app.core.db 임포트) 실패. 설정만 읽는 곳(serve 상위 프로세스, 스크립트)은 DB 없이도 임포트됨
 DB_URL = os.getenv("SUPABASE_DB_URL")
-if not DB_URL:
-    raise RuntimeError("SUPABASE_DB_URL not set")
 
 DEVICE_SHARED_SECRET = os.getenv("DEVICE_HMAC_SECRET", "device-shared-secret")
+# 장치별 서명 키: devices.hmac_key가 있으면 그것, 없으면 마스터 키에서 HKDF로 유도
+# (마스터 키도 없으면 SIGNATURE_ALLOW_LEGACY일 때만 공용 비밀, 아니면 그 장치는 서명할 수 없음)
+DEVICE_HMAC_MASTER_KEY = os.getenv("DEVICE_HMAC_MASTER_KEY", "")
+# 기존 장치 호환: 공용 비밀 + sha1= 서명, 타임스탬프·논스 없는(재전송 창 밖의) 서명 허용.
+# 공용 비밀 하나로 모든 장치를 사칭하고 잡힌 요청을 계속 재전송할 수 있으므로 기본은 끔 (켜져 있으면 시작 시 경고).
+# legacy를 켠 채로도 타임스탬프·논스를 강제하려면 SIGNATURE_REQUIRE_TIMESTAMP=1
+SIGNATURE_ALLOW_LEGACY = os.getenv("SIGNATURE_ALLOW_LEGACY", "0").lower() in ("1", "true", "yes")
+SIGNATURE_REQUIRE_TIMESTAMP = os.getenv("SIGNATURE_REQUIRE_TIMESTAMP", "0").lower() in ("1", "true", "yes")
+SIGNATURE_MAX_SKEW = float(os.getenv("SIGNATURE_MAX_SKEW", 300))
+# 재전송 방지 논스 창 크기 (초당 서명 요청 수 × 2 × SIGNATURE_MAX_SKEW 이상 권장) / 준비된 hmac 객체 LRU 크기
+SIGNATURE_NONCE_MAX = int(os.getenv("SIGNATURE_NONCE_MAX", 1_000_000))
+HMAC_KEY_CACHE_MAX = int(os.getenv("HMAC_KEY_CACHE_MAX", 100_000))
 PORT = int(os.getenv("PORT", 5000))
+INGEST_BATCH_MAX = int(os.getenv("INGEST_BATCH_MAX", 1000))
+
+# 수집 모드: "sync"(요청 안에서 바로 처리) | "queue"(큐 적재 후 202, 워커가 처리)
+INGEST_MODE = os.getenv("INGEST_MODE", "sync")
+# 큐 백엔드: "db"(ingest_jobs 테이블, 내구성 있음) | "memory"(프로세스 내 asyncio, 재시작 시 유실)
+QUEUE_BACKEND = os.getenv("QUEUE_BACKEND", "db")
+QUEUE_MAX_ATTEMPTS = int(os.getenv("QUEUE_MAX_ATTEMPTS", 5))
+QUEUE_VISIBILITY_TIMEOUT = float(os.getenv("QUEUE_VISIBILITY_TIMEOUT", 30))
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", 4))
+WORKER_BATCH_SIZE = int(os.getenv("WORKER_BATCH_SIZE", 100))
+RULES_REFRESH_SECONDS = float(os.getenv("RULES_REFRESH_SECONDS", 30))
+
+# 장치·이벤트 종류별 윈도 상태 (연속 HIGH 지속시간 등). 임계치 이상이 STATE_SUSTAIN_SECONDS 지속되면 CRITICAL로 올리는
+# 규칙은 STATE_SUSTAIN_TYPES에 적은 센서 종류에만 적용 (움직임처럼 기본 점수가 임계치인 종류는 넣지 않음)
+STATE_WINDOW_SECONDS = float(os.getenv("STATE_WINDOW_SECONDS", 60))
+STATE_RING_SIZE = int(os.getenv("STATE_RING_SIZE", 32))
+STATE_HIGH_THRESHOLD = float(os.getenv("STATE_HIGH_THRESHOLD", 0.7))
+STATE_SUSTAIN_SECONDS = float(os.getenv("STATE_SUSTAIN_SECONDS", 10))
+STATE_SUSTAIN_TYPES = frozenset(t for t in os.getenv("STATE_SUSTAIN_TYPES", "smoke,gas").split(",") if t)
+STATE_TTL_SECONDS = float(os.getenv("STATE_TTL_SECONDS", 900))
+STATE_MAX_DEVICES = int(os.getenv("STATE_MAX_DEVICES", 100_000))
+
+# 다변량 이상치 점수 (payload에서 읽는 특징 / 점수 산출 전 최소 표본 수)
+SCORING_FEATURES = tuple(f for f in os.getenv("SCORING_FEATURES", "gas,temperature,motion").split(",") if f)
+SCORING_MIN_SAMPLES = int(os.getenv("SCORING_MIN_SAMPLES", 20))
+# ML 등급 경계: 점수는 카이제곱 누적확률(자유도 = 점수에 쓴 특징 수) = 1 - p. 정상 값이 그만큼 벗어날 꼬리 확률 p가
+# 아래 값 이하일 때만 등급을 올림 → 정상 읽기값 중 HIGH 이상이 되는 비율이 대략 ANOMALY_P_HIGH
+ANOMALY_P_MEDIUM = float(os.getenv("ANOMALY_P_MEDIUM", 1e-2))
+ANOMALY_P_HIGH = float(os.getenv("ANOMALY_P_HIGH", 1e-4))
+ANOMALY_P_CRITICAL = float(os.getenv("ANOMALY_P_CRITICAL", 1e-6))
+
+# 같은 장치의 HIGH 이벤트 폭주를 DB 왕복 없이 한 인시던트로 합치는 시간 (0이면 끔)
+INCIDENT_COALESCE_SECONDS = float(os.getenv("INCIDENT_COALESCE_SECONDS", 5))
+INCIDENT_COALESCE_MAX = int(os.getenv("INCIDENT_COALESCE_MAX", 100_000))
+
+# DB 커넥션 풀 (SQLite에는 적용하지 않음)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+# asyncpg prepared statement 캐시 (Supabase pooler/pgbouncer transaction 모드면 0)
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 100))
+# 수집 경로에 비동기 엔진 사용 (asyncpg / 테스트는 aiosqlite)
+ASYNC_DB = os.getenv("ASYNC_DB", "0").lower() in ("1", "true", "yes")
+ASYNC_DB_URL = os.getenv("ASYNC_DB_URL")
+
+# 알림 발송기 (채널별 동시 전송 수 / 초당 전송 수는 "sms:8,push:32" 형식)
+def _channel_map(raw: str) -> dict:
+    out = {}
+    for part in raw.split(","):
+        if ":" in part:
+            k, v = part.split(":", 1)
+            out[k.strip()] = float(v)
+    return out
+
+ALERT_BATCH_SIZE = int(os.getenv("ALERT_BATCH_SIZE", 100))
+ALERT_DISPATCH_LOOPS = int(os.getenv("ALERT_DISPATCH_LOOPS", 2))
+ALERT_MAX_ATTEMPTS = int(os.getenv("ALERT_MAX_ATTEMPTS", 5))
+ALERT_BACKOFF_BASE = float(os.getenv("ALERT_BACKOFF_BASE", 1.0))
+ALERT_BACKOFF_MAX = float(os.getenv("ALERT_BACKOFF_MAX", 60))
+ALERT_SEND_TIMEOUT = float(os.getenv("ALERT_SEND_TIMEOUT", 5))
+ALERT_VISIBILITY_TIMEOUT = float(os.getenv("ALERT_VISIBILITY_TIMEOUT", 60))
+ALERT_POLL_INTERVAL = float(os.getenv("ALERT_POLL_INTERVAL", 0.2))
+ALERT_CHANNEL_CONCURRENCY = _channel_map(os.getenv("ALERT_CHANNEL_CONCURRENCY", "sms:8,push:32,voice:2"))
+ALERT_CHANNEL_RATE = _channel_map(os.getenv("ALERT_CHANNEL_RATE", "sms:20,push:200,voice:2"))
+# 채널별 발송 웹훅 (ALERT_SMS_URL 등). 비어 있는 채널의 알림은 dead_letter, 모두 비어 있으면 발송기 시작 실패
+ALERT_CHANNEL_URLS = {
+    c: os.getenv(f"ALERT_{c.upper()}_URL") for c in ("sms", "push", "voice")
+}
+# API 프로세스 안에서 발송기 실행 (운영은 python -m app.dispatcher 별도 프로세스)
+ALERT_DISPATCHER_INPROCESS = os.getenv("ALERT_DISPATCHER_INPROCESS", "0").lower() in ("1", "true", "yes")
+
+# 에스컬레이션 단계 "지연초:동작:채널+채널" (1단계 알림은 탐지 시 enqueue_alerts가 이미 만듦)
+def _escalation_steps(raw: str) -> tuple:
+    steps = []
+    for part in raw.split(","):
+        delay, action, channels = (part.split(":") + ["", ""])[:3]
+        steps.append((float(delay), action, tuple(c for c in channels.split("+") if c)))
+    return tuple(steps)
+
+ESCALATION_STEPS = _escalation_steps(os.getenv("ESCALATION_STEPS", "0:notify:,10:voice_call:voice,30:guide_119:push"))
+ESCALATION_TICK_SECONDS = float(os.getenv("ESCALATION_TICK_SECONDS", 0.01))
+# 다른 프로세스(워커)에서 열린 인시던트를 가져오는 주기
+ESCALATION_SYNC_SECONDS = float(os.getenv("ESCALATION_SYNC_SECONDS", 2))
+ESCALATION_INPROCESS = os.getenv("ESCALATION_INPROCESS", "1").lower() in ("1", "true", "yes")
+
+# 장치 레지스트리 캐시 (증분 갱신 주기 / 전체 재적재 주기 / 미등록 id 음성 캐시)
+REGISTRY_REFRESH_SECONDS = float(os.getenv("REGISTRY_REFRESH_SECONDS", 10))
+REGISTRY_FULL_RELOAD_SECONDS = float(os.getenv("REGISTRY_FULL_RELOAD_SECONDS", 600))
+REGISTRY_NEGATIVE_MAX = int(os.getenv("REGISTRY_NEGATIVE_MAX", 10_000))
+REGISTRY_NEGATIVE_TTL = float(os.getenv("REGISTRY_NEGATIVE_TTL", 30))
+# 장치 위치 공간 인덱스 (레지스트리와 함께 적재): 격자 칸 크기(도, 0.005 ≈ 550m),
+# /devices/nearby 최대 반경(m), /incidents?bbox=가 IN 조건으로 넘길 장치 수 상한
+GEO_CELL_DEG = float(os.getenv("GEO_CELL_DEG", 0.005))
+GEO_NEARBY_MAX_RADIUS = float(os.getenv("GEO_NEARBY_MAX_RADIUS", 50_000))
+GEO_BBOX_MAX_DEVICES = int(os.getenv("GEO_BBOX_MAX_DEVICES", 20_000))
+
+# 아이템포턴시 필터 (블룸 필터 2개를 window초마다 교대 + 최근 키→event_id LRU)
+IDEM_WINDOW_SECONDS = float(os.getenv("IDEM_WINDOW_SECONDS", 600))
+IDEM_BLOOM_CAPACITY = int(os.getenv("IDEM_BLOOM_CAPACITY", 1_000_000))
+IDEM_BLOOM_FPR = float(os.getenv("IDEM_BLOOM_FPR", 0.01))
+IDEM_LRU_MAX = int(os.getenv("IDEM_LRU_MAX", 100_000))
+
+# events 파티션 (Postgres): "month" | "day", 미리 만들어 둘 파티션 수, 보존 기간(일, 0이면 삭제 안 함)
+EVENTS_PARTITION_INTERVAL = os.getenv("EVENTS_PARTITION_INTERVAL", "month")
+EVENTS_PARTITIONS_AHEAD = int(os.getenv("EVENTS_PARTITIONS_AHEAD", 2))
+EVENTS_RETENTION_DAYS = int(os.getenv("EVENTS_RETENTION_DAYS", 180))
+EVENTS_MAINTENANCE_SECONDS = float(os.getenv("EVENTS_MAINTENANCE_SECONDS", 3600))
+# 파티션이 아닌 events(이전 스키마 / SQLite)의 보존 정리는 행 삭제라 기본으로 하지 않음. 켜면 이 건수씩 나눈 트랜잭션으로 삭제
+EVENTS_RETENTION_DELETE_ROWS = os.getenv("EVENTS_RETENTION_DELETE_ROWS", "0").lower() in ("1", "true", "yes")
+EVENTS_RETENTION_BATCH = int(os.getenv("EVENTS_RETENTION_BATCH", 5000))
+
+# 실시간 푸시 허브 (구독자별 대기열 상한 / 하트비트 주기)
+HUB_MAX_PENDING = int(os.getenv("HUB_MAX_PENDING", 256))
+HUB_HEARTBEAT_SECONDS = float(os.getenv("HUB_HEARTBEAT_SECONDS", 15))
+
+# 수집 단계별 구간 계측 (ingest_stage_seconds) / OpenTelemetry 스팬 (opentelemetry-api 설치 + 익스포터 설정 필요)
+METRICS_STAGE_TIMING = os.getenv("METRICS_STAGE_TIMING", "1").lower() in ("1", "true", "yes")
+OTEL_TRACING = os.getenv("OTEL_TRACING", "0").lower() in ("1", "true", "yes")
+
+# 인시던트 폭주 방어: 장치/소유자별 수집 속도 제한 (초당, 버스트. 0이면 끔). 초과분 중 LOW/MEDIUM만 버림
+INGEST_DEVICE_RATE = float(os.getenv("INGEST_DEVICE_RATE", 5))
+INGEST_DEVICE_BURST = float(os.getenv("INGEST_DEVICE_BURST", 200))
+INGEST_OWNER_RATE = float(os.getenv("INGEST_OWNER_RATE", 50))
+INGEST_OWNER_BURST = float(os.getenv("INGEST_OWNER_BURST", 1000))
+RATE_TABLE_MAX = int(os.getenv("RATE_TABLE_MAX", 200_000))
+# 적응형 부하 차단: 수집 지연(EWMA, 초) / 큐 깊이가 목표를 넘으면 LOW/MEDIUM을 표본으로만 남김 (HIGH/CRITICAL은 항상 처리)
+SHED_LATENCY_TARGET = float(os.getenv("SHED_LATENCY_TARGET", 0.5))
+SHED_QUEUE_TARGET = int(os.getenv("SHED_QUEUE_TARGET", 10_000))
+SHED_MIN_KEEP = float(os.getenv("SHED_MIN_KEEP", 0.05))
+# 같은 인시던트의 탐지 알림은 이 시간 동안 1건만 만들고 나머지는 창이 닫힐 때 요약 알림의 count로 합침 (0이면 끔).
+# 요약 알림은 ALERT_ROLLUP_FLUSH_SECONDS마다 닫힌 창을 확인해 만듦
+ALERT_SUPPRESS_SECONDS = float(os.getenv("ALERT_SUPPRESS_SECONDS", 60))
+ALERT_SUPPRESS_MAX = int(os.getenv("ALERT_SUPPRESS_MAX", 100_000))
+ALERT_ROLLUP_FLUSH_SECONDS = float(os.getenv("ALERT_ROLLUP_FLUSH_SECONDS", 5))
+
+# 연결 유지형 수집 (WebSocket /ingest/ws): 응답 안 받은 프레임 상한(넘으면 소켓을 더 읽지 않음) / 한 번에 처리할 프레임 수 /
+# 연결 후 인증 프레임을 기다리는 시간
+WS_INGEST_WINDOW = int(os.getenv("WS_INGEST_WINDOW", 256))
+WS_INGEST_BATCH_MAX = int(os.getenv("WS_INGEST_BATCH_MAX", 200))
+WS_INGEST_AUTH_TIMEOUT = float(os.getenv("WS_INGEST_AUTH_TIMEOUT", 10))
+# MQTT 구독 수집 (python -m app.mqtt_ingest): 브로커 주소(mqtt:// 또는 mqtts://), 토픽(마지막 단계가 device_id,
+# 여러 구독 프로세스로 나누려면 "$share/ingest/safety/ingest/+"), 마이크로 배치 크기/대기 시간, 처리 대기 메시지 상한,
+# 처리 결과를 "<MQTT_ACK_TOPIC>/<device_id>"로 게시 (비어 있으면 안 함)
+MQTT_URL = os.getenv("MQTT_URL", "mqtt://127.0.0.1:1883")
+MQTT_TOPIC = os.getenv("MQTT_TOPIC", "safety/ingest/+")
+MQTT_QOS = int(os.getenv("MQTT_QOS", 1))
+MQTT_CLIENT_ID = os.getenv("MQTT_CLIENT_ID", "safety-ingest")
+MQTT_BATCH_MAX = int(os.getenv("MQTT_BATCH_MAX", 500))
+MQTT_BATCH_LINGER = float(os.getenv("MQTT_BATCH_LINGER", 0.02))
+MQTT_INFLIGHT = int(os.getenv("MQTT_INFLIGHT", 1000))
+MQTT_ACK_TOPIC = os.getenv("MQTT_ACK_TOPIC", "")
+
+# 서버 실행 (python -m app.serve): 바인드 주소 / 워커 프로세스 수 / 종료 시 처리 중 요청을 기다리는 시간 /
+# SIGTERM 뒤 readyz를 503으로 두고 요청은 계속 받는 시간 (로드밸런서가 대상에서 뺄 때까지) / 예열 때 미리 열 DB 연결 수
+SERVE_HOST = os.getenv("SERVE_HOST", "0.0.0.0")
+SERVE_WORKERS = int(os.getenv("SERVE_WORKERS", 1))
+SERVE_GRACEFUL_TIMEOUT = float(os.getenv("SERVE_GRACEFUL_TIMEOUT", 30))
+SERVE_DRAIN_DELAY = float(os.getenv("SERVE_DRAIN_DELAY", 0))
+SERVE_PREWARM_CONNECTIONS = int(os.getenv("SERVE_PREWARM_CONNECTIONS", 4))
+
+# 감사 로그 (audit_logs): 변경 요청이 끝날 때 메모리 버퍼에 넣고 백그라운드 스레드가 묶음 INSERT.
+# 버퍼 상한 / 모이면 바로 쓰는 건수 / 최대 대기(ms) / 버퍼가 찼을 때 정책:
+#   block = 쓰기 스레드를 깨우고 AUDIT_BLOCK_TIMEOUT(초)까지 자리를 기다린 뒤, 그래도 차 있으면 그 요청에서 직접 INSERT (잃지 않음)
+#   drop  = 가장 오래된 기록을 버리고 셈 (요청 지연 우선)
+AUDIT_ENABLED = os.getenv("AUDIT_ENABLED", "1").lower() in ("1", "true", "yes")
+AUDIT_BUFFER_MAX = int(os.getenv("AUDIT_BUFFER_MAX", 10_000))
+AUDIT_FLUSH_RECORDS = int(os.getenv("AUDIT_FLUSH_RECORDS", 500))
+AUDIT_FLUSH_MS = float(os.getenv("AUDIT_FLUSH_MS", 200))
+AUDIT_OVERFLOW = os.getenv("AUDIT_OVERFLOW", "block")
+AUDIT_BLOCK_TIMEOUT = float(os.getenv("AUDIT_BLOCK_TIMEOUT", 0.05))
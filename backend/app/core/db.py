@@ -1,10 +1,59 @@
+from time import perf_counter
+
 from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import (
+    DB_URL, ASYNC_DB, ASYNC_DB_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_RECYCLE, DB_POOL_TIMEOUT,
+    DB_STATEMENT_CACHE_SIZE,
+)
+from app.core.metrics import FAST_BUCKETS, Gauge, Histogram
+
+db_pool_wait = Histogram("db_pool_checkout_wait_seconds", "Time to get a connection from the pool",
+                         ["engine"], buckets=FAST_BUCKETS)
+
+class _TimedCheckout:
+    # 풀에서 연결을 꺼내기까지 걸린 시간 (빈 연결 대기 + 넘침 시 새 연결 생성). 풀이 모자라면 여기서 먼저 보임
+    _wait = None
+
+    def _do_get(self):
+        t0 = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self._wait.observe(perf_counter() - t0)
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    _wait = db_pool_wait.labels("sync")
 
-from app.core.config import DB_URL
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    _wait = db_pool_wait.labels("async")
 
-engine = create_engine(DB_URL, pool_pre_ping=True)
+def _file_sqlite(url: str) -> bool:
+    path = url.split("///", 1)[-1]
+    return path not in ("", ":memory:") and "mode=memory" not in url
+
+def _pool_kwargs(url: str, is_async: bool = False) -> dict:
+    poolclass = TimedAsyncQueuePool if is_async else TimedQueuePool
+    if url.startswith("sqlite"):
+        # 파일 SQLite는 원래도 QueuePool (메모리 DB는 스레드별 단일 연결 풀이라 그대로 둠)
+        return {"poolclass": poolclass} if _file_sqlite(url) else {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_timeout": DB_POOL_TIMEOUT,
+    }
+
+if not DB_URL:
+    raise RuntimeError("SUPABASE_DB_URL not set")
+engine = create_engine(DB_URL, pool_pre_ping=True, **_pool_kwargs(DB_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+db_pool_checked_out = Gauge("db_pool_checked_out", "Connections currently checked out (sync engine)",
+                            fn=lambda: engine.pool.checkedout())
 
 def get_db():
     db = SessionLocal()
@@ -12,3 +61,61 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def dialect_name(db) -> str:
+    # Session / AsyncSession 모두 bind에서 방언 이름을 얻음
+    bind = db.bind if db.bind is not None else db.get_bind()
+    return bind.dialect.name
+
+def dialect_insert(db, table):
+    # ON CONFLICT 구문은 방언별 insert()에만 있음 (Postgres 운영 / SQLite 로컬 테스트)
+    if dialect_name(db) == "sqlite":
+        return sqlite.insert(table)
+    return postgresql.insert(table)
+
+def async_url(url: str) -> str:
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+_async_engine = None
+_async_sessionmaker = None
+
+def get_async_engine():
+    # asyncpg/aiosqlite는 선택 의존성이라 처음 쓸 때 만든다
+    global _async_engine, _async_sessionmaker
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        url = ASYNC_DB_URL or async_url(DB_URL)
+        connect_args = {}
+        if url.startswith("postgresql+asyncpg"):
+            connect_args["statement_cache_size"] = DB_STATEMENT_CACHE_SIZE
+        _async_engine = create_async_engine(
+            url, pool_pre_ping=True, connect_args=connect_args, **_pool_kwargs(url, is_async=True)
+        )
+        _async_sessionmaker = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+def async_session():
+    get_async_engine()
+    return _async_sessionmaker()
+
+async def get_async_db():
+    async with async_session() as db:
+        yield db
+
+async def get_ingest_db():
+    # 수집 경로: ASYNC_DB면 AsyncSession, 아니면 기존 동기 Session (스레드풀에서 사용)
+    if ASYNC_DB:
+        async with async_session() as db:
+            yield db
+        return
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,45 @@
+# JSON 직렬화 계층: orjson이 설치돼 있으면 사용하고, 없으면 표준 json으로 같은 규칙(UUID/datetime/Decimal)을 적용
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson 미설치 시 표준 json
+    orjson = None
+
+def _default(v: Any) -> Any:
+    if isinstance(v, UUID):
+        return str(v)
+    if isinstance(v, (datetime, date)):
+        return v.isoformat()
+    if isinstance(v, Decimal):
+        return float(v)
+    if isinstance(v, (set, frozenset, tuple)):
+        return list(v)
+    raise TypeError(f"Object of type {type(v).__name__} is not JSON serializable")
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default, option=_OPTIONS)
+
+    loads = orjson.loads
+else:
+    _encode = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False, default=_default).encode
+
+    def dumps(obj: Any) -> bytes:
+        return _encode(obj).encode()
+
+    loads = json.loads
+
+class FastJSONResponse(JSONResponse):
+    # 앱 기본 응답 클래스. response_model이 있는 경로는 FastAPI가 pydantic으로 바로 바이트를 만들고,
+    # 직접 dict를 돌려주는 경로만 이 render를 거침
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,53 @@
+# 프로세스 수명 상태 (워커 프로세스마다 하나).
+#  - ready: 예열(DB 연결, 장치 레지스트리, 규칙, 탐지 경로)이 끝나야 True → /readyz 200
+#  - draining: SIGTERM을 받으면 True → /readyz 503, 스트림 수집(WebSocket)은 받은 프레임까지 처리·응답하고 닫음
+#  - inflight: 처리 중인 수집 요청/프레임 묶음 수. 종료 시 0이 될 때까지(또는 시간 초과) 기다린 뒤 워커/발송기를 멈춤
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict
+
+class Lifecycle:
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.ready = False
+        self.draining = False
+        self.inflight = 0
+        self.warmup: Dict[str, float] = {}   # 예열 단계별 소요 시간 (초), ready까지 걸린 시간은 "total"
+        self._callbacks: set = set()
+
+    def uptime(self) -> float:
+        return time.monotonic() - self.started_at
+
+    @contextmanager
+    def track(self):
+        # 이벤트 루프 스레드에서만 호출 (잠금 없음)
+        self.inflight += 1
+        try:
+            yield
+        finally:
+            self.inflight -= 1
+
+    def on_drain(self, callback: Callable[[], None]) -> Callable[[], None]:
+        # 종료가 시작되면 등록한 루프에서 callback 호출 (이미 종료 중이면 바로 예약). 등록 해제 함수를 돌려줌
+        entry = (asyncio.get_running_loop(), callback)
+        self._callbacks.add(entry)
+        if self.draining:
+            entry[0].call_soon(callback)
+        return lambda: self._callbacks.discard(entry)
+
+    def begin_drain(self) -> None:
+        # 시그널 처리기나 다른 스레드에서 불러도 됨
+        if self.draining:
+            return
+        self.draining = True
+        for loop, callback in list(self._callbacks):
+            loop.call_soon_threadsafe(callback)
+
+    async def wait_idle(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while self.inflight and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        return not self.inflight
+
+lifecycle = Lifecycle()
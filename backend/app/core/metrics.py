@@ -0,0 +1,277 @@
+# 프로세스 내 지표 (카운터 / 게이지 / 고정 버킷 히스토그램). 라벨별로 자식 지표를 둠.
+# 카운터/히스토그램은 스레드마다 자기 셀에만 쓰고(잠금 없음) 읽을 때(스크레이프) 셀들을 합침
+import bisect
+import math
+import threading
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# 수집 단계별 구간처럼 ms 이하가 대부분인 구간용
+FAST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], "_Metric"] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def labels(self, *values: str, **kw: str):
+        key = tuple(str(v) for v in values) or tuple(str(kw[n]) for n in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._children[key] = self._child()
+        return child
+
+    def samples(self) -> List[Tuple[Tuple[str, ...], object]]:
+        if not self.labelnames:
+            return [((), self._value())]
+        return [(k, c._value()) for k, c in list(self._children.items())]
+
+class _Sharded:
+    # 스레드별 셀: 처음 쓰는 스레드만 잠금을 잡고 셀을 등록, 이후 쓰기는 자기 셀에만 (GIL 아래 단일 쓰기라 안전).
+    # 스레드가 끝나도 셀은 남겨 둠 (누적값이 줄면 안 되므로)
+    __slots__ = ("_local", "_cells", "_lock")
+
+    def __init__(self):
+        self._local = threading.local()
+        self._cells: List[list] = []
+        self._lock = threading.Lock()
+
+    def _new_cell(self) -> list:
+        cell = self._empty()
+        with self._lock:
+            self._cells.append(cell)
+        self._local.cell = cell
+        return cell
+
+class _CounterValue(_Sharded):
+    __slots__ = ()
+
+    def _empty(self) -> list:
+        return [0.0]
+
+    def inc(self, amount: float = 1.0) -> None:
+        try:
+            cell = self._local.cell
+        except AttributeError:
+            cell = self._new_cell()
+        cell[0] += amount
+
+    @property
+    def value(self) -> float:
+        return sum(c[0] for c in list(self._cells))
+
+    def _value(self) -> float:
+        return self.value
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._own = _CounterValue()
+
+    def _child(self):
+        return _CounterValue()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._own.inc(amount)
+
+    def _value(self) -> float:
+        return self._own.value
+
+class _GaugeValue:
+    # 게이지는 set이 필요해 셀을 나누지 않음 (갱신 빈도가 낮은 값들)
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def _value(self) -> float:
+        return self.value
+
+class Gauge(_Metric):
+    # fn을 주면 스크레이프 시점에 호출해 값을 읽음 (풀 점유 수처럼 다른 객체가 이미 들고 있는 값)
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 fn: Optional[Callable[[], float]] = None):
+        super().__init__(name, help, labelnames)
+        self._own = _GaugeValue()
+        self._fn = fn
+
+    def _child(self):
+        return _GaugeValue()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._own.inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._own.dec(amount)
+
+    def set(self, value: float) -> None:
+        self._own.set(value)
+
+    def set_function(self, fn: Optional[Callable[[], float]]) -> None:
+        self._fn = fn
+
+    def _value(self) -> float:
+        if self._fn is not None:
+            try:
+                return float(self._fn())
+            except Exception:
+                return math.nan
+        return self._own.value
+
+class _Timer:
+    __slots__ = ("_h", "_t0")
+
+    def __init__(self, h: "_HistogramValue"):
+        self._h = h
+
+    def __enter__(self):
+        self._t0 = perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self._h.observe(perf_counter() - self._t0)
+        return False
+
+class _HistogramValue(_Sharded):
+    # 셀 = 버킷별 개수(+Inf 포함) 뒤에 합계 한 칸. 총 개수는 버킷 개수의 합
+    __slots__ = ("buckets",)
+
+    def __init__(self, buckets: Sequence[float]):
+        super().__init__()
+        self.buckets = buckets
+
+    def _empty(self) -> list:
+        return [0] * (len(self.buckets) + 1) + [0.0]
+
+    def observe(self, v: float) -> None:
+        try:
+            cell = self._local.cell
+        except AttributeError:
+            cell = self._new_cell()
+        cell[bisect.bisect_left(self.buckets, v)] += 1
+        cell[-1] += v
+
+    def time(self) -> _Timer:
+        return _Timer(self)
+
+    def _merged(self) -> list:
+        out = self._empty()
+        for cell in list(self._cells):
+            for i, c in enumerate(cell):
+                out[i] += c
+        return out
+
+    @property
+    def count(self) -> int:
+        return sum(self._merged()[:-1])
+
+    @property
+    def sum(self) -> float:
+        return self._merged()[-1]
+
+    def quantile(self, q: float) -> float:
+        # 버킷 상한 기준 근사치 (대시보드/벤치 출력용)
+        counts = self._merged()[:-1]
+        target = q * sum(counts)
+        acc = 0
+        for i, c in enumerate(counts):
+            acc += c
+            if acc >= target and c:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return 0.0
+
+    def _value(self) -> dict:
+        merged = self._merged()
+        counts = merged[:-1]
+        return {"buckets": self.buckets, "counts": counts, "sum": merged[-1], "count": sum(counts)}
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        self._own = _HistogramValue(self.buckets)
+
+    def _child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, v: float) -> None:
+        self._own.observe(v)
+
+    def time(self) -> _Timer:
+        return self._own.time()
+
+    def _value(self) -> dict:
+        return self._own._value()
+
+REGISTRY: List[_Metric] = []
+
+def snapshot() -> Dict[str, list]:
+    return {m.name: m.samples() for m in REGISTRY}
+
+def _num(v: float) -> str:
+    if v != v:
+        return "NaN"
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    if float(v).is_integer() and abs(v) < 1e15:
+        return str(int(v))
+    return repr(float(v))
+
+def _esc(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_esc(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def render() -> bytes:
+    # Prometheus 텍스트 형식 (version 0.0.4)
+    out: List[str] = []
+    for m in list(REGISTRY):
+        out.append(f"# HELP {m.name} {m.help}")
+        out.append(f"# TYPE {m.name} {m.kind}")
+        for values, v in m.samples():
+            if m.kind != "histogram":
+                out.append(f"{m.name}{_labels(m.labelnames, values)} {_num(v)}")
+                continue
+            acc = 0
+            for le, c in zip(list(v["buckets"]) + [math.inf], v["counts"]):
+                acc += c
+                le_label = 'le="' + _num(le) + '"'
+                out.append(f"{m.name}_bucket{_labels(m.labelnames, values, le_label)} {acc}")
+            out.append(f"{m.name}_sum{_labels(m.labelnames, values)} {_num(v['sum'])}")
+            out.append(f"{m.name}_count{_labels(m.labelnames, values)} {v['count']}")
+    out.append("")
+    return "\n".join(out).encode()
@@ -0,0 +1,40 @@
+# keyset 페이지네이션 커서: 마지막 행의 정렬 키 값을 URL 안전 base64 JSON으로 감쌈
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List
+
+from fastapi import HTTPException
+
+from app.core.utils import as_utc
+
+def encode_cursor(*values: Any) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, n: int) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != n:
+            raise ValueError
+        return values
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid cursor")
+
+def cursor_time(v: Any) -> datetime:
+    if not isinstance(v, str):
+        raise ValueError
+    return as_utc(datetime.fromisoformat(v))
+
+def cursor_int(v: Any) -> int:
+    if type(v) is not int:
+        raise ValueError
+    return v
+
+def cursor_values(cursor: str, *parsers: Callable[[Any], Any]) -> List[Any]:
+    # 필드별로 변환까지 마친 커서 값. 디코딩은 되지만 값이 틀린 커서도 같은 400 "invalid cursor"
+    values = decode_cursor(cursor, len(parsers))
+    try:
+        return [parse(v) for parse, v in zip(parsers, values)]
+    except (TypeError, ValueError, AttributeError):
+        raise HTTPException(status_code=400, detail="invalid cursor")
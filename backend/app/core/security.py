@@ -1,8 +1,215 @@
 import hmac, hashlib
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Optional
+from uuid import UUID
+
+from app.core.config import (
+    DEVICE_HMAC_MASTER_KEY, DEVICE_SHARED_SECRET, HMAC_KEY_CACHE_MAX, SIGNATURE_ALLOW_LEGACY, SIGNATURE_MAX_SKEW,
+    SIGNATURE_NONCE_MAX, SIGNATURE_REQUIRE_TIMESTAMP,
+)
+from app.core.metrics import Counter
+
+signature_checks = Counter("signature_checks_total", "Ingest signature checks by outcome", ["outcome"])
+_OUTCOMES = {o: signature_checks.labels(o) for o in (
+    "ok", "missing", "malformed", "stale", "missing_timestamp", "rejected", "invalid", "replay",
+)}
 
 def verify_signature(raw: bytes, signature: str | None, secret: str) -> bool:
+    # 공용 비밀 + SHA-1 (기존 방식). 장치별 키 검증은 DeviceKeyring.verify
     if not signature:
         return False
     sig = signature.split("=", 1)[-1] if "=" in signature else signature
     mac = hmac.new(secret.encode(), msg=raw, digestmod=hashlib.sha1).hexdigest()
     return hmac.compare_digest(mac, sig)
+
+def hkdf_sha256(ikm: bytes, info: bytes, salt: bytes = b"", length: int = 32) -> bytes:
+    # RFC 5869 (extract → expand)
+    prk = hmac.new(salt or b"\0" * 32, ikm, hashlib.sha256).digest()
+    okm, block, i = b"", b"", 1
+    while len(okm) < length:
+        block = hmac.new(prk, block + info + bytes([i]), hashlib.sha256).digest()
+        okm += block
+        i += 1
+    return okm[:length]
+
+_IPAD = bytes(x ^ 0x36 for x in range(256))
+_OPAD = bytes(x ^ 0x5C for x in range(256))
+
+class PreparedHmac:
+    # 키 패딩(ipad/opad)을 흡수한 내부/외부 해시 상태를 미리 만들어 두고 요청마다 copy()만 함.
+    # hmac.HMAC.copy()는 파이썬 수준 객체 복제라, C 해시 객체 두 개를 직접 복사하는 편이 빠름
+    __slots__ = ("inner", "outer")
+
+    def __init__(self, key: bytes, digest: str = "sha256"):
+        block = hashlib.new(digest).block_size
+        if len(key) > block:
+            key = hashlib.new(digest, key).digest()
+        key = key.ljust(block, b"\0")
+        self.inner = hashlib.new(digest, key.translate(_IPAD))
+        self.outer = hashlib.new(digest, key.translate(_OPAD))
+
+    def hexdigest(self, *parts: bytes) -> str:
+        i = self.inner.copy()
+        for p in parts:
+            i.update(p)
+        o = self.outer.copy()
+        o.update(i.digest())
+        return o.hexdigest()
+
+def _as_uuid(device_id: Any) -> UUID:
+    return device_id if isinstance(device_id, UUID) else UUID(str(device_id))
+
+def _device_int(device_id: Any) -> int:
+    # 키 캐시/논스 창의 장치 키: UUID.int (UUID.__hash__/.bytes는 파이썬 수준이라 요청마다 여러 번 부르면 비쌈).
+    # 문자열로 온 id도 같은 키가 됨
+    return _as_uuid(device_id).int
+
+class NonceWindow:
+    # (장치, 논스)를 타임스탬프 허용 범위 동안만 기억. 범위를 벗어난 요청은 타임스탬프 검사에서 먼저 거절되므로
+    # 만료된 항목은 앞에서부터 버리고, 상한을 넘으면 가장 오래된 것부터 버림 (evicted로 집계)
+    def __init__(self, skew: float = SIGNATURE_MAX_SKEW, max_entries: int = SIGNATURE_NONCE_MAX):
+        self.skew = skew
+        self.max_entries = max_entries
+        self._seen: set = set()
+        self._order: deque = deque()   # (만료 시각, 키) 기록 순서. 앞이 만료되지 않았으면 뒤도 대부분 살아 있음
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def fresh(self, ts: float, now: Optional[float] = None) -> bool:
+        return abs((now if now is not None else time.time()) - ts) <= self.skew
+
+    def add(self, scope: Any, nonce: str, ts: float, now: Optional[float] = None) -> bool:
+        # 처음 보는 논스면 기록하고 True, 재전송이면 False
+        now = now if now is not None else time.time()
+        key = (scope, nonce)
+        expires = (ts if ts > now else now) + self.skew
+        with self._lock:
+            seen, order = self._seen, self._order
+            while order and order[0][0] < now:
+                seen.discard(order.popleft()[1])
+            if key in seen:
+                return False
+            seen.add(key)
+            order.append((expires, key))
+            if len(order) > self.max_entries:
+                seen.discard(order.popleft()[1])
+                self.evicted += 1
+        return True
+
+class DeviceKeyring:
+    # 장치 키로 준비한 PreparedHmac을 LRU에 두고 요청마다 해시 상태만 복사해서 씀 (키 유도/패딩 계산 생략).
+    # 캐시 키에 저장된 키 값이 포함되므로 devices.hmac_key가 바뀌면 자연히 새 항목이 만들어짐
+    def __init__(self, master_key: bytes = DEVICE_HMAC_MASTER_KEY.encode(),
+                 shared_secret: bytes = DEVICE_SHARED_SECRET.encode(),
+                 max_entries: int = HMAC_KEY_CACHE_MAX, allow_legacy: bool = SIGNATURE_ALLOW_LEGACY,
+                 require_timestamp: bool = SIGNATURE_REQUIRE_TIMESTAMP, nonces: Optional[NonceWindow] = None):
+        self.master_key = master_key
+        self.shared_secret = shared_secret
+        self.max_entries = max_entries
+        self.allow_legacy = allow_legacy
+        self.require_timestamp = require_timestamp
+        self.nonces = nonces if nonces is not None else NonceWindow()
+        self._prepared: "OrderedDict[tuple, PreparedHmac]" = OrderedDict()
+        self._shared = {"sha1": PreparedHmac(shared_secret, "sha1"), "sha256": PreparedHmac(shared_secret)}
+        self._lock = threading.Lock()
+
+    def device_key(self, device_id: Any, stored: Optional[bytes] = None) -> Optional[bytes]:
+        # 저장된 키 > 마스터 키 유도 > (legacy일 때만) 공용 비밀. 모두 없으면 None (서명 불가)
+        if stored:
+            return stored
+        if self.master_key:
+            return hkdf_sha256(self.master_key, b"device-hmac:" + _as_uuid(device_id).bytes)
+        return self.shared_secret if self.allow_legacy else None
+
+    def _mac(self, device: int, stored: Optional[bytes]) -> Optional[PreparedHmac]:
+        # device: _device_int 값
+        cache_key = (device, stored)
+        h = self._prepared.get(cache_key)
+        if h is not None:
+            # 적중 경로는 잠금 없이 (OrderedDict 단일 연산은 GIL 아래 원자적, 동시에 밀려났으면 무시)
+            try:
+                self._prepared.move_to_end(cache_key)
+            except KeyError:
+                pass
+            return h
+        key = self.device_key(UUID(int=device), stored)
+        if key is None:
+            return None
+        h = PreparedHmac(key)
+        with self._lock:
+            self._prepared[cache_key] = h
+            while len(self._prepared) > self.max_entries:
+                self._prepared.popitem(last=False)
+        return h
+
+    def verify(self, device_id: Any, stored: Optional[bytes], raw: bytes, signature: Optional[str],
+               timestamp: Optional[str] = None, nonce: Optional[str] = None, now: Optional[float] = None) -> bool:
+        # 서명: "sha256=<hex>" (장치 키) | "sha1=<hex>" 또는 hex만 (공용 비밀, allow_legacy일 때만).
+        # 서명 대상은 "{X-Timestamp}.{X-Nonce}." + 본문이고 재전송 창으로 확인 (둘 다 없는 본문만 서명은 legacy에서만).
+        # device_id가 None이면(여러 장치가 섞인 배치 등) 공용 비밀만 가능
+        outcome = self._verify(device_id, stored, raw, signature, timestamp, nonce, now)
+        _OUTCOMES[outcome].inc()
+        return outcome == "ok"
+
+    def _verify(self, device_id, stored, raw, signature, timestamp, nonce, now) -> str:
+        if not signature:
+            return "missing"
+        if device_id is not None:
+            device_id = _device_int(device_id)   # 한 번만 변환해 키 캐시와 논스 창에 같이 씀
+        algo, _, sig = signature.rpartition("=")
+        algo = algo.lower() or "sha1"
+
+        prefix = b""
+        if timestamp is not None or nonce is not None:
+            if not timestamp or not nonce or len(nonce) > 64:
+                return "malformed"
+            try:
+                ts = float(timestamp)
+            except ValueError:
+                return "malformed"
+            now = time.time() if now is None else now
+            if not self.nonces.fresh(ts, now):
+                return "stale"
+            prefix = f"{timestamp}.{nonce}.".encode()
+        elif self.require_timestamp or not self.allow_legacy:
+            # 타임스탬프/논스 없는 서명은 재전송을 막을 수 없으므로 legacy 호환에서만 허용
+            return "missing_timestamp"
+
+        if algo == "sha256" and device_id is not None:
+            mac = self._mac(device_id, stored)
+        elif algo in ("sha1", "sha256") and self.allow_legacy:
+            mac = self._shared[algo]
+        else:
+            mac = None
+        if mac is None:
+            return "rejected"
+        if not hmac.compare_digest(mac.hexdigest(prefix, raw), sig.lower()):
+            return "invalid"
+        # 서명이 맞는 요청만 논스 창에 넣음 (위조 요청으로 창을 채울 수 없도록)
+        if nonce and not self.nonces.add(device_id, nonce, ts, now):
+            return "replay"
+        return "ok"
+
+    def verify_frame(self, device_id: Any, stored: Optional[bytes], raw: bytes, signature: Optional[str]) -> bool:
+        # 인증된 연결(WebSocket) 위의 프레임: 장치 키 sha256만, 타임스탬프/논스 없이 (신선도는 연결 인증에서 확인됨)
+        algo, _, sig = (signature or "").rpartition("=")
+        mac = self._mac(_device_int(device_id), stored) if algo.lower() == "sha256" else None
+        ok = mac is not None and hmac.compare_digest(mac.hexdigest(raw), sig.lower())
+        _OUTCOMES["ok" if ok else "invalid"].inc()
+        return ok
+
+    def sign(self, device_id: Any, stored: Optional[bytes], raw: bytes,
+             timestamp: Optional[str] = None, nonce: Optional[str] = None) -> str:
+        # 장치 측 서명과 같은 계산 (테스트/벤치마크/프로비저닝 확인용)
+        prefix = f"{timestamp}.{nonce}.".encode() if timestamp is not None else b""
+        mac = self._mac(_device_int(device_id), stored)
+        if mac is None:
+            raise ValueError(f"no signing key for device {device_id}")
+        return "sha256=" + mac.hexdigest(prefix, raw)
+
+keyring = DeviceKeyring()
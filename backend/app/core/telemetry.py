@@ -0,0 +1,70 @@
+# 수집 경로 계측: 단계별 구간 히스토그램(ingest_stage_seconds{stage}), occurred_at→received_at 지연.
+# OTEL_TRACING이면 같은 구간을 OpenTelemetry 스팬으로도 남김 (트레이서/익스포터 설정은 SDK 쪽, 여기서는 API만 사용)
+from datetime import datetime
+from time import perf_counter
+
+from app.core.config import METRICS_STAGE_TIMING, OTEL_TRACING
+from app.core.metrics import FAST_BUCKETS, Histogram
+from app.core.utils import as_utc
+
+try:
+    from opentelemetry import trace as _otel
+except ImportError:  # opentelemetry-api 미설치 시 지표만
+    _otel = None
+
+STAGES = ("verify", "device_lookup", "detection", "save_event", "incident", "alerts")
+LAG_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+
+ingest_stage = Histogram("ingest_stage_seconds", "Time spent in each ingest stage", ["stage"], buckets=FAST_BUCKETS)
+ingest_lag = Histogram("ingest_event_lag_seconds", "Event occurred_at to received_at (device clock vs server)",
+                       buckets=LAG_BUCKETS)
+_stage_hist = {s: ingest_stage.labels(s) for s in STAGES}
+
+_tracer = _otel.get_tracer("safety.ingest") if _otel is not None and OTEL_TRACING else None
+_enabled = METRICS_STAGE_TIMING or _tracer is not None
+
+def set_enabled(on: bool) -> None:
+    # 오버헤드 측정용 스위치 (운영에서는 METRICS_STAGE_TIMING 환경 변수)
+    global _enabled
+    _enabled = on
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+_NULL = _NullStage()
+
+class _Stage:
+    __slots__ = ("_h", "_name", "_span", "_t0")
+
+    def __init__(self, name: str):
+        self._h = _stage_hist[name]
+        self._name = name
+        self._span = None
+
+    def __enter__(self):
+        if _tracer is not None:
+            self._span = _tracer.start_as_current_span("ingest." + self._name)
+            self._span.__enter__()
+        self._t0 = perf_counter()
+        return self
+
+    def __exit__(self, et, e, tb) -> bool:
+        self._h.observe(perf_counter() - self._t0)
+        if self._span is not None:
+            self._span.__exit__(et, e, tb)
+        return False
+
+def stage(name: str):
+    # with stage("detection"): ...  — 꺼져 있으면 공용 빈 컨텍스트를 돌려줘 객체도 만들지 않음
+    return _Stage(name) if _enabled else _NULL
+
+def observe_lag(occurred_at: datetime, received_at: datetime) -> None:
+    # 장치 시계가 앞서 있으면 음수가 되므로 0으로 자름
+    lag = (as_utc(received_at) - as_utc(occurred_at)).total_seconds()
+    ingest_lag.observe(lag if lag > 0 else 0.0)
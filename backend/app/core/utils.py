@@ -2,3 +2,9 @@ from datetime import datetime, timezone
 
 def utcnow():
     return datetime.now(timezone.utc)
+
+def as_utc(dt):
+    # tz 없는 값(SQLite에서 읽은 값 등)은 UTC로 간주
+    if dt is None:
+        return None
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
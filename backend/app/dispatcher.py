@@ -0,0 +1,25 @@
+# app/dispatcher.py — 알림 발송기 (python -m app.dispatcher)
+import argparse
+import asyncio
+import signal
+
+from app.core.config import ALERT_BATCH_SIZE, ALERT_DISPATCH_LOOPS
+from app.services.dispatcher import AlertDispatcher
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="alert dispatcher")
+    ap.add_argument("--loops", type=int, default=ALERT_DISPATCH_LOOPS)
+    ap.add_argument("--batch-size", type=int, default=ALERT_BATCH_SIZE)
+    args = ap.parse_args()
+
+    async def _run():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        await AlertDispatcher(batch_size=args.batch_size).run(stop, args.loops)
+
+    asyncio.run(_run())
+
+if __name__ == "__main__":
+    main()
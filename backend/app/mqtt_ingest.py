@@ -0,0 +1,190 @@
+# app/mqtt_ingest.py — MQTT 구독 수집 (python -m app.mqtt_ingest)
+# 토픽 마지막 단계가 device_id, 메시지는 stream_ingest 프레임 형식 (서명은 HTTP와 같은 규칙으로 확인).
+# 메시지를 MQTT_BATCH_LINGER초/MQTT_BATCH_MAX개 단위로 모아 process_batch 한 번(세션 1개, 커밋 1번)으로 처리.
+# QoS 1 수동 확인: 배치가 커밋된 뒤에 PUBACK → 처리 전에 죽거나 실패하면 재연결 때 브로커가 다시 보냄 (중복은 아이템포턴시 키로 걸러짐).
+# 처리 대기열(MQTT_INFLIGHT)이 차면 수신 스레드가 멈추고, 확인 안 된 메시지가 브로커의 in-flight 상한에 닿으면 브로커가 전송을 멈춤.
+# 장치가 자기 토픽에만 게시하도록 하는 것은 브로커 인증/ACL의 몫
+import argparse
+import logging
+import queue
+import signal
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+from uuid import UUID
+
+from app.core.config import (
+    MQTT_ACK_TOPIC, MQTT_BATCH_LINGER, MQTT_BATCH_MAX, MQTT_CLIENT_ID, MQTT_INFLIGHT, MQTT_QOS, MQTT_TOPIC, MQTT_URL,
+    RULES_REFRESH_SECONDS,
+)
+from app.core.db import SessionLocal
+from app.core.jsonlib import dumps
+from app.core.metrics import Counter
+from app.core.telemetry import stage
+from app.services import registry, rules
+from app.services.pipeline import process_batch
+from app.services.registry import registry as devices
+from app.services.storm import gate as ingest_gate
+from app.services.stream_ingest import FrameError, open_frame
+
+try:
+    import paho.mqtt.client as mqtt
+except ImportError:  # MQTT 모드에서만 필요 (pip install "paho-mqtt>=2")
+    mqtt = None
+
+log = logging.getLogger("mqtt_ingest")
+mqtt_messages = Counter("mqtt_ingest_messages_total", "MQTT ingest messages by outcome", ["outcome"])
+
+def topic_device(topic: str) -> Optional[UUID]:
+    try:
+        return UUID(topic.rsplit("/", 1)[-1])
+    except ValueError:
+        return None
+
+class MqttIngest:
+    def __init__(self, url: str = MQTT_URL, topic: str = MQTT_TOPIC, qos: int = MQTT_QOS,
+                 client_id: str = MQTT_CLIENT_ID, batch_max: int = MQTT_BATCH_MAX,
+                 linger: float = MQTT_BATCH_LINGER, inflight: int = MQTT_INFLIGHT, ack_topic: str = MQTT_ACK_TOPIC,
+                 client: Any = None):
+        if client is None and mqtt is None:
+            raise RuntimeError("MQTT ingest requires paho-mqtt>=2")
+        self.url = urlparse(url)
+        self.topic = topic
+        self.qos = qos
+        self.batch_max = batch_max
+        self.linger = linger
+        self.ack_topic = ack_topic
+        self.processed = 0
+        self._inbox: "queue.Queue" = queue.Queue(inflight)
+        self._stop = threading.Event()
+        self.connected = threading.Event()
+
+        if client is not None:
+            # 이미 설정된 클라이언트 (브로커 없이 handle/_finish를 확인할 때는 publish/ack만 있는 객체)
+            self.client = client
+            return
+        # 영속 세션: 확인 안 된 QoS 1 메시지가 재연결 뒤 다시 옴
+        self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=client_id, clean_session=False)
+        self.client.manual_ack_set(True)
+        if self.url.username:
+            self.client.username_pw_set(self.url.username, self.url.password)
+        if self.url.scheme == "mqtts":
+            self.client.tls_set()
+        self.client.on_connect = self._on_connect
+        self.client.on_message = self._on_message
+
+    def _on_connect(self, client, userdata, flags, reason_code, properties) -> None:
+        if reason_code.is_failure:
+            log.warning("mqtt connect refused: %s", reason_code)
+            return
+        client.subscribe(self.topic, self.qos)
+        self.connected.set()
+
+    def _on_message(self, client, userdata, msg) -> None:
+        # 수신 스레드: 대기열이 비기를 기다림 (멈춤 신호가 오면 버림 — 확인 전이므로 브로커가 다시 보냄)
+        while not self._stop.is_set():
+            try:
+                self._inbox.put(msg, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _next_batch(self) -> List[Any]:
+        try:
+            batch = [self._inbox.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.linger
+        while len(batch) < self.batch_max:
+            left = deadline - time.monotonic()
+            try:
+                batch.append(self._inbox.get(timeout=left) if left > 0 else self._inbox.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def handle(self, msgs: List[Any]) -> List[Dict[str, Any]]:
+        results: List[Dict[str, Any]] = [{} for _ in msgs]
+        ids = [topic_device(m.topic) for m in msgs]
+        with SessionLocal() as db:
+            # 배치 안 장치를 한 번에 확인 (레지스트리 캐시, 모르는 id만 IN 쿼리), 이후 process_batch는 조회하지 않음
+            with stage("device_lookup"):
+                known = devices.resolve(db, {d for d in ids if d is not None})
+            bodies, slots, gated = [], [], []
+            for i, (m, device_id) in enumerate(zip(msgs, ids)):
+                if device_id not in known:
+                    results[i] = {"ok": False, "error": "unknown device_id"}
+                    continue
+                info = devices.get(device_id)
+                try:
+                    bodies.append(open_frame(device_id, info.hmac_key if info else None, m.payload, authenticated=False))
+                except FrameError as e:
+                    results[i] = {"ok": False, "error": str(e)}
+                    continue
+                slots.append(i)
+                gated.append(ingest_gate.check(device_id))
+            out = process_batch(db, bodies, gated, known) if bodies else []
+        for i, r in zip(slots, out):
+            results[i] = r
+        return results
+
+    def _finish(self, msgs: List[Any], results: List[Dict[str, Any]]) -> None:
+        # 거절/차단된 메시지도 확인 (다시 받아도 같은 결과). 결과 토픽이 설정돼 있으면 장치별로 게시
+        for m, r in zip(msgs, results):
+            mqtt_messages.labels("ok" if r.get("ok") else ("shed" if r.get("shed") else "rejected")).inc()
+            if self.ack_topic:
+                self.client.publish(f"{self.ack_topic}/{m.topic.rsplit('/', 1)[-1]}", dumps(r), qos=0)
+            if m.qos > 0:
+                self.client.ack(m.mid, m.qos)
+        self.processed += len(msgs)
+
+    def run(self, stop: threading.Event) -> None:
+        port = self.url.port or (8883 if self.url.scheme == "mqtts" else 1883)
+        self.client.connect(self.url.hostname or "127.0.0.1", port)
+        self.client.loop_start()
+        try:
+            while not stop.is_set():
+                msgs = self._next_batch()
+                if not msgs:
+                    continue
+                try:
+                    results = self.handle(msgs)
+                except Exception:
+                    # 배치 전체 롤백: 확인하지 않고 재연결해 브로커가 다시 보내게 함
+                    log.exception("mqtt batch of %d failed", len(msgs))
+                    mqtt_messages.labels("failed").inc(len(msgs))
+                    self._drain()
+                    self.client.reconnect()
+                    continue
+                self._finish(msgs, results)
+        finally:
+            self._stop.set()
+            self.client.disconnect()
+            self.client.loop_stop()
+
+    def _drain(self) -> None:
+        # 재연결하면 확인 안 된 메시지가 전부 다시 오므로 대기열에 남은 것은 버림
+        while True:
+            try:
+                self._inbox.get_nowait()
+            except queue.Empty:
+                return
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="MQTT ingest subscriber")
+    ap.add_argument("--url", default=MQTT_URL)
+    ap.add_argument("--topic", default=MQTT_TOPIC)
+    ap.add_argument("--batch-max", type=int, default=MQTT_BATCH_MAX)
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+    rules.start_refresher(SessionLocal, RULES_REFRESH_SECONDS, stop)
+    registry.start_refresher(SessionLocal, stop)
+    MqttIngest(args.url, args.topic, batch_max=args.batch_max).run(stop)
+
+if __name__ == "__main__":
+    main()
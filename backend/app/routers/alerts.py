@@ -1,17 +1,21 @@
 from fastapi import APIRouter, Depends
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.core.db import get_db
 from app.core.utils import utcnow
 from app.schemas.common import AlertCreate
-from models.models import Alert
+from app.services import timeline
+from app.services.audit import actor, audit
+from app.services.hub import alert_message, hub
+from models.models import Alert, Incident
 
 router = APIRouter(prefix="/alerts", tags=["alerts"])
 
 @router.post("", status_code=201)
-def create_alert(payload: AlertCreate, db: Session = Depends(get_db)):
+def create_alert(payload: AlertCreate, db: Session = Depends(get_db), who: str | None = Depends(actor)):
     a = Alert(
-        incident_id=str(payload.incident_id),
+        incident_id=payload.incident_id,
         channel=payload.channel,
         target=payload.target,
         payload=payload.payload,
@@ -20,5 +24,12 @@ def create_alert(payload: AlertCreate, db: Session = Depends(get_db)):
         created_at=utcnow(),
     )
     db.add(a)
+    db.flush()
+    timeline.append(db, timeline.alert_entry(a.incident_id, a.id, a.created_at, a.channel, a.target, a.payload))
     db.commit()
+    if hub.active:
+        device_id = db.scalar(select(Incident.device_id).where(Incident.id == a.incident_id))
+        hub.publish(alert_message(a.id, a.incident_id, device_id, a.channel, a.status))
+    audit.record(who, "alert.create", f"alert:{a.id}",
+                 {"incident_id": str(a.incident_id), "channel": a.channel, "target": a.target, "status": a.status})
     return {"id": a.id, "status": a.status}
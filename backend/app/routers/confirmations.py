@@ -4,19 +4,31 @@ from sqlalchemy.orm import Session
 from app.core.db import get_db
 from app.core.utils import utcnow
 from app.schemas.common import ConfirmationCreate
+from app.services import timeline
+from app.services.audit import actor, audit
+from app.services.escalation import scheduler as escalations
 from models.models import Confirmation
 
 router = APIRouter(prefix="/confirmations", tags=["confirmations"])
 
 @router.post("", status_code=201)
-def confirm_decision(payload: ConfirmationCreate, db: Session = Depends(get_db)):
+def confirm_decision(payload: ConfirmationCreate, db: Session = Depends(get_db), who: str | None = Depends(actor)):
     c = Confirmation(
-        incident_id=str(payload.incident_id),
-        actor_id=str(payload.actor_id),
+        incident_id=payload.incident_id,
+        actor_id=payload.actor_id,
         decision=payload.decision,
         reason=payload.reason,
         decided_at=utcnow(),
     )
     db.add(c)
+    db.flush()
+    timeline.append(db, timeline.confirmation_entry(
+        c.incident_id, c.id, c.decided_at, c.decision, c.reason, c.actor_id,
+    ))
     db.commit()
+    # 사용자가 응답했으므로 남은 에스컬레이션 단계 취소
+    escalations.cancel(payload.incident_id)
+    # 헤더가 없으면 결정한 사람(actor_id)을 주체로
+    audit.record(who or (str(c.actor_id) if c.actor_id else None), "confirmation.create",
+                 f"incident:{c.incident_id}", {"confirmation_id": c.id, "decision": c.decision, "reason": c.reason})
     return {"id": c.id, "decision": c.decision}
@@ -1,73 +1,90 @@
+import os
 import uuid as uuidlib
+from typing import List
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app.core.config import GEO_NEARBY_MAX_RADIUS
 from app.core.db import get_db
+from app.core.security import keyring
 from app.core.utils import utcnow
-from app.schemas.common import DeviceCreate
+from app.schemas.common import DeviceCreate, DeviceOut, NearbyDevice
+from app.services.audit import actor, audit
+from app.services.geo import geo_index, parse_location
+from app.services.registry import registry
 from models.models import Device
 
 router = APIRouter(prefix="/devices", tags=["devices"])
 
 @router.post("", status_code=201)
-def register_device(payload: DeviceCreate, db: Session = Depends(get_db)):
+def register_device(payload: DeviceCreate, db: Session = Depends(get_db), who: str | None = Depends(actor)):
     if payload.serial:
         exists = db.query(Device).filter_by(serial=payload.serial).first()
         if exists:
             raise HTTPException(status_code=409, detail="serial_already_exists")
 
+    lat, lon = parse_location(payload.location) or (None, None)
     d = Device(
         id=uuidlib.uuid4(),
-        owner_id=str(payload.owner_id) if payload.owner_id else None,
+        owner_id=payload.owner_id,
         name=payload.name,
         type=payload.type,
         serial=payload.serial,
         location=payload.location,
+        lat=lat,
+        lon=lon,
         is_active=True,
         created_at=utcnow(),
+        # 마스터 키가 있으면 장치 키는 HKDF로 유도되므로 저장하지 않음
+        hmac_key=None if keyring.master_key else os.urandom(32),
     )
     db.add(d)
     db.commit()
-    return {"id": str(d.id), "serial": d.serial}
+    registry.put(d)
+    audit.record(who, "device.register", f"device:{d.id}",
+                 {"owner_id": payload.owner_id and str(payload.owner_id), "serial": d.serial, "name": d.name,
+                  "type": d.type})
+    # 장치 프로비저닝용 서명 키 (sha256= 서명에 사용). 이 응답에서만 돌려줌
+    return {"id": str(d.id), "serial": d.serial, "hmac_key": keyring.device_key(d.id, d.hmac_key).hex()}
 
-@router.get("")
+# 응답에 필요한 컬럼만 읽음 (hmac_key 등은 제외)
+_DEVICE_COLUMNS = (
+    Device.id, Device.owner_id, Device.name, Device.type, Device.serial, Device.location,
+    Device.lat, Device.lon, Device.is_active, Device.created_at,
+)
+
+@router.get("", response_model=List[DeviceOut])
 def list_devices(
     owner_id: UUID | None = Query(default=None),
     serial: str | None = Query(default=None),
     limit: int = Query(default=50, ge=1, le=500),
     db: Session = Depends(get_db),
 ):
-    q = db.query(Device)
+    q = select(*_DEVICE_COLUMNS)
     if owner_id:
-        q = q.filter(Device.owner_id == str(owner_id))
+        q = q.where(Device.owner_id == owner_id)
     if serial:
-        q = q.filter(Device.serial == serial)
-    q = q.order_by(Device.created_at.desc()).limit(limit)
+        q = q.where(Device.serial == serial)
+    return db.execute(q.order_by(Device.created_at.desc()).limit(limit)).all()
 
-    return [{
-        "id": str(d.id),
-        "owner_id": str(d.owner_id) if d.owner_id else None,
-        "name": d.name,
-        "type": d.type,
-        "serial": d.serial,
-        "location": d.location,
-        "is_active": d.is_active,
-        "created_at": d.created_at.isoformat() if d.created_at else None,
-    } for d in q]
+@router.get("/nearby", response_model=List[NearbyDevice])
+async def nearby_devices(
+    lat: float = Query(ge=-90, le=90),
+    lon: float = Query(ge=-180, le=180),
+    radius: float = Query(default=1000, gt=0, le=GEO_NEARBY_MAX_RADIUS, description="meters"),
+    limit: int = Query(default=50, ge=1, le=500),
+):
+    # 메모리 공간 인덱스만 봄 (DB 없음): 반경 안의 활성 장치를 가까운 순으로. /{device_id}보다 먼저 선언해야 함
+    return [
+        {"id": uuidlib.UUID(int=key), "lat": la, "lon": lo, "distance_m": round(d, 1)}
+        for key, la, lo, d in geo_index.nearby(lat, lon, radius, limit)
+    ]
 
-@router.get("/{device_id}")
+@router.get("/{device_id}", response_model=DeviceOut)
 def get_device(device_id: UUID, db: Session = Depends(get_db)):
-    d = db.get(Device, str(device_id))
+    d = db.execute(select(*_DEVICE_COLUMNS).where(Device.id == device_id)).first()
     if not d:
         raise HTTPException(status_code=404, detail="not_found")
-    return {
-        "id": str(d.id),
-        "owner_id": str(d.owner_id) if d.owner_id else None,
-        "name": d.name,
-        "type": d.type,
-        "serial": d.serial,
-        "location": d.location,
-        "is_active": d.is_active,
-        "created_at": d.created_at.isoformat() if d.created_at else None,
-    }
+    return d
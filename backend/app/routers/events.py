@@ -1,31 +1,65 @@
-from fastapi import APIRouter, Depends
+from datetime import datetime
+from typing import Literal
+from uuid import UUID
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select, tuple_
 from sqlalchemy.orm import Session
 
 from app.core.db import get_db
-from app.core.utils import utcnow
-from app.schemas.common import EventIngest
+from app.core.pagination import cursor_int, cursor_time, cursor_values, encode_cursor
+from app.core.utils import as_utc
+from app.schemas.common import EventIngest, EventPage
+from app.services.export import export_response
+from app.services.pipeline import store_event
 from models.models import Event
 
 router = APIRouter(prefix="/events", tags=["events"])
 
 @router.post("", status_code=201)
 def ingest_event(payload: EventIngest, db: Session = Depends(get_db)):
-    idx_idem = payload.idx_idempotency
-    if idx_idem:
-        existing = db.query(Event).filter_by(idx_idempotency=idx_idem).first()
-        if existing:
-            return {"id": existing.id, "status": "duplicate"}
+    body = dict(payload)
+    event_id, duplicate, _ = store_event(db, body, payload.risk_score, payload.risk_level, payload.idx_idempotency)
+    if duplicate:
+        return {"id": event_id, "status": "duplicate"}
+    return {"id": event_id}
 
-    evt = Event(
-        device_id=str(payload.device_id),
-        event_type=payload.event_type,
-        payload=payload.payload,
-        risk_score=payload.risk_score,
-        risk_level=payload.risk_level,
-        occurred_at=payload.occurred_at or utcnow(),
-        received_at=utcnow(),
-        idx_idempotency=idx_idem,
-    )
-    db.add(evt)
-    db.commit()
-    return {"id": evt.id}
+@router.get("/export")
+def export_events(
+    device_id: UUID | None = None,
+    from_: datetime | None = Query(default=None, alias="from"),
+    to: datetime | None = Query(default=None),
+    risk_level: str | None = Query(default=None),
+    format: Literal["ndjson", "csv"] = Query(default="ndjson"),
+    gzip: bool = Query(default=False),
+):
+    return export_response("events", format, gzip, device_id=device_id, from_=from_, to=to, risk_level=risk_level)
+
+@router.get("", response_model=EventPage)
+def list_events(
+    device_id: UUID,
+    from_: datetime | None = Query(default=None, alias="from"),
+    to: datetime | None = Query(default=None),
+    limit: int = Query(default=100, ge=1, le=1000),
+    cursor: str | None = Query(default=None),
+    db: Session = Depends(get_db),
+):
+    # (device_id, occurred_at DESC, id DESC) 인덱스를 그대로 따라가는 최신순 keyset 페이지네이션.
+    # from/to는 파티션 가지치기에도 쓰이므로 가능하면 함께 지정
+    q = select(
+        Event.id, Event.device_id, Event.event_type, Event.payload, Event.risk_score, Event.risk_level,
+        Event.occurred_at, Event.received_at,
+    ).where(Event.device_id == device_id)
+    if from_:
+        q = q.where(Event.occurred_at >= as_utc(from_))
+    if to:
+        q = q.where(Event.occurred_at < as_utc(to))
+    if cursor:
+        ts, last_id = cursor_values(cursor, cursor_time, cursor_int)
+        q = q.where(tuple_(Event.occurred_at, Event.id) < (ts, last_id))
+    rows = db.execute(q.order_by(Event.occurred_at.desc(), Event.id.desc()).limit(limit + 1)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last.occurred_at, last.id)
+    return {"items": rows[:limit], "next_cursor": next_cursor}
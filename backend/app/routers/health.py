@@ -0,0 +1,47 @@
+import asyncio
+import time
+
+from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+
+from app.core.db import engine
+from app.core.jsonlib import FastJSONResponse
+from app.core.lifecycle import lifecycle
+
+# 프로브. /healthz: 프로세스/이벤트 루프가 살아 있는지만 (DB를 보지 않음 — DB 장애로 재시작이 연쇄되지 않도록)
+# /readyz: 예열 완료 + 종료 중 아님 + DB 응답. DB 확인 결과는 1초 재사용 (프로브가 몰려도 쿼리는 초당 한 번)
+router = APIRouter(tags=["health"])
+
+DB_CHECK_TTL = 1.0
+DB_CHECK_TIMEOUT = 2.0
+_db_check = [0.0, False]   # [확인 시각, 결과]
+
+def _ping() -> None:
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+async def _db_ok() -> bool:
+    now = time.monotonic()
+    if now - _db_check[0] < DB_CHECK_TTL:
+        return _db_check[1]
+    try:
+        await asyncio.wait_for(run_in_threadpool(_ping), DB_CHECK_TIMEOUT)
+        ok = True
+    except Exception:
+        ok = False
+    _db_check[:] = [time.monotonic(), ok]
+    return ok
+
+@router.get("/healthz", include_in_schema=False)
+async def healthz():
+    return {"ok": True, "uptime": round(lifecycle.uptime(), 3)}
+
+@router.get("/readyz", include_in_schema=False)
+async def readyz():
+    db = not lifecycle.draining and await _db_ok()
+    ok = lifecycle.ready and not lifecycle.draining and db
+    return FastJSONResponse(status_code=200 if ok else 503, content={
+        "ok": ok, "warm": lifecycle.ready, "draining": lifecycle.draining, "db": db,
+        "inflight": lifecycle.inflight, "warmup": lifecycle.warmup,
+    })
@@ -1,60 +1,211 @@
-import uuid as uuidlib
+import hashlib
+from datetime import datetime
+from typing import List, Literal
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from app.core.config import GEO_BBOX_MAX_DEVICES
 from app.core.db import get_db
-from app.core.utils import utcnow
-from app.schemas.common import IncidentCreate, IncidentStatusUpdate
-from models.models import Incident
+from app.core.pagination import cursor_int, cursor_time, cursor_values, encode_cursor
+from app.core.utils import as_utc, utcnow
+from app.schemas.common import IncidentBrief, IncidentCreate, IncidentPage, IncidentStatusUpdate, TimelinePage
+from app.services import timeline
+from app.services.audit import actor, audit
+from app.services.coalescer import coalescer
+from app.services.escalation import scheduler as escalations
+from app.services.export import export_response
+from app.services.geo import geo_index
+from app.services.hub import hub, incident_message
+from app.services.pipeline import upsert_incident
+from models.models import Device, Incident, IncidentCount, TimelineEntry
 
 router = APIRouter(prefix="/incidents", tags=["incidents"])
 
 @router.post("", status_code=201)
 def open_incident(payload: IncidentCreate, db: Session = Depends(get_db)):
-    inc = Incident(
-        id=uuidlib.uuid4(),
-        device_id=str(payload.device_id),
-        status="open",
-        category=payload.category,
-        risk_level=payload.risk_level,
-        top_signals=payload.top_signals,
-        opened_at=utcnow(),
+    # 이미 열린 인시던트가 있으면 거기에 합쳐짐 (장치당 open 1건)
+    incident_id, created = upsert_incident(
+        db, payload.device_id, payload.risk_level, payload.category, payload.top_signals
     )
-    db.add(inc)
     db.commit()
-    return {"id": str(inc.id), "status": inc.status}
+    return {"id": incident_id, "status": "open", "created": created}
 
 @router.post("/{incident_id}/status")
-def update_incident_status(incident_id: UUID, payload: IncidentStatusUpdate, db: Session = Depends(get_db)):
+def update_incident_status(incident_id: UUID, payload: IncidentStatusUpdate, db: Session = Depends(get_db),
+                           who: str | None = Depends(actor)):
     status = payload.status
     if status not in {"open", "acknowledged", "closed"}:
         raise HTTPException(status_code=400, detail="invalid status")
 
-    inc = db.get(Incident, str(incident_id))
+    inc = db.get(Incident, incident_id)
     if not inc:
         raise HTTPException(status_code=404, detail="not_found")
 
+    now = utcnow()
+    previous = inc.status
     inc.status = status
     if status == "acknowledged":
-        inc.acknowledged_at = utcnow()
+        inc.acknowledged_at = now
     elif status == "closed":
-        inc.closed_at = utcnow()
-    db.commit()
+        inc.closed_at = now
+    timeline.append(db, timeline.status_entry(inc.id, now, status))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="open_incident_exists")
+    coalescer.forget_incident(str(inc.id))
+    if status in ("acknowledged", "closed"):
+        escalations.cancel(inc.id)
+    hub.publish(incident_message(inc, "status"))
+    audit.record(who, "incident.status", f"incident:{inc.id}", {"from": previous, "to": status})
     return {"id": str(inc.id), "status": inc.status}
 
-@router.get("/by-device/{device_id}")
+_TIMELINE_COLUMNS = (
+    TimelineEntry.id, TimelineEntry.ts, TimelineEntry.kind, TimelineEntry.ref_id, TimelineEntry.risk_level,
+    TimelineEntry.summary,
+)
+
+def _etag_matches(header: str | None, etag: str) -> bool:
+    # If-None-Match는 약한 비교 (W/ 접두어 무시), 여러 값 / "*" 허용
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag.removeprefix("W/") in {t.strip().removeprefix("W/") for t in header.split(",")}
+
+@router.get("/{incident_id}/timeline", response_model=TimelinePage)
+def incident_timeline(
+    incident_id: UUID,
+    request: Request,
+    response: Response,
+    limit: int = Query(default=100, ge=1, le=1000),
+    cursor: str | None = Query(default=None),
+    db: Session = Depends(get_db),
+):
+    # timeline_entries 읽기 모델을 (incident_id, ts, id) 인덱스 순서로 범위 스캔 (시간순 keyset 페이지네이션).
+    # ETag = 인시던트 항목의 (개수, 최대 id) + 페이지 위치: 항목이 추가되면 바뀜. 폴링하는 클라이언트는
+    # If-None-Match가 맞으면 304 — 같은 인덱스의 개수 확인만 하고 페이지를 읽거나 직렬화하지 않음
+    n, last = db.execute(
+        select(func.count(), func.max(TimelineEntry.id)).where(TimelineEntry.incident_id == incident_id)
+    ).one()
+    if not n and db.get(Incident, incident_id) is None:
+        raise HTTPException(status_code=404, detail="not_found")
+    etag = 'W/"%s"' % hashlib.sha1(f"{incident_id}:{n}:{last}:{limit}:{cursor}".encode()).hexdigest()[:20]
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    q = select(*_TIMELINE_COLUMNS).where(TimelineEntry.incident_id == incident_id)
+    if cursor:
+        ts, last_id = cursor_values(cursor, cursor_time, cursor_int)
+        q = q.where(tuple_(TimelineEntry.ts, TimelineEntry.id) > (ts, last_id))
+    rows = db.execute(q.order_by(TimelineEntry.ts, TimelineEntry.id).limit(limit + 1)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        last_row = rows[limit - 1]
+        next_cursor = encode_cursor(as_utc(last_row.ts), last_row.id)
+    response.headers["ETag"] = etag
+    return {"items": rows[:limit], "next_cursor": next_cursor}
+
+_INCIDENT_COLUMNS = (
+    Incident.id, Incident.device_id, Incident.status, Incident.category, Incident.risk_level,
+    Incident.top_signals, Incident.opened_at, Incident.acknowledged_at, Incident.closed_at,
+)
+
+def _bbox_devices(bbox: str) -> List[UUID]:
+    # bbox = "min_lon,min_lat,max_lon,max_lat" (GeoJSON 순서, min_lon > max_lon이면 날짜변경선을 넘는 범위).
+    # 메모리 공간 인덱스로 범위 안 장치를 구해 IN 조건으로 넘김 — 너무 넓으면 지도를 확대하도록 400
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(x) for x in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid bbox")
+    if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lon <= 180 and -180 <= max_lon <= 180):
+        raise HTTPException(status_code=400, detail="invalid bbox")
+    keys = geo_index.within(min_lat, min_lon, max_lat, max_lon, limit=GEO_BBOX_MAX_DEVICES)
+    if len(keys) > GEO_BBOX_MAX_DEVICES:
+        raise HTTPException(status_code=400, detail="bbox_too_large")
+    return [UUID(int=k) for k in keys]
+
+@router.get("", response_model=IncidentPage)
+def list_incidents(
+    status: str | None = Query(default=None),
+    risk_level: str | None = Query(default=None),
+    category: str | None = Query(default=None),
+    device_id: UUID | None = Query(default=None),
+    owner_id: UUID | None = Query(default=None),
+    from_: datetime | None = Query(default=None, alias="from"),
+    to: datetime | None = Query(default=None),
+    bbox: str | None = Query(default=None, description="min_lon,min_lat,max_lon,max_lat"),
+    limit: int = Query(default=50, ge=1, le=500),
+    cursor: str | None = Query(default=None),
+    db: Session = Depends(get_db),
+):
+    # 최신순 keyset 페이지네이션 (opened_at DESC, id DESC). OFFSET 없이 상태/장치 인덱스를 따라감
+    q = select(*_INCIDENT_COLUMNS)
+    if bbox:
+        in_box = _bbox_devices(bbox)
+        if not in_box:
+            return {"items": [], "next_cursor": None}
+        q = q.where(Incident.device_id.in_(in_box))
+    if status:
+        q = q.where(Incident.status == status)
+    if risk_level:
+        q = q.where(Incident.risk_level == risk_level.upper())
+    if category:
+        q = q.where(Incident.category == category)
+    if device_id:
+        q = q.where(Incident.device_id == device_id)
+    if owner_id:
+        q = q.where(Incident.device_id.in_(select(Device.id).where(Device.owner_id == owner_id)))
+    if from_:
+        q = q.where(Incident.opened_at >= as_utc(from_))
+    if to:
+        q = q.where(Incident.opened_at < as_utc(to))
+    if cursor:
+        ts, last_id = cursor_values(cursor, cursor_time, UUID)
+        q = q.where(tuple_(Incident.opened_at, Incident.id) < (ts, last_id))
+    rows = db.execute(q.order_by(Incident.opened_at.desc(), Incident.id.desc()).limit(limit + 1)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last.opened_at, str(last.id))
+    return {"items": rows[:limit], "next_cursor": next_cursor}
+
+@router.get("/summary")
+def incident_summary(db: Session = Depends(get_db)):
+    # COUNT(*) 대신 트리거로 유지되는 incident_counts를 읽음 (행 수는 상태 × 등급 조합 수)
+    by_status: dict = {}
+    by_risk: dict = {}
+    for status, level, n in db.execute(select(IncidentCount.status, IncidentCount.risk_level, IncidentCount.n)):
+        if not n:
+            continue
+        by_status[status] = by_status.get(status, 0) + n
+        by_risk.setdefault(status, {})[level or None] = n
+    return {"by_status": by_status, "by_status_risk": by_risk}
+
+@router.get("/export")
+def export_incidents(
+    device_id: UUID | None = None,
+    from_: datetime | None = Query(default=None, alias="from"),
+    to: datetime | None = Query(default=None),
+    risk_level: str | None = Query(default=None),
+    format: Literal["ndjson", "csv"] = Query(default="ndjson"),
+    gzip: bool = Query(default=False),
+):
+    return export_response("incidents", format, gzip, device_id=device_id, from_=from_, to=to,
+                           risk_level=risk_level)
+
+@router.get("/by-device/{device_id}", response_model=List[IncidentBrief])
 def list_incidents_by_device(device_id: UUID, db: Session = Depends(get_db)):
     q = (
-        db.query(Incident)
-        .filter(Incident.device_id == str(device_id))
+        select(Incident.id, Incident.status, Incident.category, Incident.risk_level, Incident.opened_at)
+        .where(Incident.device_id == device_id)
         .order_by(Incident.opened_at.desc())
         .limit(50)
     )
-    return [{
-        "id": str(x.id),
-        "status": x.status,
-        "category": x.category,
-        "risk_level": x.risk_level,
-        "opened_at": x.opened_at.isoformat() if x.opened_at else None,
-    } for x in q]
+    return db.execute(q).all()
@@ -1,53 +1,317 @@
-import hashlib
-from fastapi import APIRouter, Depends, Header, HTTPException, Request
+import asyncio
+from time import perf_counter
+from uuid import UUID
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import select
 
-from app.core.db import get_db
-from app.core.config import DEVICE_SHARED_SECRET
-from app.core.security import verify_signature
-from app.core.utils import utcnow
-from app.schemas.common import EventIngest
-from app.services.pipeline import (
-    run_detection, save_event, open_or_update_incident, enqueue_alerts
+from app.core.db import get_ingest_db
+from app.core.config import (
+    INGEST_BATCH_MAX, INGEST_MODE, WS_INGEST_AUTH_TIMEOUT, WS_INGEST_BATCH_MAX, WS_INGEST_WINDOW,
 )
-from models.models import Device
+from app.core.jsonlib import FastJSONResponse, dumps, loads
+from app.core.lifecycle import lifecycle
+from app.core.security import keyring
+from app.core.telemetry import stage
+from app.core.utils import utcnow
+from app.schemas.common import EventIngest, IngestResult
+from app.services import pipeline, pipeline_async
+from app.services.pipeline import idempotency_key, process_batch
+from app.services.queue import get_queue
+from app.services.registry import registry
+from app.services.storm import gate as ingest_gate
+from app.services.stream_ingest import FrameError, FrameInbox, device_known, hello_message, open_frame, process_frames
 
 router = APIRouter(tags=["ingest"])
 
-@router.post("/ingest", status_code=201)
+async def _tracked():
+    # 처리 중인 수집 수 (종료 시 이것이 0이 될 때까지 기다림). 이벤트 루프에서 세도록 async 의존성
+    with lifecycle.track():
+        yield
+
+async def _run(db, name: str, *args):
+    # AsyncSession이면 비동기 파이프라인, 동기 Session이면 스레드풀에서 실행해 이벤트 루프를 막지 않음
+    if isinstance(db, AsyncSession):
+        return await getattr(pipeline_async, name)(db, *args)
+    return await run_in_threadpool(getattr(pipeline, name), db, *args)
+
+def _parse_event(raw: bytes) -> EventIngest:
+    # 서명 검증에 쓴 원문 바이트를 pydantic이 바로 파싱/검증 (중간 dict나 json.loads 없이 한 번만)
+    try:
+        return EventIngest.model_validate_json(raw)
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)]
+        )
+
+def _authenticate(device_id, raw: bytes, signature: str | None, timestamp: str | None, nonce: str | None) -> None:
+    # 장치 키(저장된 키 또는 마스터 키 유도)로 검증. 레지스트리에 장치가 올라온 뒤(device_exists 이후) 호출
+    with stage("verify"):
+        info = registry.get(device_id) if device_id is not None else None
+        ok = keyring.verify(device_id, info.hmac_key if info else None, raw, signature, timestamp, nonce)
+    if not ok:
+        raise HTTPException(status_code=401, detail="Invalid signature")
+
+@router.post(
+    "/ingest", status_code=201, response_model=IngestResult, dependencies=[Depends(_tracked)],
+    openapi_extra={"requestBody": {"required": True, "content": {
+        "application/json": {"schema": EventIngest.model_json_schema()},
+    }}},
+)
 async def ingest(
     request: Request,
-    body: EventIngest,
     x_signature: str | None = Header(default=None),
-    db: Session = Depends(get_db),
+    x_timestamp: str | None = Header(default=None),
+    x_nonce: str | None = Header(default=None),
+    db: Session | AsyncSession = Depends(get_ingest_db),
 ):
+    # 서명 키가 장치마다 다르므로 본문에서 device_id를 먼저 얻고 검증.
+    # 없는 장치도 서명 실패와 같은 401 (응답으로 장치 존재 여부를 알 수 없도록, /ingest/batch와 같음)
     raw = await request.body()
-    if not verify_signature(raw, x_signature, DEVICE_SHARED_SECRET):
-        raise HTTPException(status_code=401, detail="Invalid signature")
+    body = _parse_event(raw)
 
-    exists = db.execute(
-        select(Device.id).where(Device.id == str(body.device_id))
-    ).scalar_one_or_none()
-    if not exists:
-        raise HTTPException(status_code=400, detail="unknown device_id")
+    if not await _run(db, "device_exists", body.device_id):
+        raise HTTPException(status_code=401, detail="Invalid signature")
+    _authenticate(body.device_id, raw, x_signature, x_timestamp, x_nonce)
 
-    occurred_iso = (body.occurred_at or utcnow()).isoformat()
-    idem = body.idx_idempotency or hashlib.sha1(
-        f"{body.device_id}:{occurred_iso}:{body.event_type}".encode()
-    ).hexdigest()
+    # 속도 제한/과부하에 걸렸는지는 지금 정하고, 버릴지는 탐지 등급을 보고 파이프라인에서 정함 (HIGH 이상은 항상 처리)
+    if INGEST_MODE == "queue":
+        await ingest_gate.refresh_depth(get_queue())
+    gated = ingest_gate.check(body.device_id)
 
-    bdict = body.model_dump()
+    bdict = dict(body)
     bdict["occurred_at"] = body.occurred_at or utcnow()
+    idem = idempotency_key(bdict)
 
-    risk_score, risk_level, category, top_signals = run_detection(bdict)
-    event_id = save_event(db, bdict, risk_score, risk_level, idem)
+    if INGEST_MODE == "queue":
+        # 큐에 내구성 있게 적재되면 202로 응답, 탐지/저장은 워커가 수행
+        await get_queue().put(_queue_payload(bdict, gated))
+        return FastJSONResponse(status_code=202, content={"ok": True, "queued": True, "idx_idempotency": idem})
 
-    incident_id = None
-    if risk_level.upper() in ("HIGH", "CRITICAL"):
-        incident_id = open_or_update_incident(
-            db, str(body.device_id), risk_level, category, top_signals
-        )
-        enqueue_alerts(db, incident_id, risk_level)
+    t0 = perf_counter()
+    result = await _run(db, "process_event", bdict, idem, gated)
+    ingest_gate.observe_latency(perf_counter() - t0)
+    if result.get("shed"):
+        return _shed_response(result)
+    return result
+
+def _retry_after(reason: str) -> int:
+    # 속도 제한은 곧 다시 보내도 되지만, 과부하 차단은 더 길게 물러나도록
+    return 5 if reason == "overload" else 1
+
+def _shed_response(result: dict) -> FastJSONResponse:
+    return FastJSONResponse(status_code=429, content=result, headers={"Retry-After": str(_retry_after(result["shed"]))})
+
+def _queue_payload(bdict: dict, gated: str | None = None) -> dict:
+    # 재시도해도 같은 키가 되도록 occurred_at / idempotency 키를 적재 시점에 고정 (occurred_at은 채워진 상태).
+    # 게이트 판정도 같이 실어 워커가 탐지 후 버릴지 정함
+    d = dict(bdict)
+    d["idx_idempotency"] = idempotency_key(d)
+    d["device_id"] = str(d["device_id"])
+    d["occurred_at"] = d["occurred_at"].isoformat()
+    if gated:
+        d["gated"] = gated
+    return d
+
+def _parse_batch(raw: bytes, content_type: str) -> list:
+    # JSON 배열 또는 NDJSON(한 줄에 이벤트 하나)
+    if "ndjson" in content_type or not raw.lstrip().startswith(b"["):
+        return [loads(line) for line in raw.splitlines() if line.strip()]
+    items = loads(raw)
+    if not isinstance(items, list):
+        raise ValueError("expected array")
+    return items
+
+def _single_device(items: list) -> UUID | None:
+    # 인증 전이므로 원시 JSON 값은 문자열만 봄 (dict/list 같은 값은 해시할 수 없음)
+    ids = {v for it in items if isinstance(it, dict) and isinstance(v := it.get("device_id"), str)}
+    if len(ids) != 1:
+        return None
+    try:
+        return UUID(str(ids.pop()))
+    except ValueError:
+        return None
+
+@router.post("/ingest/batch", dependencies=[Depends(_tracked)])
+async def ingest_batch(
+    request: Request,
+    x_signature: str | None = Header(default=None),
+    x_timestamp: str | None = Header(default=None),
+    x_nonce: str | None = Header(default=None),
+    x_device_id: UUID | None = Header(default=None),
+    db: Session | AsyncSession = Depends(get_ingest_db),
+):
+    raw = await request.body()
+    try:
+        items = _parse_batch(raw, request.headers.get("content-type", ""))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid batch body")
+    if len(items) > INGEST_BATCH_MAX:
+        raise HTTPException(status_code=413, detail="batch too large")
+
+    # 서명 장치: X-Device-Id(게이트웨이) 또는 배치의 유일한 device_id. 여러 장치가 섞이면 공용 비밀 서명만 가능
+    signer = x_device_id or _single_device(items)
+    if signer is not None and not await _run(db, "device_exists", signer):
+        raise HTTPException(status_code=401, detail="Invalid signature")
+    _authenticate(signer, raw, x_signature, x_timestamp, x_nonce)
+
+    # 장치 키로 서명된 배치는 그 장치의 이벤트만 받음 (다른 장치 이벤트를 끼워 넣는 사칭 차단)
+    results: list = [None] * len(items)
+    bodies, slots = [], []
+    for i, item in enumerate(items):
+        try:
+            body = EventIngest.model_validate(item)
+        except ValidationError:
+            results[i] = {"ok": False, "error": "invalid event"}
+            continue
+        if signer is not None and body.device_id != signer:
+            results[i] = {"ok": False, "error": "device_id mismatch"}
+            continue
+        bodies.append(body)
+        slots.append(i)
+
+    if INGEST_MODE == "queue":
+        await ingest_gate.refresh_depth(get_queue())
+    gated = [ingest_gate.check(b.device_id) for b in bodies]
+
+    if INGEST_MODE == "queue":
+        now = utcnow()
+        payloads = []
+        for b, g in zip(bodies, gated):
+            d = dict(b)
+            d["occurred_at"] = b.occurred_at or now
+            payloads.append(_queue_payload(d, g))
+        await get_queue().put_many(payloads)
+        for i in slots:
+            results[i] = {"ok": True, "queued": True}
+        return FastJSONResponse(status_code=202, content={"ok": True, "count": len(results), "results": results})
+
+    bodies = [dict(b) for b in bodies]
+
+    if isinstance(db, AsyncSession):
+        out = await db.run_sync(process_batch, bodies, gated)
+    else:
+        out = await run_in_threadpool(process_batch, db, bodies, gated)
+    for i, r in zip(slots, out):
+        results[i] = r
+    return FastJSONResponse({"ok": True, "count": len(results), "results": results})
+
+def _frame_data(msg: dict) -> bytes:
+    data = msg.get("bytes")
+    return data if data is not None else (msg.get("text") or "").encode()
+
+async def _ws_reject(websocket: WebSocket, error: str) -> None:
+    try:
+        await websocket.send_text(dumps({"ok": False, "error": error}).decode())
+        await websocket.close(code=1008)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+
+async def _ws_handshake(websocket: WebSocket) -> UUID | None:
+    # 첫 프레임 {"device_id", "timestamp", "nonce", "signature"}: hello_message(device_id)에 대한 장치 키 서명.
+    # 타임스탬프/논스는 필수 (연결 인증 프레임을 가로채 다시 쓰지 못하도록 재전송 창으로 확인)
+    try:
+        msg = await asyncio.wait_for(websocket.receive(), WS_INGEST_AUTH_TIMEOUT)
+        if msg["type"] == "websocket.disconnect":
+            return None
+        hello = loads(_frame_data(msg))
+        device_id = UUID(str(hello["device_id"]))
+        timestamp, nonce, signature = str(hello["timestamp"]), str(hello["nonce"]), hello.get("signature")
+    except (asyncio.TimeoutError, ValueError, KeyError, TypeError):
+        await _ws_reject(websocket, "invalid hello")
+        return None
+
+    if not await run_in_threadpool(device_known, device_id):
+        await _ws_reject(websocket, "unknown device_id")
+        return None
+    with stage("verify"):
+        info = registry.get(device_id)
+        ok = keyring.verify(device_id, info.hmac_key if info else None, hello_message(device_id),
+                            signature, timestamp, nonce)
+    if not ok:
+        await _ws_reject(websocket, "Invalid signature")
+        return None
+    await websocket.send_text(dumps({"ok": True, "window": WS_INGEST_WINDOW}).decode())
+    return device_id
+
+async def _ws_reader(websocket: WebSocket, inbox: FrameInbox) -> None:
+    try:
+        while True:
+            msg = await websocket.receive()
+            if msg["type"] == "websocket.disconnect":
+                break
+            await inbox.put(_frame_data(msg))
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        inbox.close()
+
+async def _ws_process(device_id: UUID, frames: list) -> list:
+    info = registry.get(device_id)
+    stored = info.hmac_key if info else None
+    results: list = [None] * len(frames)
+    bodies, slots = [], []
+    for i, frame in enumerate(frames):
+        try:
+            bodies.append(open_frame(device_id, stored, frame, authenticated=True))
+            slots.append(i)
+        except FrameError as e:
+            results[i] = {"ok": False, "error": str(e)}
+    if not bodies:
+        return results
+
+    if INGEST_MODE == "queue":
+        await ingest_gate.refresh_depth(get_queue())
+    gated = [ingest_gate.check(device_id) for _ in bodies]
+
+    if INGEST_MODE == "queue":
+        now = utcnow()
+        payloads = []
+        for b, g in zip(bodies, gated):
+            b["occurred_at"] = b["occurred_at"] or now
+            payloads.append(_queue_payload(b, g))
+        await get_queue().put_many(payloads)
+        out = [{"ok": True, "queued": True, "idx_idempotency": p["idx_idempotency"]} for p in payloads]
+    else:
+        # 장치 확인은 연결 인증 때 끝났으므로 process_batch에 알려진 장치로 넘김 (프레임마다 조회하지 않음)
+        t0 = perf_counter()
+        out = await run_in_threadpool(process_frames, bodies, gated, {device_id})
+        ingest_gate.observe_latency(perf_counter() - t0)
+    for i, r in zip(slots, out):
+        if r.get("shed"):
+            r["retry_after"] = _retry_after(r["shed"])
+        results[i] = r
+    return results
 
-    return {"ok": True, "risk_level": risk_level, "incident_id": incident_id, "event_id": event_id}
+@router.websocket("/ingest/ws")
+async def ingest_ws(websocket: WebSocket):
+    # 연결당 한 번 장치 인증 후 서명된 이벤트 프레임(stream_ingest 형식)을 계속 받음.
+    # 응답: 처리한 묶음마다 [{"seq": n, ...IngestResult}] 한 메시지 (seq는 인증 뒤 프레임 순번, 1부터).
+    # 응답 안 받은 프레임은 인증 응답의 window개까지만 보낼 것 (넘게 보내면 서버가 소켓 읽기를 멈춤).
+    # 서버 종료가 시작되면 더 읽지 않고, 받은 프레임까지 처리·응답한 뒤 1012(서비스 재시작)로 닫음 → 장치는 다른 인스턴스로 재연결
+    await websocket.accept()
+    device_id = await _ws_handshake(websocket)
+    if device_id is None:
+        return
+    inbox = FrameInbox(WS_INGEST_WINDOW)
+    reader = asyncio.create_task(_ws_reader(websocket, inbox))
+    stop_watching = lifecycle.on_drain(reader.cancel)
+    seq = 0
+    try:
+        while (frames := await inbox.next_batch(WS_INGEST_BATCH_MAX)) is not None:
+            with lifecycle.track():
+                acks = await _ws_process(device_id, frames)
+            for ack in acks:
+                seq += 1
+                ack["seq"] = seq
+            await websocket.send_text(dumps(acks).decode())
+        if lifecycle.draining:
+            await websocket.close(code=1012)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        stop_watching()
+        reader.cancel()
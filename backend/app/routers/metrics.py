@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from app.core.config import INGEST_MODE
+from app.core.metrics import CONTENT_TYPE, render
+from app.services.queue import get_queue, ingest_queue_depth
+
+# Prometheus 스크레이프 엔드포인트. 스레드별 카운터/히스토그램 셀은 여기서 합쳐짐
+router = APIRouter(tags=["metrics"])
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    if INGEST_MODE == "queue":
+        try:
+            ingest_queue_depth.set(await get_queue().depth())
+        except Exception:
+            pass
+    return Response(render(), media_type=CONTENT_TYPE)
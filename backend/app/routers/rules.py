@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.core.db import get_db
+from app.core.utils import utcnow
+from app.schemas.common import RuleCreate, RuleUpdate
+from app.services import rules as engine
+from models.models import Rule
+
+router = APIRouter(prefix="/rules", tags=["rules"])
+
+def _validate(definition):
+    try:
+        engine.compile_rule(None, None, definition)
+    except engine.RuleError as e:
+        raise HTTPException(status_code=400, detail=f"invalid definition: {e}")
+
+@router.post("", status_code=201)
+def create_rule(payload: RuleCreate, db: Session = Depends(get_db)):
+    _validate(payload.definition)
+    r = Rule(
+        name=payload.name,
+        enabled=True if payload.enabled is None else payload.enabled,
+        definition=payload.definition,
+        created_at=utcnow(),
+    )
+    db.add(r)
+    db.commit()
+    engine.reload(db)
+    return {"id": r.id, "name": r.name, "enabled": r.enabled}
+
+@router.put("/{rule_id}")
+def update_rule(rule_id: int, payload: RuleUpdate, db: Session = Depends(get_db)):
+    r = db.get(Rule, rule_id)
+    if not r:
+        raise HTTPException(status_code=404, detail="not_found")
+    if payload.definition is not None:
+        _validate(payload.definition)
+        r.definition = payload.definition
+    if payload.name is not None:
+        r.name = payload.name
+    if payload.enabled is not None:
+        r.enabled = payload.enabled
+    db.commit()
+    engine.reload(db)
+    return {"id": r.id, "name": r.name, "enabled": r.enabled}
+
+@router.get("")
+def list_rules(db: Session = Depends(get_db)):
+    return [{
+        "id": r.id,
+        "name": r.name,
+        "enabled": r.enabled,
+        "definition": r.definition,
+        "created_at": r.created_at.isoformat() if r.created_at else None,
+    } for r in db.query(Rule).order_by(Rule.id)]
@@ -0,0 +1,69 @@
+import asyncio
+from typing import List
+from uuid import UUID
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from app.core.config import HUB_HEARTBEAT_SECONDS
+from app.services.hub import Subscriber, hub
+
+# 인시던트/알림 실시간 푸시. owner_id / device_id를 여러 번 줄 수 있고, 둘 다 없으면 전체 구독
+router = APIRouter(prefix="/incidents", tags=["stream"])
+
+HEARTBEAT = '{"type":"heartbeat"}'
+
+async def _watch_disconnect(websocket: WebSocket, sub: Subscriber) -> None:
+    # 클라이언트가 보내는 메시지는 무시하고 연결 종료만 감지해 송신 루프를 깨움
+    try:
+        while True:
+            if (await websocket.receive())["type"] == "websocket.disconnect":
+                break
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        hub.unsubscribe(sub)
+        sub.wake.set()
+
+@router.websocket("/ws")
+async def incidents_ws(websocket: WebSocket,
+                       owner_id: List[UUID] = Query(default=[]),
+                       device_id: List[UUID] = Query(default=[])):
+    await websocket.accept()
+    sub = hub.subscribe(owner_id, device_id)
+    watcher = asyncio.create_task(_watch_disconnect(websocket, sub))
+    try:
+        while not sub.closed:
+            batch = await sub.next_batch()
+            if sub.closed:
+                break
+            # 송신이 하트비트 주기 안에 끝나지 않으면 끊긴 연결로 보고 정리 (그동안 쌓인 변경은 대기열에서 합쳐짐)
+            for text in batch if batch is not None else (HEARTBEAT,):
+                await asyncio.wait_for(websocket.send_text(text), HUB_HEARTBEAT_SECONDS)
+    except (WebSocketDisconnect, asyncio.TimeoutError, RuntimeError):
+        pass
+    finally:
+        hub.unsubscribe(sub)
+        watcher.cancel()
+
+@router.get("/stream")
+async def incidents_sse(owner_id: List[UUID] = Query(default=[]),
+                        device_id: List[UUID] = Query(default=[])):
+    async def events():
+        # 구독은 본문을 실제로 보내기 시작할 때 만듦: 응답이 시작되기 전에 끊기면 제너레이터가 돌지 않아
+        # finally도 실행되지 않으므로 밖에서 만든 구독은 남음. 연결이 끊기면 Starlette가 제너레이터를 취소 → finally에서 해제
+        sub = hub.subscribe(owner_id, device_id)
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                batch = await sub.next_batch()
+                if batch is None:
+                    yield ": heartbeat\n\n"
+                else:
+                    yield "".join(f"data: {text}\n\n" for text in batch)
+        finally:
+            hub.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
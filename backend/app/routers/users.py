@@ -5,12 +5,13 @@ from sqlalchemy.orm import Session
 from app.core.db import get_db
 from app.core.utils import utcnow
 from app.schemas.common import UserCreate
+from app.services.audit import actor, audit
 from models.models import User
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 @router.post("", status_code=201)
-def create_user(payload: UserCreate, db: Session = Depends(get_db)):
+def create_user(payload: UserCreate, db: Session = Depends(get_db), who: str | None = Depends(actor)):
     u = User(
         id=uuid.uuid4(),
         email=payload.email,
@@ -21,4 +22,5 @@ def create_user(payload: UserCreate, db: Session = Depends(get_db)):
     )
     db.add(u)
     db.commit()
+    audit.record(who, "user.create", f"user:{u.id}", {"email": u.email, "role": u.role})
     return {"id": str(u.id), "email": u.email, "role": u.role}
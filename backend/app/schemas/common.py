@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from pydantic import BaseModel, ConfigDict
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 from uuid import UUID
 
@@ -47,3 +47,84 @@ class ConfirmationCreate(BaseModel):
     actor_id: UUID
     decision: Optional[str] = None
     reason: Optional[str] = None
+
+class RuleCreate(BaseModel):
+    name: Optional[str] = None
+    enabled: Optional[bool] = True
+    definition: Dict[str, Any]
+
+class RuleUpdate(BaseModel):
+    name: Optional[str] = None
+    enabled: Optional[bool] = None
+    definition: Optional[Dict[str, Any]] = None
+
+# --- 응답 스키마 (조회 결과 Row를 그대로 검증/직렬화) ---
+class RowModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+class DeviceOut(RowModel):
+    id: UUID
+    owner_id: Optional[UUID] = None
+    name: Optional[str] = None
+    type: Optional[str] = None
+    serial: Optional[str] = None
+    location: Optional[Dict[str, Any]] = None
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    is_active: Optional[bool] = None
+    created_at: Optional[datetime] = None
+
+class NearbyDevice(BaseModel):
+    id: UUID
+    lat: float
+    lon: float
+    distance_m: float
+
+class EventOut(RowModel):
+    id: int
+    device_id: UUID
+    event_type: Optional[str] = None
+    payload: Optional[Dict[str, Any]] = None
+    risk_score: Optional[float] = None
+    risk_level: Optional[str] = None
+    occurred_at: Optional[datetime] = None
+    received_at: Optional[datetime] = None
+
+class EventPage(BaseModel):
+    items: List[EventOut]
+    next_cursor: Optional[str] = None
+
+class IncidentBrief(RowModel):
+    id: UUID
+    status: str
+    category: Optional[str] = None
+    risk_level: Optional[str] = None
+    opened_at: Optional[datetime] = None
+
+class IncidentOut(IncidentBrief):
+    device_id: Optional[UUID] = None
+    top_signals: Optional[Dict[str, Any]] = None
+    acknowledged_at: Optional[datetime] = None
+    closed_at: Optional[datetime] = None
+
+class IncidentPage(BaseModel):
+    items: List[IncidentOut]
+    next_cursor: Optional[str] = None
+
+class TimelineEntryOut(RowModel):
+    id: int
+    ts: datetime
+    kind: str
+    ref_id: Optional[str] = None
+    risk_level: Optional[str] = None
+    summary: Optional[Dict[str, Any]] = None
+
+class TimelinePage(BaseModel):
+    items: List[TimelineEntryOut]
+    next_cursor: Optional[str] = None
+
+class IngestResult(BaseModel):
+    ok: bool
+    risk_level: Optional[str] = None
+    incident_id: Optional[str] = None
+    event_id: Optional[int] = None
@@ -0,0 +1,93 @@
+# app/serve.py — API 서버 (python -m app.serve)
+# uvicorn을 코드로 띄움. 워커 프로세스가 여러 개면 상위 프로세스는 소켓만 열고 앱을 임포트하지 않음 (자식이 "main:app"을 읽음).
+# uvloop/httptools가 설치돼 있으면 사용. 종료 순서 (SIGTERM):
+#   1) lifecycle.begin_drain → /readyz 503, WebSocket 수집은 받은 프레임까지 응답하고 1012로 닫음
+#   2) SERVE_DRAIN_DELAY 뒤 uvicorn 종료 시작: 리스너 닫기 → 처리 중 요청을 SERVE_GRACEFUL_TIMEOUT까지 기다림
+#   3) lifespan 종료: 남은 수집/메모리 큐 처리, 발송기·에스컬레이션이 진행 중인 기록을 마치고 끝남
+# 두 번째 SIGTERM/SIGINT는 기다리지 않고 바로 종료 단계로 (워커가 여러 개면 상위 프로세스는 첫 신호만 워커에 전하므로
+# 두 번째 신호는 워커 pid에 직접 보냄). 확인: scripts/bench_startup.py의 serve_check
+import argparse
+import inspect
+import logging
+import os
+import sys
+import threading
+from importlib.util import find_spec
+
+import uvicorn
+from uvicorn.supervisors import multiprocess
+
+from app.core.config import DB_URL, PORT, SERVE_DRAIN_DELAY, SERVE_GRACEFUL_TIMEOUT, SERVE_HOST, SERVE_WORKERS
+from app.core.lifecycle import lifecycle
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+log = logging.getLogger("serve")
+
+class DrainingServer(uvicorn.Server):
+    def handle_exit(self, sig, frame) -> None:
+        # 드레인 지연은 config에 실어 보냄 (워커 프로세스는 config를 넘겨받아 Server를 새로 만듦)
+        delay = getattr(self.config, "drain_delay", SERVE_DRAIN_DELAY)
+        if lifecycle.draining or delay <= 0:
+            lifecycle.begin_drain()
+            return super().handle_exit(sig, frame)
+        lifecycle.begin_drain()
+        timer = threading.Timer(delay, super().handle_exit, (sig, frame))
+        timer.daemon = True
+        timer.start()
+
+class DrainingProcess(multiprocess.Process):
+    # 새 uvicorn(0.54에서 확인): 워커의 Server는 Process.server가 uvicorn.Server로 만듦 → DrainingServer로 바꿈
+    @property
+    def server(self) -> uvicorn.Server:
+        if self._server is None:
+            self._server = DrainingServer(config=self.config)
+        return self._server
+
+def _run_workers(config: uvicorn.Config, server: DrainingServer) -> None:
+    sockets = [config.bind_socket()]
+    if "target" in inspect.signature(multiprocess.Multiprocess).parameters:
+        # 이전 uvicorn: 워커가 실행할 함수를 직접 넘김
+        multiprocess.Multiprocess(config, target=server.run, sockets=sockets).run()
+        return
+    # 지금 uvicorn은 워커마다 모듈의 Process로 Server를 만들므로 그 자리를 바꿈 (spawn된 워커는 pickle로
+    # DrainingProcess를 받아 app.serve를 임포트함)
+    multiprocess.Process = DrainingProcess
+    multiprocess.Multiprocess(config, sockets=sockets).run()
+
+def _pick(module: str, fallback: str) -> str:
+    return module if find_spec(module) is not None else fallback
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="API server")
+    ap.add_argument("--host", default=SERVE_HOST)
+    ap.add_argument("--port", type=int, default=PORT)
+    ap.add_argument("--workers", type=int, default=SERVE_WORKERS)
+    ap.add_argument("--drain-delay", type=float, default=SERVE_DRAIN_DELAY)
+    ap.add_argument("--log-level", default="info")
+    args = ap.parse_args()
+    logging.basicConfig(level=args.log_level.upper())
+
+    # 워커마다 임포트 중에 실패하지 않도록 필수 설정은 여기서 한 번 확인
+    if not DB_URL:
+        sys.exit("SUPABASE_DB_URL not set")
+
+    # "main:app"을 찾을 경로 (uvicorn.Config에는 app_dir가 없음 — uvicorn.run/CLI가 하는 일을 직접).
+    # 워커는 spawn으로 뜨며 상위의 sys.path를 물려받음
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    loop = _pick("uvloop", "asyncio")
+    http = _pick("httptools", "h11")
+    log.info("serving on %s:%d with %d worker(s), loop=%s http=%s", args.host, args.port, args.workers, loop, http)
+    config = uvicorn.Config(
+        "main:app", host=args.host, port=args.port, workers=args.workers, loop=loop, http=http,
+        lifespan="on", timeout_graceful_shutdown=SERVE_GRACEFUL_TIMEOUT, log_level=args.log_level,
+    )
+    config.drain_delay = args.drain_delay
+    server = DrainingServer(config)
+    if config.workers > 1:
+        _run_workers(config, server)
+    else:
+        server.run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+# 감사 로그 (audit_logs: 누가 언제 무엇을 바꿨는지) 지연 쓰기.
+# 변경 API는 커밋이 끝난 뒤 record()로 메모리 버퍼에 넣기만 하고 (요청당 커밋/왕복 추가 없음),
+# 쓰기 스레드가 AUDIT_FLUSH_RECORDS건이 모이거나 AUDIT_FLUSH_MS가 지나면 여러 행 INSERT 한 번으로 씀.
+# 버퍼가 차면 AUDIT_OVERFLOW 정책을 따르고, 종료 시 close()가 남은 기록을 모두 쓴 뒤 끝남.
+# 쓰기가 실패한 묶음은 버퍼 앞에 되돌려 다음 주기에 다시 씀 (DB 장애 중에는 버퍼가 차서 정책이 적용됨)
+import logging
+import threading
+from collections import deque
+from time import monotonic
+from typing import Any, Dict, List, Optional
+
+from fastapi import Header
+from sqlalchemy import insert
+
+from app.core.config import (
+    AUDIT_BLOCK_TIMEOUT, AUDIT_BUFFER_MAX, AUDIT_ENABLED, AUDIT_FLUSH_MS, AUDIT_FLUSH_RECORDS, AUDIT_OVERFLOW,
+)
+from app.core.metrics import FAST_BUCKETS, Counter, Gauge, Histogram
+from app.core.utils import utcnow
+from models.models import AuditLog
+
+log = logging.getLogger(__name__)
+
+audit_records = Counter("audit_records_total", "Audit records by outcome (buffered/blocked/inline/dropped/lost)",
+                        ["outcome"])
+audit_flushes = Counter("audit_flushes_total", "Audit buffer flushes", ["result"])
+audit_flush_seconds = Histogram("audit_flush_seconds", "Time to write one audit batch")
+audit_record_seconds = Histogram("audit_record_seconds", "Time spent in record() by the calling request",
+                                 buckets=FAST_BUCKETS)
+
+def actor(x_actor: Optional[str] = Header(default=None)) -> Optional[str]:
+    # 변경 요청의 주체. 앞단(게이트웨이/관리 화면)이 인증한 사용자 id를 X-Actor 헤더로 넘김
+    return x_actor
+
+class AuditWriter:
+    def __init__(self, engine=None, capacity: int = AUDIT_BUFFER_MAX, batch: int = AUDIT_FLUSH_RECORDS,
+                 interval: float = AUDIT_FLUSH_MS / 1000, overflow: str = AUDIT_OVERFLOW,
+                 block_timeout: float = AUDIT_BLOCK_TIMEOUT, enabled: bool = AUDIT_ENABLED):
+        if overflow not in ("block", "drop"):
+            raise ValueError(f"unknown audit overflow policy: {overflow!r}")
+        self._engine = engine
+        self.capacity = capacity
+        self.batch = batch
+        self.interval = interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.enabled = enabled
+        self._buf: deque = deque()
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()   # 쓰기 스레드 / close() / 직접 쓰기가 겹치지 않게
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self._buf)
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            from app.core.db import engine
+            self._engine = engine
+        return self._engine
+
+    # --- 요청 쪽 ---
+    def record(self, actor: Optional[str], action: str, entity: str, details: Optional[Dict[str, Any]] = None) -> None:
+        # 스레드풀(동기 핸들러)에서 부름: block 정책은 최대 block_timeout 동안 기다릴 수 있으므로 이벤트 루프에서 부르지 않음
+        if not self.enabled:
+            return
+        row = {"actor": actor, "action": action, "entity": entity, "details": details, "created_at": utcnow()}
+        with audit_record_seconds.time():
+            with self._cond:
+                if len(self._buf) < self.capacity:
+                    self._buf.append(row)
+                    if len(self._buf) >= self.batch:
+                        self._cond.notify_all()
+                    audit_records.labels("buffered").inc()
+                    return
+                if self.overflow == "drop":
+                    self._buf.popleft()
+                    self._buf.append(row)
+                    audit_records.labels("dropped").inc()
+                    return
+                # block: 쓰기 스레드를 깨우고 자리가 날 때까지 잠깐 기다림
+                self._cond.notify_all()
+                if self._cond.wait_for(lambda: len(self._buf) < self.capacity, self.block_timeout):
+                    self._buf.append(row)
+                    audit_records.labels("blocked").inc()
+                    return
+            # 그래도 차 있으면 (DB가 느리거나 멈춤) 이 요청이 직접 씀 → 기록은 잃지 않고 느려짐이 호출자에게 전달됨
+            try:
+                self._write([row])
+                audit_records.labels("inline").inc()
+            except Exception:
+                # 변경 자체는 이미 커밋됐으므로 요청을 실패시키지 않고 로그에라도 남김
+                audit_records.labels("lost").inc()
+                log.exception("audit record lost: %s", row)
+
+    # --- 쓰기 쪽 ---
+    def _write(self, rows: List[dict]) -> None:
+        # 여러 행 INSERT 한 번 (SQLAlchemy insertmanyvalues → INSERT ... VALUES (...), (...), ...)
+        with audit_flush_seconds.time(), self.engine.begin() as conn:
+            conn.execute(insert(AuditLog), rows)
+
+    def _take(self) -> List[dict]:
+        with self._cond:
+            n = min(len(self._buf), self.batch)
+            rows = [self._buf.popleft() for _ in range(n)]
+            if rows:
+                self._cond.notify_all()   # 자리를 기다리는 요청
+            return rows
+
+    def _put_back(self, rows: List[dict]) -> None:
+        # 실패한 묶음은 순서를 지켜 앞에 되돌림 (잠시 capacity를 넘을 수 있음)
+        with self._cond:
+            self._buf.extendleft(reversed(rows))
+
+    def flush(self) -> int:
+        # 버퍼를 batch 단위로 비울 때까지 씀. 실패하면 남은 기록을 되돌리고 예외를 올림
+        written = 0
+        with self._write_lock:
+            while True:
+                rows = self._take()
+                if not rows:
+                    return written
+                try:
+                    self._write(rows)
+                except Exception:
+                    self._put_back(rows)
+                    audit_flushes.labels("error").inc()
+                    raise
+                audit_flushes.labels("ok").inc()
+                written += len(rows)
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._stopping or len(self._buf) >= self.batch, self.interval)
+                if self._stopping:
+                    return
+            try:
+                self.flush()
+            except Exception as e:
+                log.warning("audit flush failed (%d buffered): %r", len(self._buf), e)
+                with self._cond:
+                    self._cond.wait_for(lambda: self._stopping, self.interval)
+
+    def start(self) -> threading.Thread:
+        with self._cond:
+            self._stopping = False
+        self._thread = threading.Thread(target=self._loop, name="audit-writer", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def close(self, timeout: float = 30.0) -> int:
+        # 정상 종료: 쓰기 스레드를 멈추고 남은 기록을 모두 씀 (실패하면 timeout까지 다시 시도).
+        # 못 쓴 건수를 돌려줌
+        deadline = monotonic() + timeout
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(max(0.0, deadline - monotonic()))
+            self._thread = None
+        while True:
+            try:
+                self.flush()
+                return 0
+            except Exception as e:
+                if monotonic() >= deadline:
+                    left = len(self._buf)
+                    audit_records.labels("lost").inc(left)
+                    log.error("shutdown: %d audit record(s) not written: %r", left, e)
+                    return left
+                with self._cond:
+                    self._cond.wait(min(self.interval, max(0.0, deadline - monotonic())))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"buffered": len(self._buf), "capacity": self.capacity, "overflow": self.overflow,
+                "running": self._thread is not None}
+
+audit = AuditWriter()
+audit_buffer_depth = Gauge("audit_buffer_depth", "Audit records waiting to be written", fn=lambda: len(audit))
@@ -0,0 +1,102 @@
+# 알림 채널 어댑터. send()가 ChannelError(retryable=False)를 던지면 재시도 없이 dead_letter로 보냄
+import asyncio
+import logging
+import random
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from app.core.config import ALERT_CHANNEL_URLS, ALERT_SEND_TIMEOUT
+
+log = logging.getLogger(__name__)
+
+class ChannelError(Exception):
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+class AlertMessage:
+    __slots__ = ("id", "incident_id", "channel", "target", "payload", "attempts", "created_at")
+
+    def __init__(self, id: int, incident_id: Any, channel: str, target: Optional[str],
+                 payload: Optional[Dict[str, Any]], attempts: int, created_at: Any):
+        self.id = id
+        self.incident_id = incident_id
+        self.channel = channel
+        self.target = target
+        self.payload = payload
+        self.attempts = attempts
+        self.created_at = created_at
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "alert_id": self.id,
+            "incident_id": str(self.incident_id) if self.incident_id else None,
+            "channel": self.channel,
+            "target": self.target,
+            "payload": self.payload,
+            "attempt": self.attempts,
+        }
+
+class ChannelAdapter(ABC):
+    name = ""
+
+    @abstractmethod
+    async def send(self, msg: AlertMessage) -> None: ...
+
+    async def close(self) -> None:
+        pass
+
+class FakeAdapter(ChannelAdapter):
+    # 벤치/스크립트 전용 (default_adapters는 만들지 않음): 지연과 실패율을 흉내 내고 최근 보낸 메시지를 기록
+    def __init__(self, name: str, latency: float = 0.0, failure_rate: float = 0.0, seed: Optional[int] = None,
+                 keep: int = 1000):
+        self.name = name
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.sent: Deque[AlertMessage] = deque(maxlen=keep)
+        self.count = 0
+        self._rnd = random.Random(seed)
+
+    async def send(self, msg: AlertMessage) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.failure_rate and self._rnd.random() < self.failure_rate:
+            raise ChannelError(f"{self.name}: simulated failure")
+        self.sent.append(msg)
+        self.count += 1
+
+class WebhookAdapter(ChannelAdapter):
+    # SMS/푸시/음성 벤더 게이트웨이에 JSON POST. 4xx는 재시도해도 소용없으므로 retryable=False
+    def __init__(self, name: str, url: str, timeout: float = ALERT_SEND_TIMEOUT):
+        import httpx
+
+        self.name = name
+        self.url = url
+        self._client = httpx.AsyncClient(timeout=timeout)
+
+    async def send(self, msg: AlertMessage) -> None:
+        import httpx
+
+        try:
+            r = await self._client.post(self.url, json=msg.as_dict())
+        except httpx.HTTPError as e:
+            raise ChannelError(f"{self.name}: {e!r}")
+        if r.status_code >= 500 or r.status_code == 429:
+            raise ChannelError(f"{self.name}: HTTP {r.status_code}")
+        if r.status_code >= 400:
+            raise ChannelError(f"{self.name}: HTTP {r.status_code}", retryable=False)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+def default_adapters() -> Dict[str, ChannelAdapter]:
+    # 웹훅이 설정된 채널만. 빠진 채널의 알림은 발송기가 "no adapter"로 바로 dead_letter 처리
+    # (보내지 않은 알림을 sent로 남기지 않도록), 하나도 없으면 발송기를 띄우지 않음
+    missing = sorted(name for name, url in ALERT_CHANNEL_URLS.items() if not url)
+    if len(missing) == len(ALERT_CHANNEL_URLS):
+        raise RuntimeError("no alert channel configured: set " + ", ".join(
+            f"ALERT_{name.upper()}_URL" for name in missing))
+    if missing:
+        log.warning("alert channels without a webhook, their alerts go to dead_letter: %s", ", ".join(missing))
+    return {name: WebhookAdapter(name, url) for name, url in ALERT_CHANNEL_URLS.items() if url}
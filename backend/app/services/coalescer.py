@@ -0,0 +1,55 @@
+# 짧은 시간 안에 같은 장치에서 몰려오는 HIGH 이벤트를 프로세스 안에서 한 인시던트로 합침.
+# 캐시된 등급보다 높은 이벤트가 오면 DB upsert로 넘겨 등급을 올림.
+# (다른 프로세스에서 상태가 바뀐 경우 최대 window초 동안 이전 인시던트 id를 돌려줄 수 있음)
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.core.config import INCIDENT_COALESCE_MAX, INCIDENT_COALESCE_SECONDS
+from app.services.state import device_key
+
+class IncidentCoalescer:
+    def __init__(self, window: float = INCIDENT_COALESCE_SECONDS, max_entries: int = INCIDENT_COALESCE_MAX):
+        self.window = window
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, list]" = OrderedDict()   # key -> [incident_id, rank, expires]
+        self._by_incident: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, device_id: Any, rank: int) -> Optional[str]:
+        if self.window <= 0:
+            return None
+        key = device_key(device_id)
+        now = time.monotonic()
+        with self._lock:
+            e = self._entries.get(key)
+            if e is None or e[2] < now or rank > e[1]:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return e[0]
+
+    def remember(self, device_id: Any, incident_id: str, rank: int) -> None:
+        if self.window <= 0:
+            return
+        key = device_key(device_id)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self._by_incident.pop(old[0], None)
+            self._entries[key] = [incident_id, rank, time.monotonic() + self.window]
+            self._by_incident[incident_id] = key
+            while len(self._entries) > self.max_entries:
+                _, e = self._entries.popitem(last=False)
+                self._by_incident.pop(e[0], None)
+
+    def forget_incident(self, incident_id: str) -> None:
+        with self._lock:
+            key = self._by_incident.pop(str(incident_id), None)
+            if key is not None:
+                self._entries.pop(key, None)
+
+coalescer = IncidentCoalescer()
@@ -0,0 +1,136 @@
+# 아이템포턴시 키 필터: events.idx_idempotency 유니크 인덱스 앞에 두는 시간 창 중복 제거 계층.
+#  - 최근 키 → (event_id, risk_level) LRU: 최근 재전송은 DB 없이 원래 event_id로 응답
+#  - 블룸 필터 2개(현재/이전)를 window초마다 교대: 둘 다 없다고 하면 확실히 새 키 → 사전 SELECT 생략
+# 다른 프로세스가 넣은 키나 창이 지난 키는 "새 키"로 보일 수 있으므로 INSERT는 항상 ON CONFLICT로 하고
+# 충돌 시 DB에서 기존 id를 읽음 (DB 유니크 제약이 최종 판정)
+import hashlib
+import math
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import IDEM_BLOOM_CAPACITY, IDEM_BLOOM_FPR, IDEM_LRU_MAX, IDEM_WINDOW_SECONDS
+
+class BloomFilter:
+    __slots__ = ("m", "k", "bits", "count")
+
+    def __init__(self, capacity: int, fpr: float):
+        self.m = max(8, int(-capacity * math.log(fpr) / (math.log(2) ** 2)))
+        self.k = max(1, round(self.m / capacity * math.log(2)))
+        self.bits = bytearray((self.m + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        # 이중 해싱: blake2b 128비트를 두 개의 64비트 해시로 나눠 k개 위치 생성
+        h = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=16).digest(), "little")
+        h1, h2 = h & 0xFFFFFFFFFFFFFFFF, (h >> 64) | 1
+        m = self.m
+        return [(h1 + i * h2) % m for i in range(self.k)]
+
+    def add(self, key: str) -> None:
+        bits = self.bits
+        for p in self._positions(key):
+            bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def estimated_fpr(self) -> float:
+        return (1.0 - math.exp(-self.k * self.count / self.m)) ** self.k
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.bits)
+
+class IdempotencyFilter:
+    def __init__(self, window: float = IDEM_WINDOW_SECONDS, capacity: int = IDEM_BLOOM_CAPACITY,
+                 fpr: float = IDEM_BLOOM_FPR, lru_max: int = IDEM_LRU_MAX):
+        self.window = window
+        self.capacity = capacity
+        self.fpr = fpr
+        self.lru_max = lru_max
+        self._current = BloomFilter(capacity, fpr)
+        self._previous = BloomFilter(capacity, fpr)
+        self._rotated_at = time.monotonic()
+        self._recent: "OrderedDict[str, Tuple[Any, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 지표: 캐시 적중 / 확실히 새 키 / 블룸 "있을 수도" → DB에 실제로 있었음 / 없었음(거짓 양성)
+        self.cached = 0
+        self.definitely_new = 0
+        self.maybe_found = 0
+        self.maybe_missing = 0
+
+    def _maybe_rotate(self) -> None:
+        if time.monotonic() - self._rotated_at < self.window and self._current.count < self.capacity:
+            return
+        with self._lock:
+            if time.monotonic() - self._rotated_at < self.window and self._current.count < self.capacity:
+                return
+            self._previous = self._current
+            self._current = BloomFilter(self.capacity, self.fpr)
+            self._rotated_at = time.monotonic()
+
+    def classify(self, keys: Iterable[str]) -> Tuple[Dict[str, Tuple[Any, ...]], List[str], List[str]]:
+        # (LRU에 있는 키 → 값, DB 확인이 필요한 키, 확실히 새 키)
+        self._maybe_rotate()
+        cached: Dict[str, Tuple[Any, ...]] = {}
+        maybe: List[str] = []
+        new: List[str] = []
+        cur, prev = self._current, self._previous
+        with self._lock:
+            for k in keys:
+                v = self._recent.get(k)
+                if v is not None:
+                    self._recent.move_to_end(k)
+                    cached[k] = v
+                elif k in cur or k in prev:
+                    maybe.append(k)
+                else:
+                    new.append(k)
+            self.cached += len(cached)
+            self.definitely_new += len(new)
+        return cached, maybe, new
+
+    def add(self, key: str, *value: Any) -> None:
+        self.add_many([(key, value)])
+
+    def add_many(self, items: Iterable[Tuple[str, Tuple[Any, ...]]]) -> None:
+        self._maybe_rotate()
+        with self._lock:
+            cur, recent = self._current, self._recent
+            for k, v in items:
+                cur.add(k)
+                recent[k] = v
+                recent.move_to_end(k)
+            while len(recent) > self.lru_max:
+                recent.popitem(last=False)
+
+    def record_probe(self, found: int, missing: int) -> None:
+        # 블룸이 "있을 수도"라고 해서 SELECT 했을 때의 결과 (missing은 거짓 양성)
+        self.maybe_found += found
+        self.maybe_missing += missing
+
+    def stats(self) -> Dict[str, float]:
+        negatives = self.maybe_missing + self.definitely_new
+        return {
+            "cached": self.cached,
+            "definitely_new": self.definitely_new,
+            "maybe_found": self.maybe_found,
+            "maybe_missing": self.maybe_missing,
+            "observed_fpr": self.maybe_missing / negatives if negatives else 0.0,
+            "estimated_fpr": 1 - (1 - self._current.estimated_fpr()) * (1 - self._previous.estimated_fpr()),
+            "bloom_bytes": self._current.nbytes + self._previous.nbytes,
+            "lru_entries": len(self._recent),
+            "lru_bytes": self._lru_bytes(),
+        }
+
+    def _lru_bytes(self) -> int:
+        with self._lock:
+            items = list(self._recent.items())
+        return sys.getsizeof(self._recent) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in items)
+
+dedup = IdempotencyFilter()
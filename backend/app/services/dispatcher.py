@@ -0,0 +1,189 @@
+# 알림 발송기: queued 알림을 배치로 점유(FOR UPDATE SKIP LOCKED)해 채널 어댑터로 보내고
+# 결과(sent / 재시도 예약 / dead_letter)를 한 번에 갱신. 채널마다 동시 전송 수와 초당 전송 수를 제한
+import asyncio
+import logging
+import random
+from datetime import timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, or_, select, update
+
+from app.core.config import (
+    ALERT_BACKOFF_BASE, ALERT_BACKOFF_MAX, ALERT_BATCH_SIZE, ALERT_CHANNEL_CONCURRENCY, ALERT_CHANNEL_RATE,
+    ALERT_MAX_ATTEMPTS, ALERT_POLL_INTERVAL, ALERT_SEND_TIMEOUT, ALERT_VISIBILITY_TIMEOUT,
+)
+from app.core.db import SessionLocal
+from app.core.metrics import Counter, Gauge, Histogram
+from app.core.utils import utcnow
+from app.services.channels import AlertMessage, ChannelAdapter, ChannelError, default_adapters
+from app.services.hub import alert_message, hub
+from app.services.ratelimit import TokenBucket
+from models.models import Alert, Incident
+
+log = logging.getLogger(__name__)
+
+alert_queue_depth = Gauge("alert_queue_depth", "Alerts waiting to be sent (queued + sending)")
+alert_send_latency = Histogram("alert_enqueue_to_send_seconds", "Alert created_at to successful send", ["channel"])
+alert_send_total = Counter("alert_send_total", "Alert send attempts by outcome", ["channel", "outcome"])
+
+def jittered_backoff(attempts: int, base: float = ALERT_BACKOFF_BASE, cap: float = ALERT_BACKOFF_MAX) -> float:
+    # equal jitter: 지수 백오프의 절반은 고정, 나머지 절반은 무작위 (동시 실패한 알림이 한꺼번에 재시도하지 않도록)
+    d = min(cap, base * 2 ** max(attempts - 1, 0))
+    return d / 2 + random.uniform(0, d / 2)
+
+# _send 결과: (메시지, 오류 문자열 또는 None, 재시도 가능 여부)
+SendResult = Tuple[AlertMessage, Optional[str], bool]
+
+class AlertDispatcher:
+    def __init__(self, adapters: Optional[Dict[str, ChannelAdapter]] = None, session_factory=SessionLocal,
+                 batch_size: int = ALERT_BATCH_SIZE, max_attempts: int = ALERT_MAX_ATTEMPTS,
+                 concurrency: Optional[Dict[str, float]] = None, rates: Optional[Dict[str, float]] = None,
+                 send_timeout: float = ALERT_SEND_TIMEOUT, visibility_timeout: float = ALERT_VISIBILITY_TIMEOUT):
+        self.adapters = adapters if adapters is not None else default_adapters()
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.send_timeout = send_timeout
+        self.visibility_timeout = visibility_timeout
+        concurrency = ALERT_CHANNEL_CONCURRENCY if concurrency is None else concurrency
+        rates = ALERT_CHANNEL_RATE if rates is None else rates
+        self._sems = {c: asyncio.Semaphore(int(concurrency.get(c, 4))) for c in self.adapters}
+        self._buckets = {c: TokenBucket(r) for c, r in rates.items() if r > 0}
+
+    # --- DB ---
+    def _claim(self, max_items: int) -> List[AlertMessage]:
+        now = utcnow()
+        stale = now - timedelta(seconds=self.visibility_timeout)
+        claimable = (
+            select(Alert.id)
+            .where(or_(
+                (Alert.status == "queued") & (or_(Alert.next_attempt_at.is_(None), Alert.next_attempt_at <= now)),
+                (Alert.status == "sending") & (Alert.locked_at < stale),
+            ))
+            .order_by(Alert.id)
+            .limit(max_items)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(Alert)
+            .where(Alert.id.in_(claimable.scalar_subquery()))
+            .values(status="sending", locked_at=now, attempts=func.coalesce(Alert.attempts, 0) + 1)
+            .returning(Alert.id, Alert.incident_id, Alert.channel, Alert.target, Alert.payload,
+                       Alert.attempts, Alert.created_at)
+        )
+        with self.session_factory() as db:
+            rows = db.execute(stmt).all()
+            db.commit()
+        return [AlertMessage(*r) for r in rows]
+
+    def _finish(self, results: List[SendResult]) -> None:
+        now = utcnow()
+        sent = [m.id for m, err, _ in results if err is None]
+        failed = []
+        for m, err, retryable in results:
+            if err is None:
+                continue
+            if retryable and m.attempts < self.max_attempts:
+                failed.append({"id": m.id, "status": "queued", "error": err, "locked_at": None,
+                               "next_attempt_at": now + timedelta(seconds=jittered_backoff(m.attempts))})
+            else:
+                failed.append({"id": m.id, "status": "dead_letter", "error": err, "locked_at": None,
+                               "next_attempt_at": None})
+        with self.session_factory() as db:
+            if sent:
+                db.execute(
+                    update(Alert).where(Alert.id.in_(sent))
+                    .values(status="sent", sent_at=now, error=None, locked_at=None)
+                )
+            if failed:
+                db.execute(update(Alert), failed)   # 기본키 기준 executemany
+            db.commit()
+            if hub.active:
+                self._publish(db, results, {f["id"]: f["status"] for f in failed})
+
+    def _publish(self, db, results: List[SendResult], failed: Dict[int, str]) -> None:
+        # 같은 프로세스에 실시간 구독자가 있을 때만 장치 id를 찾아 상태 변경을 알림
+        incident_ids = {m.incident_id for m, _, _ in results if m.incident_id}
+        devices = dict(db.execute(
+            select(Incident.id, Incident.device_id).where(Incident.id.in_(incident_ids))
+        ).all()) if incident_ids else {}
+        hub.publish_many(
+            alert_message(m.id, m.incident_id, devices.get(m.incident_id), m.channel,
+                          failed.get(m.id, "sent"), m.attempts)
+            for m, _, _ in results
+        )
+
+    def _depth(self) -> int:
+        with self.session_factory() as db:
+            return db.execute(
+                select(func.count()).select_from(Alert).where(Alert.status.in_(("queued", "sending")))
+            ).scalar_one()
+
+    # --- 전송 ---
+    async def _send(self, msg: AlertMessage) -> SendResult:
+        adapter = self.adapters.get(msg.channel)
+        if adapter is None:
+            alert_send_total.labels(msg.channel, "dead_letter").inc()
+            return msg, f"no adapter for channel {msg.channel!r}", False
+
+        bucket = self._buckets.get(msg.channel)
+        if bucket is not None:
+            await bucket.acquire()
+        async with self._sems[msg.channel]:
+            try:
+                await asyncio.wait_for(adapter.send(msg), self.send_timeout)
+            except ChannelError as e:
+                alert_send_total.labels(msg.channel, "error").inc()
+                return msg, str(e), e.retryable
+            except asyncio.TimeoutError:
+                alert_send_total.labels(msg.channel, "timeout").inc()
+                return msg, f"{msg.channel}: timed out after {self.send_timeout}s", True
+            except Exception as e:
+                alert_send_total.labels(msg.channel, "error").inc()
+                return msg, repr(e), True
+
+        alert_send_total.labels(msg.channel, "sent").inc()
+        if msg.created_at is not None:
+            created = msg.created_at if msg.created_at.tzinfo else msg.created_at.replace(tzinfo=timezone.utc)
+            alert_send_latency.labels(msg.channel).observe((utcnow() - created).total_seconds())
+        return msg, None, True
+
+    async def run_once(self) -> int:
+        batch = await asyncio.to_thread(self._claim, self.batch_size)
+        if batch:
+            results = await asyncio.gather(*(self._send(m) for m in batch))
+            await asyncio.to_thread(self._finish, results)
+        return len(batch)
+
+    async def _loop(self, stop: asyncio.Event, poll_interval: float) -> None:
+        while not stop.is_set():
+            try:
+                n = await self.run_once()
+            except Exception:
+                log.exception("alert dispatch failed")
+                n = 0
+            if n < self.batch_size:
+                try:
+                    await asyncio.wait_for(stop.wait(), poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _sample_depth(self, stop: asyncio.Event, interval: float = 1.0) -> None:
+        while not stop.is_set():
+            try:
+                alert_queue_depth.set(await asyncio.to_thread(self._depth))
+            except Exception as e:
+                log.debug("alert queue depth sample failed: %r", e)
+            try:
+                await asyncio.wait_for(stop.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run(self, stop: asyncio.Event, loops: int = 2, poll_interval: float = ALERT_POLL_INTERVAL) -> None:
+        # 점유 루프를 여러 개 돌려 느린 채널이 있는 배치가 다음 배치 점유를 막지 않게 함
+        try:
+            await asyncio.gather(self._sample_depth(stop),
+                                 *(self._loop(stop, poll_interval) for _ in range(loops)))
+        finally:
+            for a in self.adapters.values():
+                await a.close()
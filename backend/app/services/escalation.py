@@ -0,0 +1,188 @@
+# 에스컬레이션 스케줄러: 인시던트가 열리면 단계별 마감 시각을 타이밍 휠에 등록하고,
+# 확인(Confirmation)·acknowledged/closed 시 O(1)로 취소. 발화한 단계는 escalations 행으로 기록하고
+# 단계 채널로 알림을 적재. 기동 시 DB에서 열린 인시던트의 남은 단계를 복구함
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, insert, select
+
+from app.core.config import ESCALATION_STEPS, ESCALATION_SYNC_SECONDS, ESCALATION_TICK_SECONDS
+from app.core.db import SessionLocal, dialect_insert
+from app.core.metrics import Counter, Gauge, Histogram
+from app.core.utils import utcnow
+from app.services.timerwheel import Timer, TimingWheel
+from models.models import Alert, Confirmation, Escalation, Incident
+
+log = logging.getLogger(__name__)
+
+escalation_pending = Gauge("escalation_pending_timers", "Escalation steps waiting to fire")
+escalation_fire_lag = Histogram("escalation_fire_lag_seconds", "Escalation step fire time minus deadline",
+                                buckets=(0.005, 0.01, 0.02, 0.05, 0.1, 0.25, 1.0, 5.0))
+escalation_fired = Counter("escalation_fired_total", "Escalation steps by result", ["result"])
+
+def _epoch(dt: Optional[datetime]) -> float:
+    if dt is None:
+        return time.time()
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+class EscalationScheduler:
+    def __init__(self, steps=ESCALATION_STEPS, session_factory=SessionLocal, tick: float = ESCALATION_TICK_SECONDS):
+        self.steps = tuple(steps)
+        self.session_factory = session_factory
+        self.wheel = TimingWheel(tick, now=time.time())
+        self._timers: Dict[str, List[Timer]] = {}   # incident_id -> 대기 중인 단계 타이머
+        self._lock = threading.Lock()
+        self._watermark: Optional[datetime] = None
+        self.running = False
+
+    def __len__(self) -> int:
+        return len(self.wheel)
+
+    # --- 등록 / 취소 ---
+    def register(self, incident_id: Any, opened_at: Any = None, done_steps: int = 0) -> None:
+        # 스케줄러가 돌지 않는 프로세스(워커 등)에서는 무시: 실행 중인 스케줄러가 DB 동기화로 가져감
+        if not self.running:
+            return
+        key = str(incident_id)
+        base = opened_at if isinstance(opened_at, float) else _epoch(opened_at)
+        with self._lock:
+            if key in self._timers:
+                return
+            self._timers[key] = [
+                self.wheel.add(Timer(base + delay, key, (n, action, channels)))
+                for n, (delay, action, channels) in enumerate(self.steps, start=1)
+                if n > done_steps
+            ]
+
+    def cancel(self, incident_id: Any) -> int:
+        with self._lock:
+            timers = self._timers.pop(str(incident_id), None) or []
+            return sum(self.wheel.cancel(t) for t in timers)
+
+    def _fire(self, t: Timer) -> None:
+        timers = self._timers.get(t.key)
+        if timers is not None:
+            timers.remove(t)
+            if not timers:
+                del self._timers[t.key]
+
+    def advance(self, now: float) -> List[Timer]:
+        with self._lock:
+            fired = self.wheel.advance(now, self._fire)
+        for t in fired:
+            escalation_fire_lag.observe(now - t.deadline)
+        escalation_pending.set(len(self.wheel))
+        return fired
+
+    # --- DB ---
+    def _record(self, fired: List[Timer]) -> int:
+        # 아직 open이고 확인이 없는 인시던트만 실행. (incident_id, step) 유니크라 다른 프로세스와 겹쳐도 한 번만
+        import uuid
+        from app.services import timeline
+        from app.services.pipeline import alert_values
+
+        now = utcnow()
+        ids = {uuid.UUID(t.key) for t in fired}
+        with self.session_factory() as db:
+            live = dict(db.execute(
+                select(Incident.id, Incident.risk_level)
+                .where(Incident.id.in_(ids), Incident.status == "open")
+                .where(~select(Confirmation.id).where(Confirmation.incident_id == Incident.id).exists())
+            ).all())
+            rows = [
+                {"incident_id": uuid.UUID(t.key), "step": t.data[0], "action": t.data[1], "executed_at": now,
+                 "result": "fired", "meta": {"deadline": t.deadline, "channels": list(t.data[2])}}
+                for t in fired if uuid.UUID(t.key) in live
+            ]
+            escalation_fired.labels("skipped").inc(len(fired) - len(rows))
+            if not rows:
+                return 0
+            recorded = db.execute(
+                dialect_insert(db, Escalation).values(rows)
+                .on_conflict_do_nothing(index_elements=["incident_id", "step"])
+                .returning(Escalation.id, Escalation.incident_id, Escalation.step, Escalation.action)
+            ).all()
+            done = {(r.incident_id, r.step) for r in recorded}
+            entries = [timeline.escalation_entry(r.incident_id, r.id, now, r.step, r.action) for r in recorded]
+            alerts = [
+                alert_values(str(r["incident_id"]), live[r["incident_id"]] or "HIGH", ch)
+                | {"payload": {"risk_level": live[r["incident_id"]], "escalation_step": r["step"],
+                               "action": r["action"]}}
+                for r in rows if (r["incident_id"], r["step"]) in done
+                for ch in r["meta"]["channels"]
+            ]
+            if alerts:
+                for a in db.execute(
+                    insert(Alert).returning(Alert.id, Alert.incident_id, Alert.channel, Alert.target, Alert.payload),
+                    alerts,
+                ):
+                    entries.append(timeline.alert_entry(a.incident_id, a.id, now, a.channel, a.target, a.payload))
+            timeline.append_many(db, entries)
+            db.commit()
+        escalation_fired.labels("fired").inc(len(done))
+        return len(done)
+
+    def recover(self) -> int:
+        # 열린 인시던트와 이미 실행한 마지막 단계를 한 번에 읽어 남은 단계만 등록
+        with self.session_factory() as db:
+            q = (
+                select(Incident.id, Incident.opened_at, func.coalesce(func.max(Escalation.step), 0))
+                .outerjoin(Escalation, Escalation.incident_id == Incident.id)
+                .where(Incident.status == "open")
+                .where(~select(Confirmation.id).where(Confirmation.incident_id == Incident.id).exists())
+                .group_by(Incident.id, Incident.opened_at)
+            )
+            if self._watermark is not None:
+                # 커밋이 늦게 보이는 인시던트를 놓치지 않도록 여유를 두고 겹쳐 읽음 (중복 등록은 무시됨)
+                q = q.where(Incident.opened_at > self._watermark - timedelta(seconds=30))
+            rows = db.execute(q).all()
+        n = 0
+        for incident_id, opened_at, done in rows:
+            if done < len(self.steps):
+                self.register(incident_id, opened_at, done)
+                n += 1
+            if opened_at is not None and (self._watermark is None or opened_at > self._watermark):
+                self._watermark = opened_at
+        return n
+
+    async def _record_async(self, fired: List[Timer]) -> None:
+        try:
+            await asyncio.to_thread(self._record, fired)
+        except Exception:
+            escalation_fired.labels("error").inc(len(fired))
+            log.exception("failed to record %d escalation step(s)", len(fired))
+
+    # --- 실행 루프 ---
+    async def run(self, stop: asyncio.Event, sync_interval: float = ESCALATION_SYNC_SECONDS) -> None:
+        self.running = True
+        await asyncio.to_thread(self.recover)
+        writes: set = set()
+        next_sync = time.monotonic() + sync_interval
+        try:
+            while not stop.is_set():
+                fired = self.advance(time.time())
+                if fired:
+                    # DB 기록은 스레드에서: 틱 루프가 밀리지 않도록 기다리지 않음
+                    task = asyncio.create_task(self._record_async(fired))
+                    writes.add(task)
+                    task.add_done_callback(writes.discard)
+                if time.monotonic() >= next_sync:
+                    # 다른 프로세스에서 열린 인시던트 (같은 인시던트는 register가 무시)
+                    next_sync = time.monotonic() + sync_interval
+                    try:
+                        await asyncio.to_thread(self.recover)
+                    except Exception as e:
+                        log.warning("escalation sync failed: %r", e)
+                await asyncio.sleep(self.wheel.tick)
+        finally:
+            self.running = False
+            if writes:
+                await asyncio.gather(*writes, return_exceptions=True)
+
+scheduler = EscalationScheduler()
@@ -0,0 +1,137 @@
+# events / incidents 내보내기: 서버측 커서(stream_results + yield_per)로 청크 단위로 읽어
+# NDJSON / CSV 바이트로 바꿔 흘려보냄. 메모리는 청크 크기에만 비례.
+# HTTP 응답(StreamingResponse)과 scripts/export_dataset.py(Parquet/Arrow)가 같은 생성기를 씀
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import select
+
+from app.core.db import SessionLocal
+from app.core.jsonlib import dumps
+from app.core.utils import as_utc
+from models.models import Confirmation, Event, Incident
+
+EXPORT_CHUNK_ROWS = 5000
+
+EVENT_COLUMNS = ("id", "device_id", "event_type", "payload", "risk_score", "risk_level",
+                 "occurred_at", "received_at")
+INCIDENT_COLUMNS = ("id", "device_id", "status", "category", "risk_level", "top_signals",
+                    "opened_at", "acknowledged_at", "closed_at", "decision")
+
+def event_query(device_id: Optional[UUID] = None, from_: Optional[datetime] = None,
+                to: Optional[datetime] = None, risk_level: Optional[str] = None):
+    q = select(*(getattr(Event, c) for c in EVENT_COLUMNS))
+    if device_id:
+        q = q.where(Event.device_id == device_id)
+    if from_:
+        q = q.where(Event.occurred_at >= as_utc(from_))
+    if to:
+        q = q.where(Event.occurred_at < as_utc(to))
+    if risk_level:
+        q = q.where(Event.risk_level == risk_level.upper())
+    return q.order_by(Event.occurred_at, Event.id)
+
+def incident_query(device_id: Optional[UUID] = None, from_: Optional[datetime] = None,
+                   to: Optional[datetime] = None, risk_level: Optional[str] = None):
+    # 오탐 라벨링용으로 마지막 사용자 확인(decision)을 함께 내보냄
+    decision = (
+        select(Confirmation.decision)
+        .where(Confirmation.incident_id == Incident.id)
+        .order_by(Confirmation.decided_at.desc())
+        .limit(1)
+        .scalar_subquery()
+        .label("decision")
+    )
+    q = select(*(getattr(Incident, c) for c in INCIDENT_COLUMNS[:-1]), decision)
+    if device_id:
+        q = q.where(Incident.device_id == device_id)
+    if from_:
+        q = q.where(Incident.opened_at >= as_utc(from_))
+    if to:
+        q = q.where(Incident.opened_at < as_utc(to))
+    if risk_level:
+        q = q.where(Incident.risk_level == risk_level.upper())
+    return q.order_by(Incident.opened_at, Incident.id)
+
+def iter_chunks(query, chunk_rows: int = EXPORT_CHUNK_ROWS, session_factory=SessionLocal) -> Iterator[List[tuple]]:
+    # 응답이 끝날 때까지 살아 있어야 하므로 요청 의존성 세션이 아닌 자체 세션 사용
+    with session_factory() as db:
+        result = db.execute(query, execution_options={"stream_results": True, "yield_per": chunk_rows})
+        for part in result.partitions():
+            yield part
+
+def _plain(v: Any) -> Any:
+    if isinstance(v, UUID):
+        return str(v)
+    if isinstance(v, Decimal):
+        return float(v)
+    if isinstance(v, datetime):
+        return as_utc(v).isoformat()
+    return v
+
+def ndjson_bytes(columns: Sequence[str], chunks: Iterable[List[tuple]]) -> Iterator[bytes]:
+    for part in chunks:
+        yield b"".join(dumps({c: _plain(v) for c, v in zip(columns, row)}) + b"\n" for row in part)
+
+def csv_bytes(columns: Sequence[str], chunks: Iterable[List[tuple]]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    w.writerow(columns)
+    for part in chunks:
+        for row in part:
+            w.writerow([json.dumps(v, separators=(",", ":")) if isinstance(v, (dict, list)) else _plain(v)
+                        for v in row])
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode()
+
+def gzip_bytes(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    z = zlib.compressobj(level, zlib.DEFLATED, 31)   # wbits 31 = gzip 헤더
+    for b in chunks:
+        out = z.compress(b)
+        if out:
+            yield out
+    yield z.flush()
+
+def rows_as_dicts(columns: Sequence[str], chunks: Iterable[List[tuple]]) -> Iterator[Dict[str, list]]:
+    # 열 단위 dict (Arrow RecordBatch 변환용). 시각은 datetime(UTC) 그대로, JSON 열은 문자열로
+    def conv(v: Any) -> Any:
+        if isinstance(v, datetime):
+            return as_utc(v)
+        if isinstance(v, (dict, list)):
+            return json.dumps(v, separators=(",", ":"))
+        return _plain(v)
+
+    for part in chunks:
+        cols: Dict[str, list] = {c: [] for c in columns}
+        for row in part:
+            for c, v in zip(columns, row):
+                cols[c].append(conv(v))
+        yield cols
+
+def stream(kind: str, fmt: str, compress: bool, **filters) -> Iterator[bytes]:
+    if kind == "events":
+        columns, query = EVENT_COLUMNS, event_query(**filters)
+    else:
+        columns, query = INCIDENT_COLUMNS, incident_query(**filters)
+    out = (csv_bytes if fmt == "csv" else ndjson_bytes)(columns, iter_chunks(query))
+    return gzip_bytes(out) if compress else out
+
+def export_response(kind: str, fmt: str, compress: bool, **filters):
+    from fastapi.responses import StreamingResponse
+
+    media = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    filename = f"{kind}.{fmt}" + (".gz" if compress else "")
+    return StreamingResponse(
+        stream(kind, fmt, compress, **filters),
+        media_type="application/gzip" if compress else media,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
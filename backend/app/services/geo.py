@@ -0,0 +1,215 @@
+# 장치 위치 공간 인덱스: 위/경도를 고정 크기 격자 칸(GEO_CELL_DEG)으로 나눈 버킷에 장치 정수 키를 둠.
+# 반경/사각형 조회는 겹치는 칸만 훑고 칸 안에서 좌표로 거름 → 장치 수와 무관하게 주변 몇 칸의 장치만 봄.
+# 레지스트리(registry.py)가 적재/갱신할 때 같이 채우므로 Postgres의 location JSONB를 훑지 않음.
+# 위치는 등록 시 parse_location으로 Device.lat/lon에 정규화해 저장
+import heapq
+import math
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.config import GEO_CELL_DEG
+
+EARTH_RADIUS_M = 6_371_008.8
+
+def _coord(v: Any, limit: float) -> Optional[float]:
+    try:
+        x = float(v)
+    except (TypeError, ValueError):
+        return None
+    return x if math.isfinite(x) and -limit <= x <= limit else None
+
+def parse_location(location: Any) -> Optional[Tuple[float, float]]:
+    # 자유 형식 location에서 (lat, lon): {"lat","lon"|"lng"} / {"latitude","longitude"} /
+    # GeoJSON Point {"type":"Point","coordinates":[lon, lat]} / {"geometry": Point}. 못 읽으면 None
+    if not isinstance(location, dict):
+        return None
+    if isinstance(location.get("geometry"), dict):
+        return parse_location(location["geometry"])
+    coords = location.get("coordinates")
+    if isinstance(coords, (list, tuple)) and len(coords) >= 2:
+        lat, lon = _coord(coords[1], 90), _coord(coords[0], 180)
+    else:
+        lat = _coord(location.get("lat", location.get("latitude")), 90)
+        lon = _coord(location.get("lon", location.get("lng", location.get("longitude"))), 180)
+    return (lat, lon) if lat is not None and lon is not None else None
+
+def distance_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    # 하버사인 (구면 근사, 수 km 범위에서 오차 0.5% 이하)
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+def _boxes(min_lat: float, max_lat: float, min_lon: float, max_lon: float) -> List[Tuple[float, float, float, float]]:
+    # 날짜변경선을 넘는 범위는 두 사각형으로 나눔 (min_lon > max_lon도 넘는 것으로 봄)
+    min_lat, max_lat = max(-90.0, min_lat), min(90.0, max_lat)
+    if max_lon - min_lon >= 360:
+        return [(min_lat, max_lat, -180.0, 180.0)]
+    if min_lon < -180:
+        return [(min_lat, max_lat, min_lon + 360, 180.0), (min_lat, max_lat, -180.0, max_lon)]
+    if max_lon > 180:
+        return [(min_lat, max_lat, min_lon, 180.0), (min_lat, max_lat, -180.0, max_lon - 360)]
+    if min_lon > max_lon:
+        return [(min_lat, max_lat, min_lon, 180.0), (min_lat, max_lat, -180.0, max_lon)]
+    return [(min_lat, max_lat, min_lon, max_lon)]
+
+class GeoIndex:
+    def __init__(self, cell_deg: float = GEO_CELL_DEG):
+        self.cell = cell_deg
+        self._cols = int(math.ceil(360 / cell_deg))
+        self._rows = int(math.ceil(180 / cell_deg)) + 1
+        self._cells: Dict[int, Dict[int, Tuple[float, float]]] = {}   # 칸 번호 -> {장치 키: (lat, lon)}
+        self._where: Dict[int, int] = {}                               # 장치 키 -> 칸 번호
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def _row(self, lat: float) -> int:
+        return int((lat + 90) // self.cell)
+
+    def _col(self, lon: float) -> int:
+        return int((lon + 180) // self.cell) % self._cols   # 경도 180 = -180
+
+    def _cell_of(self, lat: float, lon: float) -> int:
+        return self._row(lat) * self._cols + self._col(lon)
+
+    # --- 갱신 ---
+    def _put(self, key: int, lat: float, lon: float) -> None:
+        cell = self._cell_of(lat, lon)
+        old = self._where.get(key)
+        if old is not None and old != cell:
+            self._drop(key, old)
+        self._cells.setdefault(cell, {})[key] = (lat, lon)
+        self._where[key] = cell
+
+    def _drop(self, key: int, cell: int) -> None:
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.pop(key, None)
+            if not bucket:
+                del self._cells[cell]
+
+    def put(self, key: int, lat: float, lon: float) -> None:
+        with self._lock:
+            self._put(key, lat, lon)
+
+    def remove(self, key: int) -> None:
+        with self._lock:
+            cell = self._where.pop(key, None)
+            if cell is not None:
+                self._drop(key, cell)
+
+    def load(self, points: Iterable[Tuple[int, float, float]]) -> int:
+        # 전체 재적재: 새 인덱스를 잠금 밖에서 만들고 통째로 교체 (조회를 오래 막지 않도록)
+        fresh = GeoIndex(self.cell)
+        for key, lat, lon in points:
+            fresh._put(key, lat, lon)
+        with self._lock:
+            self._cells, self._where = fresh._cells, fresh._where
+        return len(fresh)
+
+    # --- 조회 (호출자가 잠금을 잡은 상태에서) ---
+    def _cells_in(self, la0: float, la1: float, lo0: float, lo1: float) -> Iterator[Tuple[int, int, int]]:
+        # 사각형과 겹치는 비어 있지 않은 칸: (칸 번호, 행, 열)
+        r0, r1 = self._row(la0), self._row(la1)
+        c0, c1 = self._col(lo0), min(self._cols - 1, int((lo1 + 180) // self.cell))
+        cols = self._cols
+        if (r1 - r0 + 1) * (c1 - c0 + 1) <= len(self._cells):
+            for r in range(r0, r1 + 1):
+                for c in range(c0, c1 + 1):
+                    if r * cols + c in self._cells:
+                        yield r * cols + c, r, c
+        else:
+            # 범위가 넓으면 비어 있지 않은 칸만 훑는 편이 적음
+            for cell in self._cells:
+                r, c = divmod(cell, cols)
+                if r0 <= r <= r1 and c0 <= c <= c1:
+                    yield cell, r, c
+
+    def _cell_d2(self, lat: float, lon: float, k: float, r: int, c: int) -> float:
+        # 점에서 칸까지 최소 거리² (아래 nearby와 같은 근사 거리, 도 단위)
+        la0 = r * self.cell - 90
+        dy = max(0.0, la0 - lat, lat - (la0 + self.cell))
+        lo0 = c * self.cell - 180
+        dx = min(max(0.0, lo0 - x, x - (lo0 + self.cell)) for x in (lon, lon - 360, lon + 360)) * k
+        return dx * dx + dy * dy
+
+    def _ring(self, rc: int, cc: int, i: int, m: int) -> Iterator[Tuple[int, int]]:
+        # 중심 칸에서 i번째 고리: 행 ±i, 열 ±i·m (m = 위도 배율을 맞추는 열 배수, 경도 한 바퀴에서 멈춤)을
+        # 덮는 사각형에서 i-1번째 사각형을 뺀 칸 (행, 열). 열은 호출자가 % _cols
+        half = self._cols // 2
+        w, w0 = min(i * m, half), min((i - 1) * m, half)
+        for r in ((rc,) if i == 0 else (rc - i, rc + i)):
+            if 0 <= r < self._rows:
+                yield from ((r, c) for c in range(cc - w, cc + w + 1))
+        if i and w > w0:
+            for r in range(max(0, rc - i + 1), min(self._rows, rc + i)):
+                yield from ((r, c) for c in range(cc - w, cc - w0))
+                yield from ((r, c) for c in range(cc + w0 + 1, cc + w + 1))
+
+    def nearby(self, lat: float, lon: float, radius_m: float, limit: int = 50) -> List[Tuple[int, float, float, float]]:
+        # 반경 안의 장치를 가까운 순으로: (키, lat, lon, 거리 m).
+        # 중심 칸부터 고리 단위로 넓혀 가며, 다음 고리의 최소 거리가 반경이나 이미 찾은 limit개 중 가장 먼 것보다
+        # 멀면 멈춤 → 밀집 지역은 주변 몇 칸, 한산한 지역은 반경까지만.
+        # 후보 비교는 등장방형 근사(위도 cos 배율), 돌려줄 limit개만 하버사인으로 다시 계산
+        rdeg = math.degrees(radius_m / EARTH_RADIUS_M)
+        k = max(math.cos(math.radians(lat)), 1e-9)
+        m = min(self._cols, math.ceil(1 / k))
+        r2 = rdeg * rdeg
+        rc, cc = self._row(lat), self._col(lon)
+        best: List[Tuple[float, int, float, float]] = []   # (-거리², 키, lat, lon) 최대 힙
+        seen = set()
+        with self._lock:
+            for i in range(int(rdeg / self.cell) + 2):
+                edge = max(0.0, (i - 1) * self.cell)   # 고리 i 칸까지의 최소 거리 하한
+                if edge * edge > (r2 if len(best) < limit else -best[0][0]):
+                    break
+                for r, c in self._ring(rc, cc, i, m):
+                    cell = r * self._cols + c % self._cols
+                    bucket = self._cells.get(cell)
+                    if not bucket or cell in seen:
+                        continue
+                    seen.add(cell)
+                    if self._cell_d2(lat, lon, k, r, c) > (r2 if len(best) < limit else -best[0][0]):
+                        continue
+                    for key, (la, lo) in bucket.items():
+                        dx = lo - lon
+                        if dx > 180:
+                            dx -= 360
+                        elif dx < -180:
+                            dx += 360
+                        dx *= k
+                        dy = la - lat
+                        d2 = dx * dx + dy * dy
+                        if d2 <= r2:
+                            if len(best) < limit:
+                                heapq.heappush(best, (-d2, key, la, lo))
+                            elif d2 < -best[0][0]:
+                                heapq.heapreplace(best, (-d2, key, la, lo))
+        found = sorted((distance_m(lat, lon, la, lo), key, la, lo) for _, key, la, lo in best)
+        return [(key, la, lo, d) for d, key, la, lo in found if d <= radius_m]
+
+    def within(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float,
+               limit: Optional[int] = None) -> List[int]:
+        # 사각형 안의 장치 키. 통째로 들어오는 칸은 좌표 비교 없이 복사, 경계 칸만 거름.
+        # limit을 주면 limit개를 넘는 순간 멈춤 (호출자가 초과 여부를 판단)
+        keys: List[int] = []
+        with self._lock:
+            for la0, la1, lo0, lo1 in _boxes(min_lat, max_lat, min_lon, max_lon):
+                for cell, r, c in self._cells_in(la0, la1, lo0, lo1):
+                    bucket = self._cells[cell]
+                    cla, clo = r * self.cell - 90, c * self.cell - 180
+                    if la0 <= cla and cla + self.cell <= la1 and lo0 <= clo and clo + self.cell <= lo1:
+                        keys.extend(bucket)
+                    else:
+                        keys.extend(key for key, (la, lo) in bucket.items()
+                                    if la0 <= la <= la1 and lo0 <= lo <= lo1)
+                    if limit is not None and len(keys) > limit:
+                        return keys
+        return keys
+
+    def stats(self) -> Dict[str, int]:
+        return {"devices": len(self._where), "cells": len(self._cells)}
+
+geo_index = GeoIndex()
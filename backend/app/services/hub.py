@@ -0,0 +1,196 @@
+# 실시간 푸시 허브: 인시던트/알림 변경을 프로세스 안에서 WebSocket·SSE 구독자에게 팬아웃.
+# 구독자는 장치 id / 소유자 id(없으면 전체)로 걸러지고, 메시지는 발행 시 한 번만 JSON으로 직렬화.
+# 구독자마다 (종류, id) 키의 제한된 대기열을 두어 같은 엔티티의 밀린 변경은 최신 것 하나로 합치고,
+# 가득 차면 가장 오래된 것을 버림 (느린 클라이언트가 허브나 다른 구독자를 막지 않도록).
+# 허브는 프로세스 단위 — 별도 프로세스(워커/발송기)의 변경은 해당 프로세스 안에서만 발행됨
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import HUB_HEARTBEAT_SECONDS, HUB_MAX_PENDING
+from app.core.jsonlib import dumps
+from app.core.metrics import Counter, Gauge
+from app.services.registry import registry
+from app.services.state import device_key
+
+hub_subscribers = Gauge("hub_subscribers", "Connected push subscribers")
+hub_messages_total = Counter("hub_messages_total", "Push messages by outcome", ["outcome"])
+
+_delivered = hub_messages_total.labels("delivered")
+_coalesced = hub_messages_total.labels("coalesced")
+_dropped = hub_messages_total.labels("dropped")
+
+# 발행 단위: (합치기 키, 장치 정수 키, 소유자 정수 키, 직렬화된 JSON)
+Packet = Tuple[Tuple[str, str], Optional[int], Optional[int], str]
+
+def incident_message(inc: Any, action: str) -> Dict[str, Any]:
+    return {
+        "type": "incident",
+        "action": action,
+        "id": str(inc.id),
+        "device_id": str(inc.device_id) if inc.device_id else None,
+        "status": inc.status,
+        "risk_level": inc.risk_level,
+        "category": inc.category,
+    }
+
+def alert_message(alert_id: Any, incident_id: Any, device_id: Any, channel: str, status: str,
+                  attempts: Optional[int] = None) -> Dict[str, Any]:
+    return {
+        "type": "alert",
+        "id": str(alert_id),
+        "incident_id": str(incident_id) if incident_id else None,
+        "device_id": str(device_id) if device_id else None,
+        "channel": channel,
+        "status": status,
+        "attempts": attempts,
+    }
+
+class Subscriber:
+    __slots__ = ("owners", "devices", "pending", "max_pending", "wake", "dropped", "closed")
+
+    def __init__(self, owners: Set[int], devices: Set[int], max_pending: int):
+        self.owners = owners
+        self.devices = devices
+        self.pending: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self.max_pending = max_pending
+        self.wake = asyncio.Event()
+        self.dropped = 0
+        self.closed = False
+
+    def offer(self, key: Tuple[str, str], text: str) -> None:
+        # 이벤트 루프 스레드에서만 호출됨
+        p = self.pending
+        if key in p:
+            p[key] = text
+            p.move_to_end(key)
+            _coalesced.inc()
+        else:
+            if len(p) >= self.max_pending:
+                p.popitem(last=False)
+                self.dropped += 1
+                _dropped.inc()
+            p[key] = text
+        self.wake.set()
+
+    async def next_batch(self, timeout: float = HUB_HEARTBEAT_SECONDS) -> Optional[List[str]]:
+        # 밀린 메시지를 한꺼번에 꺼냄. timeout 동안 아무것도 없으면 None (하트비트 보낼 차례)
+        if not self.pending:
+            self.wake.clear()
+            try:
+                await asyncio.wait_for(self.wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        batch = list(self.pending.values())
+        self.pending.clear()
+        _delivered.inc(len(batch))
+        return batch
+
+class Hub:
+    def __init__(self, max_pending: int = HUB_MAX_PENDING):
+        self.max_pending = max_pending
+        self._all: Set[Subscriber] = set()
+        self._by_device: Dict[int, Set[Subscriber]] = {}
+        self._by_owner: Dict[int, Set[Subscriber]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._count = 0
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+
+    @property
+    def active(self) -> bool:
+        return self._count > 0
+
+    # --- 구독 (이벤트 루프 스레드) ---
+    def subscribe(self, owner_ids: Iterable[Any] = (), device_ids: Iterable[Any] = ()) -> Subscriber:
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        sub = Subscriber({device_key(o) for o in owner_ids}, {device_key(d) for d in device_ids},
+                         self.max_pending)
+        if not sub.owners and not sub.devices:
+            self._all.add(sub)
+        for k in sub.devices:
+            self._by_device.setdefault(k, set()).add(sub)
+        for k in sub.owners:
+            self._by_owner.setdefault(k, set()).add(sub)
+        self._count += 1
+        hub_subscribers.set(self._count)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        if sub.closed:
+            return
+        sub.closed = True
+        self._all.discard(sub)
+        for index, keys in ((self._by_device, sub.devices), (self._by_owner, sub.owners)):
+            for k in keys:
+                subs = index.get(k)
+                if subs is not None:
+                    subs.discard(sub)
+                    if not subs:
+                        del index[k]
+        self._count -= 1
+        hub_subscribers.set(self._count)
+
+    # --- 발행 (아무 스레드) ---
+    def publish(self, msg: Dict[str, Any]) -> None:
+        self.publish_many([msg])
+
+    def publish_many(self, msgs: Iterable[Dict[str, Any]]) -> None:
+        loop = self._loop
+        if loop is None or not self._count:
+            return
+        packets = [self._pack(m) for m in msgs]
+        if not packets:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._fanout(packets)
+        elif not loop.is_closed():
+            loop.call_soon_threadsafe(self._fanout, packets)
+
+    @staticmethod
+    def _pack(msg: Dict[str, Any]) -> Packet:
+        dev = msg.get("device_id")
+        info = registry.get(dev) if dev else None
+        return ((msg["type"], msg["id"]), device_key(dev) if dev else None,
+                info.owner_id if info is not None else None, dumps(msg).decode())
+
+    def _fanout(self, packets: List[Packet]) -> None:
+        for key, dev, owner, text in packets:
+            targets = set(self._all)
+            if dev is not None:
+                targets.update(self._by_device.get(dev, ()))
+            if owner is not None:
+                targets.update(self._by_owner.get(owner, ()))
+            for sub in targets:
+                sub.offer(key, text)
+
+hub = Hub()
+
+# --- 커밋 후 발행 ---
+# 파이프라인 함수는 commit 여부를 호출자가 정하므로, 메시지를 세션에 쌓아 두고 실제 커밋 뒤에만 내보냄
+_PENDING = "hub_pending"
+
+def publish_on_commit(db: Any, msg: Dict[str, Any]) -> None:
+    if not hub.active:
+        return
+    session = getattr(db, "sync_session", db)   # AsyncSession이면 내부 동기 Session
+    session.info.setdefault(_PENDING, []).append(msg)
+
+@event.listens_for(Session, "after_commit")
+def _flush_pending(session: Session) -> None:
+    msgs = session.info.pop(_PENDING, None)
+    if msgs:
+        hub.publish_many(msgs)
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(session: Session) -> None:
+    session.info.pop(_PENDING, None)
@@ -0,0 +1,181 @@
+# events 시간 파티션 관리 (Postgres). occurred_at RANGE 파티션을 월/일 단위로 미리 만들고,
+# 보존 기간이 지난 파티션은 DELETE 대신 DETACH + DROP으로 통째로 제거.
+# 파티션이 아닌 테이블(이전 스키마 / SQLite)은 EVENTS_RETENTION_DELETE_ROWS를 켰을 때만 작은 묶음 DELETE로 정리
+import logging
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import delete, select, text
+
+from app.core.config import (
+    EVENTS_MAINTENANCE_SECONDS, EVENTS_PARTITION_INTERVAL, EVENTS_PARTITIONS_AHEAD, EVENTS_RETENTION_BATCH,
+    EVENTS_RETENTION_DAYS, EVENTS_RETENTION_DELETE_ROWS,
+)
+from app.core.utils import utcnow
+from models.models import Event, EventKey
+
+log = logging.getLogger(__name__)
+
+# 모델(Event)과 같은 열. PK/유니크에 파티션 키 occurred_at 포함
+PARTITIONED_DDL = [
+    """
+    CREATE TABLE events (
+        id bigint GENERATED BY DEFAULT AS IDENTITY,
+        device_id uuid REFERENCES devices(id),
+        event_type text,
+        payload jsonb,
+        risk_score numeric,
+        risk_level text,
+        occurred_at timestamptz NOT NULL,
+        received_at timestamptz,
+        idx_idempotency text,
+        incident_id uuid REFERENCES incidents(id),
+        PRIMARY KEY (id, occurred_at),
+        CONSTRAINT uq_events_idempotency UNIQUE (idx_idempotency, occurred_at)
+    ) PARTITION BY RANGE (occurred_at)
+    """,
+    "CREATE INDEX idx_events_device_occurred ON events (device_id, occurred_at DESC, id DESC)",
+    "CREATE INDEX idx_events_incident ON events (incident_id) WHERE incident_id IS NOT NULL",
+    # 범위 밖 행을 잃지 않도록 기본 파티션 (정상 운영에서는 비어 있어야 함)
+    "CREATE TABLE events_default PARTITION OF events DEFAULT",
+    # 키당 1행 가드 (models.EventKey). 파티션이 아니므로 키만으로 유니크
+    """
+    CREATE TABLE IF NOT EXISTS event_keys (
+        idx_idempotency text PRIMARY KEY,
+        event_id bigint NOT NULL,
+        occurred_at timestamptz NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_event_keys_occurred ON event_keys (occurred_at)",
+]
+
+_NAME = re.compile(r"^events_p(\d{8})$")
+
+def _floor(dt: datetime, interval: str) -> datetime:
+    dt = dt.astimezone(timezone.utc)
+    if interval == "day":
+        return datetime(dt.year, dt.month, dt.day, tzinfo=timezone.utc)
+    return datetime(dt.year, dt.month, 1, tzinfo=timezone.utc)
+
+def _next(start: datetime, interval: str) -> datetime:
+    if interval == "day":
+        return start + timedelta(days=1)
+    return datetime(start.year + start.month // 12, start.month % 12 + 1, 1, tzinfo=timezone.utc)
+
+def partition_for(dt: datetime, interval: str = EVENTS_PARTITION_INTERVAL) -> Tuple[str, datetime, datetime]:
+    start = _floor(dt, interval)
+    return f"events_p{start:%Y%m%d}", start, _next(start, interval)
+
+def is_partitioned(conn) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('events')"
+    )).first() is not None
+
+def list_partitions(conn) -> List[Tuple[str, datetime]]:
+    # (이름, 시작 시각). 이름 규칙(events_pYYYYMMDD)을 따르는 파티션만
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'events'::regclass"
+    )).scalars()
+    out = []
+    for name in rows:
+        m = _NAME.match(name)
+        if m:
+            out.append((name, datetime.strptime(m.group(1), "%Y%m%d").replace(tzinfo=timezone.utc)))
+    return sorted(out, key=lambda x: x[1])
+
+def ensure_partitions(conn, now: Optional[datetime] = None, ahead: int = EVENTS_PARTITIONS_AHEAD,
+                      interval: str = EVENTS_PARTITION_INTERVAL, since: Optional[datetime] = None) -> List[str]:
+    # since(기본: 현재)부터 현재 + ahead 구간까지 파티션이 있도록 생성
+    now = now or utcnow()
+    start = _floor(since or now, interval)
+    end = _floor(now, interval)
+    for _ in range(ahead):
+        end = _next(end, interval)
+    created = []
+    while start <= end:
+        name, lo, hi = partition_for(start, interval)
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF events "
+            f"FOR VALUES FROM ('{lo.isoformat()}') TO ('{hi.isoformat()}')"
+        ))
+        created.append(name)
+        start = hi
+    return created
+
+def apply_retention(conn, now: Optional[datetime] = None, days: int = EVENTS_RETENTION_DAYS,
+                    interval: str = EVENTS_PARTITION_INTERVAL) -> int:
+    # 파티션 끝이 보존 기준보다 이전이면 통째로 제거. 반환값: 제거한 파티션 수.
+    # 파티션 테이블이 아니면 아무것도 지우지 않음 (행 삭제는 delete_expired_rows)
+    if days <= 0 or not is_partitioned(conn):
+        return 0
+    cutoff = (now or utcnow()) - timedelta(days=days)
+    dropped = 0
+    for name, start in list_partitions(conn):
+        if _next(start, interval) <= cutoff:
+            conn.execute(text(f"ALTER TABLE events DETACH PARTITION {name}"))
+            conn.execute(text(f"DROP TABLE {name}"))
+            dropped += 1
+    return dropped
+
+def _delete_before(engine, table, pk, cutoff: datetime, batch: int) -> int:
+    # occurred_at이 cutoff 이전인 행을 batch건씩 각자 트랜잭션으로 삭제 (긴 잠금/거대한 트랜잭션 방지)
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            ids = select(pk).where(table.occurred_at < cutoff).limit(batch).scalar_subquery()
+            n = conn.execute(delete(table).where(pk.in_(ids))).rowcount
+        total += n
+        if n < batch:
+            return total
+
+def delete_expired_rows(engine, now: Optional[datetime] = None, days: int = EVENTS_RETENTION_DAYS,
+                        batch: int = EVENTS_RETENTION_BATCH) -> int:
+    # 파티션이 아닌 events에서 보존 기간 지난 행 삭제
+    if days <= 0:
+        return 0
+    return _delete_before(engine, Event, Event.id, (now or utcnow()) - timedelta(days=days), batch)
+
+def delete_expired_keys(engine, now: Optional[datetime] = None, days: int = EVENTS_RETENTION_DAYS,
+                        batch: int = EVENTS_RETENTION_BATCH) -> int:
+    # event_keys는 파티션이 아니라 DROP으로 같이 사라지지 않음: 이벤트와 같은 보존 기준으로 묶음 삭제
+    if days <= 0:
+        return 0
+    return _delete_before(engine, EventKey, EventKey.idx_idempotency, (now or utcnow()) - timedelta(days=days), batch)
+
+_warned_unpartitioned = False
+
+def maintain(engine, now: Optional[datetime] = None) -> dict:
+    global _warned_unpartitioned
+    with engine.begin() as conn:
+        partitioned = is_partitioned(conn)
+        created = ensure_partitions(conn, now) if partitioned else []
+        removed = apply_retention(conn, now)
+    keys_removed = 0
+    if not partitioned and EVENTS_RETENTION_DAYS > 0:
+        if EVENTS_RETENTION_DELETE_ROWS:
+            removed = delete_expired_rows(engine, now)
+        elif not _warned_unpartitioned:
+            _warned_unpartitioned = True
+            log.warning("events is not partitioned: retention (%d days) skipped; run scripts/manage_partitions.py "
+                        "migrate or set EVENTS_RETENTION_DELETE_ROWS=1", EVENTS_RETENTION_DAYS)
+    if partitioned or EVENTS_RETENTION_DELETE_ROWS:
+        keys_removed = delete_expired_keys(engine, now)
+    return {"partitions": created, "retention_removed": removed, "retention_keys_removed": keys_removed}
+
+def start_maintainer(engine, stop: threading.Event, interval: float = EVENTS_MAINTENANCE_SECONDS) -> threading.Thread:
+    def loop():
+        while True:
+            try:
+                maintain(engine)
+            except Exception as e:
+                log.warning("events partition maintenance failed: %r", e)
+            if stop.wait(interval):
+                return
+    t = threading.Thread(target=loop, name="events-partitions", daemon=True)
+    t.start()
+    return t
@@ -1,101 +1,563 @@
-from typing import Tuple, Dict, Any, Optional
+from typing import Tuple, Dict, Any, Optional, List
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import case, delete, func, select, text
+import hashlib
 import uuid
 
+from app.core.config import (
+    ANOMALY_P_CRITICAL, ANOMALY_P_HIGH, ANOMALY_P_MEDIUM, STATE_SUSTAIN_SECONDS, STATE_SUSTAIN_TYPES,
+)
+from app.core.db import dialect_insert
+from app.core.telemetry import observe_lag, stage
 from app.core.utils import utcnow
-from models.models import Event, Incident, Alert
+from app.services import rules, timeline
+from app.services.coalescer import coalescer
+from app.services.dedup import dedup
+from app.services.escalation import scheduler as escalations
+from app.services.hub import publish_on_commit
+from app.services.registry import registry
+from app.services.state import store as device_state
+from app.services.storm import alert_windows, gate as ingest_gate
+from models.models import Event, EventKey, Incident, Alert
 
-def run_detection(body: Dict[str, Any]) -> Tuple[float, str, str, Dict[str, Any]]:
+INCIDENT_LEVELS = ("HIGH", "CRITICAL")
+# events 유니크 제약 (uq_events_idempotency): ON CONFLICT 대상
+EVENT_CONFLICT_KEYS = ["idx_idempotency", "occurred_at"]
+# 키당 1행 보장은 event_keys(idx_idempotency PK) 쪽: 이벤트 INSERT 뒤 같은 트랜잭션에서 키를 선점
+_STORED = (Event.id == EventKey.event_id) & (Event.occurred_at == EventKey.occurred_at)
+_scorer: Any = False   # 아직 안 읽음
+
+def anomaly_scorer():
+    # numpy 임포트(~0.1s)를 모듈 임포트에서 빼 첫 탐지(운영에서는 시작 예열)로 미룸. numpy 미설치 시 None → 규칙 등급만
+    global _scorer
+    if _scorer is False:
+        try:
+            from app.services.scoring import scorer
+        except ImportError:
+            scorer = None
+        _scorer = scorer
+    return _scorer
+
+def idempotency_key(body: Dict[str, Any]) -> str:
+    if body.get("idx_idempotency"):
+        return body["idx_idempotency"]
+    occurred_iso = body["occurred_at"].isoformat()
+    return hashlib.sha1(
+        f"{body['device_id']}:{occurred_iso}:{body['event_type']}".encode()
+    ).hexdigest()
+
+DEFAULT_SCORES = {"intrusion": 0.9, "motion": 0.7, "tamper": 0.6}
+
+def level_for_score(score: float) -> str:
+    if score >= 0.85:
+        return "CRITICAL"
+    if score >= 0.7:
+        return "HIGH"
+    if score >= 0.5:
+        return "MEDIUM"
+    return "LOW"
+
+def anomaly_level(ml_score: float) -> str:
+    # ML 점수(카이제곱 누적확률)는 꼬리 확률 p = 1 - 점수로 등급을 나눔. level_for_score의 경계(0.7/0.85)를
+    # 그대로 쓰면 특징 1개에서 |z| 1.55만 넘어도 HIGH라 정상 값의 10% 넘게 인시던트가 됨
+    p = 1.0 - ml_score
+    if p <= ANOMALY_P_CRITICAL:
+        return "CRITICAL"
+    if p <= ANOMALY_P_HIGH:
+        return "HIGH"
+    if p <= ANOMALY_P_MEDIUM:
+        return "MEDIUM"
+    return "LOW"
+
+Detection = Tuple[float, str, str, Dict[str, Any]]
+
+def run_detection(body: Dict[str, Any]) -> Detection:
+    return run_detection_batch([body])[0]
+
+def run_detection_batch(bodies: List[Dict[str, Any]]) -> List[Detection]:
+    with stage("detection"):
+        return _detect_batch(bodies)
+
+def _detect_batch(bodies: List[Dict[str, Any]]) -> List[Detection]:
+    # ML 점수는 배치 전체를 한 번에 벡터 연산으로 계산한 뒤 이벤트별 규칙 등급과 합침
+    ml_scores: List[Optional[float]] = [None] * len(bodies)
+    scorer = anomaly_scorer()
+    if scorer is not None:
+        feats = scorer.features
+        scored = [
+            i for i, b in enumerate(bodies)
+            if b.get("device_id") is not None and any(f in (b.get("payload") or {}) for f in feats)
+        ]
+        if scored:
+            for i, m in zip(scored, scorer.score_bodies([bodies[i] for i in scored])):
+                ml_scores[i] = m
+    return [_detect(b, m) for b, m in zip(bodies, ml_scores)]
+
+def _detect(body: Dict[str, Any], ml_score: Optional[float]) -> Detection:
     payload = body.get("payload") or {}
     score = payload.get("score")
     level = payload.get("level")
-    category = payload.get("category", "generic")
+    category = payload.get("category")
 
     if score is None:
         et = body.get("event_type") or "unknown"
-        score = {"intrusion": 0.9, "motion": 0.7, "tamper": 0.6}.get(et, 0.4)
+        score = DEFAULT_SCORES.get(et, 0.4)
+
+    # 장치·종류별 링 버퍼에 누적 → 윈도 집계를 규칙에서 "window.*" 필드로 참조
+    window = None
+    if body.get("device_id") is not None:
+        occurred = body.get("occurred_at") or utcnow()
+        window = device_state.observe(body["device_id"], occurred.timestamp(), float(score),
+                                      body.get("event_type")).as_dict()
+        body = {**body, "window": window}
+
+    # 현재 규칙 세트에서 이 event_type에 걸린 규칙만 평가
+    hit = rules.current().evaluate(body)
+    if hit and hit.score is not None and payload.get("score") is None:
+        score = hit.score
 
     if not level:
-        if score >= 0.85:
+        level = level_for_score(score)
+        if hit and _rank(hit.level) > _rank(level):
+            level = hit.level
+        # 임계치 이상이 STATE_SUSTAIN_SECONDS 이상 연속되면 (예: 연기 센서 10초 연속 HIGH) 즉시 CRITICAL.
+        # STATE_SUSTAIN_TYPES에 넣은 센서 종류만
+        if window and body.get("event_type") in STATE_SUSTAIN_TYPES and window["duration_above"] >= STATE_SUSTAIN_SECONDS:
             level = "CRITICAL"
-        elif score >= 0.7:
-            level = "HIGH"
-        elif score >= 0.5:
-            level = "MEDIUM"
-        else:
-            level = "LOW"
-
-    top_signals = {"heuristic": "demo", "inputs": {"event_type": body.get("event_type")}}
+
+    if not category:
+        category = (hit.category if hit else None) or "generic"
+
+    # 최종 리스크 = max(규칙 등급, ML 등급). 점수도 ML 등급이 이겼을 때만 ML 점수로 올림
+    if ml_score is not None:
+        ml_level = anomaly_level(ml_score)
+        if _rank(ml_level) > _rank(level):
+            level = ml_level
+            score = max(float(score), ml_score)
+
+    top_signals = {
+        "heuristic": "rules" if hit else "demo",
+        "rules": list(hit.names) if hit else [],
+        "inputs": {"event_type": body.get("event_type")},
+    }
+    if window:
+        top_signals["window"] = window
+    if ml_score is not None:
+        top_signals["ml_score"] = round(ml_score, 4)
+        top_signals["ml_p"] = float(f"{1.0 - ml_score:.3g}")
     return float(score), str(level), str(category), top_signals
 
-def save_event(db: Session, body: Dict[str, Any], risk_score: float, risk_level: str, idx_idem: Optional[str]) -> int:
-    if idx_idem:
-        existing = db.query(Event).filter_by(idx_idempotency=idx_idem).first()
-        if existing:
-            return existing.id
-    evt = Event(
-        device_id=body.get("device_id"),
-        event_type=body.get("event_type"),
-        payload=body.get("payload"),
-        risk_score=risk_score,
-        risk_level=risk_level,
-        occurred_at=body.get("occurred_at") or utcnow(),
-        received_at=utcnow(),
-        idx_idempotency=idx_idem,
+def _rank(x: str) -> int:
+    return rules.LEVEL_RANK.get((x or "").upper(), 0)
+
+def find_duplicate(db: Session, idx_idem: Optional[str]) -> Optional[Tuple[int, Optional[str]]]:
+    # 이미 저장된 키면 (event_id, 저장된 risk_level). 최근 키는 메모리에서, 블룸이 "있을 수도"라고 할 때만 SELECT
+    if not idx_idem:
+        return None
+    with stage("save_event"):   # 저장 단계의 일부로 집계 (예전 위치)
+        cached, maybe, _ = dedup.classify([idx_idem])
+        if cached:
+            return cached[idx_idem]
+        if not maybe:
+            return None
+        existing = db.execute(stored_event_stmt(idx_idem)).first()
+        dedup.record_probe(existing is not None, existing is None)
+        if existing is None:
+            return None
+        dedup.add(idx_idem, existing.id, existing.risk_level)
+        return existing.id, existing.risk_level
+
+def stored_event_stmt(idx_idem: str):
+    # 키로 저장된 이벤트 (id, risk_level). event_keys → events 조인 (occurred_at으로 파티션 프루닝)
+    return select(Event.id, Event.risk_level).join(EventKey, _STORED).where(EventKey.idx_idempotency == idx_idem)
+
+def stored_events_stmt(keys):
+    return (select(EventKey.idx_idempotency, Event.id, Event.risk_level)
+            .join(Event, _STORED).where(EventKey.idx_idempotency.in_(keys)))
+
+def claim_keys_stmt(db, rows: List[Dict[str, Any]]):
+    # rows: {idx_idempotency, event_id, occurred_at}. 선점에 성공한 키만 RETURNING
+    return (
+        dialect_insert(db, EventKey).values(rows)
+        .on_conflict_do_nothing(index_elements=[EventKey.idx_idempotency])
+        .returning(EventKey.idx_idempotency)
+    )
+
+def store_event(db: Session, body: Dict[str, Any], risk_score: Optional[float], risk_level: Optional[str],
+                idx_idem: Optional[str], checked: bool = False) -> Tuple[int, bool, Optional[str]]:
+    # (event_id, 중복 여부, 저장된 risk_level) — pipeline_async.store_event와 같은 모양.
+    # checked: 호출자가 이미 find_duplicate로 확인함
+    with stage("save_event"):
+        return _store_event(db, body, risk_score, risk_level, idx_idem, checked)
+
+def _store_event(db: Session, body: Dict[str, Any], risk_score: Optional[float], risk_level: Optional[str],
+                 idx_idem: Optional[str], checked: bool) -> Tuple[int, bool, Optional[str]]:
+    if not checked:
+        found = find_duplicate(db, idx_idem)
+        if found:
+            return found[0], True, found[1]
+
+    occurred_at = body.get("occurred_at") or utcnow()
+    received_at = utcnow()
+    stmt = (
+        dialect_insert(db, Event)
+        .values(
+            device_id=body.get("device_id"),
+            event_type=body.get("event_type"),
+            payload=body.get("payload"),
+            risk_score=risk_score,
+            risk_level=risk_level,
+            occurred_at=occurred_at,
+            received_at=received_at,
+            idx_idempotency=idx_idem,
+        )
+        .on_conflict_do_nothing(index_elements=EVENT_CONFLICT_KEYS)
+        .returning(Event.id)
     )
-    db.add(evt)
+    event_id = db.execute(stmt).scalar_one_or_none()
+    duplicate = event_id is None
+    # 필터가 모르는 키(다른 프로세스 / 창 밖)와 충돌: 유니크 인덱스와 event_keys가 최종 판정
+    if duplicate:
+        # 같은 (키, occurred_at) 행이 이미 있음
+        event_id, risk_level = db.execute(
+            select(Event.id, Event.risk_level)
+            .where(Event.idx_idempotency == idx_idem, Event.occurred_at == occurred_at)
+        ).one()
+    elif idx_idem and not db.execute(claim_keys_stmt(db, [
+        {"idx_idempotency": idx_idem, "event_id": event_id, "occurred_at": occurred_at},
+    ])).first():
+        # 같은 키가 다른 occurred_at으로 이미 있음: 방금 넣은 행을 지우고 기존 이벤트로 응답
+        db.execute(delete(Event).where(Event.id == event_id, Event.occurred_at == occurred_at))
+        duplicate = True
+        event_id, risk_level = db.execute(stored_event_stmt(idx_idem)).one()
     db.commit()
-    return evt.id
+    if idx_idem:
+        dedup.add(idx_idem, event_id, risk_level)
+    if not duplicate:
+        observe_lag(occurred_at, received_at)
+    return event_id, duplicate, risk_level
 
-def open_or_update_incident(db: Session, device_id: str, risk_level: str,
-                            category: Optional[str] = None,
-                            top_signals: Optional[Dict[str, Any]] = None) -> str:
-    inc = db.execute(
-        select(Incident).where(
-            Incident.device_id == device_id,
-            Incident.status == "open",
-        ).order_by(Incident.opened_at.desc())
-    ).scalar_one_or_none()
-
-    def rank(x: str) -> int:
-        order = {"LOW": 1, "MEDIUM": 2, "HIGH": 3, "CRITICAL": 4}
-        return order.get((x or "").upper(), 0)
-
-    if inc:
-        if rank(risk_level) > rank(inc.risk_level or ""):
-            inc.risk_level = risk_level
-        if category:
-            inc.category = category
-        if top_signals:
-            inc.top_signals = top_signals
-        db.commit()
-        return str(inc.id)
+def save_event(db: Session, body: Dict[str, Any], risk_score: float, risk_level: str, idx_idem: Optional[str]) -> int:
+    return store_event(db, body, risk_score, risk_level, idx_idem)[0]
 
-    new_inc = Incident(
-        id=uuid.uuid4(),
-        device_id=device_id,
+def _rank_sql(col):
+    return case(rules.LEVEL_RANK, value=func.upper(col), else_=0)
+
+def incident_upsert_stmt(db, device_id: Any, risk_level: str,
+                         category: Optional[str] = None,
+                         top_signals: Optional[Dict[str, Any]] = None):
+    # 장치당 열린 인시던트 부분 유니크 인덱스에 대해 INSERT ... ON CONFLICT DO UPDATE 한 번으로 처리.
+    # 등급은 SQL 안에서 비교해 더 높을 때만 올리고, 반환된 id가 새로 만든 id면 신규 생성
+    new_id = uuid.uuid4()
+    device_uuid = device_id if isinstance(device_id, uuid.UUID) else uuid.UUID(str(device_id))
+    ins = dialect_insert(db, Incident).values(
+        id=new_id,
+        device_id=device_uuid,
         status="open",
         category=category,
         risk_level=risk_level,
         top_signals=top_signals,
         opened_at=utcnow(),
     )
-    db.add(new_inc)
-    db.commit()
-    return str(new_inc.id)
+    stmt = ins.on_conflict_do_update(
+        index_elements=[Incident.device_id],
+        index_where=text("status = 'open'"),  # 부분 인덱스 추론은 바인드 파라미터가 아닌 리터럴이어야 함
+        set_={
+            "risk_level": case(
+                (_rank_sql(ins.excluded.risk_level) > _rank_sql(Incident.risk_level), ins.excluded.risk_level),
+                else_=Incident.risk_level,
+            ),
+            "category": func.coalesce(ins.excluded.category, Incident.category),
+            "top_signals": func.coalesce(ins.excluded.top_signals, Incident.top_signals),
+        },
+    ).returning(Incident.id, Incident.risk_level, Incident.category)
+    return stmt, new_id
+
+def open_level_stmt(device_id: Any):
+    # upsert 직전 열린 인시던트의 등급. RETURNING은 바뀐 뒤 값만 주므로 따로 읽음.
+    # FOR UPDATE로 같은 장치의 동시 upsert를 줄 세워 "upgraded"가 한 번만 나가게 함 (SQLite는 무시)
+    device_uuid = device_id if isinstance(device_id, uuid.UUID) else uuid.UUID(str(device_id))
+    return (select(Incident.risk_level)
+            .where(Incident.device_id == device_uuid, Incident.status == "open")
+            .with_for_update())
+
+def incident_upserted(db, row, new_id: uuid.UUID, device_id: Any, previous_level: Optional[str]) -> Tuple[str, bool]:
+    # upsert 결과 처리 (동기/비동기 공용): 신규면 에스컬레이션 등록,
+    # 신규이거나 등급이 실제로 올랐으면 커밋 후 실시간 구독자에게 알림 (같은 등급 반복은 알리지 않음)
+    incident_id, stored_level, category = row
+    created = incident_id == new_id
+    if created:
+        escalations.register(incident_id)
+    if created or _rank(stored_level) > _rank(previous_level):
+        timeline.append(db, timeline.incident_entry(
+            incident_id, "opened" if created else "upgraded", utcnow(), stored_level, category,
+        ))
+        publish_on_commit(db, {
+            "type": "incident",
+            "action": "opened" if created else "upgraded",
+            "id": str(incident_id),
+            "device_id": str(device_id),
+            "status": "open",
+            "risk_level": stored_level,
+            "category": category,
+        })
+    return str(incident_id), created
+
+def upsert_incident(db: Session, device_id: Any, risk_level: str,
+                    category: Optional[str] = None,
+                    top_signals: Optional[Dict[str, Any]] = None) -> Tuple[str, bool]:
+    previous = db.scalar(open_level_stmt(device_id))
+    stmt, new_id = incident_upsert_stmt(db, device_id, risk_level, category, top_signals)
+    return incident_upserted(db, db.execute(stmt).one(), new_id, device_id, previous)
+
+def open_or_update_incident(db: Session, device_id: Any, risk_level: str,
+                            category: Optional[str] = None,
+                            top_signals: Optional[Dict[str, Any]] = None,
+                            commit: bool = True) -> str:
+    with stage("incident"):
+        return _open_or_update_incident(db, device_id, risk_level, category, top_signals, commit)
+
+def _open_or_update_incident(db: Session, device_id: Any, risk_level: str, category: Optional[str],
+                             top_signals: Optional[Dict[str, Any]], commit: bool) -> str:
+    if commit:
+        cached = coalescer.lookup(device_id, _rank(risk_level))
+        if cached:
+            return cached
+
+    incident_id, _ = upsert_incident(db, device_id, risk_level, category, top_signals)
+    if commit:
+        db.commit()
+        coalescer.remember(device_id, incident_id, _rank(risk_level))
+    else:
+        db.flush()
+    return incident_id
+
+def alert_values(incident_id: str, risk_level: str, channel: str = "sms",
+                 target: Optional[str] = None, count: int = 1) -> Dict[str, Any]:
+    # count > 1: 억제 창 동안 접힌 탐지 건수를 합친 알림
+    payload: Dict[str, Any] = {"risk_level": risk_level}
+    if count > 1:
+        payload["count"] = count
+    return {
+        "incident_id": uuid.UUID(str(incident_id)),
+        "channel": channel,
+        "target": target or "ops-team",
+        "payload": payload,
+        "status": "queued",
+        "error": None,
+        "created_at": utcnow(),
+    }
 
 def enqueue_alerts(db: Session, incident_id: str, risk_level: str,
-                   channel: str = "sms", target: Optional[str] = None) -> int:
-    a = Alert(
-        incident_id=uuid.UUID(incident_id),
-        channel=channel,
-        target=target or "ops-team",
-        payload={"risk_level": risk_level},
-        status="queued",
-        error=None,
-        created_at=utcnow(),
+                   channel: str = "sms", target: Optional[str] = None,
+                   commit: bool = True) -> Optional[int]:
+    # 같은 인시던트에 억제 창 안에서 이미 알림을 만들었으면 건수만 올리고 None
+    with stage("alerts"):
+        count = alert_windows.admit(db, incident_id, _rank(risk_level))
+        if count is None:
+            return None
+        a = Alert(**alert_values(incident_id, risk_level, channel, target, count))
+        db.add(a)
+        db.flush()
+        alert_id = a.id
+        timeline.append(db, timeline.alert_entry(incident_id, alert_id, a.created_at, a.channel, a.target, a.payload))
+        if commit:
+            db.commit()
+        return alert_id
+
+_LEVEL_NAME = {rank: level for level, rank in rules.LEVEL_RANK.items()}
+
+def flush_alert_rollups(db: Session, everything: bool = False) -> int:
+    # 억제 창이 닫혔는데 다음 알림이 없어 접힌 건수만 남은 인시던트에 요약 알림 1건 (payload.count = 접힌 건수).
+    # 이미 닫힌 인시던트는 건너뜀. 기록에 실패하면 건수를 억제기에 되돌림. 반환값: 만든 알림 수
+    due = alert_windows.due(everything)
+    if not due:
+        return 0
+    try:
+        ids = [uuid.UUID(k) for k, _, _ in due]
+        still_open = set(db.scalars(select(Incident.id).where(Incident.id.in_(ids), Incident.status == "open")))
+        made = 0
+        for incident_id, rank, folded in due:
+            if uuid.UUID(incident_id) not in still_open:
+                continue
+            values = alert_values(incident_id, _LEVEL_NAME.get(rank, "HIGH"))
+            values["payload"].update(count=folded, rollup=True)
+            a = Alert(**values)
+            db.add(a)
+            db.flush()
+            timeline.append(db, timeline.alert_entry(incident_id, a.id, a.created_at, a.channel, a.target, a.payload))
+            made += 1
+        db.commit()
+    except Exception:
+        db.rollback()
+        alert_windows.refold(due)
+        raise
+    return made
+
+def device_exists(db: Session, device_id: Any) -> bool:
+    # 레지스트리 캐시로 판정되면 DB를 읽지 않음
+    with stage("device_lookup"):
+        known = registry.lookup(device_id)
+        if known is not None:
+            return known
+        found = bool(registry.absorb([device_id], db.execute(registry.query([device_id])).all()))
+        # 읽기 전용 확인이므로 바로 연결을 풀에 돌려줌: 스레드풀 대기 중에 연결을 붙잡고 있지 않도록
+        db.rollback()
+        return found
+
+def shed_result(reason: str, risk_level: str) -> Dict[str, Any]:
+    return {"ok": False, "shed": reason, "risk_level": risk_level, "incident_id": None, "event_id": None}
+
+def process_event(db: Session, body: Dict[str, Any], idx_idem: str, gated: Optional[str] = None) -> Dict[str, Any]:
+    # gated: 수집 게이트에 걸린 이유 (storm.IngestGate.check). 탐지 후 LOW/MEDIUM이면 저장하지 않고 버림
+    # 재전송은 탐지 전에 걸러 장치 상태 창/점수기에 같은 이벤트가 두 번 들어가지 않게 함
+    found = find_duplicate(db, idx_idem)
+    if found:
+        return {"ok": True, "risk_level": found[1], "incident_id": None, "event_id": found[0]}
+    risk_score, risk_level, category, top_signals = run_detection(body)
+    if gated and not ingest_gate.admit(gated, risk_level):
+        return shed_result(gated, risk_level)
+    event_id, duplicate, stored_level = store_event(db, body, risk_score, risk_level, idx_idem, checked=True)
+    if duplicate:
+        # 재전송(동시에 들어온 같은 키): 원래 이벤트 id와 저장된 등급으로 응답하고 인시던트/알림은 다시 만들지 않음
+        return {"ok": True, "risk_level": stored_level, "incident_id": None, "event_id": event_id}
+
+    incident_id = None
+    if risk_level.upper() in INCIDENT_LEVELS:
+        incident_id = open_or_update_incident(
+            db, body["device_id"], risk_level, category, top_signals
+        )
+        enqueue_alerts(db, incident_id, risk_level, commit=False)
+        timeline.link_events(db, [(incident_id, event_id, body["occurred_at"], body.get("event_type"), risk_level)])
+        db.commit()
+
+    return {"ok": True, "risk_level": risk_level, "incident_id": incident_id, "event_id": event_id}
+
+def save_events_bulk(db: Session, rows: List[Dict[str, Any]]) -> Dict[str, int]:
+    # 다중 행 INSERT ... ON CONFLICT DO NOTHING RETURNING: 새로 들어간 키만 돌려받음
+    if not rows:
+        return {}
+    with stage("save_event"):
+        return _save_events_bulk(db, rows)
+
+def _save_events_bulk(db: Session, rows: List[Dict[str, Any]]) -> Dict[str, int]:
+    stmt = (
+        dialect_insert(db, Event)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=EVENT_CONFLICT_KEYS)
+        .returning(Event.idx_idempotency, Event.id)
     )
-    db.add(a)
+    inserted = {k: i for k, i in db.execute(stmt)}
+    if inserted:
+        # 새로 들어간 행의 키를 event_keys에 선점. 다른 occurred_at으로 이미 있던 키는 행을 지우고 중복으로 돌림
+        at = {r["idx_idempotency"]: r["occurred_at"] for r in rows}
+        claimed = set(db.execute(claim_keys_stmt(db, [
+            {"idx_idempotency": k, "event_id": i, "occurred_at": at[k]} for k, i in inserted.items()
+        ])).scalars())
+        lost = [inserted.pop(k) for k in list(inserted) if k not in claimed]
+        if lost:
+            db.execute(delete(Event).where(Event.id.in_(lost)))
+    return inserted
+
+def process_batch(db: Session, items: List[Dict[str, Any]],
+                  gated: Optional[List[Optional[str]]] = None,
+                  known: Optional[set] = None) -> List[Dict[str, Any]]:
+    # known: 연결 단위로 이미 확인된 장치 id (WebSocket/MQTT 스트림) → 배치마다 장치 조회를 하지 않음
+    results: List[Dict[str, Any]] = [{} for _ in items]
+    now = utcnow()
+
+    if known is None:
+        with stage("device_lookup"):
+            known = registry.resolve(db, {b["device_id"] for b in items})
+
+    pending: List[Tuple[int, Dict[str, Any], str]] = []
+    for i, b in enumerate(items):
+        if b["device_id"] not in known:
+            results[i] = {"ok": False, "error": "unknown device_id"}
+            continue
+        b["occurred_at"] = b.get("occurred_at") or now
+        pending.append((i, b, idempotency_key(b)))
+
+    # 최근 키는 메모리에서, 블룸 필터가 "있을 수도"라고 한 키만 DB에서 확인
+    existing, maybe, _ = dedup.classify({k for _, _, k in pending})
+    if maybe:
+        found = {
+            k: (eid, lvl) for k, eid, lvl in db.execute(stored_events_stmt(maybe))
+        }
+        dedup.record_probe(len(found), len(maybe) - len(found))
+        existing.update(found)
+
+    todo: List[Tuple[int, Dict[str, Any], str]] = []
+    seen = set()
+    for i, b, key in pending:
+        if key in existing or key in seen:
+            continue
+        seen.add(key)
+        todo.append((i, b, key))
+
+    rows: List[Dict[str, Any]] = []
+    fresh: List[Tuple[int, Dict[str, Any], str, str, str, Dict[str, Any]]] = []
+    detections = run_detection_batch([b for _, b, _ in todo])
+    for (i, b, key), (risk_score, risk_level, category, top_signals) in zip(todo, detections):
+        if gated and gated[i] and not ingest_gate.admit(gated[i], risk_level):
+            results[i] = shed_result(gated[i], risk_level)
+            continue
+        rows.append({
+            "device_id": b["device_id"],
+            "event_type": b.get("event_type"),
+            "payload": b.get("payload"),
+            "risk_score": risk_score,
+            "risk_level": risk_level,
+            "occurred_at": b["occurred_at"],
+            "received_at": now,
+            "idx_idempotency": key,
+        })
+        fresh.append((i, b, key, risk_level, category, top_signals))
+
+    inserted = save_events_bulk(db, rows)
+
+    # 배치 안의 같은 장치 HIGH 이벤트는 인시던트 1건 / 알림 1건으로 합침
+    worst: Dict[Any, Tuple[str, str, Dict[str, Any]]] = {}
+    for _, b, key, risk_level, category, top_signals in fresh:
+        if key in inserted and risk_level.upper() in INCIDENT_LEVELS:
+            prev = worst.get(b["device_id"])
+            if not prev or _rank(risk_level) > _rank(prev[0]):
+                worst[b["device_id"]] = (risk_level, category, top_signals)
+
+    incidents: Dict[Any, str] = {}
+    for device_id, (risk_level, category, top_signals) in worst.items():
+        incident_id = open_or_update_incident(
+            db, device_id, risk_level, category, top_signals, commit=False
+        )
+        enqueue_alerts(db, incident_id, risk_level, commit=False)
+        incidents[device_id] = incident_id
+    timeline.link_events(db, [
+        (incidents[b["device_id"]], inserted[key], b["occurred_at"], b.get("event_type"), risk_level)
+        for _, b, key, risk_level, _, _ in fresh
+        if key in inserted and risk_level.upper() in INCIDENT_LEVELS
+    ])
     db.commit()
-    return a.id
+    for device_id, (risk_level, _, _) in worst.items():
+        coalescer.remember(device_id, incidents[device_id], _rank(risk_level))
+
+    for i, b, key, risk_level, _, _ in fresh:
+        if key in inserted:
+            incident_id = incidents.get(b["device_id"]) if risk_level.upper() in INCIDENT_LEVELS else None
+            results[i] = {"ok": True, "event_id": inserted[key], "duplicate": False,
+                          "risk_level": risk_level, "incident_id": incident_id}
+            existing[key] = (inserted[key], risk_level)
+            observe_lag(b["occurred_at"], now)
+
+    # ON CONFLICT / event_keys 선점에서 빠진 키(동시 요청과 경합)는 한 번에 다시 조회
+    lost = {key for i, _, key in pending if not results[i] and key not in existing}
+    if lost:
+        existing.update({
+            k: (eid, lvl) for k, eid, lvl in db.execute(stored_events_stmt(lost))
+        })
+    for i, _, key in pending:
+        if not results[i]:
+            eid, lvl = existing.get(key, (None, None))
+            results[i] = {"ok": True, "event_id": eid, "duplicate": True,
+                          "risk_level": lvl, "incident_id": None}
+    dedup.add_many(existing.items())
+    return results
@@ -0,0 +1,146 @@
+# pipeline.py의 비동기(AsyncSession) 버전: 수집 경로에서 이벤트 루프를 막지 않도록 함.
+# 탐지(run_detection)와 SQL 문 구성은 동기 버전과 공유
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db import dialect_insert
+from app.core.telemetry import observe_lag, stage
+from app.core.utils import utcnow
+from app.services import timeline
+from app.services.coalescer import coalescer
+from app.services.dedup import dedup
+from app.services.registry import registry
+from app.services.pipeline import (
+    EVENT_CONFLICT_KEYS, INCIDENT_LEVELS, _rank, alert_values, claim_keys_stmt, incident_upsert_stmt, incident_upserted,
+    open_level_stmt, run_detection, shed_result, stored_event_stmt,
+)
+from app.services.storm import alert_windows, gate as ingest_gate
+from models.models import Alert, Event
+
+async def device_exists(db: AsyncSession, device_id: Any) -> bool:
+    with stage("device_lookup"):
+        known = registry.lookup(device_id)
+        if known is not None:
+            return known
+        rows = (await db.execute(registry.query([device_id]))).all()
+        return bool(registry.absorb([device_id], rows))
+
+async def find_duplicate(db: AsyncSession, idx_idem: str) -> Optional[Tuple[int, Optional[str]]]:
+    # pipeline.find_duplicate와 같음: 이미 저장된 키면 (event_id, 저장된 risk_level)
+    if not idx_idem:
+        return None
+    with stage("save_event"):
+        cached, maybe, _ = dedup.classify([idx_idem])
+        if cached:
+            return cached[idx_idem]
+        if not maybe:
+            return None
+        existing = (await db.execute(stored_event_stmt(idx_idem))).first()
+        dedup.record_probe(existing is not None, existing is None)
+        return (existing.id, existing.risk_level) if existing else None
+
+async def store_event(db: AsyncSession, body: Dict[str, Any], risk_score: float, risk_level: str,
+                      idx_idem: str) -> Tuple[int, bool, Optional[str]]:
+    # (event_id, 중복 여부, 저장된 risk_level). 사전 중복 확인은 find_duplicate, 필터 갱신은 커밋 후 호출자가 함
+    with stage("save_event"):
+        return await _store_event(db, body, risk_score, risk_level, idx_idem)
+
+async def _store_event(db: AsyncSession, body: Dict[str, Any], risk_score: float, risk_level: str,
+                       idx_idem: str) -> Tuple[int, bool, Optional[str]]:
+    # 동시에 같은 키가 들어온 경우만 여기서 충돌 → 유니크 인덱스와 event_keys가 최종 판정
+    occurred_at = body.get("occurred_at") or utcnow()
+    received_at = utcnow()
+    stmt = (
+        dialect_insert(db, Event)
+        .values(
+            device_id=body.get("device_id"),
+            event_type=body.get("event_type"),
+            payload=body.get("payload"),
+            risk_score=risk_score,
+            risk_level=risk_level,
+            occurred_at=occurred_at,
+            received_at=received_at,
+            idx_idempotency=idx_idem,
+        )
+        .on_conflict_do_nothing(index_elements=EVENT_CONFLICT_KEYS)
+        .returning(Event.id)
+    )
+    event_id = (await db.execute(stmt)).scalar_one_or_none()
+    if event_id is None:
+        r = await db.execute(
+            select(Event.id, Event.risk_level)
+            .where(Event.idx_idempotency == idx_idem, Event.occurred_at == occurred_at)
+        )
+        event_id, level = r.one()
+        return event_id, True, level
+    if idx_idem and not (await db.execute(claim_keys_stmt(db, [
+        {"idx_idempotency": idx_idem, "event_id": event_id, "occurred_at": occurred_at},
+    ]))).first():
+        # 같은 키가 다른 occurred_at으로 이미 있음 (event_keys가 판정): 방금 넣은 행은 지움
+        await db.execute(delete(Event).where(Event.id == event_id, Event.occurred_at == occurred_at))
+        event_id, level = (await db.execute(stored_event_stmt(idx_idem))).one()
+        return event_id, True, level
+    observe_lag(occurred_at, received_at)
+    return event_id, False, risk_level
+
+async def upsert_incident(db: AsyncSession, device_id: Any, risk_level: str,
+                          category: Optional[str] = None,
+                          top_signals: Optional[Dict[str, Any]] = None):
+    previous = await db.scalar(open_level_stmt(device_id))
+    stmt, new_id = incident_upsert_stmt(db, device_id, risk_level, category, top_signals)
+    return incident_upserted(db, (await db.execute(stmt)).one(), new_id, device_id, previous)
+
+async def open_or_update_incident(db: AsyncSession, device_id: Any, risk_level: str,
+                                  category: Optional[str] = None,
+                                  top_signals: Optional[Dict[str, Any]] = None) -> str:
+    with stage("incident"):
+        cached = coalescer.lookup(device_id, _rank(risk_level))
+        if cached:
+            return cached
+        incident_id, _ = await upsert_incident(db, device_id, risk_level, category, top_signals)
+        return incident_id
+
+async def enqueue_alerts(db: AsyncSession, incident_id: str, risk_level: str,
+                         channel: str = "sms", target: Optional[str] = None) -> Optional[int]:
+    with stage("alerts"):
+        count = alert_windows.admit(db, incident_id, _rank(risk_level))
+        if count is None:
+            return None
+        values = alert_values(incident_id, risk_level, channel, target, count)
+        alert_id = (await db.execute(insert(Alert).values(**values).returning(Alert.id))).scalar_one()
+        timeline.append(db, timeline.alert_entry(
+            incident_id, alert_id, values["created_at"], channel, values["target"], values["payload"],
+        ))
+        return alert_id
+
+async def process_event(db: AsyncSession, body: Dict[str, Any], idx_idem: str,
+                        gated: Optional[str] = None) -> Dict[str, Any]:
+    # 이벤트/인시던트/알림을 한 트랜잭션으로 묶어 커밋은 한 번.
+    # 재전송은 탐지 전에 걸러 장치 상태 창/점수기에 같은 이벤트가 두 번 들어가지 않게 함
+    found = await find_duplicate(db, idx_idem)
+    if found:
+        dedup.add(idx_idem, *found)
+        return {"ok": True, "risk_level": found[1], "incident_id": None, "event_id": found[0]}
+    risk_score, risk_level, category, top_signals = run_detection(body)
+    if gated and not ingest_gate.admit(gated, risk_level):
+        return shed_result(gated, risk_level)
+    event_id, duplicate, stored_level = await store_event(db, body, risk_score, risk_level, idx_idem)
+    if duplicate:
+        # 재전송: 원래 이벤트 id로 응답하고 인시던트/알림은 다시 만들지 않음
+        dedup.add(idx_idem, event_id, stored_level)
+        return {"ok": True, "risk_level": stored_level, "incident_id": None, "event_id": event_id}
+
+    incident_id = None
+    if risk_level.upper() in INCIDENT_LEVELS:
+        incident_id = await open_or_update_incident(db, body["device_id"], risk_level, category, top_signals)
+        await enqueue_alerts(db, incident_id, risk_level)
+        link = [(incident_id, event_id, body["occurred_at"], body.get("event_type"), risk_level)]
+        await db.run_sync(timeline.link_events, link)
+    await db.commit()
+    dedup.add(idx_idem, event_id, risk_level)
+
+    if incident_id:
+        coalescer.remember(body["device_id"], incident_id, _rank(risk_level))
+    return {"ok": True, "risk_level": risk_level, "incident_id": incident_id, "event_id": event_id}
@@ -0,0 +1,183 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, func, insert, or_, select, update
+
+from app.core.config import QUEUE_BACKEND, QUEUE_MAX_ATTEMPTS, QUEUE_VISIBILITY_TIMEOUT
+from app.core.db import SessionLocal
+from app.core.metrics import Gauge
+from app.core.utils import utcnow
+from models.models import DeadLetter, IngestJob
+
+# 스크레이프 시점에 /metrics가 depth()로 갱신 (DB 큐는 COUNT 한 번)
+ingest_queue_depth = Gauge("ingest_queue_depth", "Events waiting in the ingest queue (pending + processing)")
+
+def backoff_seconds(attempts: int) -> float:
+    return float(min(2 ** attempts, 60))
+
+class QueueMessage:
+    __slots__ = ("id", "payload", "attempts")
+
+    def __init__(self, id: Any, payload: Dict[str, Any], attempts: int = 0):
+        self.id = id
+        self.payload = payload
+        self.attempts = attempts
+
+class EventQueue(ABC):
+    async def put(self, payload: Dict[str, Any]) -> None:
+        await self.put_many([payload])
+
+    @abstractmethod
+    async def put_many(self, payloads: List[Dict[str, Any]]) -> None: ...
+
+    @abstractmethod
+    async def get_batch(self, max_items: int, timeout: float = 1.0) -> List[QueueMessage]: ...
+
+    @abstractmethod
+    async def ack(self, msgs: List[QueueMessage]) -> None: ...
+
+    @abstractmethod
+    async def nack(self, msg: QueueMessage, error: str, retry: bool = True) -> None: ...
+
+    @abstractmethod
+    async def depth(self) -> int: ...
+
+class MemoryQueue(EventQueue):
+    # 프로세스 내 asyncio 큐: API와 워커가 같은 프로세스일 때만 의미가 있음
+    def __init__(self, maxsize: int = 100_000, max_attempts: int = QUEUE_MAX_ATTEMPTS):
+        self._q: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._seq = 0
+        self.max_attempts = max_attempts
+        self.dead: List[Dict[str, Any]] = []
+
+    async def put_many(self, payloads: List[Dict[str, Any]]) -> None:
+        for p in payloads:
+            self._seq += 1
+            await self._q.put(QueueMessage(self._seq, p))
+
+    async def get_batch(self, max_items: int, timeout: float = 1.0) -> List[QueueMessage]:
+        try:
+            first = await asyncio.wait_for(self._q.get(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        batch = [first]
+        while len(batch) < max_items and not self._q.empty():
+            batch.append(self._q.get_nowait())
+        for m in batch:
+            m.attempts += 1
+        return batch
+
+    async def ack(self, msgs: List[QueueMessage]) -> None:
+        return None
+
+    async def nack(self, msg: QueueMessage, error: str, retry: bool = True) -> None:
+        if retry and msg.attempts < self.max_attempts:
+            loop = asyncio.get_running_loop()
+            loop.call_later(backoff_seconds(msg.attempts), self._q.put_nowait, msg)
+            return
+        self.dead.append({"id": msg.id, "payload": msg.payload, "attempts": msg.attempts,
+                          "error": error, "failed_at": utcnow()})
+
+    async def depth(self) -> int:
+        return self._q.qsize()
+
+class DBQueue(EventQueue):
+    # ingest_jobs 테이블 기반. Postgres에서는 FOR UPDATE SKIP LOCKED로 워커끼리 겹치지 않게 가져감
+    # (SQLite는 with_for_update를 무시하지만 쓰기가 직렬화되므로 테스트에는 충분)
+    def __init__(self, session_factory=SessionLocal, max_attempts: int = QUEUE_MAX_ATTEMPTS,
+                 visibility_timeout: float = QUEUE_VISIBILITY_TIMEOUT, poll_interval: float = 0.2):
+        self.session_factory = session_factory
+        self.max_attempts = max_attempts
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+
+    async def put_many(self, payloads: List[Dict[str, Any]]) -> None:
+        if payloads:
+            await asyncio.to_thread(self._put_many, payloads)
+
+    def _put_many(self, payloads: List[Dict[str, Any]]) -> None:
+        now = utcnow()
+        with self.session_factory() as db:
+            db.execute(insert(IngestJob), [
+                {"payload": p, "status": "pending", "attempts": 0, "available_at": now, "created_at": now}
+                for p in payloads
+            ])
+            db.commit()
+
+    async def get_batch(self, max_items: int, timeout: float = 1.0) -> List[QueueMessage]:
+        deadline = time.monotonic() + timeout
+        while True:
+            batch = await asyncio.to_thread(self._claim, max_items)
+            if batch or time.monotonic() >= deadline:
+                return batch
+            await asyncio.sleep(self.poll_interval)
+
+    def _claim(self, max_items: int) -> List[QueueMessage]:
+        now = utcnow()
+        stale = now - timedelta(seconds=self.visibility_timeout)
+        claimable = (
+            select(IngestJob.id)
+            .where(or_(
+                (IngestJob.status == "pending") & (IngestJob.available_at <= now),
+                (IngestJob.status == "processing") & (IngestJob.locked_at < stale),
+            ))
+            .order_by(IngestJob.id)
+            .limit(max_items)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(IngestJob)
+            .where(IngestJob.id.in_(claimable.scalar_subquery()))
+            .values(status="processing", locked_at=now, attempts=IngestJob.attempts + 1)
+            .returning(IngestJob.id, IngestJob.payload, IngestJob.attempts)
+        )
+        with self.session_factory() as db:
+            rows = db.execute(stmt).all()
+            db.commit()
+        return [QueueMessage(i, p, a) for i, p, a in rows]
+
+    async def ack(self, msgs: List[QueueMessage]) -> None:
+        if msgs:
+            await asyncio.to_thread(self._ack, [m.id for m in msgs])
+
+    def _ack(self, ids: List[int]) -> None:
+        with self.session_factory() as db:
+            db.execute(delete(IngestJob).where(IngestJob.id.in_(ids)))
+            db.commit()
+
+    async def nack(self, msg: QueueMessage, error: str, retry: bool = True) -> None:
+        await asyncio.to_thread(self._nack, msg, error, retry)
+
+    def _nack(self, msg: QueueMessage, error: str, retry: bool) -> None:
+        now = utcnow()
+        with self.session_factory() as db:
+            if retry and msg.attempts < self.max_attempts:
+                db.execute(
+                    update(IngestJob).where(IngestJob.id == msg.id).values(
+                        status="pending", last_error=error, locked_at=None,
+                        available_at=now + timedelta(seconds=backoff_seconds(msg.attempts)),
+                    )
+                )
+            else:
+                db.add(DeadLetter(job_id=msg.id, payload=msg.payload, attempts=msg.attempts,
+                                  error=error, failed_at=now))
+                db.execute(delete(IngestJob).where(IngestJob.id == msg.id))
+            db.commit()
+
+    async def depth(self) -> int:
+        return await asyncio.to_thread(self._depth)
+
+    def _depth(self) -> int:
+        with self.session_factory() as db:
+            return db.execute(select(func.count()).select_from(IngestJob)).scalar_one()
+
+_queue: Optional[EventQueue] = None
+
+def get_queue() -> EventQueue:
+    global _queue
+    if _queue is None:
+        _queue = MemoryQueue() if QUEUE_BACKEND == "memory" else DBQueue()
+    return _queue
@@ -0,0 +1,75 @@
+# 토큰 버킷: 초당 rate개씩 채워지고 최대 burst개까지 모임
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated", "_lock")
+
+    def __init__(self, rate: float, burst: float | None = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, n: float = 1.0) -> bool:
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.tokens >= n:
+                self.tokens -= n
+                return True
+            return False
+
+    def wait_time(self, n: float = 1.0) -> float:
+        # 토큰을 미리 차감하고 기다릴 시간을 돌려줌 (음수 잔고 = 예약)
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens -= n
+            if self.tokens >= 0 or self.rate <= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    async def acquire(self, n: float = 1.0) -> None:
+        delay = self.wait_time(n)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+class BucketTable:
+    # 키(장치/소유자 정수 키)별 토큰 버킷을 [토큰, 갱신 시각] 리스트로만 보관 (TokenBucket 객체/잠금을 키마다 두지 않음).
+    # 가장 오래 안 쓴 키부터 버림: 버려진 키는 다음 요청 때 가득 찬 버킷으로 다시 시작
+    def __init__(self, rate: float, burst: float, max_entries: int):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.max_entries = max_entries
+        self._buckets: "OrderedDict[int, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def take(self, key: int, n: float = 1.0, now: float | None = None) -> bool:
+        if self.rate <= 0:
+            return True
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            b = self._buckets.get(key)
+            if b is None:
+                b = self._buckets[key] = [self.burst, now]
+                if len(self._buckets) > self.max_entries:
+                    self._buckets.popitem(last=False)
+                    self.evicted += 1
+            else:
+                self._buckets.move_to_end(key)
+                b[0] = min(self.burst, b[0] + (now - b[1]) * self.rate)
+                b[1] = now
+            if b[0] >= n:
+                b[0] -= n
+                return True
+            return False
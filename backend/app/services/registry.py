@@ -0,0 +1,203 @@
+# 장치 레지스트리 캐시: 활성 장치를 정수 키(UUID 128비트)로 메모리에 두고 수집 시 DB 조회 없이 검증.
+# 기동 시 한 번에 적재, register_device에서 즉시 반영, 주기적으로 created_at 기준 증분 갱신.
+# 캐시에 없는 id만 DB를 한 번 확인하고 결과가 없으면 제한된 크기의 음성 캐시에 TTL 동안 둠.
+# 좌표가 있는 활성 장치는 공간 인덱스(geo.geo_index)에도 같이 반영
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import select
+
+from app.core.config import (
+    REGISTRY_FULL_RELOAD_SECONDS, REGISTRY_NEGATIVE_MAX, REGISTRY_NEGATIVE_TTL, REGISTRY_REFRESH_SECONDS,
+)
+from app.services.geo import geo_index
+from app.services.state import device_key
+from models.models import Device
+
+log = logging.getLogger(__name__)
+
+_COLUMNS = (Device.id, Device.owner_id, Device.hmac_key, Device.is_active, Device.created_at, Device.lat, Device.lon)
+
+class DeviceInfo:
+    __slots__ = ("owner_id", "hmac_key")
+
+    def __init__(self, owner_id: Optional[int], hmac_key: Optional[bytes]):
+        self.owner_id = owner_id       # owner UUID의 정수 값
+        self.hmac_key = hmac_key
+
+class DeviceRegistry:
+    def __init__(self, negative_max: int = REGISTRY_NEGATIVE_MAX, negative_ttl: float = REGISTRY_NEGATIVE_TTL):
+        self._devices: Dict[int, DeviceInfo] = {}
+        self._negative: "OrderedDict[int, float]" = OrderedDict()   # key -> 만료 시각(monotonic)
+        self.negative_max = negative_max
+        self.negative_ttl = negative_ttl
+        self._watermark: Optional[datetime] = None
+        self._lock = threading.Lock()
+        self.warmed = False
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+
+    def __len__(self) -> int:
+        return len(self._devices)
+
+    # --- 조회 ---
+    def get(self, device_id: Any) -> Optional[DeviceInfo]:
+        info = self._devices.get(device_key(device_id))
+        if info is not None:
+            self.hits += 1
+        return info
+
+    def known_missing(self, device_id: Any) -> bool:
+        key = device_key(device_id)
+        exp = self._negative.get(key)
+        if exp is None:
+            return False
+        if exp < time.monotonic():
+            with self._lock:
+                self._negative.pop(key, None)
+            return False
+        self.negative_hits += 1
+        return True
+
+    def lookup(self, device_id: Any) -> Optional[bool]:
+        # True: 활성 장치 / False: 없음(음성 캐시) / None: 모름 → 호출자가 DB 확인 후 put/mark_missing
+        if self.get(device_id) is not None:
+            return True
+        if self.known_missing(device_id):
+            return False
+        self.misses += 1
+        return None
+
+    # --- 갱신 ---
+    def _row(self, row) -> None:
+        key = device_key(row.id)
+        if row.is_active:
+            self._devices[key] = DeviceInfo(device_key(row.owner_id) if row.owner_id else None, row.hmac_key)
+            self._negative.pop(key, None)
+        else:
+            self._devices.pop(key, None)
+        if row.is_active and row.lat is not None and row.lon is not None:
+            geo_index.put(key, row.lat, row.lon)
+        else:
+            geo_index.remove(key)
+
+    def put(self, device: Any) -> None:
+        # register_device 직후 호출: 다음 증분 갱신을 기다리지 않고 바로 보이게 함
+        with self._lock:
+            self._row(device)
+
+    def mark_missing(self, device_ids: Iterable[Any]) -> None:
+        exp = time.monotonic() + self.negative_ttl
+        with self._lock:
+            for d in device_ids:
+                key = device_key(d)
+                self._devices.pop(key, None)
+                geo_index.remove(key)
+                self._negative[key] = exp
+                self._negative.move_to_end(key)
+            while len(self._negative) > self.negative_max:
+                self._negative.popitem(last=False)
+
+    def invalidate(self, device_id: Any) -> None:
+        key = device_key(device_id)
+        with self._lock:
+            self._devices.pop(key, None)
+            self._negative.pop(key, None)
+        geo_index.remove(key)
+
+    def warm(self, db) -> int:
+        # 활성 장치 전체를 한 쿼리로 적재해 통째로 교체
+        rows = db.execute(select(*_COLUMNS).where(Device.is_active.is_(True))).all()
+        fresh = {
+            device_key(r.id): DeviceInfo(device_key(r.owner_id) if r.owner_id else None, r.hmac_key)
+            for r in rows
+        }
+        watermark = max((r.created_at for r in rows if r.created_at is not None), default=None)
+        geo_index.load((device_key(r.id), r.lat, r.lon) for r in rows if r.lat is not None and r.lon is not None)
+        with self._lock:
+            self._devices = fresh
+            self._negative.clear()
+            self._watermark = watermark
+            self.warmed = True
+        return len(rows)
+
+    def refresh(self, db) -> int:
+        # created_at 워터마크 이후 등록분만 (커밋 지연을 감안해 조금 겹쳐 읽음)
+        if self._watermark is None:
+            return self.warm(db)
+        since = self._watermark - timedelta(seconds=REGISTRY_REFRESH_SECONDS)
+        rows = db.execute(select(*_COLUMNS).where(Device.created_at > since)).all()
+        with self._lock:
+            for r in rows:
+                self._row(r)
+                if r.created_at is not None and r.created_at > self._watermark:
+                    self._watermark = r.created_at
+        return len(rows)
+
+    def partition(self, device_ids: Iterable[Any]):
+        # 캐시로 판정되는 활성 id 집합과 DB 확인이 필요한 id 목록
+        known, unknown = set(), []
+        for d in device_ids:
+            r = self.lookup(d)
+            if r:
+                known.add(d)
+            elif r is None:
+                unknown.append(d)
+        return known, unknown
+
+    @staticmethod
+    def query(device_ids: Iterable[Any]):
+        return select(*_COLUMNS).where(Device.id.in_(list(device_ids)))
+
+    def absorb(self, device_ids: Iterable[Any], rows) -> set:
+        # DB 조회 결과를 캐시에 반영하고, 없거나 비활성인 id는 음성 캐시로
+        found = set()
+        with self._lock:
+            for r in rows:
+                self._row(r)
+                if r.is_active:
+                    found.add(device_key(r.id))
+        ids = list(device_ids)
+        self.mark_missing(d for d in ids if device_key(d) not in found)
+        return {d for d in ids if device_key(d) in found}
+
+    def resolve(self, db, device_ids: Iterable[Any]) -> set:
+        # 캐시로 판정 못 한 id만 IN 쿼리 한 번으로 확인하고 활성 장치 id 집합을 돌려줌
+        known, unknown = self.partition(device_ids)
+        if unknown:
+            known |= self.absorb(unknown, db.execute(self.query(unknown)).all())
+        return known
+
+    def stats(self) -> Dict[str, int]:
+        return {"devices": len(self._devices), "negative": len(self._negative),
+                "hits": self.hits, "misses": self.misses, "negative_hits": self.negative_hits,
+                "located": len(geo_index)}
+
+def start_refresher(session_factory, stop: threading.Event, interval: float = REGISTRY_REFRESH_SECONDS,
+                    full_interval: float = REGISTRY_FULL_RELOAD_SECONDS, warmed: bool = False) -> threading.Thread:
+    # 증분 갱신은 새 장치만 보므로, 비활성화 같은 변경은 주기적인 전체 재적재로 반영.
+    # warmed: 시작 예열에서 이미 전체 적재함 → 첫 전체 재적재는 full_interval 뒤
+    def loop():
+        next_full = time.monotonic() + full_interval if warmed else 0.0
+        while True:
+            try:
+                with session_factory() as db:
+                    if time.monotonic() >= next_full:
+                        registry.warm(db)
+                        next_full = time.monotonic() + full_interval
+                    else:
+                        registry.refresh(db)
+            except Exception as e:
+                log.warning("device registry refresh failed: %r", e)
+            if stop.wait(interval):
+                return
+    t = threading.Thread(target=loop, name="registry-refresher", daemon=True)
+    t.start()
+    return t
+
+registry = DeviceRegistry()
@@ -0,0 +1,281 @@
+# 규칙 엔진: rules 테이블의 definition(JSON)을 한 번 컴파일해 event_type별 디스패치 테이블로 보관
+#
+# definition 예시
+#   {"event_type": ["smoke", "gas"],            # 생략하면 모든 이벤트에 적용
+#    "when": {"all": [{"field": "payload.score", "op": ">=", "value": 0.7},
+#                     {"any": [{"field": "payload.zone", "op": "in", "value": ["kitchen"]},
+#                              {"not": {"field": "payload.test", "op": "exists"}}]}]},
+#    "level": "HIGH", "score": 0.9, "category": "fire"}
+import json
+import logging
+import operator
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models.models import Rule
+
+log = logging.getLogger(__name__)
+
+LEVEL_RANK = {"LOW": 1, "MEDIUM": 2, "HIGH": 3, "CRITICAL": 4}
+
+Predicate = Callable[[Dict[str, Any]], bool]
+
+class RuleError(ValueError):
+    pass
+
+def _contains(v, c):
+    try:
+        return v in c
+    except TypeError:
+        return False
+
+# 연산자별로 비교를 클로저 안에 직접 풀어 넣어 호출 한 단계를 줄임.
+# 타입이 안 맞는 비교(TypeError)는 RuleSet.evaluate에서 불일치로 처리
+_OPS: Dict[str, Callable[[Callable, Any], Predicate]] = {
+    "==": lambda get, c: lambda e: get(e) == c,
+    "!=": lambda get, c: lambda e: (v := get(e)) is not None and v != c,
+    ">": lambda get, c: lambda e: (v := get(e)) is not None and v > c,
+    ">=": lambda get, c: lambda e: (v := get(e)) is not None and v >= c,
+    "<": lambda get, c: lambda e: (v := get(e)) is not None and v < c,
+    "<=": lambda get, c: lambda e: (v := get(e)) is not None and v <= c,
+    "in": lambda get, c: lambda e: (v := get(e)) is not None and _contains(v, c),
+    "exists": lambda get, c: lambda e: get(e) is not None,
+}
+
+# "payload.score >= 0.7"처럼 두 단계 경로 + 비교는 값 읽기와 비교를 한 클로저로 (규칙당 파이썬 호출 한 번)
+_CMP = {"==": operator.eq, "!=": operator.ne, ">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le,
+        "in": lambda v, c: _contains(v, c)}
+
+def _field2(head: str, key: str, op: str, c: Any) -> Predicate:
+    cmp = _CMP[op]
+    if op == "==":
+        def eq2(e):
+            v = e.get(head)
+            return v.get(key) == c if isinstance(v, dict) else None == c
+        return eq2
+
+    def pred2(e):
+        v = e.get(head)
+        if not isinstance(v, dict):
+            return False
+        v = v.get(key)
+        return v is not None and cmp(v, c)
+    return pred2
+
+def _getter(path: str) -> Callable[[Dict[str, Any]], Any]:
+    parts = path.split(".")
+    if len(parts) == 1:
+        key = parts[0]
+        return lambda e: e.get(key)
+    if len(parts) == 2:
+        head, key = parts
+        def get2(e):
+            v = e.get(head)
+            return v.get(key) if isinstance(v, dict) else None
+        return get2
+
+    def getn(e):
+        v: Any = e
+        for p in parts:
+            if not isinstance(v, dict):
+                return None
+            v = v.get(p)
+        return v
+    return getn
+
+def _all(preds: Tuple[Predicate, ...]) -> Predicate:
+    # 자주 쓰는 1~2항은 제너레이터 없이 바로 연결
+    if len(preds) == 1:
+        return preds[0]
+    if len(preds) == 2:
+        a, b = preds
+        return lambda e: a(e) and b(e)
+
+    def all_of(e):
+        for p in preds:
+            if not p(e):
+                return False
+        return True
+    return all_of
+
+def _any(preds: Tuple[Predicate, ...]) -> Predicate:
+    if len(preds) == 1:
+        return preds[0]
+    if len(preds) == 2:
+        a, b = preds
+        return lambda e: a(e) or b(e)
+
+    def any_of(e):
+        for p in preds:
+            if p(e):
+                return True
+        return False
+    return any_of
+
+def compile_condition(cond: Any) -> Predicate:
+    if cond is None:
+        return lambda e: True
+    if not isinstance(cond, dict):
+        raise RuleError(f"condition must be an object: {cond!r}")
+
+    for key, join in (("all", _all), ("any", _any)):
+        if key in cond:
+            if not isinstance(cond[key], list):
+                raise RuleError(f"{key} must be a list: {cond[key]!r}")
+            return join(tuple(compile_condition(c) for c in cond[key]))
+    if "not" in cond:
+        inner = compile_condition(cond["not"])
+        return lambda e: not inner(e)
+
+    if "field" not in cond:
+        raise RuleError(f"unknown condition: {cond!r}")
+    if not isinstance(cond["field"], str) or not cond["field"]:
+        raise RuleError(f"field must be a non-empty string: {cond['field']!r}")
+    op = cond.get("op", "==")
+    make = _OPS.get(op)
+    if make is None:
+        raise RuleError(f"unknown op: {op!r}")
+    value = cond.get("value")
+    if op == "in" and isinstance(value, list):
+        value = frozenset(value)
+    parts = cond["field"].split(".")
+    if len(parts) == 2 and op in _CMP:
+        return _field2(parts[0], parts[1], op, value)
+    return make(_getter(cond["field"]), value)
+
+class CompiledRule:
+    __slots__ = ("id", "name", "pred", "level", "rank", "score", "category", "hit")
+
+    def __init__(self, id: Any, name: Optional[str], pred: Predicate, level: str,
+                 score: Optional[float], category: Optional[str]):
+        self.id = id
+        self.name = name or f"rule-{id}"
+        self.pred = pred
+        self.level = level
+        self.rank = LEVEL_RANK[level]
+        self.score = score
+        self.category = category
+        self.hit = RuleHit(level, self.score, category, (self.name,))   # 평가마다 만들지 않도록 미리 (불변)
+
+class RuleHit:
+    __slots__ = ("level", "score", "category", "names")
+
+    def __init__(self, level: str, score: Optional[float], category: Optional[str], names: Tuple[str, ...]):
+        self.level = level
+        self.score = score
+        self.category = category
+        self.names = names
+
+def compile_rule(id: Any, name: Optional[str], definition: Dict[str, Any]) -> Tuple[Tuple[str, ...], CompiledRule]:
+    if not isinstance(definition, dict):
+        raise RuleError("definition must be an object")
+    level = str(definition.get("level", "HIGH")).upper()
+    if level not in LEVEL_RANK:
+        raise RuleError(f"unknown level: {level!r}")
+    score = definition.get("score")
+    et = definition.get("event_type")
+    # 형식이 틀린 값(숫자 자리에 문자열 등)도 API/재적재에서 같은 RuleError로 다루도록 감쌈
+    try:
+        types = () if et in (None, "*") else ((et,) if isinstance(et, str) else tuple(et))
+        if not all(isinstance(t, str) for t in types):
+            raise RuleError(f"event_type must be a string or list of strings: {et!r}")
+        rule = CompiledRule(id, name, compile_condition(definition.get("when")), level,
+                            float(score) if score is not None else None, definition.get("category"))
+    except RuleError:
+        raise
+    except (TypeError, ValueError, AttributeError) as e:
+        raise RuleError(f"malformed definition: {e}") from e
+    return types, rule
+
+class RuleSet:
+    # 불변 객체: 교체는 참조 한 번 대입으로 끝나므로 평가 경로에는 락이 필요 없음.
+    # event_type별 규칙(+ 와일드카드)은 우선순위(등급, 점수 내림차순, 같으면 id 순)로 정렬해 두고
+    # 처음 맞는 규칙에서 멈춤 → 결과는 맞는 규칙 중 우선순위가 가장 높은 하나
+    __slots__ = ("by_type", "wildcard", "fingerprint", "size")
+
+    def __init__(self, compiled: Iterable[Tuple[Tuple[str, ...], CompiledRule]], fingerprint: str = ""):
+        by_type: Dict[str, List[CompiledRule]] = {}
+        wildcard: List[CompiledRule] = []
+        size = 0
+        for types, rule in compiled:
+            size += 1
+            if not types:
+                wildcard.append(rule)
+            for t in types:
+                by_type.setdefault(t, []).append(rule)
+        self.by_type = {t: _by_priority(rs + wildcard) for t, rs in by_type.items()}
+        self.wildcard = _by_priority(wildcard)
+        self.fingerprint = fingerprint
+        self.size = size
+
+    def evaluate(self, event: Dict[str, Any]) -> Optional[RuleHit]:
+        rs = self.by_type.get(event.get("event_type"), self.wildcard)
+        try:
+            for r in rs:
+                if r.pred(event):
+                    return r.hit
+            return None
+        except TypeError:
+            for r in rs:
+                if _safe_match(r, event):
+                    return r.hit
+            return None
+
+def _safe_match(rule: CompiledRule, event: Dict[str, Any]) -> bool:
+    try:
+        return bool(rule.pred(event))
+    except TypeError:
+        return False
+
+def _by_priority(rules: List[CompiledRule]) -> Tuple[CompiledRule, ...]:
+    # sorted는 안정 정렬이므로 우선순위가 같으면 적재 순서(id 순) 유지
+    return tuple(sorted(rules, key=lambda r: (-r.rank, -(r.score or 0.0))))
+
+_active = RuleSet(())
+_reload_lock = threading.Lock()
+
+def current() -> RuleSet:
+    return _active
+
+def swap(ruleset: RuleSet) -> None:
+    global _active
+    _active = ruleset
+
+def _fingerprint(rows) -> str:
+    return str(hash(tuple((r.id, r.name, json.dumps(r.definition, sort_keys=True)) for r in rows)))
+
+def reload(db: Session, force: bool = False) -> RuleSet:
+    with _reload_lock:
+        rows = db.execute(
+            select(Rule.id, Rule.name, Rule.definition).where(Rule.enabled.is_(True)).order_by(Rule.id)
+        ).all()
+        fp = _fingerprint(rows)
+        if not force and fp == _active.fingerprint:
+            return _active
+        compiled = []
+        for r in rows:
+            try:
+                compiled.append(compile_rule(r.id, r.name, r.definition or {}))
+            except RuleError as e:
+                log.warning("skip rule %s: %s", r.id, e)
+        ruleset = RuleSet(compiled, fp)
+        swap(ruleset)
+        return ruleset
+
+def start_refresher(session_factory, interval: float, stop: threading.Event) -> threading.Thread:
+    # 다른 프로세스(관리 API, 다른 워커)에서 바뀐 규칙도 주기적으로 반영
+    def loop():
+        while True:
+            try:
+                with session_factory() as db:
+                    reload(db)
+            except Exception as e:
+                log.warning("rule refresh failed: %r", e)
+            if stop.wait(interval):
+                return
+    t = threading.Thread(target=loop, name="rules-refresher", daemon=True)
+    t.start()
+    return t
@@ -0,0 +1,178 @@
+# 다변량 이상치 점수: 장치별 특징(가스/온도/모션 등)의 누적 평균/분산(Welford)을
+# NumPy 배열(장치 인덱스 × 특징)에 두고, 마이크로 배치 단위로 한 번에 점수화.
+# 장치 인덱스는 state.DeviceStateStore와 같은 정책(LRU + 유휴 TTL + 장치 수 상한)으로 비우고 행을 재사용
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.core.config import SCORING_FEATURES, SCORING_MIN_SAMPLES, STATE_MAX_DEVICES, STATE_TTL_SECONDS
+from app.services.state import device_key
+
+def _num(v: Any) -> float:
+    return float(v) if isinstance(v, (int, float)) else math.nan
+
+def chi2_sf(x: float, k: int) -> float:
+    # 자유도 k(정수)인 카이제곱 꼬리 확률 P(X >= x). scipy 없이 닫힌 식:
+    # 짝수 k는 포아송 합, 홀수 k는 erfc + 반정수 감마 항
+    h = x / 2
+    if k % 2 == 0:
+        term = total = 1.0
+        for i in range(1, k // 2):
+            term *= h / i
+            total += term
+        return math.exp(-h) * total
+    total = math.erfc(math.sqrt(h))
+    term = math.exp(-h) * math.sqrt(h) / math.gamma(1.5)
+    for i in range(1, (k + 1) // 2):
+        total += term
+        term *= h / (i + 0.5)
+    return total
+
+_erfc = np.frompyfunc(math.erfc, 1, 1)
+
+def chi2_sf_batch(x: np.ndarray, k: np.ndarray) -> np.ndarray:
+    # chi2_sf의 배열 버전 (k는 특징 수라 몇 가지뿐이므로 k별로 묶어 계산)
+    out = np.full(x.shape, np.nan)
+    for kk in np.unique(k):
+        kk = int(kk)
+        if kk <= 0:
+            continue
+        sel = k == kk
+        h = x[sel] / 2
+        if kk % 2 == 0:
+            term = np.ones_like(h)
+            total = np.ones_like(h)
+            for i in range(1, kk // 2):
+                term = term * h / i
+                total += term
+            out[sel] = np.exp(-h) * total
+        else:
+            total = _erfc(np.sqrt(h)).astype(float)
+            term = np.exp(-h) * np.sqrt(h) / math.gamma(1.5)
+            for i in range(1, (kk + 1) // 2):
+                total += term
+                term = term * h / (i + 0.5)
+            out[sel] = total
+    return out
+
+class AnomalyScorer:
+    def __init__(self, features: Sequence[str] = SCORING_FEATURES,
+                 min_samples: int = SCORING_MIN_SAMPLES, capacity: int = 1024,
+                 max_devices: int = STATE_MAX_DEVICES, ttl: float = STATE_TTL_SECONDS):
+        self.features = tuple(features)
+        self.min_samples = min_samples
+        self.max_devices = max_devices
+        self.ttl = ttl
+        k = len(self.features)
+        self._index: "OrderedDict[int, int]" = OrderedDict()   # 장치 키 -> 행, LRU 순서
+        self._free: List[int] = []                              # 비운 장치의 행 (재사용)
+        self.n = np.zeros((capacity, k))
+        self.mean = np.zeros((capacity, k))
+        self.m2 = np.zeros((capacity, k))
+        self.seen = np.zeros(capacity)                          # 행별 마지막 점수화 시각 (monotonic)
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def extract(self, payloads: Sequence[Optional[Dict[str, Any]]]) -> np.ndarray:
+        # 특징별 열 단위로 변환 (None → NaN). 숫자가 아닌 값이 섞인 열만 느린 경로로 정리
+        ps = [p or {} for p in payloads]
+        X = np.empty((len(ps), len(self.features)))
+        for j, f in enumerate(self.features):
+            col = [p.get(f) for p in ps]
+            try:
+                X[:, j] = np.array(col, dtype=float)
+            except (TypeError, ValueError):
+                X[:, j] = [_num(v) for v in col]
+        return X
+
+    def _rows_for(self, device_ids: Sequence[Any]) -> np.ndarray:
+        index, free = self._index, self._free
+        rows = np.empty(len(device_ids), dtype=np.intp)
+        for j, d in enumerate(device_ids):
+            key = device_key(d)
+            r = index.get(key)
+            if r is None:
+                r = index[key] = free.pop() if free else len(index)
+            else:
+                index.move_to_end(key)
+            rows[j] = r
+        if len(index) + len(free) > self.n.shape[0]:
+            size = max(len(index) + len(free), self.n.shape[0] * 2)
+            for name in ("n", "mean", "m2", "seen"):
+                old = getattr(self, name)
+                grown = np.zeros((size,) + old.shape[1:])
+                grown[: old.shape[0]] = old
+                setattr(self, name, grown)
+        now = time.monotonic()
+        self.seen[rows] = now
+        self._evict(now)
+        return rows
+
+    def _evict(self, now: float) -> None:
+        # LRU 순서라 앞쪽만 보면 됨: 오래 조용한 장치 + 상한 초과분의 통계를 비우고 행을 돌려 둠.
+        # 이번 배치의 장치(seen == now)는 배치가 상한보다 커도 남김
+        index, seen = self._index, self.seen
+        while index:
+            key, r = next(iter(index.items()))
+            if seen[r] >= now or (len(index) <= self.max_devices and now - seen[r] < self.ttl):
+                break
+            del index[key]
+            self.n[r] = self.mean[r] = self.m2[r] = 0.0
+            self._free.append(r)
+            self.evicted += 1
+
+    def score_batch(self, device_ids: Sequence[Any], X: np.ndarray) -> np.ndarray:
+        # 배치 이전 통계 기준으로 점수를 낸 뒤 배치를 통계에 병합 (같은 장치가 여러 번 나와도 안전)
+        with self._lock:
+            rows = self._rows_for(device_ids)
+            n, mean, m2 = self.n[rows], self.mean[rows], self.m2[rows]
+
+            present = ~np.isnan(X)
+            ready = present & (n >= self.min_samples)
+            var = np.where(n > 1, m2 / np.maximum(n - 1, 1), 0.0)
+            z2 = np.where(ready, (np.nan_to_num(X) - mean) ** 2 / (var + 1e-9), 0.0)
+            k = ready.sum(axis=1)
+            d2 = z2.sum(axis=1)
+            # 대각 공분산 마할라노비스 거리 제곱은 정상일 때 자유도 k 카이제곱 → 점수 = 누적확률 (1 - 꼬리 확률).
+            # 등급은 꼬리 확률로 나눔 (pipeline.anomaly_level)
+            scores = 1.0 - chi2_sf_batch(d2, k)
+
+            self._merge(rows, X, present)
+        return scores
+
+    def _merge(self, rows: np.ndarray, X: np.ndarray, present: np.ndarray) -> None:
+        # Chan의 병렬 Welford 병합: 배치를 장치별로 모아 (개수, 평균, M2)를 한 번에 합침
+        uniq, inv = np.unique(rows, return_inverse=True)
+        k = X.shape[1]
+        vals = np.where(present, X, 0.0)
+        cnt = np.zeros((len(uniq), k))
+        s = np.zeros((len(uniq), k))
+        np.add.at(cnt, inv, present.astype(float))
+        np.add.at(s, inv, vals)
+        b_mean = np.divide(s, cnt, out=np.zeros_like(s), where=cnt > 0)
+        sq = np.zeros((len(uniq), k))
+        np.add.at(sq, inv, np.where(present, (vals - b_mean[inv]) ** 2, 0.0))
+
+        n_a, mean_a, m2_a = self.n[uniq], self.mean[uniq], self.m2[uniq]
+        n_ab = n_a + cnt
+        delta = b_mean - mean_a
+        safe = np.maximum(n_ab, 1)
+        self.mean[uniq] = np.where(cnt > 0, mean_a + delta * cnt / safe, mean_a)
+        self.m2[uniq] = m2_a + sq + np.where(cnt > 0, delta ** 2 * n_a * cnt / safe, 0.0)
+        self.n[uniq] = n_ab
+
+    def score_bodies(self, bodies: List[Dict[str, Any]]) -> List[Optional[float]]:
+        if not bodies:
+            return []
+        X = self.extract([b.get("payload") for b in bodies])
+        scores = self.score_batch([b["device_id"] for b in bodies], X)
+        return [None if math.isnan(s) else float(s) for s in scores]
+
+scorer = AnomalyScorer()
@@ -0,0 +1,152 @@
+# 장치·이벤트 종류별 스트리밍 상태: 최근 (timestamp, score)를 고정 크기 링 버퍼에 담고
+# 슬라이딩 윈도 집계(지속시간/개수/최대/평균/변화율)를 이벤트당 상각 O(1)로 유지
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+
+from app.core.config import (
+    STATE_HIGH_THRESHOLD, STATE_MAX_DEVICES, STATE_RING_SIZE, STATE_TTL_SECONDS, STATE_WINDOW_SECONDS,
+)
+
+class WindowStats:
+    __slots__ = ("count", "mean", "max", "duration_above", "rate")
+
+    def __init__(self, count: int, mean: float, max: float, duration_above: float, rate: float):
+        self.count = count
+        self.mean = mean
+        self.max = max
+        self.duration_above = duration_above
+        self.rate = rate
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"count": self.count, "mean": self.mean, "max": self.max,
+                "duration_above": self.duration_above, "rate": self.rate}
+
+class RingBuffer:
+    # ts/값과 최대값용 단조 감소 큐를 모두 배열로 보관 (장치당 객체 수 최소화)
+    __slots__ = ("cap", "ts", "vals", "head", "size", "total",
+                 "mq", "mq_head", "mq_len", "above_since", "last_seen")
+
+    def __init__(self, cap: int):
+        self.cap = cap
+        self.ts = array("d", bytes(8 * cap))
+        self.vals = array("f", bytes(4 * cap))
+        self.head = 0            # 가장 오래된 항목 위치
+        self.size = 0
+        self.total = 0.0         # 윈도 안 값의 합 (평균용)
+        self.mq = array("H", bytes(2 * cap))   # 값이 단조 감소하는 항목들의 위치 (최대값용)
+        self.mq_head = 0
+        self.mq_len = 0
+        self.above_since: Optional[float] = None
+        self.last_seen = 0.0
+
+    def _pop_oldest(self) -> None:
+        i = self.head
+        self.total -= self.vals[i]
+        if self.mq_len and self.mq[self.mq_head] == i:
+            self.mq_head = (self.mq_head + 1) % self.cap
+            self.mq_len -= 1
+        self.head = (i + 1) % self.cap
+        self.size -= 1
+
+    def push(self, ts: float, value: float, window: float, threshold: float) -> WindowStats:
+        cap = self.cap
+        if self.size:
+            newest = self.ts[(self.head + self.size - 1) % cap]
+            if ts < newest:
+                ts = newest          # 늦게 온 이벤트는 최신 시각으로 맞춤
+
+        cutoff = ts - window
+        while self.size and self.ts[self.head] < cutoff:
+            self._pop_oldest()
+        if not self.size:
+            self.above_since = None  # 윈도보다 긴 공백 뒤에는 "연속"이 끊긴 것으로 봄
+        if self.size == cap:
+            self._pop_oldest()
+
+        i = (self.head + self.size) % cap
+        self.ts[i] = ts
+        self.vals[i] = value
+        self.size += 1
+        self.total += self.vals[i]
+
+        mq, vals = self.mq, self.vals
+        while self.mq_len and vals[mq[(self.mq_head + self.mq_len - 1) % cap]] <= vals[i]:
+            self.mq_len -= 1
+        mq[(self.mq_head + self.mq_len) % cap] = i
+        self.mq_len += 1
+
+        if value >= threshold:
+            if self.above_since is None:
+                self.above_since = ts
+        else:
+            self.above_since = None
+
+        first_ts, first_val = self.ts[self.head], vals[self.head]
+        dt = ts - first_ts
+        return WindowStats(
+            count=self.size,
+            mean=self.total / self.size,
+            max=vals[mq[self.mq_head]],
+            duration_above=(ts - self.above_since) if self.above_since is not None else 0.0,
+            rate=(vals[i] - first_val) / dt if dt > 0 else 0.0,
+        )
+
+def device_key(device_id: Any) -> int:
+    # UUID 객체 대신 128비트 정수를 키로 사용 (메모리/해시 비용 절감)
+    if isinstance(device_id, UUID):
+        return device_id.int
+    return UUID(str(device_id)).int
+
+class DeviceStateStore:
+    def __init__(self, ring_size: int = STATE_RING_SIZE, window: float = STATE_WINDOW_SECONDS,
+                 threshold: float = STATE_HIGH_THRESHOLD, ttl: float = STATE_TTL_SECONDS,
+                 max_devices: int = STATE_MAX_DEVICES):
+        self.ring_size = ring_size
+        self.window = window
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_devices = max_devices
+        self._buffers: "OrderedDict[Tuple[int, Optional[str]], RingBuffer]" = OrderedDict()   # (장치, event_type)
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        # 추적 중인 (장치, event_type) 창 수
+        return len(self._buffers)
+
+    def observe(self, device_id: Any, ts: float, value: float, event_type: Optional[str] = None) -> WindowStats:
+        # 센서 종류마다 따로 창을 둠: 같은 장치의 움직임 이벤트가 연기 센서의 "연속 HIGH"를 이어 붙이지 않도록
+        key = (device_key(device_id), event_type)
+        now = time.monotonic()
+        with self._lock:
+            buf = self._buffers.get(key)
+            if buf is None:
+                buf = self._buffers[key] = RingBuffer(self.ring_size)
+            else:
+                self._buffers.move_to_end(key)
+            buf.last_seen = now
+            stats = buf.push(ts, value, self.window, self.threshold)
+            self._evict(now)
+        return stats
+
+    def _evict(self, now: float) -> None:
+        # LRU 순서라 앞쪽만 보면 됨: 오래 조용한 장치 + 상한 초과분 제거
+        bufs = self._buffers
+        while bufs:
+            key, oldest = next(iter(bufs.items()))
+            if len(bufs) <= self.max_devices and now - oldest.last_seen < self.ttl:
+                break
+            del bufs[key]
+            self.evicted += 1
+
+    def forget(self, device_id: Any) -> None:
+        dk = device_key(device_id)
+        with self._lock:
+            for key in [k for k in self._buffers if k[0] == dk]:
+                del self._buffers[key]
+
+store = DeviceStateStore()
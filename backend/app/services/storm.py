@@ -0,0 +1,200 @@
+# 인시던트 폭주 방어 (coalescer와 같이 프로세스 단위 메모리 상태).
+#  - IngestGate: 장치/소유자별 토큰 버킷 + 수집 지연/큐 깊이 기반 적응형 차단. 탐지 전에 check()로 "걸렸는지"만 정하고,
+#    실제로 버릴지는 탐지로 등급이 나온 뒤 admit()에서 정함 → HIGH/CRITICAL은 어떤 경우에도 저장/인시던트/알림까지 감.
+#    버려진 이벤트도 탐지는 거쳤으므로 장치 윈도 상태(연속 HIGH 지속시간 등)에는 반영됨
+#  - AlertSuppressor: 인시던트당 window초에 탐지 알림 1건. 그 사이 들어온 건수는 창이 닫히면 요약 알림
+#    (payload["count"], start_flusher)으로 내보내고, 그 전에 다음 알림이 만들어지면 그 알림의 count로 합침.
+#    자리는 알림을 만들 때 잡고, 트랜잭션이 커밋 없이 끝나면 되돌림 (알림 없이 자리만 남지 않도록)
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import (
+    ALERT_ROLLUP_FLUSH_SECONDS, ALERT_SUPPRESS_MAX, ALERT_SUPPRESS_SECONDS, INGEST_DEVICE_BURST, INGEST_DEVICE_RATE, INGEST_OWNER_BURST,
+    INGEST_OWNER_RATE, RATE_TABLE_MAX, SHED_LATENCY_TARGET, SHED_MIN_KEEP, SHED_QUEUE_TARGET,
+)
+from app.core.metrics import Counter, Gauge
+from app.services.ratelimit import BucketTable
+from app.services.registry import registry
+from app.services.rules import LEVEL_RANK
+from app.services.state import device_key
+
+log = logging.getLogger(__name__)
+
+ingest_shed = Counter("ingest_shed_total", "Events dropped before storage", ["reason", "level"])
+ingest_gated_kept = Counter("ingest_gated_kept_total", "Rate-limited or overload events kept anyway (HIGH+ or sampled)",
+                            ["reason"])
+alerts_suppressed = Counter("alerts_suppressed_total", "Detection alerts folded into the incident's previous alert")
+
+_HIGH = LEVEL_RANK["HIGH"]
+_MEDIUM = LEVEL_RANK["MEDIUM"]
+_LATENCY_STALE = 10.0   # 이 시간 동안 지연 표본이 없으면 부하가 빠진 것으로 봄
+
+class IngestGate:
+    def __init__(self, device_rate: float = INGEST_DEVICE_RATE, device_burst: float = INGEST_DEVICE_BURST,
+                 owner_rate: float = INGEST_OWNER_RATE, owner_burst: float = INGEST_OWNER_BURST,
+                 max_entries: int = RATE_TABLE_MAX, latency_target: float = SHED_LATENCY_TARGET,
+                 queue_target: int = SHED_QUEUE_TARGET, min_keep: float = SHED_MIN_KEEP):
+        self.devices = BucketTable(device_rate, device_burst, max_entries)
+        self.owners = BucketTable(owner_rate, owner_burst, max_entries)
+        self.latency_target = latency_target
+        self.queue_target = queue_target
+        self.min_keep = min_keep
+        self.latency = 0.0          # 수집 처리 지연 EWMA (초)
+        self._latency_at = 0.0
+        self.depth = 0
+        self._depth_at = 0.0
+        self._rnd = random.Random()
+
+    # --- 부하 신호 ---
+    def observe_latency(self, seconds: float) -> None:
+        self.latency += 0.1 * (seconds - self.latency)
+        self._latency_at = time.monotonic()
+
+    async def refresh_depth(self, queue, interval: float = 1.0) -> None:
+        # 큐 모드: 적재 경로에서 초당 한 번만 깊이를 읽음 (DB 큐는 COUNT)
+        now = time.monotonic()
+        if now - self._depth_at >= interval:
+            self._depth_at = now
+            self.depth = await queue.depth()
+
+    def pressure(self) -> float:
+        latency = self.latency if time.monotonic() - self._latency_at < _LATENCY_STALE else 0.0
+        p = latency / self.latency_target if self.latency_target > 0 else 0.0
+        if self.queue_target > 0:
+            p = max(p, self.depth / self.queue_target)
+        return p
+
+    # --- 판정 ---
+    def check(self, device_id: Any, n: float = 1.0) -> Optional[str]:
+        # 탐지 전: 걸린 이유("device_rate" | "owner_rate" | "overload") 또는 None
+        if not self.devices.take(device_key(device_id), n):
+            return "device_rate"
+        info = registry.get(device_id)
+        if info is not None and info.owner_id is not None and not self.owners.take(info.owner_id, n):
+            return "owner_rate"
+        if self.pressure() > 1.0:
+            return "overload"
+        return None
+
+    def admit(self, reason: Optional[str], risk_level: str) -> bool:
+        # 탐지 후: 걸린 이벤트라도 HIGH/CRITICAL은 통과. 과부하면 LOW/MEDIUM을 압력에 반비례해 표본으로 남김
+        if reason is None:
+            return True
+        level = (risk_level or "").upper()
+        rank = LEVEL_RANK.get(level, 0)
+        if rank >= _HIGH or (reason == "overload" and self._rnd.random() < self.keep_fraction(rank)):
+            ingest_gated_kept.labels(reason).inc()
+            return True
+        ingest_shed.labels(reason, level or "UNKNOWN").inc()
+        return False
+
+    def keep_fraction(self, rank: int) -> float:
+        p = self.pressure()
+        if p <= 1.0:
+            return 1.0
+        keep = max(self.min_keep, 1.0 / p)
+        return keep if rank >= _MEDIUM else max(self.min_keep, keep * keep)
+
+class AlertSuppressor:
+    def __init__(self, window: float = ALERT_SUPPRESS_SECONDS, max_entries: int = ALERT_SUPPRESS_MAX):
+        self.window = window
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, list]" = OrderedDict()   # incident_id -> [알림 시각, 등급, 합쳐진 건수]
+        self._lock = threading.Lock()
+
+    def admit(self, db: Any, incident_id: str, rank: int) -> Optional[int]:
+        # 새 알림을 만들어야 하면 그 알림이 대표하는 이벤트 수(1 + 합쳐진 건수), 접어야 하면 None.
+        # 등급이 올라간 경우는 창 안이라도 바로 알림
+        if self.window <= 0:
+            return 1
+        key = str(incident_id)
+        now = time.monotonic()
+        with self._lock:
+            e = self._entries.get(key)
+            if e is not None and now - e[0] < self.window and rank <= e[1]:
+                e[2] += 1
+                alerts_suppressed.inc()
+                return None
+            self._entries[key] = [now, rank, 0]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        session = getattr(db, "sync_session", db)
+        if not session.in_transaction():
+            session.begin()   # 트랜잭션 종료 이벤트로 자리를 정리하려면 트랜잭션 안이어야 함
+        session.info.setdefault(_RESERVED, []).append((self, key, e))
+        return 1 + (e[2] if e is not None else 0)
+
+    def due(self, everything: bool = False) -> List[Tuple[str, int, int]]:
+        # 창이 닫혔는데 접힌 건수가 남은 인시던트: [(incident_id, 등급, 접힌 건수)]. 꺼낸 건수는 0으로 돌려 다음 알림과
+        # 겹치지 않게 함. 항목은 마지막 알림 순서라 창이 안 닫힌 항목을 만나면 멈춤. everything: 종료 시 전부
+        now = time.monotonic()
+        out = []
+        with self._lock:
+            for key, e in self._entries.items():
+                if not everything and now - e[0] < self.window:
+                    break
+                if e[2]:
+                    out.append((key, e[1], e[2]))
+                    e[2] = 0
+        return out
+
+    def refold(self, items: List[Tuple[str, int, int]]) -> None:
+        # 요약 알림 기록에 실패한 건수를 되돌림 (다음 주기 / 다음 알림에서 다시 합침)
+        with self._lock:
+            for key, _, folded in items:
+                e = self._entries.get(key)
+                if e is not None:
+                    e[2] += folded
+
+    def _restore(self, key: str, prev: Optional[list]) -> None:
+        with self._lock:
+            if prev is None:
+                self._entries.pop(key, None)
+            else:
+                self._entries[key] = prev
+
+_RESERVED = "alert_window_reserved"
+
+@event.listens_for(Session, "after_commit")
+def _keep_reserved(session: Session) -> None:
+    session.info.pop(_RESERVED, None)
+
+@event.listens_for(Session, "after_transaction_end")
+def _release_reserved(session: Session, transaction) -> None:
+    # 커밋 없이 끝난 최상위 트랜잭션(롤백, 예외 후 close): 잡아 둔 자리를 이전 상태로 되돌림
+    if transaction.parent is not None:
+        return
+    for sup, key, prev in reversed(session.info.pop(_RESERVED, ())):
+        sup._restore(key, prev)
+
+def start_flusher(session_factory, stop: threading.Event,
+                  interval: float = ALERT_ROLLUP_FLUSH_SECONDS) -> threading.Thread:
+    # 닫힌 창의 접힌 건수를 주기적으로 요약 알림으로 기록. 멈출 때는 창이 안 닫힌 것까지 내보냄
+    from app.services.pipeline import flush_alert_rollups   # pipeline이 이 모듈을 임포트하므로 여기서
+
+    def loop():
+        while True:
+            everything = stop.wait(interval)
+            try:
+                with session_factory() as db:
+                    flush_alert_rollups(db, everything)
+            except Exception as e:
+                log.warning("alert rollup flush failed: %r", e)
+            if everything:
+                return
+    t = threading.Thread(target=loop, name="alert-rollups", daemon=True)
+    t.start()
+    return t
+
+gate = IngestGate()
+alert_windows = AlertSuppressor()
+ingest_pressure = Gauge("ingest_load_pressure", "Ingest load relative to shedding targets (>1 sheds LOW/MEDIUM)",
+                        fn=gate.pressure)
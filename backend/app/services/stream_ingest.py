@@ -0,0 +1,101 @@
+# 연결 유지형 장치 수집 공용 처리 (WebSocket /ingest/ws, MQTT 구독 app.mqtt_ingest).
+# 프레임: "<서명>[ <타임스탬프> <논스>]\n<EventIngest JSON>" — 서명 대상은 둘째 줄 원문 바이트 (HTTP 본문 서명과 같은 규칙).
+# 프레임의 device_id는 생략 가능(연결/토픽의 장치로 채움). 모인 프레임은 process_batch로 한 세션/한 커밋에 처리
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from pydantic import ValidationError
+
+from app.core.db import SessionLocal
+from app.core.jsonlib import loads
+from app.core.security import keyring
+from app.core.telemetry import stage
+from app.schemas.common import EventIngest
+from app.services.pipeline import device_exists, process_batch
+
+class FrameError(ValueError):
+    pass
+
+def hello_message(device_id: Any) -> bytes:
+    # WebSocket 연결 인증 프레임의 서명 대상 ("{ts}.{nonce}." 접두사는 keyring이 붙임)
+    return b"ingest-ws:" + str(device_id).encode()
+
+def split_frame(data: bytes) -> Tuple[str, Optional[str], Optional[str], bytes]:
+    head, sep, raw = data.partition(b"\n")
+    parts = head.decode("ascii", "replace").split()
+    if not sep or len(parts) not in (1, 3):
+        raise FrameError("malformed frame")
+    sig, ts, nonce = (parts + [None, None])[:3]
+    return sig, ts, nonce, raw
+
+def decode_event(device_id: UUID, raw: bytes) -> Dict[str, Any]:
+    try:
+        item = loads(raw)
+    except ValueError:
+        raise FrameError("invalid json")
+    if not isinstance(item, dict):
+        raise FrameError("invalid event")
+    item.setdefault("device_id", device_id)
+    try:
+        body = EventIngest.model_validate(item)
+    except ValidationError:
+        raise FrameError("invalid event")
+    if body.device_id != device_id:
+        raise FrameError("device_id mismatch")
+    return dict(body)
+
+def open_frame(device_id: UUID, stored: Optional[bytes], data: bytes, authenticated: bool) -> Dict[str, Any]:
+    # authenticated: 연결 인증을 마친 WebSocket → 장치 키 서명만 확인.
+    # MQTT처럼 연결 인증이 우리 쪽에 없으면 HTTP와 같은 검증 (타임스탬프/논스 정책 포함)
+    sig, ts, nonce, raw = split_frame(data)
+    with stage("verify"):
+        if authenticated and ts is None:
+            ok = keyring.verify_frame(device_id, stored, raw, sig)
+        else:
+            ok = keyring.verify(device_id, stored, raw, sig, ts, nonce)
+    if not ok:
+        raise FrameError("invalid signature")
+    return decode_event(device_id, raw)
+
+def device_known(device_id: UUID) -> bool:
+    # 연결당 한 번만 호출 (레지스트리 캐시 적중이면 DB 연결도 열리지 않음)
+    with SessionLocal() as db:
+        return device_exists(db, device_id)
+
+def process_frames(bodies: List[Dict[str, Any]], gated: List[Optional[str]], known: Optional[set]) -> List[Dict[str, Any]]:
+    with SessionLocal() as db:
+        return process_batch(db, bodies, gated, known)
+
+class FrameInbox:
+    # 수신 루프 → 처리 루프 사이의 유한 대기열. 가득 차면 수신 루프가 소켓을 더 읽지 않아 TCP 흐름 제어로 장치 쪽 송신이 막힘.
+    # 처리 중에 도착한 프레임은 다음 next_batch에서 한꺼번에 나가므로 부하가 클수록 배치가 커짐
+    def __init__(self, window: int):
+        self.window = window
+        self.closed = False
+        self._q: asyncio.Queue = asyncio.Queue(window)
+
+    async def put(self, frame: bytes) -> None:
+        await self._q.put(frame)
+
+    def close(self) -> None:
+        self.closed = True
+        try:
+            self._q.put_nowait(None)   # 비어 있는 대기열에서 기다리는 처리 루프를 깨움
+        except asyncio.QueueFull:
+            pass
+
+    async def next_batch(self, max_items: int) -> Optional[List[bytes]]:
+        # 남은 프레임을 다 내보낸 뒤 닫혔으면 None
+        if self.closed and self._q.empty():
+            return None
+        first = await self._q.get()
+        if first is None:
+            return None
+        batch = [first]
+        while len(batch) < max_items and not self._q.empty():
+            frame = self._q.get_nowait()
+            if frame is None:
+                break
+            batch.append(frame)
+        return batch
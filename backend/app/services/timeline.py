@@ -0,0 +1,88 @@
+# 인시던트 타임라인 읽기 모델 (timeline_entries). 원본 테이블(events/incidents/alerts/confirmations/escalations)에
+# 쓰는 트랜잭션에서 같이 추가하므로 조회는 (incident_id, ts, id) 인덱스 범위 스캔 한 번 (원본 5개 테이블 병합 없음).
+# 항목 모양은 아래 *_entry 함수가 정함 — 쓰기 경로와 scripts/rebuild_timeline.py가 같은 함수를 써서 결과가 같음
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import insert, tuple_, update
+from sqlalchemy.orm import Session
+
+from app.core.utils import as_utc
+from models.models import Event, TimelineEntry
+
+def _uuid(x: Any) -> uuid.UUID:
+    return x if isinstance(x, uuid.UUID) else uuid.UUID(str(x))
+
+def _parse(ts: Any) -> datetime:
+    # 큐 워커 경로의 occurred_at은 ISO 문자열로 옴
+    return datetime.fromisoformat(ts) if isinstance(ts, str) else ts
+
+def _ts(ts: Any) -> datetime:
+    # 항목 시각은 UTC로 맞춰 둠 (SQLite는 오프셋 없이 문자열로 저장하므로 정렬이 섞이지 않도록)
+    return as_utc(_parse(ts))
+
+def _entry(incident_id: Any, kind: str, ts: datetime, ref_id: Any = None, risk_level: Optional[str] = None,
+           **summary: Any) -> Dict[str, Any]:
+    return {
+        "incident_id": _uuid(incident_id),
+        "ts": _ts(ts),
+        "kind": kind,
+        "ref_id": None if ref_id is None else str(ref_id),
+        "risk_level": risk_level,
+        "summary": {k: v for k, v in summary.items() if v is not None},
+    }
+
+def event_entry(incident_id: Any, event_id: Any, occurred_at: datetime, event_type: Optional[str],
+                risk_level: Optional[str]) -> Dict[str, Any]:
+    # 이벤트는 장치에서 일어난 시각(occurred_at)에 둠
+    return _entry(incident_id, "event", occurred_at, event_id, risk_level, event_type=event_type)
+
+def incident_entry(incident_id: Any, action: str, ts: datetime, risk_level: Optional[str],
+                   category: Optional[str] = None) -> Dict[str, Any]:
+    # action: opened | upgraded
+    return _entry(incident_id, "incident", ts, None, risk_level, action=action, category=category)
+
+def alert_entry(incident_id: Any, alert_id: Any, ts: datetime, channel: Optional[str], target: Optional[str],
+                payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    payload = payload or {}
+    return _entry(incident_id, "alert", ts, alert_id, payload.get("risk_level"), channel=channel, target=target,
+                  count=payload.get("count"), escalation_step=payload.get("escalation_step"))
+
+def confirmation_entry(incident_id: Any, confirmation_id: Any, ts: datetime, decision: Optional[str],
+                       reason: Optional[str], actor_id: Any = None) -> Dict[str, Any]:
+    return _entry(incident_id, "confirmation", ts, confirmation_id, decision=decision, reason=reason,
+                  actor_id=str(actor_id) if actor_id else None)
+
+def escalation_entry(incident_id: Any, escalation_id: Any, ts: datetime, step: Optional[int],
+                     action: Optional[str]) -> Dict[str, Any]:
+    return _entry(incident_id, "escalation", ts, escalation_id, step=step, action=action)
+
+def status_entry(incident_id: Any, ts: datetime, status: str) -> Dict[str, Any]:
+    return _entry(incident_id, "status", ts, status=status)
+
+def append(db, entry: Dict[str, Any]) -> None:
+    # 호출자의 세션에 추가만 함 (커밋/플러시 때 원본 행과 함께 기록). AsyncSession에도 그대로 쓸 수 있음
+    db.add(TimelineEntry(**entry))
+
+def append_many(db: Session, entries: List[Dict[str, Any]]) -> None:
+    if entries:
+        db.execute(insert(TimelineEntry), entries)
+
+def link_events(db: Session, events: Iterable[Tuple[Any, Any, datetime, Optional[str], Optional[str]]]) -> None:
+    # (incident_id, event_id, occurred_at, event_type, risk_level): events.incident_id를 채우고 이벤트 항목 추가.
+    # 파티션 키(occurred_at)를 같이 걸어 해당 파티션만 갱신 (저장할 때 넘긴 값 그대로 비교)
+    by_incident: Dict[Any, List[Tuple[Any, datetime]]] = defaultdict(list)
+    entries = []
+    for incident_id, event_id, occurred_at, event_type, risk_level in events:
+        by_incident[incident_id].append((event_id, _parse(occurred_at)))
+        entries.append(event_entry(incident_id, event_id, occurred_at, event_type, risk_level))
+    for incident_id, keys in by_incident.items():
+        db.execute(
+            update(Event)
+            .where(tuple_(Event.id, Event.occurred_at).in_(keys))
+            .values(incident_id=_uuid(incident_id))
+            .execution_options(synchronize_session=False)
+        )
+    append_many(db, entries)
@@ -0,0 +1,89 @@
+# 계층형 타이밍 휠. 틱 단위로 전진하며 하위 휠이 한 바퀴 돌 때마다 상위 휠의 슬롯을 내려보냄(cascade).
+# 등록/취소 O(1), 전진은 틱당 O(해당 슬롯의 타이머 수)
+import math
+from typing import Any, Callable, List, Optional, Sequence
+
+class Timer:
+    __slots__ = ("deadline", "expires", "key", "data", "slot")
+
+    def __init__(self, deadline: float, key: Any, data: Any = None):
+        self.deadline = deadline
+        self.expires = 0      # 만료 틱 번호
+        self.key = key
+        self.data = data
+        self.slot: Optional[set] = None
+
+class TimingWheel:
+    def __init__(self, tick: float = 0.01, bits: Sequence[int] = (8, 6, 6), now: float = 0.0):
+        # 기본: 256 × 10ms = 2.56s, × 64 = 163.84s, × 64 ≈ 2.9h (그보다 먼 타이머는 최상위 끝 슬롯에서 재배치)
+        self.tick = tick
+        self.bits = tuple(bits)
+        self.wheels: List[List[set]] = [[set() for _ in range(1 << b)] for b in self.bits]
+        self._shift = [sum(self.bits[:i]) for i in range(len(self.bits))]
+        self._range = 1 << sum(self.bits)
+        self.current = int(now / tick)
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, timer: Timer) -> Timer:
+        timer.expires = math.ceil(timer.deadline / self.tick)
+        self._place(timer)
+        self.count += 1
+        return timer
+
+    def cancel(self, timer: Timer) -> bool:
+        if timer.slot is None:
+            return False
+        timer.slot.discard(timer)
+        timer.slot = None
+        self.count -= 1
+        return True
+
+    def _place(self, timer: Timer) -> None:
+        # 이미 지난 타이머는 다음 틱에 발화
+        e = max(timer.expires, self.current + 1)
+        delta = min(e - self.current, self._range - 1)
+        e = self.current + delta
+        for level, b in enumerate(self.bits):
+            if delta < (1 << (self._shift[level] + b)) or level == len(self.bits) - 1:
+                idx = (e >> self._shift[level]) & ((1 << b) - 1)
+                slot = self.wheels[level][idx]
+                break
+        slot.add(timer)
+        timer.slot = slot
+
+    def _cascade(self, level: int) -> None:
+        idx = (self.current >> self._shift[level]) & ((1 << self.bits[level]) - 1)
+        if idx == 0 and level + 1 < len(self.bits):
+            self._cascade(level + 1)
+        slot = self.wheels[level][idx]
+        if slot:
+            moved = list(slot)
+            slot.clear()
+            for t in moved:
+                self._place(t)
+
+    def advance(self, now: float, on_fire: Optional[Callable[[Timer], None]] = None) -> List[Timer]:
+        # now까지 틱을 진행하며 만료된 타이머를 돌려줌
+        target = int(now / self.tick)
+        fired: List[Timer] = []
+        mask0 = (1 << self.bits[0]) - 1
+        while self.current < target:
+            self.current += 1
+            if self.current & mask0 == 0 and len(self.bits) > 1:
+                self._cascade(1)
+            slot = self.wheels[0][self.current & mask0]
+            if not slot:
+                continue
+            due = [t for t in slot if t.expires <= self.current]
+            for t in due:
+                slot.discard(t)
+                t.slot = None
+            self.count -= len(due)
+            if on_fire is not None:
+                for t in due:
+                    on_fire(t)
+            fired.extend(due)
+        return fired
@@ -0,0 +1,62 @@
+# 워커 프로세스 예열: 첫 요청들이 나눠 치를 비용을 트래픽을 받기 전에 치름. 서로 기다릴 필요가 없어 동시에 실행
+#  - db_pool: 연결 여러 개를 한꺼번에 열었다가 풀에 돌려줌 (접속/TLS/인증 왕복)
+#  - registry / rules: 장치 레지스트리 전체 적재, 규칙 컴파일 (이후 갱신은 refresher 스레드)
+#  - detection: 탐지 경로 임포트 (numpy 등 모듈 임포트에서 뺀 비용)
+# 단계가 실패해도 시작은 계속함 (DB 장애는 /readyz의 DB 확인이 드러냄)
+import asyncio
+import logging
+import time
+from typing import Dict
+
+from app.core.config import ASYNC_DB, SERVE_PREWARM_CONNECTIONS
+from app.core.db import SessionLocal, engine, get_async_engine
+from app.services import pipeline, rules
+from app.services.registry import registry
+
+log = logging.getLogger("warmup")
+
+def _open_connection():
+    return engine.connect()
+
+async def _db_pool(n: int) -> None:
+    size = engine.pool.size() if hasattr(engine.pool, "size") else 1
+    conns = await asyncio.gather(*(asyncio.to_thread(_open_connection) for _ in range(max(1, min(n, size)))))
+    for c in conns:
+        c.close()
+    if ASYNC_DB:
+        aengine = get_async_engine()
+        aconns = [aengine.connect() for _ in range(max(1, min(n, size)))]
+        await asyncio.gather(*(c.start() for c in aconns))
+        for c in aconns:
+            await c.close()
+
+def _registry() -> None:
+    with SessionLocal() as db:
+        registry.warm(db)
+
+def _rules() -> None:
+    with SessionLocal() as db:
+        rules.reload(db)
+
+def _detection() -> None:
+    pipeline.anomaly_scorer()
+
+async def _step(name: str, coro, timings: Dict[str, float]) -> None:
+    t0 = time.perf_counter()
+    try:
+        await coro
+    except Exception as e:
+        log.warning("warm-up step %s failed: %r", name, e)
+    timings[name] = round(time.perf_counter() - t0, 4)
+
+async def prewarm(connections: int = SERVE_PREWARM_CONNECTIONS) -> Dict[str, float]:
+    timings: Dict[str, float] = {}
+    t0 = time.perf_counter()
+    await asyncio.gather(
+        _step("db_pool", _db_pool(connections), timings),
+        _step("registry", asyncio.to_thread(_registry), timings),
+        _step("rules", asyncio.to_thread(_rules), timings),
+        _step("detection", asyncio.to_thread(_detection), timings),
+    )
+    timings["total"] = round(time.perf_counter() - t0, 4)
+    return timings
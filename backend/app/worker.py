@@ -0,0 +1,85 @@
+# app/worker.py — 수집 큐 소비 워커 (python -m app.worker)
+import argparse
+import asyncio
+import signal
+import threading
+from typing import Any, Dict, List, Optional
+
+from pydantic import ValidationError
+
+from app.core.config import RULES_REFRESH_SECONDS, WORKER_BATCH_SIZE, WORKER_CONCURRENCY
+from app.core.db import SessionLocal
+from app.schemas.common import EventIngest
+from app.services import registry, rules, storm
+from app.services.pipeline import process_batch
+from app.services.queue import EventQueue, QueueMessage, get_queue
+
+def _process(payloads: List[Dict[str, Any]], gated: List[Optional[str]]) -> List[Dict[str, Any]]:
+    with SessionLocal() as db:
+        return process_batch(db, payloads, gated)
+
+async def handle_batch(queue: EventQueue, batch: List[QueueMessage]) -> None:
+    valid: List[QueueMessage] = []
+    bodies: List[Dict[str, Any]] = []
+    gated: List[Optional[str]] = []
+    for m in batch:
+        try:
+            bodies.append(dict(EventIngest.model_validate(m.payload)))
+            gated.append(m.payload.get("gated"))
+            valid.append(m)
+        except ValidationError as e:
+            await queue.nack(m, f"invalid payload: {e.errors()[:1]}", retry=False)
+
+    if not valid:
+        return
+    try:
+        results = await asyncio.to_thread(_process, bodies, gated)
+    except Exception as e:
+        # 배치 전체 롤백 → 메시지별로 재시도 예약 (한도 초과 시 DLQ)
+        for m in valid:
+            await queue.nack(m, repr(e))
+        return
+
+    done: List[QueueMessage] = []
+    for m, r in zip(valid, results):
+        if r.get("ok") or r.get("shed"):   # 게이트에서 버린 이벤트는 재시도하지 않음
+            done.append(m)
+        else:
+            await queue.nack(m, r.get("error") or "rejected", retry=False)
+    await queue.ack(done)
+
+async def run_worker(queue: EventQueue, stop: asyncio.Event, batch_size: int = WORKER_BATCH_SIZE) -> None:
+    while not stop.is_set():
+        batch = await queue.get_batch(batch_size, timeout=1.0)
+        if batch:
+            await handle_batch(queue, batch)
+
+async def run_pool(queue: EventQueue, stop: asyncio.Event,
+                   concurrency: int = WORKER_CONCURRENCY, batch_size: int = WORKER_BATCH_SIZE) -> None:
+    await asyncio.gather(*(run_worker(queue, stop, batch_size) for _ in range(concurrency)))
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="ingest queue worker")
+    ap.add_argument("--concurrency", type=int, default=WORKER_CONCURRENCY)
+    ap.add_argument("--batch-size", type=int, default=WORKER_BATCH_SIZE)
+    args = ap.parse_args()
+
+    async def _run():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        refresher_stop = threading.Event()
+        rules.start_refresher(SessionLocal, RULES_REFRESH_SECONDS, refresher_stop)
+        registry.start_refresher(SessionLocal, refresher_stop)
+        rollups = storm.start_flusher(SessionLocal, refresher_stop)
+        try:
+            await run_pool(get_queue(), stop, args.concurrency, args.batch_size)
+        finally:
+            refresher_stop.set()
+            rollups.join(5.0)   # 접힌 알림 건수 마지막 기록
+
+    asyncio.run(_run())
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,23 @@
 # main.py
+import asyncio
+import logging
 import os
+import threading
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
+from fastapi.datastructures import Default
 from fastapi.responses import JSONResponse
 from sqlalchemy.exc import IntegrityError
 
 # 초기화 모듈 임포트 (엔진/세션 준비)
-from app.core.config import PORT
+from app.core.config import (
+    INGEST_MODE, QUEUE_BACKEND, RULES_REFRESH_SECONDS, ALERT_DISPATCHER_INPROCESS, ALERT_DISPATCH_LOOPS,
+    ESCALATION_INPROCESS, SERVE_GRACEFUL_TIMEOUT,
+)
 from app.core import db as _  # noqa: F401  (엔진 초기화용 임포트)
+from app.core.jsonlib import FastJSONResponse
+from app.core.lifecycle import lifecycle
+from app.core.metrics import Counter
 
 # 라우터 등록
 from app.routers.health import router as health_router
@@ -17,8 +28,96 @@ from app.routers.events import router as events_router
 from app.routers.incidents import router as incidents_router
 from app.routers.alerts import router as alerts_router
 from app.routers.confirmations import router as confirmations_router
+from app.routers.rules import router as rules_router
+from app.routers.stream import router as stream_router
+from app.routers.metrics import router as metrics_router
 
-app = FastAPI(title="Safety Detection API (FastAPI)")
+log = logging.getLogger("main")
+unhandled_errors = Counter("http_unhandled_exceptions_total", "Requests that ended in an unhandled exception",
+                           ["exception"])
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from app.core.db import SessionLocal, engine
+    from app.core.security import keyring
+    from app.services import partitions, registry, rules, storm
+    from app.services.audit import audit
+    from app.services.hub import hub
+    from app.services.warmup import prewarm
+
+    if keyring.allow_legacy:
+        log.warning("SIGNATURE_ALLOW_LEGACY is on: the shared DEVICE_HMAC_SECRET signs for every device")
+    if not keyring.master_key:
+        log.warning("DEVICE_HMAC_MASTER_KEY is not set: devices without a stored hmac_key %s",
+                    "fall back to the shared secret" if keyring.allow_legacy else "cannot sign")
+
+    # 실시간 푸시 허브: 스레드풀/워커 스레드에서 발행한 메시지를 이 루프로 넘김
+    hub.bind(asyncio.get_running_loop())
+
+    # 예열(DB 연결, 장치 레지스트리, 규칙, 탐지 경로)이 끝난 뒤에 /readyz가 200이 됨
+    lifecycle.warmup = await prewarm()
+    log.info("warm-up done: %s", lifecycle.warmup)
+
+    # 규칙 세트 주기적 재적재 (관리 API로 바뀐 경우는 즉시 반영됨)
+    refresher_stop = threading.Event()
+    rules.start_refresher(SessionLocal, RULES_REFRESH_SECONDS, refresher_stop)
+    # 장치 레지스트리: 전체 적재는 예열에서 끝났으므로 증분 갱신부터
+    registry.start_refresher(SessionLocal, refresher_stop, warmed=True)
+    # events 파티션 선생성 / 보존 기간 지난 파티션 제거
+    partitions.start_maintainer(engine, refresher_stop)
+    # 알림 억제 창이 닫힌 인시던트의 접힌 탐지 건수를 요약 알림으로
+    rollups = storm.start_flusher(SessionLocal, refresher_stop)
+    # 감사 로그 묶음 쓰기
+    audit.start()
+
+    # memory 큐는 프로세스 밖에서 소비할 수 없으므로 API 프로세스 안에서 워커 풀을 띄움
+    stop, pool = asyncio.Event(), None
+    if INGEST_MODE == "queue" and QUEUE_BACKEND == "memory":
+        from app.services.queue import get_queue
+        from app.worker import run_pool
+        pool = asyncio.create_task(run_pool(get_queue(), stop))
+    dispatcher = None
+    if ALERT_DISPATCHER_INPROCESS:
+        from app.services.dispatcher import AlertDispatcher
+        dispatcher = asyncio.create_task(AlertDispatcher().run(stop, ALERT_DISPATCH_LOOPS))
+    escalator = None
+    if ESCALATION_INPROCESS:
+        from app.services.escalation import scheduler as escalations
+        escalator = asyncio.create_task(escalations.run(stop))
+    lifecycle.ready = True
+    yield
+
+    # 종료: 처리 중인 수집을 기다리고, 메모리 큐에 남은 이벤트를 처리한 뒤 워커/발송기/에스컬레이션을 멈춤.
+    # 발송기는 점유한 배치의 발송 결과 기록까지, 에스컬레이션은 진행 중인 단계 기록까지 마치고 끝남.
+    # 감사 로그는 요청이 모두 끝난 뒤 버퍼에 남은 기록을 쓰고 멈춤
+    lifecycle.begin_drain()
+    deadline = asyncio.get_running_loop().time() + SERVE_GRACEFUL_TIMEOUT
+    if not await lifecycle.wait_idle(SERVE_GRACEFUL_TIMEOUT):
+        log.warning("shutdown: %d ingest(s) still in flight", lifecycle.inflight)
+    if pool:
+        await _drain_queue(get_queue(), deadline)
+    stop.set()
+    refresher_stop.set()
+    if pool:
+        await pool
+    if dispatcher:
+        await dispatcher
+    if escalator:
+        await escalator
+    await asyncio.to_thread(rollups.join, max(1.0, deadline - asyncio.get_running_loop().time()))
+    await asyncio.to_thread(audit.close, max(1.0, deadline - asyncio.get_running_loop().time()))
+
+async def _drain_queue(queue, deadline: float) -> None:
+    loop = asyncio.get_running_loop()
+    while await queue.depth() and loop.time() < deadline:
+        await asyncio.sleep(0.05)
+    left = await queue.depth()
+    if left:
+        log.warning("shutdown: %d queued event(s) dropped from the memory queue", left)
+
+# Default(...)로 감싸야 response_model이 있는 경로에서 FastAPI의 pydantic 직접 직렬화가 유지됨
+app = FastAPI(title="Safety Detection API (FastAPI)", lifespan=lifespan,
+              default_response_class=Default(FastJSONResponse))
 
 # 전역 예외 핸들러
 @app.exception_handler(IntegrityError)
@@ -27,7 +126,8 @@ async def handle_integrity_error(request: Request, exc: IntegrityError):
 
 @app.exception_handler(Exception)
 async def handle_exception(request: Request, exc: Exception):
-    print("UNHANDLED:", repr(exc))
+    unhandled_errors.labels(type(exc).__name__).inc()
+    log.exception("unhandled error on %s %s", request.method, request.url.path, exc_info=exc)
     return JSONResponse(status_code=500, content={"ok": False, "error": "Internal Server Error"})
 
 # 라우터 연결
@@ -39,7 +139,10 @@ app.include_router(events_router)
 app.include_router(incidents_router)
 app.include_router(alerts_router)
 app.include_router(confirmations_router)
+app.include_router(rules_router)
+app.include_router(stream_router)
+app.include_router(metrics_router)
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run("main:app", host="127.0.0.1", port=PORT, reload=True)
+    from app.serve import main
+    main()
@@ -1,13 +1,17 @@
 # models.py
 from datetime import datetime
 from sqlalchemy import (
-    Text, Boolean, Integer, BigInteger, Numeric, ForeignKey, UniqueConstraint
+    Text, Boolean, Integer, BigInteger, Double, LargeBinary, Numeric, ForeignKey, UniqueConstraint, Index, text,
+    DDL, event,
 )
 from sqlalchemy.dialects.postgresql import UUID, JSONB, TIMESTAMP
 from sqlalchemy.orm import relationship, Mapped, mapped_column, declarative_base
 
 Base = declarative_base()
 
+# SQLite는 INTEGER PRIMARY KEY만 자동 증가하므로 로컬 테스트용 변형 타입
+BigIntPK = BigInteger().with_variant(Integer, "sqlite")
+
 class User(Base):
     __tablename__ = "users"
     id: Mapped[str] = mapped_column(UUID(as_uuid=True), primary_key=True)
@@ -29,14 +33,23 @@ class Device(Base):
     type: Mapped[str | None] = mapped_column(Text)
     serial: Mapped[str | None] = mapped_column(Text, unique=True)
     location: Mapped[dict | None] = mapped_column(JSONB)
+    # location에서 정규화한 좌표 (app/services/geo.parse_location). 공간 조회는 메모리 인덱스(geo_index)가 맡음
+    lat: Mapped[float | None] = mapped_column(Double)
+    lon: Mapped[float | None] = mapped_column(Double)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True))
+    # 장치별 HMAC 키 (없으면 공용 비밀 사용)
+    hmac_key: Mapped[bytes | None] = mapped_column(LargeBinary)
 
     # relationships
     owner: Mapped["User"] = relationship("User", back_populates="devices")
     events: Mapped[list["Event"]] = relationship("Event", back_populates="device")
     incidents: Mapped[list["Incident"]] = relationship("Incident", back_populates="device")
 
+    __table_args__ = (
+        Index("idx_devices_created_at", "created_at"),
+    )
+
 class Incident(Base):
     __tablename__ = "incidents"
     id: Mapped[str] = mapped_column(UUID(as_uuid=True), primary_key=True)
@@ -55,9 +68,28 @@ class Incident(Base):
     confirmations: Mapped[list["Confirmation"]] = relationship("Confirmation", back_populates="incident")
     escalations: Mapped[list["Escalation"]] = relationship("Escalation", back_populates="incident")
 
+    __table_args__ = (
+        # 장치당 열린 인시던트는 1건: ON CONFLICT 대상이 되는 부분 유니크 인덱스
+        Index("uq_incidents_open_device", "device_id", unique=True,
+              postgresql_where=text("status = 'open'"), sqlite_where=text("status = 'open'")),
+    )
+
+# 대시보드 목록: 상태별 최신순 / 열린 인시던트만(부분) / 장치별 — 모두 (opened_at DESC, id DESC) keyset 순서
+Index("idx_incidents_status_opened", Incident.status, Incident.opened_at.desc(), Incident.id.desc())
+Index("idx_incidents_open_opened", Incident.opened_at.desc(), Incident.id.desc(),
+      postgresql_where=text("status = 'open'"), sqlite_where=text("status = 'open'"))
+Index("idx_incidents_device_opened", Incident.device_id, Incident.opened_at.desc(), Incident.id.desc())
+
+class IncidentCount(Base):
+    # 상태 × 위험등급별 인시던트 수. incidents 트리거가 증분으로 유지 (risk_level NULL은 '')
+    __tablename__ = "incident_counts"
+    status: Mapped[str] = mapped_column(Text, primary_key=True)
+    risk_level: Mapped[str] = mapped_column(Text, primary_key=True)
+    n: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
 class Event(Base):
     __tablename__ = "events"
-    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    id: Mapped[int] = mapped_column(BigIntPK, primary_key=True)
     device_id: Mapped[str | None] = mapped_column(UUID(as_uuid=True), ForeignKey("devices.id"))
     event_type: Mapped[str | None] = mapped_column(Text)
     payload: Mapped[dict | None] = mapped_column(JSONB)
@@ -65,14 +97,39 @@ class Event(Base):
     risk_level: Mapped[str | None] = mapped_column(Text)
     occurred_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
     received_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True))
-    idx_idempotency: Mapped[str | None] = mapped_column(Text, unique=True)
+    idx_idempotency: Mapped[str | None] = mapped_column(Text)
+    # 이 이벤트로 열리거나 갱신된 인시던트 (HIGH/CRITICAL만, 나머지는 NULL)
+    incident_id: Mapped[str | None] = mapped_column(UUID(as_uuid=True), ForeignKey("incidents.id"))
 
     # relationships
     device: Mapped["Device"] = relationship("Device", back_populates="events")
 
+    __table_args__ = (
+        # 운영 DB의 events는 occurred_at 범위 파티션 테이블(app/services/partitions.py):
+        # 파티션 테이블의 유니크 제약은 파티션 키를 포함해야 하므로 (키, occurred_at)로 둠
+        UniqueConstraint("idx_idempotency", "occurred_at", name="uq_events_idempotency"),
+    )
+
+# 장치별 기간 조회 / keyset 페이지네이션용 (device_id, occurred_at DESC, id DESC)
+Index("idx_events_device_occurred", Event.device_id, Event.occurred_at.desc(), Event.id.desc())
+Index("idx_events_incident", Event.incident_id, postgresql_where=text("incident_id IS NOT NULL"),
+      sqlite_where=text("incident_id IS NOT NULL"))
+
+# 아이템포턴시 키의 실제 유니크 가드. events의 유니크 제약은 파티션 키(occurred_at)를 포함해야 해서
+# 같은 키가 다른 occurred_at으로 두 번 들어오는 것은 막지 못함 → 파티션이 아닌 이 테이블에 키당 1행을
+# 이벤트와 같은 트랜잭션에서 기록. event_id는 파티션 테이블을 가리키므로 FK 없음
+class EventKey(Base):
+    __tablename__ = "event_keys"
+    idx_idempotency: Mapped[str] = mapped_column(Text, primary_key=True)
+    event_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    # 보존 기간 정리 + 이벤트 파티션 프루닝용 (events.occurred_at과 같은 값)
+    occurred_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
+
+Index("idx_event_keys_occurred", EventKey.occurred_at)
+
 class Alert(Base):
     __tablename__ = "alerts"
-    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    id: Mapped[int] = mapped_column(BigIntPK, primary_key=True)
     incident_id: Mapped[str | None] = mapped_column(UUID(as_uuid=True), ForeignKey("incidents.id"))
     channel: Mapped[str | None] = mapped_column(Text)
     target: Mapped[str | None] = mapped_column(Text)
@@ -80,13 +137,22 @@ class Alert(Base):
     status: Mapped[str | None] = mapped_column(Text)
     error: Mapped[str | None] = mapped_column(Text)
     created_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True))
+    # 발송기 상태: queued → sending → sent | (재시도 시 queued) | dead_letter
+    attempts: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    next_attempt_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True))
+    locked_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True))
+    sent_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True))
 
     # relationships
     incident: Mapped["Incident"] = relationship("Incident", back_populates="alerts")
 
+    __table_args__ = (
+        Index("idx_alerts_status_next", "status", "next_attempt_at"),
+    )
+
 class Confirmation(Base):
     __tablename__ = "confirmations"
-    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    id: Mapped[int] = mapped_column(BigIntPK, primary_key=True)
     incident_id: Mapped[str | None] = mapped_column(UUID(as_uuid=True), ForeignKey("incidents.id"))
     actor_id: Mapped[str | None] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"))
     decision: Mapped[str | None] = mapped_column(Text)
@@ -99,7 +165,7 @@ class Confirmation(Base):
 
 class Escalation(Base):
     __tablename__ = "escalations"
-    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    id: Mapped[int] = mapped_column(BigIntPK, primary_key=True)
     incident_id: Mapped[str | None] = mapped_column(UUID(as_uuid=True), ForeignKey("incidents.id"))
     step: Mapped[int | None] = mapped_column(Integer)
     action: Mapped[str | None] = mapped_column(Text)
@@ -110,9 +176,29 @@ class Escalation(Base):
     # relationships
     incident: Mapped["Incident"] = relationship("Incident", back_populates="escalations")
 
+    __table_args__ = (
+        # 단계는 인시던트당 한 번만 실행 (여러 프로세스의 스케줄러가 동시에 발화해도 한 행)
+        Index("uq_escalations_incident_step", "incident_id", "step", unique=True),
+    )
+
+class TimelineEntry(Base):
+    # 인시던트 타임라인 읽기 모델: 이벤트/인시던트/알림/확인/에스컬레이션/상태 변경을 한 테이블에 시간순으로.
+    # 원본 테이블에 쓰는 트랜잭션에서 함께 추가 (app/services/timeline.py), 원본에서 다시 채우기는 scripts/rebuild_timeline.py
+    __tablename__ = "timeline_entries"
+    id: Mapped[int] = mapped_column(BigIntPK, primary_key=True)
+    incident_id: Mapped[str] = mapped_column(UUID(as_uuid=True), ForeignKey("incidents.id"), nullable=False)
+    ts: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
+    kind: Mapped[str] = mapped_column(Text, nullable=False)   # event | incident | alert | confirmation | escalation | status
+    ref_id: Mapped[str | None] = mapped_column(Text)          # 원본 행 id (인시던트/상태 항목은 NULL)
+    risk_level: Mapped[str | None] = mapped_column(Text)
+    summary: Mapped[dict | None] = mapped_column(JSONB)
+
+# GET /incidents/{id}/timeline: (ts, id) keyset 순서 그대로 범위 스캔 한 번
+Index("idx_timeline_incident_ts", TimelineEntry.incident_id, TimelineEntry.ts, TimelineEntry.id)
+
 class Rule(Base):
     __tablename__ = "rules"
-    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    id: Mapped[int] = mapped_column(BigIntPK, primary_key=True)
     name: Mapped[str | None] = mapped_column(Text)
     enabled: Mapped[bool] = mapped_column(Boolean, default=True)
     definition: Mapped[dict | None] = mapped_column(JSONB)
@@ -120,9 +206,81 @@ class Rule(Base):
 
 class AuditLog(Base):
     __tablename__ = "audit_logs"
-    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    id: Mapped[int] = mapped_column(BigIntPK, primary_key=True)
     actor: Mapped[str | None] = mapped_column(Text)
     action: Mapped[str | None] = mapped_column(Text)
     entity: Mapped[str | None] = mapped_column(Text)
     details: Mapped[dict | None] = mapped_column(JSONB)
     created_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True))
+
+class IngestJob(Base):
+    __tablename__ = "ingest_jobs"
+    id: Mapped[int] = mapped_column(BigIntPK, primary_key=True)
+    payload: Mapped[dict | None] = mapped_column(JSONB)
+    status: Mapped[str] = mapped_column(Text, nullable=False, default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    available_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True), index=True)
+    locked_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True))
+    last_error: Mapped[str | None] = mapped_column(Text)
+    created_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True))
+
+class DeadLetter(Base):
+    __tablename__ = "ingest_dead_letters"
+    id: Mapped[int] = mapped_column(BigIntPK, primary_key=True)
+    job_id: Mapped[int | None] = mapped_column(BigInteger)
+    payload: Mapped[dict | None] = mapped_column(JSONB)
+    attempts: Mapped[int | None] = mapped_column(Integer)
+    error: Mapped[str | None] = mapped_column(Text)
+    failed_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True))
+
+# incident_counts 유지 트리거. 모든 테이블이 만들어진 뒤 생성 (운영 DB에는 같은 DDL을 마이그레이션으로 적용)
+_INCIDENT_COUNT_TRIGGERS = {
+    "postgresql": [
+        """
+        CREATE OR REPLACE FUNCTION incident_counts_apply() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE incident_counts SET n = n - 1
+                WHERE status = OLD.status AND risk_level = coalesce(OLD.risk_level, '');
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO incident_counts (status, risk_level, n)
+                VALUES (NEW.status, coalesce(NEW.risk_level, ''), 1)
+                ON CONFLICT (status, risk_level) DO UPDATE SET n = incident_counts.n + 1;
+            END IF;
+            RETURN NULL;
+        END $$ LANGUAGE plpgsql
+        """,
+        "CREATE TRIGGER trg_incident_counts_ins_del AFTER INSERT OR DELETE ON incidents "
+        "FOR EACH ROW EXECUTE FUNCTION incident_counts_apply()",
+        "CREATE TRIGGER trg_incident_counts_upd AFTER UPDATE OF status, risk_level ON incidents "
+        "FOR EACH ROW WHEN (OLD.status IS DISTINCT FROM NEW.status OR OLD.risk_level IS DISTINCT FROM NEW.risk_level) "
+        "EXECUTE FUNCTION incident_counts_apply()",
+    ],
+    "sqlite": [
+        """
+        CREATE TRIGGER trg_incident_counts_ins AFTER INSERT ON incidents BEGIN
+            INSERT INTO incident_counts (status, risk_level, n) VALUES (NEW.status, coalesce(NEW.risk_level, ''), 1)
+            ON CONFLICT (status, risk_level) DO UPDATE SET n = n + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER trg_incident_counts_del AFTER DELETE ON incidents BEGIN
+            UPDATE incident_counts SET n = n - 1
+            WHERE status = OLD.status AND risk_level = coalesce(OLD.risk_level, '');
+        END
+        """,
+        """
+        CREATE TRIGGER trg_incident_counts_upd AFTER UPDATE OF status, risk_level ON incidents
+        WHEN OLD.status IS NOT NEW.status OR OLD.risk_level IS NOT NEW.risk_level BEGIN
+            UPDATE incident_counts SET n = n - 1
+            WHERE status = OLD.status AND risk_level = coalesce(OLD.risk_level, '');
+            INSERT INTO incident_counts (status, risk_level, n) VALUES (NEW.status, coalesce(NEW.risk_level, ''), 1)
+            ON CONFLICT (status, risk_level) DO UPDATE SET n = n + 1;
+        END
+        """,
+    ],
+}
+for _dialect, _stmts in _INCIDENT_COUNT_TRIGGERS.items():
+    for _stmt in _stmts:
+        event.listen(Base.metadata, "after_create", DDL(_stmt).execute_if(dialect=_dialect))
@@ -0,0 +1,66 @@
+# scripts/bench_async_ingest.py — 장치 500대가 동시에 /ingest로 보낼 때 처리량/지연
+# 동기 Session(스레드풀) vs AsyncSession(ASYNC_DB=1)을 각각 새 프로세스에서 측정
+import argparse, asyncio, json, os, subprocess, sys
+
+from bench_common import Timer, encode, make_app, make_event, seed_devices, sign
+
+# 처리량 측정이므로 적응형 부하 차단은 끔 (동시 500대면 지연 목표를 넘어 LOW 이벤트가 429로 버려짐)
+os.environ.setdefault("SHED_LATENCY_TARGET", "0")
+
+async def run(devices: int, per_device: int) -> dict:
+    import httpx
+    from app.routers.ingest import router
+
+    app = make_app(router)
+    ids = seed_devices(devices)
+    latencies = []
+
+    async def device(client, device_id):
+        for i in range(per_device):
+            raw = encode(make_event(device_id, i, score=0.1))
+            with Timer() as t:
+                r = await client.post("/ingest", content=raw,
+                                      headers={"content-type": "application/json", "x-signature": sign(raw)})
+            assert r.status_code == 201, r.text
+            latencies.append(t.elapsed)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        with Timer() as total:
+            await asyncio.gather(*(device(client, d) for d in ids))
+
+    latencies.sort()
+    n = len(latencies)
+    return {
+        "events": n,
+        "seconds": total.elapsed,
+        "events_per_sec": n / total.elapsed,
+        "p50_ms": latencies[n // 2] * 1000,
+        "p99_ms": latencies[min(n - 1, int(n * 0.99))] * 1000,
+    }
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--devices", type=int, default=500)
+    ap.add_argument("--per-device", type=int, default=4)
+    ap.add_argument("--child", action="store_true")
+    args = ap.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(run(args.devices, args.per_device))))
+        return
+
+    for mode in ("0", "1"):
+        env = dict(os.environ, ASYNC_DB=mode)
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", "--devices", str(args.devices),
+             "--per-device", str(args.per_device)],
+            env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        r = json.loads(out.strip().splitlines()[-1])
+        label = "async session " if mode == "1" else "sync threadpool"
+        print(f"{label}: {r['events']} events in {r['seconds']:.2f}s = {r['events_per_sec']:,.0f}/s, "
+              f"p50 {r['p50_ms']:.1f} ms, p99 {r['p99_ms']:.1f} ms")
+
+if __name__ == "__main__":
+    main()
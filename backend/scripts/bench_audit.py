@@ -0,0 +1,158 @@
+# scripts/bench_audit.py — 감사 로그 지연 쓰기:
+#  1) 변경 API 5종(사용자/장치/인시던트 상태/확인/알림)이 audit_logs에 주체/대상/내용과 함께 남는지, 종료 시 버퍼가 비워지는지
+#  2) 버퍼가 찼을 때: drop(오래된 것 버림) / block(기다린 뒤 직접 씀), DB 장애 중 실패 묶음 보존 → 복구 후 종료 시 모두 씀
+#  3) 요청 p50/p99: 감사 끔 vs 지연 쓰기 vs 요청마다 직접 INSERT+커밋
+import argparse, statistics, time, uuid
+
+from bench_common import make_app
+
+def api_check(client) -> None:
+    from sqlalchemy import select
+    from app.core.db import SessionLocal
+    from app.services.audit import audit
+    from app.services.pipeline import upsert_incident
+    from models.models import AuditLog
+
+    audit.start()
+    who = {"X-Actor": "admin-1"}
+    user = client.post("/users", json={"email": "a@example.com", "role": "admin"}, headers=who).json()["id"]
+    device = client.post("/devices", json={"name": "cam", "serial": "S-1", "owner_id": user}, headers=who).json()["id"]
+    with SessionLocal() as db:
+        incident, _ = upsert_incident(db, uuid.UUID(device), "HIGH", "fire")
+        db.commit()
+    assert client.post("/alerts", json={"incident_id": str(incident), "channel": "sms"}, headers=who).status_code == 201
+    assert client.post("/confirmations", json={"incident_id": str(incident), "actor_id": user,
+                                               "decision": "real"}).status_code == 201
+    assert client.post(f"/incidents/{incident}/status", json={"status": "closed"}, headers=who).status_code == 200
+    assert client.post(f"/incidents/{incident}/status", json={"status": "nope"}, headers=who).status_code == 400
+    assert audit.close(5) == 0 and len(audit) == 0
+
+    with SessionLocal() as db:
+        rows = db.scalars(select(AuditLog).order_by(AuditLog.id)).all()
+    got = [(r.actor, r.action, r.entity) for r in rows]
+    assert got == [
+        ("admin-1", "user.create", f"user:{user}"),
+        ("admin-1", "device.register", f"device:{device}"),
+        ("admin-1", "alert.create", got[2][2]),
+        (user, "confirmation.create", f"incident:{incident}"),
+        ("admin-1", "incident.status", f"incident:{incident}"),
+    ], got
+    assert rows[4].details == {"from": "open", "to": "closed"} and rows[1].details["serial"] == "S-1"
+    assert all(r.created_at for r in rows)
+    print("api: " + ", ".join(a for _, a, _ in got) + " recorded; buffer empty after close()")
+
+def overflow_check() -> None:
+    from sqlalchemy import create_engine, func, select
+    from app.core.db import engine
+    from app.services.audit import AuditWriter, audit_records
+    from models.models import AuditLog
+
+    def count():
+        with engine.connect() as conn:
+            return conn.scalar(select(func.count()).select_from(AuditLog))
+
+    # 쓰기 스레드 없이 채움 → drop은 가장 오래된 것부터 버림
+    w = AuditWriter(engine, capacity=100, batch=50, overflow="drop")
+    for i in range(150):
+        w.record(None, "bench.drop", f"n:{i}")
+    assert len(w) == 100 and w._buf[0]["entity"] == "n:50"
+    w.close(1)
+
+    # block: 자리가 나지 않으면 block_timeout 뒤 요청이 직접 씀 → 잃는 것 없음
+    before, inline0 = count(), audit_records.labels("inline").value
+    w = AuditWriter(engine, capacity=100, batch=50, overflow="block", block_timeout=0.01)
+    for i in range(130):
+        w.record(None, "bench.block", f"n:{i}")
+    assert len(w) == 100 and audit_records.labels("inline").value - inline0 == 30
+    # 쓰기 스레드가 돌면 기다리던 요청은 자리를 얻음
+    w.start()
+    t = time.perf_counter()
+    for i in range(2000):
+        w.record(None, "bench.block", f"m:{i}")
+    spent = time.perf_counter() - t
+    assert w.close(5) == 0 and count() - before == 2130
+    print(f"overflow: drop keeps newest 100/150, block writes inline when stuck (30), "
+          f"2000 records through a 100-slot buffer in {spent * 1000:.0f} ms, nothing lost")
+
+    # DB 장애: 실패한 묶음은 버퍼에 남고, 복구되면 종료 시 모두 씀
+    before = count()
+    w = AuditWriter(create_engine("sqlite:////nonexistent/dir/audit.db"), capacity=1000, batch=20, interval=0.01)
+    w.start()
+    for i in range(100):
+        w.record(None, "bench.outage", f"n:{i}")
+    time.sleep(0.1)
+    assert len(w) == 100, len(w)
+    w._engine = engine
+    assert w.close(5) == 0 and count() - before == 100
+    w = AuditWriter(create_engine("sqlite:////nonexistent/dir/audit.db"), interval=0.01)
+    w.record(None, "bench.outage", "lost")
+    assert w.close(0.05) == 1
+    print("outage: 100 records kept across failed flushes and written after recovery; "
+          "close() reports what it could not write")
+
+def latency_bench(client, n: int, rounds: int = 4) -> None:
+    from app.core.db import engine
+    from app.services.audit import AuditWriter, audit
+
+    def run(label, k):
+        xs = []
+        for i in range(k):
+            t = time.perf_counter()
+            r = client.post("/users", json={"email": f"{label}-{uuid.uuid4().hex}@example.com"},
+                            headers={"X-Actor": "bench"})
+            xs.append(time.perf_counter() - t)
+            assert r.status_code == 201, r.text
+        return xs
+
+    def pct(xs):
+        xs = sorted(xs)
+        return statistics.median(xs) * 1000, xs[int(len(xs) * 0.99)] * 1000
+
+    # 모드를 번갈아 돌려 DB가 커지는 영향을 고르게 나눔
+    modes = {"audit off": [], "write-behind": [], "inline insert+commit": []}
+    run("warm", 200)
+    for _ in range(rounds):
+        audit.enabled = False
+        modes["audit off"] += run("off", n // rounds)
+        audit.enabled = True
+        audit.start()
+        modes["write-behind"] += run("behind", n // rounds)
+        assert audit.close(10) == 0
+        # 버퍼 자리를 0으로 두면 모든 기록이 요청 안에서 직접 INSERT + 커밋 (요청마다 동기 쓰기와 같음)
+        audit.capacity, audit.block_timeout = 0, 0
+        modes["inline insert+commit"] += run("sync", n // rounds)
+        audit.capacity = 10_000
+    base = pct(modes["audit off"])[1]
+    print(f"POST /users x{n} per mode: p50 / p99 ms")
+    for label, xs in modes.items():
+        p50, p99 = pct(xs)
+        print(f"  {label:22} {p50:6.2f} / {p99:6.2f}   (p99 {p99 - base:+5.2f} ms vs off)")
+
+    # record() 자체 비용 (쓰기 스레드가 도는 상태)
+    w = AuditWriter(engine)
+    w.start()
+    xs = []
+    for i in range(50_000):
+        t = time.perf_counter()
+        w.record("bench", "bench.record", f"n:{i}", {"i": i})
+        xs.append(time.perf_counter() - t)
+    assert w.close(30) == 0
+    xs.sort()
+    print(f"record(): p50 {statistics.median(xs) * 1e6:.1f} us, p99 {xs[int(len(xs) * 0.99)] * 1e6:.1f} us "
+          f"(50k records, flushed in batches of {w.batch})")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=2000)
+    args = ap.parse_args()
+
+    from fastapi.testclient import TestClient
+    from app.routers import alerts, confirmations, devices, incidents, users
+
+    client = TestClient(make_app(users.router, devices.router, incidents.router, alerts.router, confirmations.router))
+    api_check(client)
+    overflow_check()
+    latency_bench(client, args.requests)
+
+if __name__ == "__main__":
+    main()
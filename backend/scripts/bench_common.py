@@ -0,0 +1,92 @@
+# scripts/bench_common.py — 벤치마크 스크립트 공용 준비 코드
+import asyncio, os, sys, hmac, hashlib, json, tempfile, time, uuid
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# DB 지정이 없으면 임시 SQLite 파일로 로컬 실행
+if not os.getenv("SUPABASE_DB_URL"):
+    _tmp = os.path.join(tempfile.mkdtemp(prefix="bench-"), "bench.db")
+    os.environ["SUPABASE_DB_URL"] = f"sqlite:///{_tmp}"
+
+# 벤치마크는 시드한 장치(hmac_key 없음)를 공용 비밀로 서명함 → legacy 서명을 켜고 실행 (운영 기본은 끔)
+os.environ.setdefault("SIGNATURE_ALLOW_LEGACY", "1")
+SECRET = os.getenv("DEVICE_HMAC_SECRET", "device-shared-secret")
+
+def make_app(*routers):
+    from fastapi import FastAPI
+    from fastapi.datastructures import Default
+    from app.core.db import engine
+    from app.core.jsonlib import FastJSONResponse
+    from models.models import Base
+
+    Base.metadata.create_all(engine)
+    app = FastAPI(default_response_class=Default(FastJSONResponse))   # main.py와 같은 응답 클래스
+    for r in routers:
+        app.include_router(r)
+    return app
+
+# HTTP 클라이언트 없이 ASGI 앱을 직접 호출 → (status, body)
+async def call(app, method: str, path: str, body: bytes = b"", headers: dict | None = None) -> tuple:
+    path, _, qs = path.partition("?")
+    hdrs = [(b"content-type", b"application/json")] + [(k.encode(), v.encode()) for k, v in (headers or {}).items()]
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": qs.encode(),
+        "root_path": "", "headers": hdrs, "server": ("bench", 80), "client": ("127.0.0.1", 1),
+    }
+    sent = False
+    out = {"status": 0, "body": b""}
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.sleep(3600)
+
+    async def send(msg):
+        if msg["type"] == "http.response.start":
+            out["status"] = msg["status"]
+        elif msg["type"] == "http.response.body":
+            out["body"] += msg.get("body", b"")
+
+    await app(scope, receive, send)
+    return out["status"], out["body"]
+
+def seed_devices(n: int) -> list:
+    from app.core.db import SessionLocal
+    from models.models import Device
+
+    ids = [uuid.uuid4() for _ in range(n)]
+    with SessionLocal() as db:
+        db.add_all(Device(id=i, is_active=True, created_at=datetime.now(timezone.utc)) for i in ids)
+        db.commit()
+    return ids
+
+def sign(raw: bytes, secret: str = SECRET) -> str:
+    return "sha1=" + hmac.new(secret.encode(), raw, hashlib.sha1).hexdigest()
+
+def encode(body) -> bytes:
+    return json.dumps(body, separators=(",", ":"), default=str).encode()
+
+def make_event(device_id, i: int, event_type: str = "motion", score: float | None = None) -> dict:
+    body = {
+        "device_id": str(device_id),
+        "event_type": event_type,
+        "occurred_at": datetime.now(timezone.utc).isoformat(),
+        "idx_idempotency": f"bench-{uuid.uuid4().hex}-{i}",
+        "payload": {},
+    }
+    if score is not None:
+        body["payload"]["score"] = score
+    return body
+
+class Timer:
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.t0
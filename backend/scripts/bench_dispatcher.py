@@ -0,0 +1,77 @@
+# scripts/bench_dispatcher.py — queued 알림 N건을 fake 채널(지연/실패율)로 모두 처리할 때까지의
+# 처리량, 생성→발송 지연 분위수, 재시도/dead_letter 건수
+import argparse, asyncio, os
+
+os.environ.setdefault("ALERT_BACKOFF_BASE", "0.05")
+os.environ.setdefault("ALERT_BACKOFF_MAX", "0.5")
+
+from bench_common import Timer, make_app, seed_devices
+
+def seed_alerts(n: int) -> None:
+    import uuid
+    from sqlalchemy import insert
+    from app.core.db import SessionLocal
+    from app.core.utils import utcnow
+    from app.services.pipeline import alert_values
+    from models.models import Alert, Incident
+
+    device_id = seed_devices(1)[0]
+    with SessionLocal() as db:
+        inc = Incident(id=uuid.uuid4(), device_id=device_id, status="closed", risk_level="HIGH", opened_at=utcnow())
+        db.add(inc)
+        db.flush()
+        # 채널 비율 push 6 : sms 3 : voice 1
+        mix = ("push",) * 6 + ("sms",) * 3 + ("voice",)
+        db.execute(insert(Alert), [alert_values(str(inc.id), "HIGH", mix[i % 10]) for i in range(n)])
+        db.commit()
+
+async def run(args) -> None:
+    from sqlalchemy import func, select
+    from app.core.db import SessionLocal
+    from app.services.channels import FakeAdapter
+    from app.services.dispatcher import AlertDispatcher, alert_send_latency, alert_send_total
+    from models.models import Alert
+
+    adapters = {c: FakeAdapter(c, latency=args.latency, failure_rate=args.failure_rate, seed=i)
+                for i, c in enumerate(("sms", "push", "voice"))}
+    d = AlertDispatcher(adapters, batch_size=args.batch_size,
+                        rates={"sms": args.sms_rate, "push": 0, "voice": args.voice_rate})
+
+    def remaining():
+        with SessionLocal() as db:
+            return db.execute(select(func.count()).select_from(Alert)
+                              .where(Alert.status.in_(("queued", "sending")))).scalar_one()
+
+    stop = asyncio.Event()
+    with Timer() as t:
+        task = asyncio.create_task(d.run(stop, args.loops, poll_interval=0.02))
+        while remaining():
+            await asyncio.sleep(0.05)
+        stop.set()
+        await task
+
+    with SessionLocal() as db:
+        by_status = dict(db.execute(select(Alert.status, func.count()).group_by(Alert.status)).all())
+    print(f"{args.alerts} alerts in {t.elapsed:.2f}s = {args.alerts / t.elapsed:,.0f}/s; status={by_status}")
+    for ch in ("push", "sms", "voice"):
+        h = alert_send_latency.labels(ch)
+        errors = alert_send_total.labels(ch, "error").value
+        print(f"  {ch:5}: sent={h.count} p50<={h.quantile(0.5)}s p99<={h.quantile(0.99)}s failed attempts={errors:.0f}")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--alerts", type=int, default=5000)
+    ap.add_argument("--batch-size", type=int, default=200)
+    ap.add_argument("--loops", type=int, default=2)
+    ap.add_argument("--latency", type=float, default=0.02)
+    ap.add_argument("--failure-rate", type=float, default=0.1)
+    ap.add_argument("--sms-rate", type=float, default=2000)
+    ap.add_argument("--voice-rate", type=float, default=200)
+    args = ap.parse_args()
+
+    make_app()
+    seed_alerts(args.alerts)
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
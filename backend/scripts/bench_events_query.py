@@ -0,0 +1,65 @@
+# scripts/bench_events_query.py — events가 커져도 GET /events 장치별 기간 조회 시간이 일정한지 측정
+# (SQLite 대역. 단계별로 행을 추가하며 첫 페이지 / keyset 다음 페이지 조회 시간을 잼)
+import argparse, random, statistics, time, uuid
+from datetime import datetime, timedelta, timezone
+
+from bench_common import Timer, make_app
+
+def grow(engine, devices, start_id: int, n: int, t0: datetime, span: timedelta, rnd) -> None:
+    # ORM을 거치지 않고 드라이버 executemany로 빠르게 채움
+    step = span / n
+    chunk = 200_000
+    with engine.begin() as conn:
+        for off in range(0, n, chunk):
+            rows = []
+            for j in range(off, min(n, off + chunk)):
+                i = start_id + j
+                rows.append((i, devices[rnd.randrange(len(devices))].hex, "motion", 0.1, "LOW",
+                             (t0 + step * j).strftime("%Y-%m-%d %H:%M:%S.%f"), f"b{i}"))
+            conn.exec_driver_sql(
+                "INSERT INTO events (id, device_id, event_type, risk_score, risk_level, occurred_at, idx_idempotency) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--steps", default="100000,1000000,10000000,30000000")
+    ap.add_argument("--devices", type=int, default=1_000)
+    ap.add_argument("--queries", type=int, default=300)
+    args = ap.parse_args()
+
+    from fastapi.testclient import TestClient
+    from app.core.db import engine
+    from app.routers.events import router
+
+    client = TestClient(make_app(router))
+
+    rnd = random.Random(5)
+    devices = [uuid.uuid4() for _ in range(args.devices)]
+    t0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    total = 0
+    for target in (int(x) for x in args.steps.split(",")):
+        with Timer() as load:
+            # 시간 축은 행 수에 비례해 늘림 (장치당 이벤트 밀도 일정)
+            grow(engine, devices, total + 1, target - total,
+                 t0 + timedelta(minutes=total), timedelta(minutes=target - total), rnd)
+        total = target
+        end = t0 + timedelta(minutes=total)
+
+        first, nxt = [], []
+        for _ in range(args.queries):
+            d = devices[rnd.randrange(len(devices))]
+            lo = end - timedelta(days=30)
+            params = {"device_id": str(d), "from": lo.isoformat(), "to": end.isoformat(), "limit": 20}
+            t = time.perf_counter()
+            r = client.get("/events", params=params).json()
+            first.append(time.perf_counter() - t)
+            if r["next_cursor"]:
+                t = time.perf_counter()
+                client.get("/events", params={**params, "cursor": r["next_cursor"]})
+                nxt.append(time.perf_counter() - t)
+        print(f"{total:>12,} rows (loaded in {load.elapsed:6.1f}s): first page median "
+              f"{statistics.median(first) * 1000:.2f} ms, next page median "
+              f"{statistics.median(nxt) * 1000 if nxt else 0:.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# scripts/bench_export.py — 내보내기 생성기의 처리량과 최대 RSS가 행 수와 무관하게 일정한지 확인
+# (HTTP 테스트 클라이언트는 응답을 버퍼링하므로 StreamingResponse에 넘기는 생성기를 직접 소비)
+import argparse, resource
+from datetime import datetime, timedelta, timezone
+
+from bench_common import Timer, make_app, seed_devices
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--steps", default="200000,1000000,5000000")
+    ap.add_argument("--format", choices=("ndjson", "csv"), default="ndjson")
+    ap.add_argument("--gzip", action="store_true")
+    args = ap.parse_args()
+
+    from app.core.db import engine
+    from app.services.export import stream
+
+    make_app()
+    devices = seed_devices(100)
+    t0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    total = 0
+    for target in (int(x) for x in args.steps.split(",")):
+        with engine.begin() as conn:
+            for off in range(total, target, 100_000):
+                conn.exec_driver_sql(
+                    "INSERT INTO events (device_id, event_type, payload, risk_score, risk_level, occurred_at, "
+                    "idx_idempotency) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(devices[i % 100].hex, "motion", '{"gas": 0.1, "temperature": 21.5}', 0.1, "LOW",
+                      (t0 + timedelta(seconds=i)).strftime("%Y-%m-%d %H:%M:%S.%f"), f"x{i}")
+                     for i in range(off, min(target, off + 100_000))])
+        total = target
+
+        size = 0
+        with Timer() as t:
+            for b in stream("events", args.format, args.gzip):
+                size += len(b)
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"{total:>12,} rows: {total / t.elapsed:,.0f} rows/s, {size / 2**20:,.1f} MiB out, "
+              f"max RSS {rss:.0f} MiB")
+
+if __name__ == "__main__":
+    main()
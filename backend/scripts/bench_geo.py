@@ -0,0 +1,152 @@
+# scripts/bench_geo.py — 장치 위치 공간 인덱스:
+#  1) 등록 즉시 GET /devices/nearby에 보이는지, location 형식별 정규화, GET /incidents?bbox= 필터,
+#     기존 장치 백필(normalize_device_locations.py) 후 레지스트리 적재
+#  2) 장치 100만 대에서 반경/사각형 조회: 격자 인덱스 vs 전체 훑기 (결과가 같은지도 확인)
+import argparse, math, random, statistics, sys, time, uuid
+
+from bench_common import Timer, make_app
+
+def api_check(client) -> None:
+    from sqlalchemy import insert
+    from app.core.db import SessionLocal, engine
+    from app.services.pipeline import upsert_incident
+    from app.services.registry import registry
+    from models.models import Device
+
+    # 서울 시청 주변 / 부산 / 날짜변경선 양쪽
+    points = {
+        "hall": {"lat": 37.5663, "lon": 126.9779},
+        "plaza": {"latitude": 37.5658, "longitude": 126.9752},
+        "tower": {"type": "Point", "coordinates": [126.9882, 37.5512]},
+        "busan": {"geometry": {"type": "Point", "coordinates": [129.0756, 35.1796]}},
+        "fiji": {"lat": -17.8, "lng": 179.9},
+        "samoa": {"lat": -13.8, "lon": -179.9},
+        "room": {"building": "B", "room": "guard"},
+    }
+    ids = {}
+    for name, loc in points.items():
+        r = client.post("/devices", json={"name": name, "location": loc})
+        assert r.status_code == 201, r.text
+        ids[name] = r.json()["id"]
+    by_id = {v: k for k, v in ids.items()}
+
+    r = client.get("/devices/nearby", params={"lat": 37.5665, "lon": 126.9780, "radius": 2000})
+    assert r.status_code == 200, r.text
+    near = [(by_id[x["id"]], x["distance_m"]) for x in r.json()]
+    assert [n for n, _ in near] == ["hall", "plaza", "tower"], near
+    assert client.get(f"/devices/{ids['tower']}").json()["lat"] == 37.5512
+    assert client.get("/devices/nearby", params={"lat": 95, "lon": 0}).status_code == 422
+    print("nearby (2 km of city hall): " + ", ".join(f"{n} {d:.0f} m" for n, d in near))
+
+    with SessionLocal() as db:
+        for name in ("hall", "busan", "fiji", "samoa", "room"):
+            upsert_incident(db, ids[name], "HIGH", "fire")
+        db.commit()
+
+    def in_box(bbox):
+        r = client.get("/incidents", params={"bbox": bbox})
+        assert r.status_code == 200, r.text
+        return sorted(by_id[x["device_id"]] for x in r.json()["items"])
+
+    assert in_box("126.9,37.5,127.1,37.6") == ["hall"]
+    assert in_box("124,33,132,39") == ["busan", "hall"]
+    assert in_box("179,-20,-179,-10") == ["fiji", "samoa"]   # 날짜변경선을 넘는 상자
+    assert in_box("0,0,1,1") == []
+    assert client.get("/incidents", params={"bbox": "1,2,3"}).status_code == 400
+    print("incidents?bbox: city / country / antimeridian / empty boxes OK")
+
+    # 좌표 열이 비어 있는 기존 장치 → 백필 → 전체 재적재로 인덱스에 들어옴
+    legacy = [uuid.uuid4() for _ in range(3)]
+    with engine.begin() as conn:
+        conn.execute(insert(Device), [
+            {"id": d, "is_active": True, "location": {"lat": 37.57 + i * 0.001, "lon": 126.98}}
+            for i, d in enumerate(legacy)])
+    import normalize_device_locations
+    sys.argv = ["normalize_device_locations.py"]
+    normalize_device_locations.main()
+    with SessionLocal() as db:
+        registry.warm(db)
+    found = {x["id"] for x in client.get("/devices/nearby", params={"lat": 37.571, "lon": 126.98, "radius": 500}).json()}
+    assert {str(d) for d in legacy} <= found, found
+    print(f"backfill: {len(legacy)} legacy devices indexed after reload ({registry.stats()['located']} located)")
+
+def scale_bench(n: int, queries: int, naive_queries: int) -> None:
+    from app.services.geo import GeoIndex, distance_m
+
+    rnd = random.Random(7)
+    # 남한 범위에 고르게 + 도시 몇 곳에 몰리게 (절반)
+    cities = [(37.5665, 126.9780), (35.1796, 129.0756), (35.8714, 128.6014), (37.4563, 126.7052)]
+    points = []
+    for i in range(n):
+        if i % 2:
+            la, lo = rnd.choice(cities)
+            points.append((i, la + rnd.gauss(0, 0.08), lo + rnd.gauss(0, 0.08)))
+        else:
+            points.append((i, rnd.uniform(33.1, 38.6), rnd.uniform(124.6, 131.0)))
+    idx = GeoIndex()
+    with Timer() as load:
+        idx.load(points)
+    print(f"loaded {n:,} devices into {idx.stats()['cells']:,} cells in {load.elapsed:.2f}s")
+
+    edge = GeoIndex()
+    edge.load([(1, 0.0, 179.9995), (2, 0.0, -179.9995), (3, 0.0, 179.9), (4, 89.9999, 10.0), (5, 89.9999, -170.0)])
+    assert [k for k, *_ in edge.nearby(0.0, 180.0, 1000)] in ([1, 2], [2, 1])
+    assert sorted(k for k, *_ in edge.nearby(90.0, 0.0, 100)) == [4, 5]
+    assert sorted(edge.within(-1, 179.95, 1, -179.95)) == [1, 2]
+
+    def naive_nearby(lat, lon, radius, limit):
+        found = [(distance_m(lat, lon, la, lo), k) for k, la, lo in points]
+        return sorted(x for x in found if x[0] <= radius)[:limit]
+
+    def naive_within(min_lat, min_lon, max_lat, max_lon):
+        return [k for k, la, lo in points if min_lat <= la <= max_lat and min_lon <= lo <= max_lon]
+
+    def probes(k):
+        out = []
+        for _ in range(k):
+            la, lo = rnd.choice(cities) if rnd.random() < 0.5 else (rnd.uniform(33.1, 38.6), rnd.uniform(124.6, 131.0))
+            out.append((la + rnd.gauss(0, 0.05), lo + rnd.gauss(0, 0.05)))
+        return out
+
+    def timed(fn, args):
+        xs = []
+        for a in args:
+            t = time.perf_counter()
+            fn(*a)
+            xs.append(time.perf_counter() - t)
+        xs.sort()
+        return statistics.median(xs) * 1e6, xs[min(len(xs) - 1, int(len(xs) * 0.99))] * 1e6
+
+    for radius in (500, 2000, 50_000):
+        qs = [(la, lo, radius, 50) for la, lo in probes(queries)]
+        for la, lo, r, lim in qs[:naive_queries]:
+            got = [round(d, 6) for _, _, _, d in idx.nearby(la, lo, r, lim)]
+            assert got == [round(d, 6) for d, _ in naive_nearby(la, lo, r, lim)]
+        (i50, i99), (n50, _) = timed(idx.nearby, qs), timed(naive_nearby, qs[:naive_queries])
+        print(f"nearby r={radius:>5} m: index p50 {i50:7.1f} us p99 {i99:7.1f} us | full scan p50 {n50 / 1000:7.1f} ms "
+              f"(x{n50 / i50:,.0f})")
+
+    side = 0.05   # 지도 한 화면 (~5 km)
+    qs = [(la, lo, la + side, lo + side) for la, lo in probes(queries)]
+    for box in qs[:naive_queries]:
+        assert sorted(idx.within(*box)) == sorted(naive_within(*box))
+    (i50, i99), (n50, _) = timed(idx.within, qs), timed(naive_within, qs[:naive_queries])
+    avg = statistics.mean(len(idx.within(*b)) for b in qs[:100])
+    print(f"bbox {side}deg (~{avg:.0f} devices): index p50 {i50:7.1f} us p99 {i99:7.1f} us | full scan p50 "
+          f"{n50 / 1000:7.1f} ms (x{n50 / i50:,.0f})")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--devices", type=int, default=1_000_000)
+    ap.add_argument("--queries", type=int, default=2000)
+    ap.add_argument("--naive-queries", type=int, default=10)
+    args = ap.parse_args()
+
+    from fastapi.testclient import TestClient
+    from app.routers import devices, incidents
+
+    api_check(TestClient(make_app(devices.router, incidents.router)))
+    scale_bench(args.devices, args.queries, args.naive_queries)
+
+if __name__ == "__main__":
+    main()
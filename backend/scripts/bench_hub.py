@@ -0,0 +1,137 @@
+# scripts/bench_hub.py — 실시간 푸시 허브: 유휴 구독자 1만 명을 붙여 둔 상태에서 인시던트 변경 전달 지연 측정,
+# 느린 구독자의 대기열 합치기/버림 확인, WebSocket 엔드포인트로 POST /incidents → 수신까지 종단 확인
+import argparse, asyncio, json, random, threading, time, tracemalloc, uuid
+
+from bench_common import make_app, seed_devices
+
+async def fanout_check(subscribers: int, devices: int, dashboards: int, changes: int) -> None:
+    from app.services.hub import Hub
+
+    hub = Hub(max_pending=64)
+    hub.bind(asyncio.get_running_loop())
+    rnd = random.Random(1)
+    device_ids = [uuid.uuid4() for _ in range(devices)]
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    subs = [hub.subscribe(device_ids=[rnd.choice(device_ids)]) for _ in range(subscribers)]
+    subs += [hub.subscribe() for _ in range(dashboards)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    per_sub = sum(s.size_diff for s in after.compare_to(before, "filename")) / len(subs)
+
+    lags: list = []
+    received = [0]
+
+    async def client(sub):
+        # 연결 송신 루프 흉내: 받은 메시지의 발행 시각으로 지연 기록
+        while True:
+            batch = await sub.next_batch(timeout=3600)
+            now = time.perf_counter()
+            for text in batch or ():
+                lags.append(now - json.loads(text)["t"])
+                received[0] += 1
+
+    tasks = [asyncio.create_task(client(s)) for s in subs]
+    await asyncio.sleep(0.1)
+
+    # 스레드풀의 요청 처리 스레드에서 발행하는 것과 같게 다른 스레드에서 publish
+    expected = 0
+    targets = [rnd.choice(device_ids) for _ in range(changes)]
+    for d in targets:
+        expected += sum(1 for s in subs if not s.devices or d.int in s.devices)
+
+    def publisher():
+        for i, d in enumerate(targets):
+            hub.publish({"type": "incident", "id": f"inc-{i}", "device_id": str(d), "t": time.perf_counter()})
+            time.sleep(0.001)
+
+    t0 = time.perf_counter()
+    await asyncio.to_thread(publisher)
+    while received[0] < expected and time.perf_counter() - t0 < 30:
+        await asyncio.sleep(0.01)
+    for t in tasks:
+        t.cancel()
+
+    lags.sort()
+    print(f"{len(subs):,} subscribers ({dashboards} unfiltered), ~{per_sub:.0f} B/subscriber")
+    print(f"{changes} changes -> {received[0]:,}/{expected:,} deliveries: "
+          f"p50 {lags[len(lags) // 2] * 1000:.2f} ms, p99 {lags[int(len(lags) * 0.99)] * 1000:.2f} ms, "
+          f"max {lags[-1] * 1000:.2f} ms")
+    assert received[0] == expected and lags[int(len(lags) * 0.99)] < 0.1
+
+async def slow_consumer_check() -> None:
+    from app.services.hub import Hub
+
+    hub = Hub(max_pending=8)
+    hub.bind(asyncio.get_running_loop())
+    sub = hub.subscribe()
+    # 같은 인시던트 1,000번 변경 → 1건으로 합쳐짐, 서로 다른 100건 → 최근 8건만 남음
+    for i in range(1000):
+        hub.publish({"type": "incident", "id": "same", "device_id": None, "rev": i})
+    batch = await sub.next_batch()
+    assert len(batch) == 1 and json.loads(batch[0])["rev"] == 999
+    for i in range(100):
+        hub.publish({"type": "incident", "id": f"inc-{i}", "device_id": None})
+    batch = await sub.next_batch()
+    assert [json.loads(t)["id"] for t in batch] == [f"inc-{i}" for i in range(92, 100)] and sub.dropped == 92
+    print("slow consumer: 1000 updates of one incident coalesced to 1; 100 distinct -> newest 8 kept, 92 dropped")
+
+def websocket_check() -> None:
+    from fastapi.testclient import TestClient
+    from app.routers.incidents import router as incidents_router
+    from app.routers.stream import router as stream_router
+
+    client = TestClient(make_app(incidents_router, stream_router))
+    device_id, other = seed_devices(2)
+    with client.websocket_connect(f"/incidents/ws?device_id={device_id}") as ws:
+        client.post("/incidents", json={"device_id": str(other), "risk_level": "HIGH", "category": "x"})
+        t0 = time.perf_counter()
+        r = client.post("/incidents", json={"device_id": str(device_id), "risk_level": "HIGH", "category": "x"})
+        msg = ws.receive_json()
+        opened = time.perf_counter() - t0
+        assert msg["id"] == r.json()["id"] and msg["action"] == "opened", msg
+
+        client.post("/incidents", json={"device_id": str(device_id), "risk_level": "CRITICAL"})
+        msg = ws.receive_json()
+        assert msg["action"] == "upgraded" and msg["risk_level"] == "CRITICAL", msg
+        client.post(f"/incidents/{msg['id']}/status", json={"status": "acknowledged"})
+        msg = ws.receive_json()
+        assert msg["action"] == "status" and msg["status"] == "acknowledged", msg
+    print(f"websocket: POST /incidents -> message in {opened * 1000:.1f} ms (incl. request); "
+          f"upgrade and status change delivered, other device filtered out")
+
+async def sse_check() -> None:
+    # SSE: 응답 객체만 만들고 본문을 돌리지 않으면 구독이 생기지 않고, 본문이 끝나면(끊김) 해제됨
+    from app.routers.stream import incidents_sse
+    from app.services.hub import hub
+
+    before, loop = hub._count, hub._loop
+    try:
+        resp = await incidents_sse(owner_id=[], device_id=[])
+        assert hub._count == before, "subscribed before the stream started"
+        body = resp.body_iterator
+        assert (await body.__anext__()).startswith("retry:")
+        assert hub._count == before + 1
+        await body.aclose()
+        assert hub._count == before, "subscription left after the stream closed"
+    finally:
+        hub._loop = loop   # 공용 허브가 이 검사의 (곧 닫힐) 루프에 묶이지 않도록
+    print("sse: subscribes when the body starts, unsubscribes when it closes")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--subscribers", type=int, default=10_000)
+    ap.add_argument("--devices", type=int, default=5_000)
+    ap.add_argument("--dashboards", type=int, default=10)
+    ap.add_argument("--changes", type=int, default=500)
+    args = ap.parse_args()
+
+    asyncio.run(fanout_check(args.subscribers, args.devices, args.dashboards, args.changes))
+    asyncio.run(slow_consumer_check())
+    asyncio.run(sse_check())
+    websocket_check()
+    print("OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# scripts/bench_idempotency.py — 재전송 5% 섞인 /ingest 지연: 기존처럼 매번 SELECT로 확인하는 경우 vs
+# 아이템포턴시 필터(블룸 + LRU) 사용. events 테이블 사전 조회 횟수와 필터 지표도 출력.
+# 먼저 같은 키가 다른 occurred_at으로 다시 와도 event_keys가 1행만 남기는지 확인 (동기/비동기/배치 경로)
+import argparse, asyncio, random
+from datetime import timedelta
+
+from bench_common import Timer, encode, make_app, make_event, seed_devices, sign
+
+def percentile(xs, q):
+    return xs[min(len(xs) - 1, int(len(xs) * q))] * 1000
+
+async def run(app, devices, n: int, retry_rate: float, seed: int) -> list:
+    import httpx
+
+    rnd = random.Random(seed)
+    sent, latencies = [], []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for i in range(n):
+            if sent and rnd.random() < retry_rate:
+                raw = rnd.choice(sent[-200:])       # 최근 이벤트 재전송
+            else:
+                raw = encode(make_event(devices[i % len(devices)], i, score=0.1))
+                sent.append(raw)
+            with Timer() as t:
+                r = await client.post("/ingest", content=raw,
+                                      headers={"content-type": "application/json", "x-signature": sign(raw)})
+            assert r.status_code == 201, r.text
+            latencies.append(t.elapsed)
+    return sorted(latencies)
+
+def key_checks(devices, forgetful) -> None:
+    # forgetful: 아무것도 기억하지 않는 필터 → 매번 DB(유니크 인덱스 + event_keys)가 판정
+    from sqlalchemy import func, select
+    from app.core.db import SessionLocal, async_session
+    from app.services import pipeline, pipeline_async
+    from models.models import Event, EventKey
+    from app.schemas.common import EventIngest
+
+    pipeline.dedup = pipeline_async.dedup = forgetful
+    body = EventIngest.model_validate(make_event(devices[0], 1, score=0.1)).model_dump()
+    key, at = "key-check-1", body["occurred_at"]
+
+    def rows(k):
+        with SessionLocal() as db:
+            return db.scalar(select(func.count()).select_from(Event).where(Event.idx_idempotency == k))
+
+    with SessionLocal() as db:
+        first, dup, _ = pipeline.store_event(db, dict(body, occurred_at=at), 0.1, "LOW", key)
+        assert not dup
+        for shift in (0, 5):   # 같은 occurred_at (유니크 인덱스) / 다른 occurred_at (event_keys)
+            again, dup, level = pipeline.store_event(db, dict(body, occurred_at=at + timedelta(seconds=shift)),
+                                                     0.9, "CRITICAL", key)
+            assert (again, dup, level) == (first, True, "LOW"), (shift, again, dup, level)
+
+    async def async_path():
+        async with async_session() as db:
+            r = await pipeline_async.store_event(db, dict(body, occurred_at=at + timedelta(seconds=9)), 0.9, "HIGH", key)
+            await db.commit()
+            return r
+    assert asyncio.run(async_path()) == (first, True, "LOW")
+
+    batch = [dict(body, occurred_at=at + timedelta(seconds=s), idx_idempotency=k)
+             for s, k in ((7, key), (8, "key-check-2"))]
+    with SessionLocal() as db:
+        out = pipeline.process_batch(db, batch, known={devices[0]})
+    assert (out[0]["event_id"], out[0]["duplicate"], out[0]["risk_level"]) == (first, True, "LOW"), out[0]
+    assert not out[1]["duplicate"], out[1]
+    assert rows(key) == 1 and rows("key-check-2") == 1
+    with SessionLocal() as db:
+        assert db.scalar(select(EventKey.event_id).where(EventKey.idx_idempotency == key)) == first
+    print("key checks: OK (one row per key across occurred_at, sync/async/batch)")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=5000)
+    ap.add_argument("--retry-rate", type=float, default=0.05)
+    args = ap.parse_args()
+
+    from sqlalchemy import event
+    from app.core.db import engine
+    from app.routers.ingest import router
+    from app.services import dedup as dedup_mod, pipeline
+
+    class AlwaysProbe(dedup_mod.IdempotencyFilter):
+        # 필터 도입 전 동작: 모든 키를 DB에서 먼저 확인
+        def classify(self, keys):
+            return {}, list(keys), []
+
+        def add_many(self, items):
+            pass
+
+    app = make_app(router)
+    devices = seed_devices(50)
+    key_checks(devices, AlwaysProbe())
+    probes = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cur, stmt, *a: probes.append(1) if stmt.lstrip().startswith("SELECT events.id") else None)
+
+    for label, f in (("select every key", AlwaysProbe()), ("bloom + lru     ", dedup_mod.IdempotencyFilter())):
+        pipeline.dedup = f
+        probes.clear()
+        lat = asyncio.run(run(app, devices, args.events, args.retry_rate, seed=7))
+        print(f"{label}: p50 {percentile(lat, 0.5):.2f} ms, p95 {percentile(lat, 0.95):.2f} ms, "
+              f"p99 {percentile(lat, 0.99):.2f} ms, pre-insert SELECTs {len(probes)}")
+    s = pipeline.dedup.stats()
+    print(f"filter: cached={s['cached']} new={s['definitely_new']} maybe={s['maybe_found']}+{s['maybe_missing']} "
+          f"observed fpr={s['observed_fpr']:.4f} est fpr={s['estimated_fpr']:.2e} "
+          f"bloom={s['bloom_bytes'] / 2**20:.1f} MiB lru={s['lru_entries']} ({s['lru_bytes'] / 2**10:.0f} KiB)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# scripts/bench_incidents_query.py — 닫힌 인시던트가 수백만 건일 때 대시보드 조회:
+# GET /incidents?status=open 첫 페이지, GET /incidents/summary(요약 테이블) vs 매번 COUNT(*) GROUP BY
+import argparse, random, statistics, time, uuid
+from datetime import datetime, timedelta, timezone
+
+from bench_common import Timer, make_app, seed_devices
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--closed", type=int, default=1_000_000)
+    ap.add_argument("--open", type=int, default=2_000)
+    ap.add_argument("--queries", type=int, default=100)
+    args = ap.parse_args()
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import func, select
+    from app.core.db import SessionLocal, engine
+    from app.routers.incidents import router
+    from models.models import Incident
+
+    client = TestClient(make_app(router))
+    devices = seed_devices(args.open)
+    rnd = random.Random(2)
+    t0 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    levels = ("HIGH", "CRITICAL")
+    with Timer() as load, engine.begin() as conn:
+        sql = ("INSERT INTO incidents (id, device_id, status, category, risk_level, opened_at) "
+               "VALUES (?, ?, ?, ?, ?, ?)")
+        for off in range(0, args.closed, 100_000):
+            conn.exec_driver_sql(sql, [
+                (uuid.uuid4().hex, devices[rnd.randrange(len(devices))].hex, "closed", "fire", rnd.choice(levels),
+                 (t0 + timedelta(seconds=i)).strftime("%Y-%m-%d %H:%M:%S.%f"))
+                for i in range(off, min(args.closed, off + 100_000))])
+        conn.exec_driver_sql(sql, [
+            (uuid.uuid4().hex, d.hex, "open", "fire", rnd.choice(levels),
+             (t0 + timedelta(seconds=args.closed + i)).strftime("%Y-%m-%d %H:%M:%S.%f"))
+            for i, d in enumerate(devices)])
+    print(f"loaded {args.closed:,} closed + {args.open:,} open in {load.elapsed:.1f}s (triggers included)")
+
+    def timed(fn):
+        xs = []
+        for _ in range(args.queries):
+            t = time.perf_counter()
+            fn()
+            xs.append(time.perf_counter() - t)
+        return statistics.median(xs) * 1000
+
+    def count_star():
+        with SessionLocal() as db:
+            db.execute(select(Incident.status, Incident.risk_level, func.count())
+                       .group_by(Incident.status, Incident.risk_level)).all()
+
+    page = timed(lambda: client.get("/incidents", params={"status": "open", "limit": 50}))
+    summary = timed(lambda: client.get("/incidents/summary"))
+    counted = timed(count_star)
+    print(f"open list first page : {page:.2f} ms")
+    print(f"summary (table)      : {summary:.2f} ms -> {client.get('/incidents/summary').json()['by_status']}")
+    print(f"COUNT(*) GROUP BY    : {counted:.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# scripts/bench_ingest_batch.py — /ingest 단건 vs /ingest/batch 처리량 비교
+import argparse, random
+
+from bench_common import Timer, encode, make_app, make_event, seed_devices, sign
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=2000)
+    ap.add_argument("--batch", type=int, default=500)
+    ap.add_argument("--devices", type=int, default=50)
+    args = ap.parse_args()
+
+    from fastapi.testclient import TestClient
+    from app.routers.ingest import router
+
+    client = TestClient(make_app(router))
+    devices = seed_devices(args.devices)
+    rnd = random.Random(42)
+
+    def events(n):
+        return [make_event(rnd.choice(devices), i, rnd.choice(["motion", "tamper", "door"]), rnd.random() * 0.6)
+                for i in range(n)]
+
+    single = events(args.events)
+    with Timer() as t1:
+        for e in single:
+            raw = encode(e)
+            r = client.post("/ingest", content=raw, headers={"X-Signature": sign(raw), "Content-Type": "application/json"})
+            assert r.status_code == 201, r.text
+
+    batched = events(args.events)
+    with Timer() as t2:
+        for i in range(0, len(batched), args.batch):
+            raw = encode(batched[i:i + args.batch])
+            r = client.post("/ingest/batch", content=raw, headers={"X-Signature": sign(raw), "Content-Type": "application/json"})
+            assert r.status_code == 200, r.text
+
+    print(f"single : {args.events / t1.elapsed:10.0f} events/sec ({t1.elapsed:.2f}s)")
+    print(f"batch  : {args.events / t2.elapsed:10.0f} events/sec ({t2.elapsed:.2f}s, batch={args.batch})")
+    print(f"speedup: {t1.elapsed / t2.elapsed:.1f}x")
+
+if __name__ == "__main__":
+    main()
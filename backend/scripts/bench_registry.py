@@ -0,0 +1,48 @@
+# scripts/bench_registry.py — 장치 레지스트리 캐시: 적재 시간, 조회 처리량, 장치당 메모리
+import argparse, tracemalloc, uuid
+
+from bench_common import Timer, make_app
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--devices", type=int, default=100_000)
+    ap.add_argument("--lookups", type=int, default=1_000_000)
+    args = ap.parse_args()
+
+    from datetime import datetime, timezone
+    from sqlalchemy import insert
+    from app.core.db import SessionLocal
+    from app.services.registry import DeviceRegistry
+    from models.models import Device
+
+    make_app()
+    ids = [uuid.uuid4() for _ in range(args.devices)]
+    now = datetime.now(timezone.utc)
+    with SessionLocal() as db:
+        db.execute(insert(Device), [{"id": i, "is_active": True, "created_at": now, "hmac_key": i.bytes}
+                                    for i in ids])
+        db.commit()
+
+    reg = DeviceRegistry()
+    tracemalloc.start()
+    with Timer() as warm, SessionLocal() as db:
+        reg.warm(db)
+    mem, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    unknown = [uuid.uuid4() for _ in range(1000)]
+    reg.mark_missing(unknown)
+    probe = [ids[i % len(ids)] for i in range(args.lookups)]
+    with Timer() as t:
+        for d in probe:
+            reg.lookup(d)
+    with Timer() as tn:
+        for i in range(args.lookups // 10):
+            reg.lookup(unknown[i % len(unknown)])
+
+    print(f"warm    : {len(reg):,} devices in {warm.elapsed:.2f}s, ~{mem / len(reg):.0f} B/device")
+    print(f"lookup  : {args.lookups / t.elapsed:,.0f}/s active, {args.lookups // 10 / tn.elapsed:,.0f}/s unknown")
+    print(f"stats   : {reg.stats()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# scripts/bench_scoring.py — 배치 벡터 점수화 vs 이벤트별 파이썬 루프,
+# 정상 분포 읽기값이 ML 등급 HIGH 이상이 되는 비율 (ANOMALY_P_HIGH 근처여야 함), 장치 인덱스 상한/유휴 비우기
+import argparse, random, uuid
+
+from bench_common import Timer
+
+def loop_scorer(features, min_samples):
+    from app.services.scoring import chi2_sf
+
+    # 비교용: 이벤트 하나씩 dict 상태로 Welford 갱신 + z-score
+    stats = {}
+
+    def score(device_id, payload):
+        st = stats.setdefault(device_id, [[0, 0.0, 0.0] for _ in features])
+        d2, k = 0.0, 0
+        for f, s in zip(features, st):
+            v = payload.get(f)
+            if v is None:
+                continue
+            n, mean, m2 = s
+            if n >= min_samples:
+                var = m2 / (n - 1) if n > 1 else 0.0
+                d2 += (v - mean) ** 2 / (var + 1e-9)
+                k += 1
+            n += 1
+            delta = v - mean
+            mean += delta / n
+            s[0], s[1], s[2] = n, mean, m2 + delta * (v - mean)
+        return 1.0 - chi2_sf(d2, k) if k else None
+    return score
+
+def bound_check() -> None:
+    # 장치 수 상한: 인덱스와 배열이 상한 근처에 머물고, 비워진 장치는 다시 나오면 처음부터 학습
+    from app.services.scoring import AnomalyScorer
+
+    sc = AnomalyScorer(min_samples=2, capacity=16, max_devices=100)
+    devices = [uuid.uuid4() for _ in range(1_000)]
+    for i in range(0, len(devices), 50):
+        sc.score_bodies([{"device_id": d, "payload": {"gas": 400.0}} for d in devices[i:i + 50] * 3])
+    assert len(sc) <= 100 and sc.n.shape[0] <= 256, (len(sc), sc.n.shape)
+    assert sc.evicted == 900, sc.evicted
+    rows = sc.n.shape[0]
+    assert sc.score_bodies([{"device_id": devices[0], "payload": {"gas": 900.0}}]) == [None]   # 표본 0부터
+    # 유휴 TTL: 다음 배치에서 오래 조용했던 장치를 비움 (배치 안 장치는 남김)
+    sc.ttl = 0
+    sc.score_bodies([{"device_id": devices[1], "payload": {"gas": 400.0}}])
+    assert len(sc) == 1, len(sc)
+    print(f"bounded index: 1,000 devices through max_devices=100 -> 900 evicted, {rows} rows; idle TTL clears the rest")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--batch", type=int, default=10_000)
+    ap.add_argument("--batches", type=int, default=20)
+    ap.add_argument("--devices", type=int, default=2_000)
+    args = ap.parse_args()
+
+    from app.services.scoring import AnomalyScorer
+
+    bound_check()
+    rnd = random.Random(11)
+    devices = [uuid.uuid4() for _ in range(args.devices)]
+    batches = [[{
+        "device_id": rnd.choice(devices),
+        "payload": {"gas": rnd.gauss(400, 30), "temperature": rnd.gauss(22, 2), "motion": rnd.random()},
+    } for _ in range(args.batch)] for _ in range(args.batches)]
+
+    scorer = AnomalyScorer(min_samples=5)
+    with Timer() as tv:
+        for b in batches:
+            scorer.score_bodies(b)
+
+    score = loop_scorer(scorer.features, 5)
+    with Timer() as tl:
+        for b in batches:
+            for e in b:
+                score(e["device_id"], e["payload"])
+
+    # 보정 확인: 학습이 끝난 장치에 같은 정규 분포 값을 더 흘려 등급 분포를 봄
+    from app.core.config import ANOMALY_P_HIGH
+    from app.services.pipeline import anomaly_level
+    normal = [{"device_id": rnd.choice(devices),
+               "payload": {"gas": rnd.gauss(400, 30), "temperature": rnd.gauss(22, 2), "motion": rnd.random()}}
+              for _ in range(200_000)]
+    scores = [s for s in scorer.score_bodies(normal) if s is not None]
+    high = sum(anomaly_level(s) in ("HIGH", "CRITICAL") for s in scores) / len(scores)
+    print(f"calibration: {high:.2e} of {len(scores):,} normal readings scored HIGH+ (target ~{ANOMALY_P_HIGH:.0e})")
+    assert high < ANOMALY_P_HIGH * 20, high
+
+    n = args.batch * args.batches
+    print(f"vectorized: {tv.elapsed / args.batches * 1000:8.2f} ms/batch of {args.batch} ({n / tv.elapsed:,.0f} events/sec)")
+    print(f"per-event : {tl.elapsed / args.batches * 1000:8.2f} ms/batch of {args.batch} ({n / tl.elapsed:,.0f} events/sec)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# scripts/bench_serialization.py — 목록/단건 조회와 수집 엔드포인트의 요청당 CPU 시간 측정.
+# HTTP 클라이언트 비용이 섞이지 않도록 ASGI 앱을 직접 호출하고 process_time(모든 스레드 합)으로 잼
+import argparse, asyncio, json, time, uuid
+from datetime import datetime, timedelta, timezone
+
+from bench_common import call, encode, make_app, make_event, seed_devices, sign
+
+def seed(devices: int, incidents: int, events: int):
+    from app.core.db import SessionLocal
+    from models.models import Event, Incident
+
+    ids = seed_devices(devices)
+    target = ids[0]
+    now = datetime.now(timezone.utc)
+    with SessionLocal() as db:
+        db.add_all(
+            Incident(id=uuid.uuid4(), device_id=target, status="closed", category="intrusion", risk_level="HIGH",
+                     top_signals={"score": 0.9}, opened_at=now - timedelta(minutes=i), closed_at=now)
+            for i in range(incidents)
+        )
+        db.add_all(
+            Event(device_id=target, event_type="motion", payload={"score": 0.1, "zone": "door"}, risk_score=0.1,
+                  risk_level="LOW", occurred_at=now - timedelta(seconds=i), received_at=now,
+                  idx_idempotency=f"seed-{i}")
+            for i in range(events)
+        )
+        db.commit()
+    return ids, target
+
+async def measure(app, n: int, method: str, path_fn, body_fn=None, headers_fn=None) -> tuple:
+    # 워밍업 후 n회 반복, (요청당 CPU ms, 응답 바이트)
+    for i in range(5):
+        await call(app, method, path_fn(i), body_fn(i) if body_fn else b"", headers_fn(i) if headers_fn else None)
+    c0 = time.process_time()
+    size = 0
+    for i in range(n):
+        status, body = await call(app, method, path_fn(i), body_fn(i) if body_fn else b"",
+                                  headers_fn(i) if headers_fn else None)
+        assert status < 300, (status, body[:200])
+        size = len(body)
+    return (time.process_time() - c0) / n * 1000, size
+
+def parse_microbench(n: int) -> None:
+    # 수집 본문 처리만 비교: json.loads + 모델 검증 + model_dump  vs  원문 바이트 직접 검증 + dict()
+    from app.schemas.common import EventIngest
+
+    raw = encode(make_event(uuid.uuid4(), 1, "intrusion", 0.95))
+
+    def best(fn) -> float:
+        runs = []
+        for _ in range(5):
+            c0 = time.process_time()
+            for _ in range(n):
+                fn()
+            runs.append((time.process_time() - c0) / n * 1e6)
+        return min(runs)
+
+    before = best(lambda: EventIngest.model_validate(json.loads(raw)).model_dump())
+    after = best(lambda: dict(EventIngest.model_validate_json(raw)))
+    print(f"ingest body parse: loads+validate+model_dump {before:.1f} us -> validate_json+dict {after:.1f} us")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=300)
+    ap.add_argument("--devices", type=int, default=500)
+    args = ap.parse_args()
+
+    from app.routers.devices import router as devices_router
+    from app.routers.events import router as events_router
+    from app.routers.incidents import router as incidents_router
+    from app.routers.ingest import router as ingest_router
+
+    app = make_app(devices_router, events_router, incidents_router, ingest_router)
+    ids, target = seed(args.devices, 50, 100)
+
+    def ingest_body(i):
+        return encode(make_event(ids[i % len(ids)], i, "motion", 0.1))
+
+    bodies = {}
+
+    def body_fn(i):
+        bodies[i] = ingest_body(i)
+        return bodies[i]
+
+    cases = [
+        ("GET /devices?limit=500", "GET", lambda i: "/devices?limit=500", None, None),
+        ("GET /devices/{id}", "GET", lambda i: f"/devices/{ids[i % len(ids)]}", None, None),
+        ("GET /incidents/by-device/{id}", "GET", lambda i: f"/incidents/by-device/{target}", None, None),
+        ("GET /incidents?limit=50", "GET", lambda i: f"/incidents?device_id={target}&limit=50", None, None),
+        ("GET /events?limit=100", "GET", lambda i: f"/events?device_id={target}&limit=100", None, None),
+        ("POST /ingest", "POST", lambda i: "/ingest", body_fn, lambda i: {"x-signature": sign(bodies[i])}),
+    ]
+    for label, method, path_fn, b_fn, h_fn in cases:
+        cpu_ms, size = asyncio.run(measure(app, args.requests, method, path_fn, b_fn, h_fn))
+        print(f"{label:32s} {cpu_ms:7.3f} ms CPU/request  ({size:,} B)")
+    parse_microbench(20_000)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# scripts/bench_startup.py — 워커 프로세스 콜드 스타트: 새 프로세스에서 main 임포트 시간, 예열(lifespan) 단계별 시간,
+# /readyz가 200이 될 때까지 걸린 시간, 준비 직후 첫 수집 지연. 이어서 종료 드레인 확인
+# (WebSocket 수집 중 종료 시작 → 받은 프레임 전부 응답 후 1012로 닫힘, /readyz 503).
+# 마지막으로 python -m app.serve를 실제로 띄워(워커 여러 개) SIGTERM 전체 순서 확인 (uvicorn 필요)
+import argparse, json, os, signal, socket, statistics, subprocess, sys, tempfile, time, uuid
+import urllib.error, urllib.request
+
+from bench_common import ROOT, encode, make_app, make_event, seed_devices
+
+CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import main
+t_import = time.perf_counter() - t0
+numpy_loaded = "numpy" in sys.modules
+from fastapi.testclient import TestClient
+with TestClient(main.app) as c:
+    t_ready = time.perf_counter() - t0
+    ready = c.get("/readyz").json()
+    t1 = time.perf_counter()
+    c.get("/healthz")
+    t_first = time.perf_counter() - t1
+print(json.dumps({"import": t_import, "ready": t_ready, "first_request": t_first, "numpy_at_import": numpy_loaded,
+                  "warmup": ready["warmup"], "ok": ready["ok"]}))
+"""
+
+def cold_start(runs: int) -> None:
+    out = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        r = subprocess.run([sys.executable, "-c", CHILD], cwd=ROOT, env=os.environ, capture_output=True, text=True)
+        wall = time.perf_counter() - t0
+        if r.returncode:
+            sys.exit(r.stderr)
+        d = json.loads(r.stdout.strip().splitlines()[-1])
+        assert d["ok"], d
+        d["process"] = wall
+        out.append(d)
+    med = lambda k: statistics.median(d[k] for d in out) * 1000
+    print(f"cold start ({runs} runs, median): import main {med('import'):.0f} ms, ready {med('ready'):.0f} ms, "
+          f"process exit {med('process'):.0f} ms; numpy imported by main: {out[0]['numpy_at_import']}")
+    print("warm-up steps (last run, s):", out[-1]["warmup"])
+
+def drain_check(app) -> None:
+    from fastapi.testclient import TestClient
+    from starlette.websockets import WebSocketDisconnect
+    from app.core.jsonlib import dumps
+    from app.core.lifecycle import lifecycle
+    from app.core.security import keyring
+    from app.services.stream_ingest import hello_message
+
+    lifecycle.ready = True
+    client = TestClient(app)
+    (dev,) = seed_devices(1)
+    assert client.get("/readyz").status_code == 200
+    with client.websocket_connect("/ingest/ws") as ws:
+        ts, nonce = str(time.time()), uuid.uuid4().hex
+        ws.send_text(dumps({"device_id": str(dev), "timestamp": ts, "nonce": nonce,
+                            "signature": keyring.sign(dev, None, hello_message(dev), ts, nonce)}).decode())
+        ws.receive_json()
+        n = 50
+        for i in range(n):
+            raw = encode(make_event(dev, i))
+            ws.send_bytes(keyring.sign(dev, None, raw).encode() + b"\n" + raw)
+        acks = ws.receive_json()          # 첫 묶음이 처리되는 중에 종료 시작
+        lifecycle.begin_drain()
+        code = None
+        try:
+            while True:
+                acks += ws.receive_json()
+        except WebSocketDisconnect as e:
+            code = e.code
+    assert len(acks) == n and all(a["ok"] for a in acks), len(acks)
+    assert code == 1012, code
+    r = client.get("/readyz")
+    assert r.status_code == 503 and r.json()["draining"], r.json()
+    print(f"drain: {len(acks)}/{n} frames acked before close {code}; /readyz -> {r.status_code}")
+
+def _status(port: int, path: str) -> int | None:
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=1) as r:
+            return r.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, ConnectionError, TimeoutError):
+        return None   # 리스너 닫힘
+
+def serve_check(workers: int, drain_delay: float, signals: int = 1) -> None:
+    # SIGTERM → 드레인 동안 /readyz 503(요청은 계속 처리) → 리스너 닫힘 → 워커마다 lifespan 종료 → 프로세스 종료.
+    # signals=2면 두 번째 SIGTERM이 남은 드레인 지연을 건너뛰는지 (상위 프로세스가 없는 단일 워커에서)
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    env = dict(os.environ, ALERT_SMS_URL="http://127.0.0.1:9/sms")   # 발송기 시작 조건 (보내지는 않음)
+    log = tempfile.NamedTemporaryFile("w+", prefix="serve-", suffix=".log", delete=False)
+    proc = subprocess.Popen([sys.executable, "-m", "app.serve", "--host", "127.0.0.1", "--port", str(port),
+                             "--workers", str(workers), "--drain-delay", str(drain_delay)],
+                            cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    def fail(msg: str):
+        proc.kill()
+        log.seek(0)
+        sys.exit(f"serve --workers {workers}: {msg}\n{log.read()}")
+
+    t0 = time.monotonic()
+    while _status(port, "/readyz") != 200:
+        if proc.poll() is not None or time.monotonic() - t0 > 60:
+            fail("not ready")
+        time.sleep(0.1)
+    ready = time.monotonic() - t0
+
+    t0 = time.monotonic()
+    for _ in range(signals):
+        proc.send_signal(signal.SIGTERM)
+        time.sleep(0.3)
+    # 상위 프로세스는 신호를 0.5초 주기로 확인해 워커에 전하므로 그동안은 아직 200일 수 있음
+    codes, lag = [], 0.0
+    while signals == 1 and time.monotonic() - t0 < drain_delay - 0.2:
+        code = (_status(port, "/readyz"), _status(port, "/healthz"))
+        if code[0] == 200 and not codes:
+            lag = time.monotonic() - t0
+        else:
+            codes.append(code)
+        time.sleep(0.05)
+    try:
+        rc = proc.wait(drain_delay + 45)
+    except subprocess.TimeoutExpired:
+        fail("did not exit")
+    took = time.monotonic() - t0
+    log.seek(0)
+    out = log.read()
+
+    # 단일 워커는 uvicorn이 정상 종료 뒤 받은 신호를 다시 올려 -SIGTERM으로 끝남 (상위 프로세스가 있으면 0)
+    if rc not in (0, -signal.SIGTERM):
+        fail(f"exit code {rc}")
+    if signals == 1:
+        assert codes and set(codes) == {(503, 200)} and lag < 1.0, (lag, codes)
+        assert took >= drain_delay, took
+    else:
+        assert took < drain_delay, f"second SIGTERM did not skip the drain delay ({took:.1f}s)"
+    assert _status(port, "/readyz") is None
+    assert out.count("Application shutdown complete.") == workers, out
+    print(f"serve --workers {workers}: ready in {ready:.1f}s; SIGTERM x{signals} -> "
+          + (f"draining within {lag + 0.05:.1f}s, then {len(codes)} probes during the {drain_delay:g}s drain all "
+             f"/readyz 503 + /healthz 200, " if codes else "")
+          + f"exit {rc} after {took:.1f}s, lifespan shutdown completed in {workers} worker(s)")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--serve-workers", type=int, default=2)
+    args = ap.parse_args()
+
+    from app.routers.health import router as health_router
+    from app.routers.ingest import router as ingest_router
+
+    app = make_app(health_router, ingest_router)   # 테이블 생성 (자식 프로세스는 같은 임시 DB를 씀)
+    cold_start(args.runs)
+    drain_check(app)
+    serve_check(args.serve_workers, drain_delay=2)
+    serve_check(1, drain_delay=30, signals=2)
+
+if __name__ == "__main__":
+    main()
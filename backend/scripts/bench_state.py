@@ -0,0 +1,38 @@
+# scripts/bench_state.py — 장치별 링 버퍼 상태 저장소 처리량/메모리 (10만 장치)
+import argparse, random, tracemalloc, uuid
+
+from bench_common import Timer
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--devices", type=int, default=100_000)
+    ap.add_argument("--events", type=int, default=500_000)
+    args = ap.parse_args()
+
+    from app.services.state import DeviceStateStore
+
+    rnd = random.Random(3)
+    devices = [uuid.uuid4() for _ in range(args.devices)]
+    store = DeviceStateStore(max_devices=args.devices)
+
+    with Timer() as t:
+        ts = 0.0
+        for i in range(args.events):
+            ts += 0.001
+            store.observe(devices[i % args.devices], ts, rnd.random())
+
+    # 메모리는 추적 오버헤드가 처리량 측정에 섞이지 않도록 새 저장소로 따로 잰다
+    tracemalloc.start()
+    mem_store = DeviceStateStore(max_devices=args.devices)
+    for i, d in enumerate(devices):
+        mem_store.observe(d, float(i), rnd.random())
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"observe : {args.events / t.elapsed:,.0f} events/sec ({t.elapsed / args.events * 1e6:.2f} us/event)")
+    print(f"devices : {len(store):,} tracked, {store.evicted:,} evicted")
+    print(f"memory  : {current / 2**20:.1f} MiB for {len(mem_store):,} devices "
+          f"({current / max(len(mem_store), 1):.0f} B/device), peak {peak / 2**20:.1f} MiB")
+
+if __name__ == "__main__":
+    main()
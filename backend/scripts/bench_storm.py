@@ -0,0 +1,179 @@
+# scripts/bench_storm.py — 인시던트 폭주 방어 확인: 센서 한 대 폭주(LOW는 429, HIGH는 전부 처리),
+# 건물 전체 HIGH 폭주 시 알림 행 수(억제 전/후), 과부하 시 LOW/MEDIUM 표본 추출, 억제 창 뒤 count 합산 알림,
+# 다음 알림이 없을 때 창이 닫히면 요약 알림으로 나가는 접힌 건수,
+# 롤백 시 억제 자리 복원, 속도 제한 테이블 조회 비용과 항목당 메모리
+import argparse, random, time, tracemalloc, uuid
+
+from bench_common import encode, make_app, make_event, seed_devices, sign
+
+def post(client, body) -> tuple:
+    raw = encode(body)
+    r = client.post("/ingest", content=raw, headers={"content-type": "application/json", "x-signature": sign(raw)})
+    return r.status_code, r.json()
+
+def alert_rows(device_ids) -> list:
+    from sqlalchemy import select
+    from app.core.db import SessionLocal
+    from models.models import Alert, Incident
+
+    with SessionLocal() as db:
+        return [p for (p,) in db.execute(
+            select(Alert.payload).join(Incident, Incident.id == Alert.incident_id)
+            .where(Incident.device_id.in_(device_ids)).order_by(Alert.id)
+        )]
+
+def flood_check(client, gate) -> None:
+    # 고장 난 센서 하나: 버스트(20) 이후 LOW는 429, 사이사이 섞인 HIGH는 모두 201
+    gate.devices.rate, gate.devices.burst = 5, 20
+    (dev,) = seed_devices(1)
+    codes = {"low": {}, "high": {}}
+    for i in range(300):
+        high = i % 30 == 29
+        status, _ = post(client, make_event(dev, i, "intrusion" if high else "door", 0.95 if high else 0.1))
+        bucket = codes["high" if high else "low"]
+        bucket[status] = bucket.get(status, 0) + 1
+    assert codes["high"] == {201: 10}, codes
+    assert codes["low"].get(429, 0) >= 250, codes
+    print(f"one flooding sensor, 300 events: LOW {codes['low']}, HIGH {codes['high']}")
+
+def building_storm(client, alert_windows, events: int) -> None:
+    # 건물 전체: 장치 20대가 HIGH를 계속 보냄. 억제 끔 vs 켬(60초 창)의 알림 행 수
+    out = {}
+    for window in (0, 60):
+        alert_windows.window = window
+        devs = seed_devices(20)
+        rnd = random.Random(1)
+        for i in range(events):
+            status, _ = post(client, make_event(rnd.choice(devs), i, "intrusion", 0.95))
+            assert status == 201
+        out[window] = len(alert_rows(devs))
+    print(f"building storm, {events} HIGH events on 20 devices: alerts {out[0]} without suppression, "
+          f"{out[60]} with a 60 s window")
+    assert out[60] <= 20 < out[0]
+
+def rollup_check(client, alert_windows) -> None:
+    # 창 안의 나머지 탐지는 접히고, 창이 지난 뒤 첫 알림이 접힌 건수를 count로 가짐. 등급 상승은 창 안이라도 바로 알림
+    alert_windows.window = 0.5
+    (dev,) = seed_devices(1)
+    for i in range(5):
+        post(client, make_event(dev, i, "intrusion", 0.75))   # HIGH
+    time.sleep(0.6)
+    post(client, make_event(dev, 10, "intrusion", 0.75))
+    post(client, make_event(dev, 11, "intrusion", 0.95))      # CRITICAL: 창 안이지만 등급 상승
+    rows = alert_rows([dev])
+    assert [r.get("count", 1) for r in rows] == [1, 5, 1], rows
+    assert [r["risk_level"] for r in rows] == ["HIGH", "HIGH", "CRITICAL"], rows
+    print(f"rollup: 5 HIGH in window -> 1 alert, next window's alert count={rows[1]['count']}, upgrade alerted at once")
+    alert_windows.window = 60
+
+def flush_check(client, alert_windows) -> None:
+    # 창 안에서 접힌 뒤 다음 탐지가 없으면: 창이 닫힌 뒤 flush가 요약 알림(count=접힌 건수) 1건을 만들고,
+    # 그 다음 알림은 count 없이 새로 시작. 아직 안 닫힌 창은 건드리지 않음
+    from app.core.db import SessionLocal
+    from app.services.pipeline import flush_alert_rollups
+
+    with SessionLocal() as db:
+        flush_alert_rollups(db, everything=True)   # 앞 단계(건물 폭주)에서 접힌 건수 정리
+    alert_windows.window = 0.5
+    (dev,) = seed_devices(1)
+    for i in range(4):
+        post(client, make_event(dev, i, "intrusion", 0.75))   # 1건 알림 + 3건 접힘
+    with SessionLocal() as db:
+        assert flush_alert_rollups(db) == 0, "flushed before the window closed"
+    time.sleep(0.6)
+    with SessionLocal() as db:
+        assert flush_alert_rollups(db) == 1
+        assert flush_alert_rollups(db) == 0, "same folded count flushed twice"
+    post(client, make_event(dev, 10, "intrusion", 0.75))
+    rows = alert_rows([dev])
+    assert [(r.get("count", 1), r.get("rollup", False)) for r in rows] == [(1, False), (3, True), (1, False)], rows
+    print(f"flush: 3 folded HIGH with no later alert -> rollup alert count={rows[1]['count']} after the window")
+    alert_windows.window = 60
+
+def rollback_check(alert_windows) -> None:
+    from app.core.db import SessionLocal
+
+    inc = str(uuid.uuid4())
+    with SessionLocal() as db:
+        assert alert_windows.admit(db, inc, 3) == 1
+        db.rollback()
+    with SessionLocal() as db:
+        assert alert_windows.admit(db, inc, 3) == 1, "reservation survived rollback"
+    with SessionLocal() as db:
+        assert alert_windows.admit(db, inc, 3) == 1, "reservation survived close without commit"
+        db.commit()
+    with SessionLocal() as db:
+        assert alert_windows.admit(db, inc, 3) is None
+    print("rollback / close without commit release the suppression slot; commit keeps it")
+
+def overload_check(client, gate) -> None:
+    # 지연 EWMA를 목표의 4배로 올려 둔 상태: MEDIUM은 약 1/4, LOW는 약 1/16만 남고 HIGH는 전부
+    gate.devices.rate = 0
+    gate.owners.rate = 0
+    for _ in range(100):
+        gate.observe_latency(gate.latency_target * 4)
+    devs = seed_devices(50)
+    kept = {"LOW": 0, "MEDIUM": 0, "HIGH": 0}
+    sent = dict(kept)
+    for i in range(600):
+        level, score = (("LOW", 0.1), ("MEDIUM", 0.55), ("HIGH", 0.75))[i % 3]
+        status, body = post(client, make_event(devs[i % 50], i, "motion", score))
+        gate.latency = gate.latency_target * 4      # 응답이 빨라져 EWMA가 내려가는 것을 막고 같은 압력에서 측정
+        sent[level] += 1
+        kept[level] += status == 201
+    print(f"overload x4: kept LOW {kept['LOW']}/{sent['LOW']}, MEDIUM {kept['MEDIUM']}/{sent['MEDIUM']}, "
+          f"HIGH {kept['HIGH']}/{sent['HIGH']}")
+    assert kept["HIGH"] == sent["HIGH"]
+    assert kept["LOW"] < kept["MEDIUM"] < sent["MEDIUM"] * 0.5
+    gate.latency = 0.0
+
+def table_cost(n: int) -> None:
+    from app.services.ratelimit import BucketTable
+
+    keys = [uuid.uuid4().int for _ in range(n)]
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    t = BucketTable(5, 20, n)
+    for k in keys:
+        t.take(k)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    per = sum(s.size_diff for s in after.compare_to(before, "filename")) / n
+    t0 = time.perf_counter()
+    for k in keys:
+        t.take(k)
+    us = (time.perf_counter() - t0) / n * 1e6
+    small = BucketTable(5, 20, n // 10)
+    for k in keys:
+        small.take(k)
+    print(f"rate table: {n:,} devices, ~{per:.0f} B/entry, {us:.2f} us/take; "
+          f"capped at {n // 10:,} -> {small.evicted:,} evicted")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=400)
+    ap.add_argument("--devices", type=int, default=100_000)
+    args = ap.parse_args()
+
+    from fastapi.testclient import TestClient
+    from app.routers.ingest import router as ingest_router
+    from app.services.storm import alert_windows, gate
+
+    client = TestClient(make_app(ingest_router))
+    flood_check(client, gate)
+    gate.devices.rate = 0
+    building_storm(client, alert_windows, args.events)
+    rollup_check(client, alert_windows)
+    flush_check(client, alert_windows)
+    rollback_check(alert_windows)
+    overload_check(client, gate)
+    table_cost(args.devices)
+
+    from app.core.metrics import render
+    text = render().decode()
+    print("\n".join(ln for ln in text.splitlines()
+                    if ln.startswith(("ingest_shed_total", "alerts_suppressed_total", "ingest_gated_kept_total"))))
+    print("OK")
+
+if __name__ == "__main__":
+    main()
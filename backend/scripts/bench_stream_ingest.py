@@ -0,0 +1,199 @@
+# scripts/bench_stream_ingest.py — 같은 이벤트를 HTTP POST /ingest(요청마다 서명 검증/장치 조회/세션)와
+# WebSocket /ingest/ws(연결당 인증 1번, 프레임 파이프라이닝 + 마이크로 배치)로 보내 초당 메시지 수와 장치 조회 횟수 비교.
+# MQTT 구독 수집의 배치 처리/확인(handle, _finish)은 브로커 없이 가짜 메시지로 항상 확인하고,
+# paho-mqtt와 amqtt가 설치돼 있으면 내장 브로커를 띄워 처리량도 같은 방식으로 측정
+import argparse, asyncio, threading, time, uuid
+from types import SimpleNamespace
+
+from bench_common import Timer, encode, make_app, make_event, seed_devices
+
+def device_lookups() -> int:
+    from app.core.telemetry import ingest_stage
+    return ingest_stage.labels("device_lookup").count
+
+def frame(keyring, dev, body, ts=None, nonce=None) -> bytes:
+    raw = encode(body)
+    head = keyring.sign(dev, None, raw, ts, nonce)
+    if ts is not None:
+        head += f" {ts} {nonce}"
+    return head.encode() + b"\n" + raw
+
+def run_http(client, keyring, devs, per_device: int) -> dict:
+    before = device_lookups()
+    ok = 0
+    with Timer() as t:
+        for i in range(per_device):
+            for dev in devs:
+                raw = encode(make_event(dev, i))
+                r = client.post("/ingest", content=raw, headers={
+                    "content-type": "application/json", "x-signature": keyring.sign(dev, None, raw)})
+                ok += r.status_code == 201
+    return {"ok": ok, "seconds": t.elapsed, "lookups": device_lookups() - before}
+
+def hello(keyring, dev) -> str:
+    from app.core.jsonlib import dumps
+    from app.services.stream_ingest import hello_message
+
+    ts, nonce = str(time.time()), uuid.uuid4().hex
+    return dumps({"device_id": str(dev), "timestamp": ts, "nonce": nonce,
+                  "signature": keyring.sign(dev, None, hello_message(dev), ts, nonce)}).decode()
+
+def run_ws(client, keyring, devs, per_device: int) -> dict:
+    # 장치마다 연결 하나, window개까지 응답을 기다리지 않고 보냄
+    before = device_lookups()
+    ok = batches = 0
+    with Timer() as t:
+        for dev in devs:
+            with client.websocket_connect("/ingest/ws") as ws:
+                ws.send_text(hello(keyring, dev))
+                window = ws.receive_json()["window"]
+                sent = acked = 0
+                while acked < per_device:
+                    while sent < per_device and sent - acked < window:
+                        ws.send_bytes(frame(keyring, dev, make_event(dev, sent)))
+                        sent += 1
+                    acks = ws.receive_json()
+                    batches += 1
+                    acked += len(acks)
+                    ok += sum(1 for a in acks if a.get("ok"))
+    return {"ok": ok, "seconds": t.elapsed, "lookups": device_lookups() - before, "batches": batches}
+
+def ws_checks(client, keyring, dev) -> None:
+    # 잘못된 인증은 1008로 닫힘, 다른 장치 프레임/서명 오류는 해당 프레임만 거절
+    from starlette.websockets import WebSocketDisconnect
+
+    with client.websocket_connect("/ingest/ws") as ws:
+        ws.send_text(hello(keyring, uuid.uuid4()))
+        assert ws.receive_json() == {"ok": False, "error": "unknown device_id"}
+        try:
+            ws.receive_json()
+            raise AssertionError("connection should be closed")
+        except WebSocketDisconnect as e:
+            assert e.code == 1008
+    with client.websocket_connect("/ingest/ws") as ws:
+        ws.send_text(hello(keyring, dev))
+        ws.receive_json()
+        other = make_event(uuid.uuid4(), 0)
+        bad = frame(keyring, dev, make_event(dev, 1)).replace(b"motion", b"smoke")
+        for f in (frame(keyring, dev, make_event(dev, 0)), frame(keyring, dev, other), bad):
+            ws.send_bytes(f)
+        acks = []
+        while len(acks) < 3:
+            acks += ws.receive_json()
+    assert [a["seq"] for a in acks] == [1, 2, 3], acks
+    assert acks[0]["ok"] and acks[1]["error"] == "device_id mismatch" and acks[2]["error"] == "invalid signature", acks
+    print("ws checks: unknown device closed with 1008, per-frame errors acked in order")
+
+class RecordingClient:
+    # paho Client 대신: _finish가 부르는 publish/ack만 기록
+    def __init__(self):
+        self.published, self.acked = [], []
+
+    def publish(self, topic, payload, qos=0):
+        self.published.append((topic, payload))
+
+    def ack(self, mid, qos):
+        self.acked.append(mid)
+
+def mqtt_checks(keyring, dev) -> None:
+    from app.core.jsonlib import loads
+    from app.mqtt_ingest import MqttIngest
+
+    client = RecordingClient()
+    sub = MqttIngest(topic="bench/ingest/+", ack_topic="bench/acks", client=client)
+    ts = str(time.time())
+    good = make_event(dev, 0)
+    tampered = frame(keyring, dev, make_event(dev, 3), ts, uuid.uuid4().hex).replace(b"motion", b"smoke")
+    frames = [
+        (f"bench/ingest/{dev}", frame(keyring, dev, good, ts, uuid.uuid4().hex), 1),
+        (f"bench/ingest/{dev}", frame(keyring, dev, good, ts, uuid.uuid4().hex), 1),      # 같은 이벤트 재전송
+        (f"bench/ingest/{uuid.uuid4()}", frame(keyring, dev, make_event(dev, 1), ts, uuid.uuid4().hex), 1),
+        ("bench/ingest/not-a-uuid", frame(keyring, dev, make_event(dev, 2), ts, uuid.uuid4().hex), 1),
+        (f"bench/ingest/{dev}", tampered, 1),
+        (f"bench/ingest/{dev}", frame(keyring, dev, make_event(dev, 4), ts, uuid.uuid4().hex), 0),
+    ]
+    msgs = [SimpleNamespace(topic=t, payload=p, qos=q, mid=i + 1) for i, (t, p, q) in enumerate(frames)]
+    results = sub.handle(msgs)
+    sub._finish(msgs, results)
+
+    assert results[0]["ok"] and not results[0].get("duplicate"), results[0]
+    assert results[1]["ok"] and results[1]["duplicate"], results[1]
+    assert [r.get("error") for r in results[2:5]] == ["unknown device_id", "unknown device_id", "invalid signature"]
+    assert results[5]["ok"], results[5]
+    # QoS 1은 거절된 것까지 모두 확인, QoS 0은 확인하지 않음. 결과는 토픽의 장치별로 게시
+    assert client.acked == [1, 2, 3, 4, 5] and sub.processed == len(msgs), client.acked
+    assert [t for t, _ in client.published][:1] == [f"bench/acks/{dev}"] and len(client.published) == len(msgs)
+    assert [loads(p) for _, p in client.published] == results
+    print("mqtt checks (no broker): batch results in order, duplicate / unknown / bad signature rejected, "
+          "QoS 1 acked after processing")
+
+def run_mqtt(keyring, devs, per_device: int) -> dict | None:
+    try:
+        import paho.mqtt.client as mqtt
+        from amqtt.broker import Broker
+    except ImportError:
+        return None
+    from app.mqtt_ingest import MqttIngest
+
+    port = 18830
+    loop = asyncio.new_event_loop()
+    broker = Broker({"listeners": {"default": {"type": "tcp", "bind": f"127.0.0.1:{port}"}},
+                     "sys_interval": 0, "auth": {"allow-anonymous": True}, "topic-check": {"enabled": False}}, loop=loop)
+    loop.run_until_complete(broker.start())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+    sub, stop = MqttIngest(f"mqtt://127.0.0.1:{port}", "bench/ingest/+", client_id="bench-ingest"), threading.Event()
+    runner = threading.Thread(target=sub.run, args=(stop,), daemon=True)
+    runner.start()
+    sub.connected.wait(10)
+    pub = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id="bench-pub")
+    pub.connect("127.0.0.1", port)
+    pub.loop_start()
+    total = per_device * len(devs)
+    with Timer() as t:
+        for i in range(per_device):
+            for dev in devs:
+                ts, nonce = str(time.time()), uuid.uuid4().hex
+                pub.publish(f"bench/ingest/{dev}", frame(keyring, dev, make_event(dev, i), ts, nonce), qos=1)
+        while sub.processed < total:
+            time.sleep(0.01)
+    pub.loop_stop()
+    stop.set()
+    runner.join(5)
+    asyncio.run_coroutine_threadsafe(broker.shutdown(), loop).result(10)
+    return {"ok": total, "seconds": t.elapsed}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--devices", type=int, default=10)
+    ap.add_argument("--per-device", type=int, default=200)
+    args = ap.parse_args()
+
+    from fastapi.testclient import TestClient
+    from app.core.security import keyring
+    from app.routers.ingest import router as ingest_router
+    from app.services.storm import gate
+
+    gate.devices.rate = gate.owners.rate = 0   # 처리량 측정: 속도 제한 끔
+    client = TestClient(make_app(ingest_router))
+    total = args.devices * args.per_device
+    ws_checks(client, keyring, seed_devices(1)[0])
+    mqtt_checks(keyring, seed_devices(1)[0])
+
+    http = run_http(client, keyring, seed_devices(args.devices), args.per_device)
+    ws = run_ws(client, keyring, seed_devices(args.devices), args.per_device)
+    for name, r in (("http", http), ("websocket", ws)):
+        assert r["ok"] == total, (name, r)
+        print(f"{name:>9}: {total} events in {r['seconds']:.2f}s = {total / r['seconds']:,.0f} msg/s, "
+              f"device lookups {r['lookups']}" + (f", {r['batches']} ack batches" if "batches" in r else ""))
+    print(f"websocket / http throughput: x{http['seconds'] / ws['seconds']:.1f}")
+    assert ws["lookups"] == args.devices
+
+    mq = run_mqtt(keyring, seed_devices(args.devices), args.per_device)
+    if mq is None:
+        print("mqtt: skipped (needs paho-mqtt>=2 and amqtt for the embedded broker)")
+    else:
+        print(f"     mqtt: {total} events in {mq['seconds']:.2f}s = {total / mq['seconds']:,.0f} msg/s")
+
+if __name__ == "__main__":
+    main()
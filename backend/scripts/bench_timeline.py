@@ -0,0 +1,173 @@
+# scripts/bench_timeline.py — 인시던트 타임라인 읽기 모델 확인:
+#  1) 수집(단건/배치) → 에스컬레이션 → 알림 → 확인 → 상태 변경이 모두 timeline_entries에 같은 트랜잭션으로 쌓이는지,
+#     GET /incidents/{id}/timeline 페이지네이션 / ETag(304) / 항목 추가 시 ETag 변경
+#  2) scripts/rebuild_timeline.py가 이벤트 연결을 지운 상태에서도 같은 항목을 다시 만드는지
+#  3) 항목이 많을 때 읽기 모델 범위 스캔 vs 원본 5개 테이블을 매번 읽어 병합
+import argparse, random, statistics, sys, time, uuid
+from datetime import datetime, timedelta, timezone
+
+from bench_common import Timer, make_app, make_event, seed_devices
+
+def live_check(client) -> None:
+    from sqlalchemy import select, update
+    from app.core.db import SessionLocal
+    from app.services.escalation import scheduler
+    from app.services.pipeline import idempotency_key, process_batch, process_event
+    from app.services.timerwheel import Timer as WheelTimer
+    from models.models import Event, TimelineEntry
+
+    device = seed_devices(1)[0]
+    with SessionLocal() as db:
+        body = make_event(device, 0, "smoke", score=0.95)
+        body["device_id"] = device
+        body["occurred_at"] = datetime.fromisoformat(body["occurred_at"])
+        first = process_event(db, body, idempotency_key(body))
+    incident_id = first["incident_id"]
+    assert incident_id, first
+    with SessionLocal() as db:
+        batch = [make_event(device, i, "smoke", score=0.95) for i in range(1, 6)]
+        for b in batch:
+            b["device_id"] = device
+            b["occurred_at"] = datetime.fromisoformat(b["occurred_at"])
+        out = process_batch(db, batch, known={device})
+    assert all(r["incident_id"] == incident_id for r in out), out
+    scheduler._record([WheelTimer(time.time(), incident_id, (1, "call", ("sms", "voice")))])
+
+    assert client.post("/alerts", json={"incident_id": incident_id, "channel": "email"}).status_code == 201
+    assert client.post("/confirmations", json={"incident_id": incident_id, "actor_id": str(uuid.uuid4()),
+                                               "decision": "real", "reason": "smoke seen"}).status_code == 201
+    assert client.post(f"/incidents/{incident_id}/status", json={"status": "acknowledged"}).status_code == 200
+
+    url = f"/incidents/{incident_id}/timeline"
+    items, cursor, etags = [], None, []
+    while True:
+        r = client.get(url, params={"limit": 3, **({"cursor": cursor} if cursor else {})})
+        assert r.status_code == 200, r.text
+        etags.append(r.headers["etag"])
+        items += r.json()["items"]
+        cursor = r.json()["next_cursor"]
+        if not cursor:
+            break
+    kinds = [i["kind"] for i in items]
+    print(f"timeline: {len(items)} entries in {len(etags)} pages -> "
+          + ", ".join(f"{k}={kinds.count(k)}" for k in dict.fromkeys(kinds)))
+    assert kinds.count("event") == 6 and kinds.count("escalation") == 1 and kinds.count("confirmation") == 1
+    assert kinds.count("alert") >= 3 and kinds.count("status") == 1 and kinds[0] in ("event", "incident")
+    assert [(i["ts"], i["id"]) for i in items] == sorted((i["ts"], i["id"]) for i in items)
+    with SessionLocal() as db:
+        linked = db.scalars(select(Event.incident_id).where(Event.device_id == device)).all()
+    assert all(str(x) == incident_id for x in linked)
+
+    r = client.get(url, params={"limit": 3}, headers={"If-None-Match": etags[0]})
+    assert r.status_code == 304 and not r.content
+    client.post(f"/incidents/{incident_id}/status", json={"status": "closed"})
+    r = client.get(url, params={"limit": 3}, headers={"If-None-Match": etags[0]})
+    assert r.status_code == 200 and r.headers["etag"] != etags[0]
+    assert client.get(f"/incidents/{uuid.uuid4()}/timeline").status_code == 404
+    print("etag: unchanged page -> 304, after status change -> 200 with new etag")
+
+    # 재구성: 이벤트 연결을 지우고 다시 만들어도 같은 항목 (등급 상승 항목은 원본에 없으므로 제외하고 비교)
+    def snapshot():
+        with SessionLocal() as db:
+            return sorted(
+                (r.kind, r.ref_id, r.summary.get("status"), r.summary.get("action"))
+                for r in db.scalars(select(TimelineEntry).where(TimelineEntry.incident_id == uuid.UUID(incident_id)))
+                if r.summary.get("action") != "upgraded"
+            )
+
+    before = snapshot()
+    with SessionLocal() as db:
+        db.execute(update(Event).values(incident_id=None))
+        db.commit()
+    import rebuild_timeline
+    sys.argv = ["rebuild_timeline.py"]
+    rebuild_timeline.main()
+    assert snapshot() == before, (snapshot(), before)
+    print(f"rebuild: {len(before)} entries identical after relinking events")
+
+def scan_bench(incidents: int, per_incident: int, queries: int, limit: int) -> None:
+    from sqlalchemy import insert, select
+    from app.core.db import SessionLocal, engine
+    from app.services import timeline
+    from models.models import Alert, Confirmation, Escalation, Event, Incident, TimelineEntry
+
+    devices = seed_devices(incidents)
+    rnd = random.Random(3)
+    t0 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    ids = [uuid.uuid4() for _ in devices]
+    with Timer() as load, engine.begin() as conn:
+        conn.execute(insert(Incident), [
+            {"id": i, "device_id": d, "status": "closed", "risk_level": "HIGH", "opened_at": t0}
+            for i, d in zip(ids, devices)])
+        events, alerts, entries = [], [], []
+        for n, (i, d) in enumerate(zip(ids, devices)):
+            for k in range(per_incident):
+                ts = t0 + timedelta(seconds=k * 7 + rnd.random())
+                if k % 4:
+                    events.append({"device_id": d, "incident_id": i, "event_type": "smoke", "risk_level": "HIGH",
+                                   "occurred_at": ts, "received_at": ts, "idx_idempotency": f"b-{n}-{k}"})
+                else:
+                    alerts.append({"incident_id": i, "channel": "sms", "target": "ops", "payload": {},
+                                   "status": "sent", "created_at": ts})
+        conn.execute(insert(Event), events)
+        conn.execute(insert(Alert), alerts)
+        for r in conn.execute(select(Event.incident_id, Event.id, Event.occurred_at, Event.event_type,
+                                     Event.risk_level)):
+            entries.append(timeline.event_entry(*r))
+        for r in conn.execute(select(Alert.incident_id, Alert.id, Alert.created_at, Alert.channel, Alert.target,
+                                     Alert.payload)):
+            entries.append(timeline.alert_entry(*r))
+        timeline.append_many(conn, entries)
+    print(f"loaded {incidents:,} incidents x {per_incident} entries in {load.elapsed:.1f}s")
+
+    def read_model(db, iid):
+        return db.execute(
+            select(TimelineEntry.id, TimelineEntry.ts, TimelineEntry.kind, TimelineEntry.summary)
+            .where(TimelineEntry.incident_id == iid).order_by(TimelineEntry.ts, TimelineEntry.id).limit(limit)
+        ).all()
+
+    def merged(db, iid):
+        # 읽기 모델 없이: 원본 테이블마다 한 번씩 읽고 파이썬에서 시간순 병합
+        rows = []
+        rows += [(r[1], "event", r[0]) for r in db.execute(
+            select(Event.id, Event.occurred_at).where(Event.incident_id == iid))]
+        rows += [(r[1], "alert", r[0]) for r in db.execute(
+            select(Alert.id, Alert.created_at).where(Alert.incident_id == iid))]
+        rows += [(r[1], "confirmation", r[0]) for r in db.execute(
+            select(Confirmation.id, Confirmation.decided_at).where(Confirmation.incident_id == iid))]
+        rows += [(r[1], "escalation", r[0]) for r in db.execute(
+            select(Escalation.id, Escalation.executed_at).where(Escalation.incident_id == iid))]
+        rows += [(r[0], "incident", None) for r in db.execute(
+            select(Incident.opened_at).where(Incident.id == iid))]
+        return sorted(rows, key=lambda r: r[0])[:limit]
+
+    def timed(fn):
+        xs = []
+        with SessionLocal() as db:
+            for _ in range(queries):
+                iid = rnd.choice(ids)
+                t = time.perf_counter()
+                fn(db, iid)
+                xs.append(time.perf_counter() - t)
+        return statistics.median(xs) * 1000
+
+    rm, mg = timed(read_model), timed(merged)
+    print(f"first page ({limit}): read model {rm:.3f} ms, 5-table merge {mg:.3f} ms ({mg / rm:.1f}x)")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--incidents", type=int, default=2_000)
+    ap.add_argument("--per-incident", type=int, default=200)
+    ap.add_argument("--queries", type=int, default=300)
+    ap.add_argument("--limit", type=int, default=100)
+    args = ap.parse_args()
+
+    from fastapi.testclient import TestClient
+    from app.routers import alerts, confirmations, incidents
+
+    client = TestClient(make_app(alerts.router, confirmations.router, incidents.router))
+    live_check(client)
+    scan_bench(args.incidents, args.per_incident, args.queries, args.limit)
+
+if __name__ == "__main__":
+    main()
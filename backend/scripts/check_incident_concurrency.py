@@ -0,0 +1,53 @@
+# scripts/check_incident_concurrency.py — 한 장치에 HIGH 이벤트 1,000건을 동시에 보내고
+# 열린 인시던트가 정확히 1건인지 확인 (DB upsert 단독 / 프로세스 내 합치기 캐시 포함 두 번)
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_common import Timer, make_app, seed_devices
+
+def run(device_id, n: int, workers: int, use_cache: bool) -> set:
+    from app.core.db import SessionLocal
+    from app.services import coalescer as coalescer_mod
+    from app.services.pipeline import open_or_update_incident
+
+    coalescer_mod.coalescer.window = coalescer_mod.INCIDENT_COALESCE_SECONDS if use_cache else 0
+
+    def fire(i: int) -> str:
+        with SessionLocal() as db:
+            return open_or_update_incident(db, device_id, "CRITICAL" if i % 10 == 0 else "HIGH", "intrusion")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return set(pool.map(fire, range(n)))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=1000)
+    ap.add_argument("--workers", type=int, default=64)
+    args = ap.parse_args()
+
+    from sqlalchemy import func, select
+    from app.core.db import SessionLocal
+    from app.routers.incidents import router
+    from models.models import Incident
+
+    make_app(router)
+    for use_cache in (False, True):
+        device_id = seed_devices(1)[0]
+        with Timer() as t:
+            ids = run(device_id, args.events, args.workers, use_cache)
+        with SessionLocal() as db:
+            open_count = db.execute(
+                select(func.count()).select_from(Incident)
+                .where(Incident.device_id == device_id, Incident.status == "open")
+            ).scalar_one()
+            level = db.execute(
+                select(Incident.risk_level).where(Incident.device_id == device_id, Incident.status == "open")
+            ).scalar_one()
+        label = "db upsert + cache" if use_cache else "db upsert only   "
+        print(f"{label}: {args.events} events in {t.elapsed:.2f}s, "
+              f"distinct ids returned={len(ids)}, open incidents={open_count}, level={level}")
+        assert open_count == 1 and len(ids) == 1 and level == "CRITICAL"
+    print("OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# scripts/export_dataset.py — 오프라인 학습용 events / incidents를 Parquet 또는 Arrow IPC 파일로 내보냄.
+# GET /events/export와 같은 쿼리/청크 생성기를 쓰므로 메모리는 청크 크기에만 비례 (pyarrow 필요)
+import argparse, os, sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def arrow_schema(pa, kind: str):
+    ts = pa.timestamp("us", tz="UTC")
+    if kind == "events":
+        return pa.schema([("id", pa.int64()), ("device_id", pa.string()), ("event_type", pa.string()),
+                          ("payload", pa.string()), ("risk_score", pa.float64()), ("risk_level", pa.string()),
+                          ("occurred_at", ts), ("received_at", ts)])
+    return pa.schema([("id", pa.string()), ("device_id", pa.string()), ("status", pa.string()),
+                      ("category", pa.string()), ("risk_level", pa.string()), ("top_signals", pa.string()),
+                      ("opened_at", ts), ("acknowledged_at", ts), ("closed_at", ts), ("decision", pa.string())])
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("kind", choices=("events", "incidents"))
+    ap.add_argument("out")
+    ap.add_argument("--format", choices=("parquet", "arrow"), default="parquet")
+    ap.add_argument("--device-id")
+    ap.add_argument("--from", dest="from_", type=datetime.fromisoformat)
+    ap.add_argument("--to", type=datetime.fromisoformat)
+    ap.add_argument("--risk-level")
+    ap.add_argument("--chunk", type=int, default=50_000)
+    args = ap.parse_args()
+
+    try:
+        import pyarrow as pa
+    except ImportError:
+        sys.exit("pyarrow is required: pip install pyarrow")
+
+    from uuid import UUID
+    from app.services.export import (
+        EVENT_COLUMNS, INCIDENT_COLUMNS, event_query, incident_query, iter_chunks, rows_as_dicts,
+    )
+
+    filters = dict(device_id=UUID(args.device_id) if args.device_id else None,
+                   from_=args.from_, to=args.to, risk_level=args.risk_level)
+    if args.kind == "events":
+        columns, query = EVENT_COLUMNS, event_query(**filters)
+    else:
+        columns, query = INCIDENT_COLUMNS, incident_query(**filters)
+    schema = arrow_schema(pa, args.kind)
+
+    if args.format == "parquet":
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(args.out, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_file(args.out, schema)
+
+    total = 0
+    try:
+        for cols in rows_as_dicts(columns, iter_chunks(query, args.chunk)):
+            batch = pa.RecordBatch.from_pydict(cols, schema=schema)
+            if args.format == "parquet":
+                writer.write_batch(batch)
+            else:
+                writer.write(batch)
+            total += batch.num_rows
+            print(f"\r{total:,} rows", end="", file=sys.stderr)
+    finally:
+        writer.close()
+    print(f"\nwrote {total:,} rows to {args.out}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+# scripts/loadtest.py — 수집 부하 테스트: 장치 N대를 POST /devices로 등록한 뒤 시드로 만든 센서 이벤트 묶음
+# (모션/탬퍼/침입/연기 연속 발생, 같은 idempotency 키 재전송)을 동시 연결 C개로 /ingest, /ingest/batch에 보냄.
+# 처리량과 p50/p95/p99 지연을 출력하고 --json으로 저장, --compare로 이전 결과 대비 회귀 확인.
+#
+#   python loadtest.py                                   # 프로세스 내 ASGI + 임시 SQLite
+#   python loadtest.py --postgres                        # 임베디드 Postgres (pgserver 또는 testing.postgresql)
+#   python loadtest.py --base-url http://127.0.0.1:5000  # 실행 중인 서버
+#   python loadtest.py --devices 1 --events 1 --base-url ...   # 예전 test_ingest_client.py처럼 한 건만
+import argparse, asyncio, hashlib, hmac, json, os, random, sys, tempfile, time, uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+# (이벤트 종류, 비율). smoke는 한 장치에서 점수가 올라가는 연속 이벤트 묶음
+MIX = (("motion", 0.6), ("door", 0.27), ("tamper", 0.06), ("intrusion", 0.05), ("smoke", 0.02))
+
+def generate(seed: int, devices: int, events: int, dup_rate: float) -> tuple:
+    # (이벤트 목록, 재전송 수). 같은 시드면 같은 순서/내용 (idempotency 키 접두어만 실행마다 다름)
+    rnd = random.Random(seed)
+    run = uuid.uuid4().hex[:8]
+    base = datetime.now(timezone.utc) - timedelta(minutes=5)
+    kinds, weights = zip(*MIX)
+    out: list = []
+    dups = 0
+    n = 0
+
+    def event(dev: int, kind: str, payload: dict, at: datetime) -> dict:
+        nonlocal n
+        n += 1
+        return {"device": dev, "event_type": kind, "payload": payload,
+                "occurred_at": at.isoformat(), "idx_idempotency": f"lt-{run}-{n}"}
+
+    while len(out) < events:
+        if out and rnd.random() < dup_rate:
+            # 응답을 못 받은 장치의 재전송: 최근 이벤트를 키 그대로 다시 보냄
+            out.append(dict(out[rnd.randrange(max(0, len(out) - 100), len(out))]))
+            dups += 1
+            continue
+        dev = rnd.randrange(devices)
+        at = base + timedelta(milliseconds=len(out) * 10 + rnd.randrange(1000))
+        kind = rnd.choices(kinds, weights)[0]
+        if kind == "smoke":
+            steps = rnd.randint(4, 10)
+            for k in range(min(steps, events - len(out))):
+                score = min(0.3 + 0.7 * k / (steps - 1), 0.99)
+                out.append(event(dev, "smoke", {"smoke": round(50 + 400 * score), "score": round(score, 3)},
+                                 at + timedelta(seconds=k)))
+            continue
+        if kind == "motion":
+            payload = {"motion": 1, "score": round(rnd.uniform(0.1, 0.75), 3)}
+        elif kind == "door":
+            payload = {"open": rnd.random() < 0.5, "score": round(rnd.uniform(0.05, 0.3), 3)}
+        elif kind == "tamper":
+            payload = {"score": round(rnd.uniform(0.5, 0.7), 3)}
+        else:
+            payload = {"zone": rnd.choice(("door", "window", "garage")), "score": round(rnd.uniform(0.85, 0.99), 3)}
+        out.append(event(dev, kind, payload, at))
+    return out, dups
+
+class Signer:
+    # sha256: 장치별 키 + X-Timestamp/X-Nonce, sha1: 공용 비밀 (기존 장치)
+    def __init__(self, mode: str, secret: str):
+        self.mode = mode
+        self.secret = secret.encode()
+
+    def headers(self, raw: bytes, key: bytes | None) -> dict:
+        h = {"content-type": "application/json"}
+        if self.mode == "sha1":
+            h["x-signature"] = "sha1=" + hmac.new(self.secret, raw, hashlib.sha1).hexdigest()
+            return h
+        ts, nonce = str(int(time.time())), uuid.uuid4().hex
+        h["x-timestamp"], h["x-nonce"] = ts, nonce
+        h["x-signature"] = "sha256=" + hmac.new(key, f"{ts}.{nonce}.".encode() + raw, hashlib.sha256).hexdigest()
+        return h
+
+def encode(obj) -> bytes:
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+def requests_for(mode: str, schedule: list, batch: int) -> list:
+    # [(경로, 장치 번호, [이벤트...])]. 배치는 장치별로 모아 batch개가 차면 보냄 (오프라인 버퍼를 비우는 장치)
+    if mode == "single":
+        return [("/ingest", e["device"], [e]) for e in schedule]
+    out, buf = [], {}
+    for e in schedule:
+        b = buf.setdefault(e["device"], [])
+        b.append(e)
+        if len(b) >= batch:
+            out.append(("/ingest/batch", e["device"], buf.pop(e["device"])))
+    out.extend(("/ingest/batch", dev, b) for dev, b in buf.items())
+    return out
+
+def pct(sorted_ms: list, q: float) -> float:
+    return round(sorted_ms[min(len(sorted_ms) - 1, int(q * len(sorted_ms)))], 3) if sorted_ms else 0.0
+
+async def drive(client, mode: str, schedule: list, devices: list, signer: Signer,
+                concurrency: int, batch: int) -> dict:
+    reqs = requests_for(mode, schedule, batch)
+    lat: list = []
+    status: Counter = Counter()
+    event_ids: dict = {}
+    mismatched = 0
+    incidents = set()
+    pos = 0
+
+    async def worker():
+        nonlocal pos, mismatched
+        while pos < len(reqs):
+            path, dev, evs = reqs[pos]
+            pos += 1
+            dev_id, key = devices[dev]
+            bodies = [{**{k: v for k, v in e.items() if k != "device"}, "device_id": dev_id} for e in evs]
+            raw = encode(bodies if path == "/ingest/batch" else bodies[0])
+            t0 = time.perf_counter()
+            r = await client.post(path, content=raw, headers=signer.headers(raw, key))
+            lat.append((time.perf_counter() - t0) * 1000)
+            status[r.status_code] += 1
+            if r.status_code >= 300:
+                continue
+            data = r.json()
+            results = data.get("results") if path == "/ingest/batch" else [data]
+            for e, res in zip(evs, results or ()):
+                eid = res.get("event_id")
+                if eid is None:   # 큐 모드(202)는 event_id 없음
+                    continue
+                prev = event_ids.setdefault(e["idx_idempotency"], eid)
+                mismatched += prev != eid
+                if res.get("incident_id"):
+                    incidents.add(res["incident_id"])
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+    lat.sort()
+    return {
+        "requests": len(reqs),
+        "events": len(schedule),
+        "seconds": round(elapsed, 3),
+        "events_per_sec": round(len(schedule) / elapsed, 1),
+        "requests_per_sec": round(len(reqs) / elapsed, 1),
+        "latency_ms": {"p50": pct(lat, 0.5), "p95": pct(lat, 0.95), "p99": pct(lat, 0.99),
+                       "max": round(lat[-1], 3) if lat else 0.0,
+                       "mean": round(sum(lat) / len(lat), 3) if lat else 0.0},
+        "status": {str(k): v for k, v in sorted(status.items())},
+        "unique_events": len(event_ids),
+        # 재전송이 원래 이벤트와 다른 event_id를 받으면 중복 제거 실패
+        "duplicate_id_mismatches": mismatched,
+        "incidents": len(incidents),
+    }
+
+async def register(client, n: int, signer: Signer) -> list:
+    out = []
+    for i in range(n):
+        r = await client.post("/devices", json={"name": f"loadtest-{i}"})
+        r.raise_for_status()
+        d = r.json()
+        if signer.mode == "sha256" and not d.get("hmac_key"):
+            raise SystemExit("server did not return hmac_key; use --sign sha1")
+        out.append((d["id"], bytes.fromhex(d["hmac_key"]) if d.get("hmac_key") else None))
+    return out
+
+def start_postgres():
+    # 임베디드 Postgres: pgserver(pip 배포 바이너리) → testing.postgresql(로컬 initdb) 순서로 시도
+    try:
+        import pgserver
+        srv = pgserver.get_server(tempfile.mkdtemp(prefix="loadtest-pg-"), cleanup_mode="stop")
+        return srv.get_uri(), None
+    except ImportError:
+        pass
+    try:
+        import testing.postgresql
+    except ImportError:
+        raise SystemExit("--postgres needs `pip install pgserver` (or testing.postgresql + local initdb)")
+    pg = testing.postgresql.Postgresql()
+    return pg.url(), pg.stop
+
+def make_client(args):
+    import httpx
+
+    if args.base_url:
+        return httpx.AsyncClient(base_url=args.base_url, timeout=30)
+    from bench_common import make_app
+    from app.routers.devices import router as devices_router
+    from app.routers.ingest import router as ingest_router
+
+    app = make_app(devices_router, ingest_router)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=30)
+
+async def run(args) -> dict:
+    schedule, dups = generate(args.seed, args.devices, args.events, args.dup_rate)
+    signer = Signer(args.sign, os.getenv("DEVICE_HMAC_SECRET", "device-shared-secret"))
+    kinds = Counter(e["event_type"] for e in schedule)
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k not in ("json", "compare")},
+        "workload": {"events": len(schedule), "duplicates_sent": dups, "mix": dict(sorted(kinds.items()))},
+        "results": {},
+    }
+    async with make_client(args) as client:
+        devices = await register(client, args.devices, signer)
+        modes = ("single", "batch") if args.mode == "both" else (args.mode,)
+        for mode in modes:
+            # 모드마다 키 접두어가 다른 같은 모양의 작업량 (앞 모드의 이벤트와 중복되지 않도록)
+            sched = schedule if mode == modes[0] else generate(args.seed, args.devices, args.events, args.dup_rate)[0]
+            report["results"][mode] = await drive(client, mode, sched, devices, signer, args.concurrency, args.batch)
+    return report
+
+def print_report(report: dict) -> None:
+    w = report["workload"]
+    print(f"workload: {w['events']:,} events ({w['duplicates_sent']:,} retries), mix {w['mix']}")
+    for mode, r in report["results"].items():
+        l = r["latency_ms"]
+        print(f"{mode:6s}: {r['events_per_sec']:9,.0f} events/s  {r['requests_per_sec']:8,.0f} req/s  "
+              f"p50 {l['p50']:.1f}  p95 {l['p95']:.1f}  p99 {l['p99']:.1f}  max {l['max']:.1f} ms  "
+              f"status {r['status']}  incidents {r['incidents']}  dup mismatches {r['duplicate_id_mismatches']}")
+
+def compare(report: dict, baseline_path: str, tolerance: float) -> list:
+    # 처리량이 tolerance 이상 떨어지거나 p99가 tolerance 이상 늘면 회귀
+    with open(baseline_path) as f:
+        base = json.load(f)
+    problems = []
+    for mode, r in report["results"].items():
+        b = base.get("results", {}).get(mode)
+        if not b:
+            continue
+        if r["events_per_sec"] < b["events_per_sec"] * (1 - tolerance):
+            problems.append(f"{mode}: throughput {b['events_per_sec']} -> {r['events_per_sec']} events/s")
+        if r["latency_ms"]["p99"] > b["latency_ms"]["p99"] * (1 + tolerance):
+            problems.append(f"{mode}: p99 {b['latency_ms']['p99']} -> {r['latency_ms']['p99']} ms")
+    return problems
+
+def main():
+    ap = argparse.ArgumentParser(description="ingest load test")
+    ap.add_argument("--base-url", help="running server (default: in-process ASGI app)")
+    ap.add_argument("--postgres", action="store_true", help="in-process app on an embedded Postgres")
+    ap.add_argument("--devices", type=int, default=200)
+    ap.add_argument("--events", type=int, default=5000)
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--mode", choices=("single", "batch", "both"), default="both")
+    ap.add_argument("--batch", type=int, default=50, help="events per /ingest/batch request")
+    ap.add_argument("--dup-rate", type=float, default=0.03, help="fraction of retried (duplicate-key) sends")
+    ap.add_argument("--sign", choices=("sha256", "sha1"), default="sha256")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--json", help="write the report to this file")
+    ap.add_argument("--compare", help="baseline report to check for regressions")
+    ap.add_argument("--tolerance", type=float, default=0.15)
+    args = ap.parse_args()
+
+    stop = None
+    if args.postgres and not args.base_url:
+        # bench_common이 임시 SQLite를 고르기 전에 DB를 정해야 함
+        os.environ["SUPABASE_DB_URL"], stop = start_postgres()
+    try:
+        report = asyncio.run(run(args))
+    finally:
+        if stop:
+            stop()
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    problems = []
+    for r in report["results"].values():
+        if r["duplicate_id_mismatches"]:
+            problems.append("retried events got a different event_id")
+    if args.compare:
+        problems += compare(report, args.compare, args.tolerance)
+    for p in problems:
+        print("REGRESSION:", p)
+    sys.exit(1 if problems else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# scripts/manage_partitions.py — events 파티션 관리 (Postgres)
+#   migrate : 기존 단일 events 테이블을 파티션 테이블로 옮김 (events_unpartitioned로 이름 변경 후 복사).
+#             이미 파티션이면 event_keys(키당 1행 가드)만 만들고 채움
+#   maintain: 앞으로 쓸 파티션 생성 + 보존 기간 지난 파티션 DETACH/DROP
+#   list    : 파티션 목록
+import argparse, os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def migrate(engine, batch: int) -> None:
+    from sqlalchemy import text
+    from app.services.partitions import PARTITIONED_DDL, ensure_partitions, is_partitioned
+
+    with engine.begin() as conn:
+        if is_partitioned(conn):
+            print("events is already partitioned")
+            for ddl in PARTITIONED_DDL[-2:]:   # event_keys
+                conn.execute(text(ddl))
+            backfill_keys(engine, batch)
+            return
+        lo, hi = conn.execute(text("SELECT min(occurred_at), max(occurred_at) FROM events")).one()
+        conn.execute(text("ALTER TABLE events RENAME TO events_unpartitioned"))
+        # 새 테이블과 이름이 겹치는 인덱스/제약 이름 비우기
+        for old in ("events_pkey", "events_idx_idempotency_key", "uq_events_idempotency", "idx_events_device_occurred"):
+            conn.execute(text(f"ALTER INDEX IF EXISTS {old} RENAME TO {old}_old"))
+        for ddl in PARTITIONED_DDL:
+            conn.execute(text(ddl))
+        created = ensure_partitions(conn, since=lo) if lo else ensure_partitions(conn)
+        print(f"created {len(created)} partitions ({created[0]} .. {created[-1]})")
+
+    # 복사는 id 구간별 트랜잭션으로 나눠 잠금/WAL 폭주를 피함
+    last = 0
+    while True:
+        with engine.begin() as conn:
+            upper = conn.execute(text(
+                "SELECT max(id) FROM (SELECT id FROM events_unpartitioned WHERE id > :last "
+                "ORDER BY id LIMIT :n) s"
+            ), {"last": last, "n": batch}).scalar()
+            if upper is None:
+                break
+            conn.execute(text(
+                "INSERT INTO events (id, device_id, event_type, payload, risk_score, risk_level, "
+                "occurred_at, received_at, idx_idempotency) "
+                "SELECT id, device_id, event_type, payload, risk_score, risk_level, "
+                "coalesce(occurred_at, received_at, now()), received_at, idx_idempotency "
+                "FROM events_unpartitioned WHERE id > :last AND id <= :upper "
+                "ON CONFLICT DO NOTHING"
+            ), {"last": last, "upper": upper})
+        last = upper
+        print(f"copied up to id {last}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "SELECT setval(pg_get_serial_sequence('events', 'id'), coalesce((SELECT max(id) FROM events), 1))"
+        ))
+    backfill_keys(engine, batch)
+    print("done; drop events_unpartitioned after verifying counts")
+
+def backfill_keys(engine, batch: int) -> None:
+    # 기존 events의 키를 event_keys에 채움. 이미 다른 occurred_at으로 중복된 키는 id가 작은 행이 남음
+    from sqlalchemy import text
+
+    last = 0
+    while True:
+        with engine.begin() as conn:
+            upper = conn.execute(text(
+                "SELECT max(id) FROM (SELECT id FROM events WHERE id > :last ORDER BY id LIMIT :n) s"
+            ), {"last": last, "n": batch}).scalar()
+            if upper is None:
+                break
+            conn.execute(text(
+                "INSERT INTO event_keys (idx_idempotency, event_id, occurred_at) "
+                "SELECT idx_idempotency, id, occurred_at FROM events "
+                "WHERE id > :last AND id <= :upper AND idx_idempotency IS NOT NULL ORDER BY id "
+                "ON CONFLICT DO NOTHING"
+            ), {"last": last, "upper": upper})
+        last = upper
+        print(f"event_keys filled up to id {last}")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("command", choices=("migrate", "maintain", "list"))
+    ap.add_argument("--batch", type=int, default=50_000)
+    args = ap.parse_args()
+
+    from app.core.db import engine
+    from app.services.partitions import is_partitioned, list_partitions, maintain
+
+    if args.command == "migrate":
+        migrate(engine, args.batch)
+    elif args.command == "maintain":
+        print(maintain(engine))
+    else:
+        with engine.connect() as conn:
+            if not is_partitioned(conn):
+                print("events is not partitioned")
+                return
+            for name, start in list_partitions(conn):
+                print(f"{name}  from {start:%Y-%m-%d}")
+
+if __name__ == "__main__":
+    main()
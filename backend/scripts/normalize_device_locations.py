@@ -0,0 +1,47 @@
+# scripts/normalize_device_locations.py — 기존 장치의 location(JSONB)을 lat/lon 열로 정규화 (도입 전 데이터 백필).
+# 좌표가 비어 있고 location이 있는 장치만 id 순으로 묶어 읽고, 읽을 수 있는 것만 갱신.
+# 실행 중인 서버는 다음 레지스트리 전체 재적재(REGISTRY_FULL_RELOAD_SECONDS) 때 공간 인덱스에 반영함
+#   python scripts/normalize_device_locations.py [--chunk 5000]
+import argparse
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def main():
+    ap = argparse.ArgumentParser(description="Fill devices.lat/lon from the location JSON")
+    ap.add_argument("--chunk", type=int, default=5000)
+    args = ap.parse_args()
+
+    from sqlalchemy import bindparam, select, update
+    from app.core.db import engine
+    from app.services.geo import parse_location
+    from models.models import Device
+
+    set_coords = (
+        update(Device).where(Device.id == bindparam("b_id"))
+        .values(lat=bindparam("b_lat"), lon=bindparam("b_lon"))
+    )
+    seen = filled = 0
+    last = None
+    while True:
+        q = select(Device.id, Device.location).where(Device.lat.is_(None), Device.location.is_not(None))
+        if last is not None:
+            q = q.where(Device.id > last)
+        with engine.begin() as conn:
+            rows = conn.execute(q.order_by(Device.id).limit(args.chunk)).all()
+            if not rows:
+                break
+            fixes = []
+            for r in rows:
+                coords = parse_location(r.location)
+                if coords:
+                    fixes.append({"b_id": r.id, "b_lat": coords[0], "b_lon": coords[1]})
+            if fixes:
+                conn.execute(set_coords, fixes)
+        seen += len(rows)
+        filled += len(fixes)
+        last = rows[-1].id
+    print(f"checked {seen:,} devices, filled {filled:,}, unreadable {seen - filled:,}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+# scripts/rebuild_incident_counts.py — incident_counts 요약 테이블을 incidents에서 다시 계산
+# (트리거 도입 전 데이터 백필 / 점검용. 한 트랜잭션 안에서 비우고 GROUP BY 결과로 채움)
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def main():
+    from sqlalchemy import delete, func, insert, select
+    from app.core.db import engine
+    from models.models import Incident, IncidentCount
+
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            # 재계산 중 트리거가 갱신하지 못하게 incidents 쓰기를 막음
+            conn.exec_driver_sql("LOCK TABLE incidents IN SHARE MODE")
+        conn.execute(delete(IncidentCount))
+        level = func.coalesce(Incident.risk_level, "")
+        conn.execute(insert(IncidentCount).from_select(
+            ["status", "risk_level", "n"],
+            select(Incident.status, level, func.count()).group_by(Incident.status, level),
+        ))
+        rows = conn.execute(select(IncidentCount.status, IncidentCount.risk_level, IncidentCount.n)).all()
+    for status, lvl, n in rows:
+        print(f"{status:14} {lvl or '-':9} {n:,}")
+
+if __name__ == "__main__":
+    main()
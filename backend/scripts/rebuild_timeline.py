@@ -0,0 +1,96 @@
+# scripts/rebuild_timeline.py — timeline_entries 읽기 모델을 원본 테이블에서 다시 채움
+# (도입 전 데이터 백필 / 점검용). 한 트랜잭션 안에서:
+#   1) incident_id가 없는 HIGH/CRITICAL 이벤트를 인시던트에 연결: 같은 장치에서 이벤트를 받았을 때
+#      아직 확인/종료되지 않은 가장 이른 인시던트 (파이프라인이 그 이벤트로 열거나 갱신했을 인시던트)
+#   2) 항목을 비우고 events/incidents/alerts/confirmations/escalations를 스트리밍으로 읽어 묶음 INSERT
+# 인시던트 항목은 opened와 acknowledged/closed 상태만 — 등급 상승 이력은 원본에 없으므로 복원하지 않음
+#   python scripts/rebuild_timeline.py [--incident ID] [--chunk 5000]
+import argparse
+import os, sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def main():
+    ap = argparse.ArgumentParser(description="Rebuild incident timelines from source tables")
+    ap.add_argument("--incident", type=uuid.UUID, default=None, help="rebuild one incident only")
+    ap.add_argument("--chunk", type=int, default=5000)
+    args = ap.parse_args()
+
+    from sqlalchemy import delete, func, or_, select, update
+    from app.core.db import engine
+    from app.services import timeline
+    from app.services.pipeline import INCIDENT_LEVELS
+    from models.models import Alert, Confirmation, Escalation, Event, Incident, TimelineEntry
+
+    def only(q, col):
+        return q.where(col == args.incident) if args.incident else q
+
+    ended = func.coalesce(Incident.acknowledged_at, Incident.closed_at)
+    first_open = (
+        select(Incident.id)
+        .where(Incident.device_id == Event.device_id, or_(ended.is_(None), ended >= Event.received_at))
+        .order_by(Incident.opened_at)
+        .limit(1)
+        .scalar_subquery()
+    )
+    link = (
+        update(Event)
+        .where(Event.incident_id.is_(None), func.upper(Event.risk_level).in_(INCIDENT_LEVELS))
+        .values(incident_id=first_open)
+        .execution_options(synchronize_session=False)
+    )
+    if args.incident:
+        link = link.where(Event.device_id == select(Incident.device_id).where(Incident.id == args.incident)
+                          .scalar_subquery())
+
+    # (원본 쿼리, 행 → 항목 목록)
+    sources = [
+        ("events", only(select(Event.incident_id, Event.id, Event.occurred_at, Event.event_type, Event.risk_level)
+                        .where(Event.incident_id.is_not(None)), Event.incident_id),
+         lambda r: [timeline.event_entry(*r)]),
+        ("incidents", only(select(Incident.id, Incident.opened_at, Incident.risk_level, Incident.category,
+                                  Incident.acknowledged_at, Incident.closed_at), Incident.id),
+         lambda r: [timeline.incident_entry(r.id, "opened", r.opened_at, r.risk_level, r.category)]
+         + ([timeline.status_entry(r.id, r.acknowledged_at, "acknowledged")] if r.acknowledged_at else [])
+         + ([timeline.status_entry(r.id, r.closed_at, "closed")] if r.closed_at else [])),
+        ("alerts", only(select(Alert.incident_id, Alert.id, Alert.created_at, Alert.channel, Alert.target,
+                               Alert.payload).where(Alert.incident_id.is_not(None)), Alert.incident_id),
+         lambda r: [timeline.alert_entry(*r)]),
+        ("confirmations", only(select(Confirmation.incident_id, Confirmation.id, Confirmation.decided_at,
+                                      Confirmation.decision, Confirmation.reason, Confirmation.actor_id)
+                               .where(Confirmation.incident_id.is_not(None)), Confirmation.incident_id),
+         lambda r: [timeline.confirmation_entry(*r)]),
+        ("escalations", only(select(Escalation.incident_id, Escalation.id, Escalation.executed_at, Escalation.step,
+                                    Escalation.action).where(Escalation.incident_id.is_not(None)),
+                             Escalation.incident_id),
+         lambda r: [timeline.escalation_entry(*r)]),
+    ]
+
+    t0 = time.perf_counter()
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            # 다시 채우는 동안 원본 쓰기를 막아 항목이 빠지거나 두 번 들어가지 않게 함
+            conn.exec_driver_sql(
+                "LOCK TABLE incidents, events, alerts, confirmations, escalations, timeline_entries IN SHARE MODE"
+            )
+        linked = conn.execute(link).rowcount
+        conn.execute(only(delete(TimelineEntry), TimelineEntry.incident_id))
+        counts = {}
+        for name, q, build in sources:
+            n = 0
+            result = conn.execution_options(stream_results=True, yield_per=args.chunk).execute(q)
+            for part in result.partitions():
+                # 시각이 비어 있는 원본 행(예: opened_at NULL)은 타임라인에 둘 자리가 없으므로 건너뜀
+                entries = [e for r in part for e in build(r) if e["ts"] is not None]
+                timeline.append_many(conn, entries)
+                n += len(entries)
+            counts[name] = n
+    print(f"linked events  {linked:,}")
+    for name, n in counts.items():
+        print(f"{name:14} {n:,}")
+    print(f"rebuilt in {time.perf_counter() - t0:.2f}s")
+
+if __name__ == "__main__":
+    main()